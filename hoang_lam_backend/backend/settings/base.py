@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "hotel_api.performance.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -127,6 +128,9 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
     },
@@ -233,19 +237,123 @@ CELERY_BEAT_SCHEDULE = {
         "task": "hotel_api.tasks.apply_data_retention_policy",
         "schedule": crontab(hour=3, minute=0, day_of_week=0),  # Sunday 3 AM
     },
+    "maintain-partitions": {
+        "task": "hotel_api.tasks.maintain_partitions",
+        "schedule": crontab(hour=2, minute=30),  # No-op outside PostgreSQL
+    },
+    "refresh-dirty-daily-stats": {
+        "task": "hotel_api.tasks.refresh_dirty_daily_stats",
+        "schedule": crontab(minute="*"),  # Safety net for missed on-commit triggers
+    },
+    "drain-outbox": {
+        "task": "hotel_api.tasks.drain_outbox",
+        "schedule": crontab(minute="*"),  # Retries and missed on-commit triggers
+    },
+    "flush-sensitive-access-logs": {
+        "task": "hotel_api.tasks.flush_sensitive_access_logs",
+        "schedule": crontab(minute="*"),
+    },
 }
 
+# Daily KPI fact table (hotel_api/stats.py)
+# Writes queue their dates; a refresh task runs this many seconds later so that
+# bursts of writes coalesce. Set DAILY_STATS_AUTO_REFRESH=False when no Celery
+# worker runs — reports still recompute queued dates on read.
+DAILY_STATS_AUTO_REFRESH = os.getenv("DAILY_STATS_AUTO_REFRESH", "True").lower() == "true"
+DAILY_STATS_REFRESH_DELAY = int(os.getenv("DAILY_STATS_REFRESH_DELAY", "5"))
+
+# Booking side-effect outbox (hotel_api/outbox.py)
+# Eager mode applies side effects inline in the request (no worker needed).
+OUTBOX_EAGER = os.getenv("OUTBOX_EAGER", "False").lower() == "true"
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+
+# Sensitive-data access log writer (hotel_api/audit.py): "sync" writes in the
+# request; "thread" batches per process behind a local spool file; "celery"
+# queues entries in Redis for the flush task. Batches are written at
+# AUDIT_LOG_BATCH_SIZE entries or every AUDIT_LOG_FLUSH_INTERVAL seconds.
+AUDIT_LOG_MODE = os.getenv("AUDIT_LOG_MODE", "thread")
+AUDIT_LOG_BATCH_SIZE = int(os.getenv("AUDIT_LOG_BATCH_SIZE", "100"))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.getenv("AUDIT_LOG_FLUSH_INTERVAL", "2"))
+AUDIT_LOG_SPOOL_DIR = os.getenv("AUDIT_LOG_SPOOL_DIR", "")  # Default: BASE_DIR/logs/audit-spool
+AUDIT_LOG_REDIS_URL = os.getenv("AUDIT_LOG_REDIS_URL", "")  # Default: CELERY_BROKER_URL
+
+# Shared cache (dashboard summary, task coalescing). Each process gets its own
+# LocMem cache unless REDIS_URL is set, so multi-worker deployments need Redis
+# for invalidation to reach every worker.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+
+# Dashboard summary cache lifetime in seconds (hotel_api/dashboard.py); 0 disables.
+# Writes invalidate it; the TTL only bounds staleness from bulk updates.
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "30"))
+
+# Declaration export (hotel_api/declaration.py): bookings fetched and decrypted per
+# chunk, and threads decrypting each chunk (0 decrypts in the request thread).
+DECLARATION_EXPORT_CHUNK_SIZE = int(os.getenv("DECLARATION_EXPORT_CHUNK_SIZE", "500"))
+DECLARATION_EXPORT_DECRYPT_WORKERS = int(os.getenv("DECLARATION_EXPORT_DECRYPT_WORKERS", "0"))
+
+# File exports (hotel_api/exports.py): rows fetched per query chunk, and how long
+# background export jobs (mode=async) keep their files. Export files are written
+# to EXPORT_STORAGE_ROOT, which must stay outside MEDIA_ROOT and must not be
+# served by the web server: they are only downloaded through the API.
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+EXPORT_JOB_RETENTION_DAYS = int(os.getenv("EXPORT_JOB_RETENTION_DAYS", "7"))
+EXPORT_STORAGE_ROOT = os.getenv("EXPORT_STORAGE_ROOT", str(BASE_DIR / "private"))
+
+# Background report jobs (hotel_api/report_jobs.py): identical reports finished
+# within the freshness window are served from the stored result.
+REPORT_JOB_FRESHNESS_SECONDS = int(os.getenv("REPORT_JOB_FRESHNESS_SECONDS", "900"))
+REPORT_JOB_RETENTION_DAYS = int(os.getenv("REPORT_JOB_RETENTION_DAYS", "7"))
+
+# Keyset pagination (hotel_api/pagination.py): with ?count=estimated, results the
+# PostgreSQL planner estimates below this many rows are still counted exactly.
+PAGINATION_ESTIMATE_THRESHOLD = int(os.getenv("PAGINATION_ESTIMATE_THRESHOLD", "10000"))
+
+# Guest search (hotel_api/guest_search.py): maximum results of /guests/search/
+GUEST_SEARCH_LIMIT = int(os.getenv("GUEST_SEARCH_LIMIT", "50"))
+
+# Request performance instrumentation (hotel_api/performance.py): per-view metrics
+# at /metrics, and requests slower than the threshold sampled with their slowest
+# queries for /api/v1/performance/slow-requests/. /metrics requires the token
+# (Authorization: Bearer <token>) and is not served without one unless DEBUG is on.
+PERFORMANCE_MONITORING_ENABLED = (
+    os.getenv("PERFORMANCE_MONITORING_ENABLED", "True").lower() == "true"
+)
+PERFORMANCE_SLOW_REQUEST_MS = int(os.getenv("PERFORMANCE_SLOW_REQUEST_MS", "500"))
+PERFORMANCE_SLOW_REQUEST_BUFFER = int(os.getenv("PERFORMANCE_SLOW_REQUEST_BUFFER", "100"))
+PERFORMANCE_SLOW_REQUEST_TOP_QUERIES = int(os.getenv("PERFORMANCE_SLOW_REQUEST_TOP_QUERIES", "5"))
+PERFORMANCE_METRICS_TOKEN = os.getenv("PERFORMANCE_METRICS_TOKEN", "")
+
 
 # Data Retention Policy (Phase D - Task 3)
 # Override individual retention periods via environment variable
 # Format: model_name=days, comma-separated (e.g., "notification=60,booking=1825")
 DATA_RETENTION_OVERRIDES = os.getenv("DATA_RETENTION_OVERRIDES", "")
+# Expired rows are deleted RETENTION_BATCH_SIZE at a time, sleeping
+# RETENTION_BATCH_SLEEP seconds between batches; a run stops after
+# RETENTION_TIME_BUDGET seconds and the next one resumes where it stopped.
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "1000"))
+RETENTION_BATCH_SLEEP = float(os.getenv("RETENTION_BATCH_SLEEP", "0.1"))
+RETENTION_TIME_BUDGET = int(os.getenv("RETENTION_TIME_BUDGET", "1800"))
+
+# Monthly partitions on PostgreSQL (hotel_api/partitions.py): how many months
+# ahead to create, and whether expired partitions are dropped or detached
+# (kept as standalone tables for archiving).
+PARTITION_PREMAKE_MONTHS = int(os.getenv("PARTITION_PREMAKE_MONTHS", "3"))
+PARTITION_EXPIRED_ACTION = os.getenv("PARTITION_EXPIRED_ACTION", "drop")
 
 
 # Field-Level Encryption (Phase D - Sensitive Data Protection)
 # Generate a Fernet key: python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
 # Leave empty to disable encryption (dev/test mode)
 FIELD_ENCRYPTION_KEY = os.getenv("FIELD_ENCRYPTION_KEY", "")
+# Retired keys, comma-separated: still used to decrypt during key rotation
+FIELD_ENCRYPTION_OLD_KEYS = os.getenv("FIELD_ENCRYPTION_OLD_KEYS", "")
 
 # Hash pepper for sensitive field lookups (Phase D)
 # Prevents precomputation attacks on low-entropy values like 12-digit CCCD numbers.
@@ -258,6 +366,8 @@ HASH_PEPPER = os.getenv("HASH_PEPPER", "")
 FCM_ENABLED = os.getenv("FCM_ENABLED", "False").lower() == "true"
 FCM_CREDENTIALS_FILE = os.getenv("FCM_CREDENTIALS_FILE", "")
 FCM_CREDENTIALS_JSON = os.getenv("FCM_CREDENTIALS_JSON", "")
+# Deliver pushes from the send_push_notifications Celery task instead of the request
+PUSH_NOTIFICATIONS_ASYNC = os.getenv("PUSH_NOTIFICATIONS_ASYNC", "True").lower() == "true"
 
 
 # SMS Gateway (Phase D - Task 7)
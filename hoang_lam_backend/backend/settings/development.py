@@ -85,3 +85,9 @@ REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] = {
 
 # FCM disabled in development
 FCM_ENABLED = False
+
+# Apply booking side effects inline unless a Celery worker is running
+OUTBOX_EAGER = os.getenv("OUTBOX_EAGER", "True").lower() == "true"
+
+# Write sensitive-data access logs in the request
+AUDIT_LOG_MODE = os.getenv("AUDIT_LOG_MODE", "sync")
@@ -118,12 +118,3 @@ if FCM_ENABLED and not FCM_CREDENTIALS_FILE and not FCM_CREDENTIALS_JSON:
     warnings.warn(
         "FCM_ENABLED is True but no credentials configured. Push notifications will not work."
     )
-
-# Cache configuration (optional - requires Redis)
-if os.getenv("REDIS_URL"):
-    CACHES = {
-        "default": {
-            "BACKEND": "django.core.cache.backends.redis.RedisCache",
-            "LOCATION": os.getenv("REDIS_URL"),
-        }
-    }
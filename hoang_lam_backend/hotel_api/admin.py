@@ -17,6 +17,7 @@ from .models import (
     RoomType,
     SensitiveDataAccessLog,
 )
+from .pagination import EstimatedCountPaginator
 
 
 @admin.register(RoomType)
@@ -116,6 +117,8 @@ class NotificationAdmin(admin.ModelAdmin):
     list_filter = ["notification_type", "is_read", "is_sent"]
     search_fields = ["title", "body", "recipient__username"]
     raw_id_fields = ["recipient", "booking"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(DeviceToken)
@@ -132,6 +135,8 @@ class SensitiveDataAccessLogAdmin(admin.ModelAdmin):
     list_filter = ["action", "resource_type", "timestamp"]
     search_fields = ["user__username", "ip_address"]
     date_hierarchy = "timestamp"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = [
         "user",
         "action",
@@ -0,0 +1,73 @@
+"""
+Related-row counts for serializers, computed by the list query.
+
+Several serializers expose counts (rooms of a room type, entries of a
+category, bookings of a guest) that would otherwise cost one COUNT query per
+serialized object. Viewsets annotate their querysets with the `with_*`
+helpers below, and the serializers declare the counts as `AnnotatedCount`
+fields, which read the annotation and fall back to the per-object query only
+when it is absent (a freshly created object, or one serialized outside its
+viewset).
+"""
+
+from django.db.models import Count, Q
+
+from rest_framework import serializers
+
+from hotel_api.models import Room
+
+
+def room_count(room_type):
+    return room_type.rooms.filter(is_active=True).count()
+
+
+def available_room_count(room_type):
+    return room_type.rooms.filter(is_active=True, status=Room.Status.AVAILABLE).count()
+
+
+def entry_count(category):
+    return category.entries.count()
+
+
+def booking_count(guest):
+    return guest.bookings.count()
+
+
+def with_room_counts(queryset):
+    """Annotate RoomType rows with room_count and available_room_count."""
+    active = Q(rooms__is_active=True)
+    return queryset.annotate(
+        room_count=Count("rooms", filter=active),
+        available_room_count=Count("rooms", filter=active & Q(rooms__status=Room.Status.AVAILABLE)),
+    )
+
+
+def with_entry_count(queryset):
+    """Annotate FinancialCategory rows with entry_count."""
+    return queryset.annotate(entry_count=Count("entries"))
+
+
+def with_booking_count(queryset):
+    """Annotate Guest rows with booking_count."""
+    return queryset.annotate(booking_count=Count("bookings"))
+
+
+class AnnotatedCount(serializers.IntegerField):
+    """
+    Read-only count taken from the queryset annotation named like the field.
+
+    Args:
+        fallback: callable(obj) -> int, used when the object is not annotated
+    """
+
+    def __init__(self, fallback, **kwargs):
+        self.fallback = fallback
+        kwargs["read_only"] = True
+        kwargs["source"] = "*"
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        value = getattr(obj, self.field_name, None)
+        if value is None:
+            value = self.fallback(obj)
+        return int(value)
@@ -5,3 +5,10 @@ class HotelApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "hotel_api"
     verbose_name = "Hotel Management API"
+
+    def ready(self):
+        from hotel_api import signals  # noqa: F401
+        from hotel_api.performance import instrument_serializers, is_enabled
+
+        if is_enabled():
+            instrument_serializers()
@@ -3,17 +3,58 @@ Audit logging utilities for sensitive data access.
 
 Provides:
 - log_sensitive_access(): Log access to sensitive guest data
-- AuditLogMixin: ViewSet mixin for automatic audit logging
+- flush_sensitive_access_logs(): Write buffered entries now
+- replay_spool() / drain_redis(): Recover entries left by crashed processes
+  (spooled entries the database rejects are set aside in <segment>.bad)
+
+Every guest list, retrieve, search, history and export records an entry, so
+the database write is taken off the request path. AUDIT_LOG_MODE selects how:
+
+- sync: the entry is written in the request (development, tests).
+- thread: entries are appended to a per-process spool file (the write-ahead
+  journal) and an in-memory batch; a background thread bulk_creates the batch
+  every AUDIT_LOG_FLUSH_INTERVAL seconds or at AUDIT_LOG_BATCH_SIZE entries,
+  then deletes the journal segment. Segments of a crashed process stay in
+  AUDIT_LOG_SPOOL_DIR and are replayed by the flush task.
+- celery: entries are pushed to a Redis list and written by the
+  flush_sensitive_access_logs task, queued every AUDIT_LOG_BATCH_SIZE entries
+  and run every minute by Celery Beat. If Redis is unreachable the entry goes
+  to the thread-mode journal instead.
+
+Each entry carries a UUID (entry_id, unique) and is written with
+ignore_conflicts, so a batch replayed after a crash is never duplicated.
 """
 
+import atexit
+import json
 import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DataError, IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from hotel_api.models import SensitiveDataAccessLog
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None
+
 logger = logging.getLogger("hotel_api.security")
 
 SENSITIVE_GUEST_FIELDS = ["id_number", "visa_number", "id_image"]
 
+MODES = ("sync", "thread", "celery")
+
+REDIS_KEY = "audit:sensitive_access"
+REDIS_LOCK_KEY = "audit:sensitive_access:drain"
+
 
 def get_client_ip(request):
     """Extract client IP from request, handling proxies."""
@@ -23,11 +64,29 @@ def get_client_ip(request):
     return request.META.get("REMOTE_ADDR")
 
 
+def get_mode():
+    mode = getattr(settings, "AUDIT_LOG_MODE", "sync")
+    return mode if mode in MODES else "sync"
+
+
+def _batch_size():
+    return getattr(settings, "AUDIT_LOG_BATCH_SIZE", 100)
+
+
+def _spool_dir():
+    path = Path(
+        getattr(settings, "AUDIT_LOG_SPOOL_DIR", "")
+        or Path(settings.BASE_DIR) / "logs" / "audit-spool"
+    )
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
 def log_sensitive_access(
     request, action, resource_type="guest", resource_id=None, fields=None, details=None
 ):
     """
-    Create an audit log entry for sensitive data access.
+    Record an audit log entry for sensitive data access.
 
     Also logs to the `hotel_api.security` Python logger for file/SIEM.
     """
@@ -36,19 +95,27 @@ def log_sensitive_access(
 
     user = request.user if request.user.is_authenticated else None
     ip = get_client_ip(request)
-    user_agent = request.META.get("HTTP_USER_AGENT", "")[:500]
+    entry = {
+        "entry_id": uuid.uuid4().hex,
+        "user_id": user.pk if user else None,
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "fields_accessed": fields,
+        "ip_address": ip,
+        "user_agent": request.META.get("HTTP_USER_AGENT", "")[:500],
+        "details": details or {},
+        "timestamp": timezone.now(),
+    }
 
     # Database log
-    SensitiveDataAccessLog.objects.create(
-        user=user,
-        action=action,
-        resource_type=resource_type,
-        resource_id=resource_id,
-        fields_accessed=fields,
-        ip_address=ip,
-        user_agent=user_agent,
-        details=details or {},
-    )
+    mode = get_mode()
+    if mode == "sync":
+        write_entries([entry])
+    elif mode == "celery":
+        _push_redis(entry)
+    else:
+        buffer.add(entry)
 
     # File log (for SIEM integration)
     username = user.username if user else "anonymous"
@@ -61,3 +128,255 @@ def log_sensitive_access(
         ip,
         fields,
     )
+
+
+def _dumps(entry):
+    # Full precision: DjangoJSONEncoder drops microseconds, and a replayed entry
+    # must keep its timestamp, which is part of the unique key on PostgreSQL
+    return json.dumps({**entry, "timestamp": entry["timestamp"].isoformat()}, cls=DjangoJSONEncoder)
+
+
+def _loads(line):
+    entry = json.loads(line)
+    entry["timestamp"] = parse_datetime(entry["timestamp"])
+    return entry
+
+
+def write_entries(entries):
+    """bulk_create entries; ones already written (same entry_id) are skipped."""
+
+    def create():
+        with transaction.atomic():
+            SensitiveDataAccessLog.objects.bulk_create(
+                [SensitiveDataAccessLog(**entry) for entry in entries],
+                batch_size=500,
+                ignore_conflicts=True,
+            )
+
+    try:
+        create()
+    except IntegrityError:
+        # A user deleted between the access and the write: keep the entry, like SET_NULL
+        from django.contrib.auth.models import User
+
+        user_ids = {entry["user_id"] for entry in entries if entry["user_id"]}
+        existing = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+        for entry in entries:
+            if entry["user_id"] not in existing:
+                entry["user_id"] = None
+        create()
+    return len(entries)
+
+
+# ==================== Thread mode ====================
+
+
+class AuditBuffer:
+    """
+    Per-process batch of entries, journaled to spool segments until written.
+
+    A segment stays open and flock()ed by its process until the entries in it
+    are in the database, so replay_spool() only picks up segments whose
+    process has died.
+    """
+
+    def __init__(self, background=True):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pid = None
+        self.background = background
+
+    def _start(self):
+        # Lazily per process: threads and open segments do not survive a fork
+        self._pid = os.getpid()
+        self._entries = []
+        self._segments = []  # Open journal files holding self._entries
+        self._segment = None  # Segment being appended to
+        self._wake = threading.Event()
+        if self.background:
+            threading.Thread(target=self._run, name="audit-log-writer", daemon=True).start()
+            atexit.register(self.flush)
+
+    def add(self, entry):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._start()
+            self._journal(entry)
+            self._entries.append(entry)
+            full = len(self._entries) >= _batch_size()
+        if full:
+            self._wake.set()
+
+    def _journal(self, entry):
+        if self._segment is None:
+            # Locked before it gets the name replay_spool() looks for
+            path = _spool_dir() / f"{self._pid}-{uuid.uuid4().hex}"
+            segment = open(f"{path}.tmp", "a", encoding="utf-8")
+            if fcntl:
+                fcntl.flock(segment, fcntl.LOCK_EX)
+            os.rename(f"{path}.tmp", f"{path}.jsonl")
+            self._segment = (f"{path}.jsonl", segment)
+            self._segments.append(self._segment)
+        # Flushed to the OS, so it survives a crash of this process
+        self._segment[1].write(_dumps(entry) + "\n")
+        self._segment[1].flush()
+
+    def flush(self):
+        """Write the pending batch. Returns the number of entries written."""
+        with self._flush_lock:
+            with self._lock:
+                if self._pid != os.getpid() or not self._entries:
+                    return 0
+                entries, self._entries = self._entries, []
+                segments, self._segments = self._segments, []
+                self._segment = None
+
+            try:
+                write_entries(entries)
+            except Exception:
+                logger.exception("AUDIT: could not write %s entries, will retry", len(entries))
+                with self._lock:
+                    self._entries[:0] = entries
+                    self._segments[:0] = segments
+                return 0
+
+            for path, segment in segments:
+                os.unlink(path)
+                segment.close()
+            return len(entries)
+
+    def _run(self):
+        interval = getattr(settings, "AUDIT_LOG_FLUSH_INTERVAL", 2.0)
+        try:
+            replay_spool()  # Left by a previous process on this host
+        except Exception:
+            logger.exception("AUDIT: spool replay failed")
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+buffer = AuditBuffer()
+
+
+def _replay_entries(path, entries, lines):
+    """
+    Write a segment's entries, moving the ones the database rejects to <segment>.bad.
+
+    Without this, one such entry would fail the segment on every replay.
+    Connection errors still propagate, so the whole segment is retried.
+    """
+    try:
+        return write_entries(entries)
+    except (DataError, IntegrityError, TypeError, ValueError):
+        pass
+
+    written = 0
+    bad = []
+    for entry, line in zip(entries, lines):
+        try:
+            written += write_entries([entry])
+        except (DataError, IntegrityError, TypeError, ValueError):
+            bad.append(line)
+    if bad:
+        logger.error("AUDIT: moved %s rejected entries from %s to .bad", len(bad), path.name)
+        with open(path.with_suffix(".bad"), "a", encoding="utf-8") as f:
+            f.writelines(bad)
+    return written
+
+
+def replay_spool():
+    """Write entries from journal segments of dead processes. Returns entries replayed."""
+    replayed = 0
+    for path in sorted(_spool_dir().glob("*.jsonl")):
+        try:
+            segment = open(path, encoding="utf-8")
+        except FileNotFoundError:
+            continue  # Flushed by its owner meanwhile
+        with segment:
+            if fcntl:
+                try:
+                    fcntl.flock(segment, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # Owner is alive
+            if os.fstat(segment.fileno()).st_nlink == 0:
+                continue  # Written and unlinked by its owner after we opened it
+            entries, lines = [], []
+            for line in segment:
+                try:
+                    entries.append(_loads(line))
+                except (ValueError, KeyError, TypeError):
+                    logger.warning("AUDIT: skipping torn line in %s", path.name)
+                    continue
+                lines.append(line)
+            replayed += _replay_entries(path, entries, lines)
+            path.unlink(missing_ok=True)
+    if replayed:
+        logger.info("AUDIT: replayed %s spooled entries", replayed)
+    return replayed
+
+
+# ==================== Celery mode ====================
+
+_redis_client = None
+
+
+def _redis():
+    global _redis_client
+    if _redis_client is None:
+        import redis
+
+        url = getattr(settings, "AUDIT_LOG_REDIS_URL", "") or settings.CELERY_BROKER_URL
+        _redis_client = redis.Redis.from_url(url, socket_timeout=1)
+    return _redis_client
+
+
+def _push_redis(entry):
+    try:
+        length = _redis().rpush(REDIS_KEY, _dumps(entry))
+    except Exception as e:
+        logger.warning("AUDIT: Redis unavailable, journaling entry locally: %s", e)
+        buffer.add(entry)
+        return
+
+    if length % _batch_size() == 0:
+        from hotel_api.tasks import flush_sensitive_access_logs
+
+        try:
+            flush_sensitive_access_logs.delay()
+        except Exception as e:
+            # Beat runs the task every minute anyway
+            logger.warning("AUDIT: could not queue flush task: %s", e)
+
+
+def drain_redis():
+    """Write every entry queued in Redis, a batch at a time. Returns entries written."""
+    client = _redis()
+    size = _batch_size()
+    written = 0
+    # One drainer at a time: LTRIM after a concurrent read would drop entries
+    lock = client.lock(REDIS_LOCK_KEY, timeout=300)
+    if not lock.acquire(blocking=False):
+        return 0
+    try:
+        while True:
+            items = client.lrange(REDIS_KEY, 0, size - 1)
+            if not items:
+                break
+            written += write_entries([_loads(item) for item in items])
+            client.ltrim(REDIS_KEY, len(items), -1)
+    finally:
+        lock.release()
+    return written
+
+
+def flush_sensitive_access_logs():
+    """Write everything pending for this process, in Redis and in dead spool segments."""
+    written = buffer.flush()
+    if get_mode() == "celery":
+        written += drain_redis()
+    return written + replay_spool()
@@ -0,0 +1,176 @@
+"""
+Dashboard summary with a shared response cache for Hoang Lam Heritage Management.
+
+The mobile app polls the dashboard constantly during front-desk shifts, so the
+summary is built with one conditional-aggregate query per table and cached
+(Redis in deployment, see CACHES in settings). Signal handlers in
+hotel_api/signals.py invalidate it on booking status/date changes, room status
+changes and financial entry writes; DASHBOARD_CACHE_TTL bounds staleness for
+anything that bypasses them (queryset .update(), raw SQL).
+
+Hit/miss counters are kept in the same cache and exposed by
+DashboardCacheStatsView.
+"""
+
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from hotel_api.models import Booking, FinancialEntry, Room
+
+CACHE_KEY_PREFIX = "dashboard:summary"
+HITS_KEY = "dashboard:cache:hits"
+MISSES_KEY = "dashboard:cache:misses"
+INVALIDATIONS_KEY = "dashboard:cache:invalidations"
+
+
+def _cache_key(day):
+    # Keyed by date so the summary rolls over at midnight without an invalidation
+    return f"{CACHE_KEY_PREFIX}:{day.isoformat()}"
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Counter missing (first use or evicted)
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def build_dashboard_summary(today=None):
+    """Compute the dashboard payload: one aggregate query each on Room, Booking, FinancialEntry."""
+    today = today or date.today()
+
+    rooms = Room.objects.filter(is_active=True).aggregate(
+        total=Count("id"),
+        available=Count("id", filter=Q(status=Room.Status.AVAILABLE)),
+        occupied=Count("id", filter=Q(status=Room.Status.OCCUPIED)),
+        cleaning=Count("id", filter=Q(status=Room.Status.CLEANING)),
+        maintenance=Count("id", filter=Q(status=Room.Status.MAINTENANCE)),
+        blocked=Count("id", filter=Q(status=Room.Status.BLOCKED)),
+    )
+
+    bookings = Booking.objects.filter(
+        Q(check_in_date=today)
+        | Q(check_out_date=today)
+        | Q(
+            status__in=[
+                Booking.Status.PENDING,
+                Booking.Status.CONFIRMED,
+                Booking.Status.CHECKED_IN,
+            ]
+        )
+    ).aggregate(
+        pending_arrivals=Count(
+            "id",
+            filter=Q(
+                check_in_date=today,
+                status__in=[Booking.Status.PENDING, Booking.Status.CONFIRMED],
+            ),
+        ),
+        pending_departures=Count(
+            "id", filter=Q(check_out_date=today, status=Booking.Status.CHECKED_IN)
+        ),
+        completed_check_ins=Count(
+            "id", filter=Q(check_in_date=today, status=Booking.Status.CHECKED_IN)
+        ),
+        completed_check_outs=Count(
+            "id", filter=Q(check_out_date=today, status=Booking.Status.CHECKED_OUT)
+        ),
+        pending=Count("id", filter=Q(status=Booking.Status.PENDING)),
+        confirmed=Count("id", filter=Q(status=Booking.Status.CONFIRMED)),
+        checked_in=Count("id", filter=Q(status=Booking.Status.CHECKED_IN)),
+    )
+
+    finance = FinancialEntry.objects.filter(date=today).aggregate(
+        income=Sum("amount", filter=Q(entry_type=FinancialEntry.EntryType.INCOME)),
+        expense=Sum("amount", filter=Q(entry_type=FinancialEntry.EntryType.EXPENSE)),
+    )
+
+    total_rooms = rooms["total"]
+    occupied_rooms = rooms["occupied"]
+    occupancy_rate = (occupied_rooms / total_rooms * 100) if total_rooms > 0 else 0
+
+    return {
+        "room_status": {
+            "total": total_rooms,
+            "available": rooms["available"],
+            "occupied": occupied_rooms,
+            "cleaning": rooms["cleaning"],
+            "maintenance": rooms["maintenance"],
+            "blocked": rooms["blocked"],
+        },
+        "today": {
+            "date": today.isoformat(),
+            "check_ins": bookings["pending_arrivals"] + bookings["completed_check_ins"],
+            "check_outs": bookings["pending_departures"] + bookings["completed_check_outs"],
+            "pending_arrivals": bookings["pending_arrivals"],
+            "pending_departures": bookings["pending_departures"],
+            "revenue": float(finance["income"] or 0),
+            "expense": float(finance["expense"] or 0),
+        },
+        "occupancy": {
+            "rate": round(occupancy_rate, 1),
+            "occupied_rooms": occupied_rooms,
+            "total_rooms": total_rooms,
+        },
+        "bookings": {
+            "pending": bookings["pending"],
+            "confirmed": bookings["confirmed"],
+            "checked_in": bookings["checked_in"],
+        },
+    }
+
+
+def get_dashboard_summary():
+    """
+    Return (summary, cache_hit) for today, computing and caching on a miss.
+
+    Caching is disabled when DASHBOARD_CACHE_TTL is 0.
+    """
+    ttl = getattr(settings, "DASHBOARD_CACHE_TTL", 30)
+    today = date.today()
+    if not ttl:
+        return build_dashboard_summary(today), False
+
+    key = _cache_key(today)
+    summary = cache.get(key)
+    if summary is not None:
+        _incr(HITS_KEY)
+        return summary, True
+
+    _incr(MISSES_KEY)
+    summary = build_dashboard_summary(today)
+    cache.set(key, summary, timeout=ttl)
+    return summary, False
+
+
+def invalidate_dashboard():
+    """
+    Drop today's cached summary now and again after the current transaction commits.
+
+    The second delete covers a concurrent request re-caching pre-commit data.
+    """
+    key = _cache_key(date.today())
+    cache.delete(key)
+    _incr(INVALIDATIONS_KEY)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def dashboard_cache_stats():
+    """Hit/miss/invalidation counters and the hit ratio."""
+    counters = cache.get_many([HITS_KEY, MISSES_KEY, INVALIDATIONS_KEY])
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "invalidations": counters.get(INVALIDATIONS_KEY, 0),
+        "hit_ratio": round(hits / lookups, 4) if lookups else None,
+        "ttl_seconds": getattr(settings, "DASHBOARD_CACHE_TTL", 30),
+    }
@@ -0,0 +1,334 @@
+"""
+Temporary residence declaration export (ĐD10 / NA17) for Hoang Lam Heritage Management.
+
+Exports can cover a full quarter for a police audit, so nothing here holds the
+whole result in memory:
+
+- Bookings are read with queryset.iterator() in DECLARATION_EXPORT_CHUNK_SIZE
+  chunks, split into Vietnamese / foreign guests by the database.
+- id_number / visa_number are decrypted one chunk at a time, optionally on
+  DECLARATION_EXPORT_DECRYPT_WORKERS threads.
+- CSV is produced as a generator for StreamingHttpResponse; Excel is written by
+  an openpyxl write-only workbook into a temporary file served by FileResponse.
+"""
+
+import codecs
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce, Lower, Trim
+
+from hotel_api.encryption import decrypt_many
+from hotel_api.exports import iter_csv
+from hotel_api.models import Booking
+
+# ── Hotel establishment info (used in form headers) ──
+HOTEL_NAME = "Hoàng Lâm Heritage Suites"
+HOTEL_ADDRESS = "123 Đường ABC, Phường XYZ, TP.HCM"
+HOTEL_PHONE = "028 1234 5678"
+
+VN_ALIASES = ("việt nam", "vietnam", "vn", "viet nam")
+
+# Vietnamese names of nationalities for the official forms
+NATIONALITY_MAP = {
+    "vietnam": "Việt Nam",
+    "united states": "Mỹ",
+    "usa": "Mỹ",
+    "china": "Trung Quốc",
+    "south korea": "Hàn Quốc",
+    "japan": "Nhật Bản",
+    "france": "Pháp",
+    "uk": "Anh",
+    "australia": "Úc",
+    "germany": "Đức",
+    "russia": "Nga",
+    "thailand": "Thái Lan",
+}
+
+# ĐD10 (Nghị định 144/2021) - Vietnamese guests
+DD10_HEADERS = [
+    "STT",
+    "Họ và tên",
+    "Ngày sinh",
+    "Giới tính",
+    "Quốc tịch",
+    "Số CMND/CCCD/Hộ chiếu",
+    "Địa chỉ thường trú",
+    "Ngày đến",
+    "Ngày đi",
+    "Số phòng",
+    "Ghi chú",
+]
+
+# NA17 (Thông tư 04/2015/TT-BCA) - foreign guests
+NA17_HEADERS = [
+    "STT",
+    "Họ tên",
+    "Giới tính",
+    "Ngày tháng năm sinh",
+    "Quốc tịch",
+    "Số hộ chiếu",
+    "Loại hộ chiếu",
+    "Loại giấy tờ nhập cảnh",
+    "Số giấy tờ",
+    "Thời hạn",
+    "Ngày cấp",
+    "Cơ quan cấp",
+    "Ngày nhập cảnh",
+    "Cửa khẩu nhập cảnh",
+    "Mục đích nhập cảnh",
+    "Tạm trú từ ngày",
+    "Tạm trú đến ngày",
+    "Số phòng",
+]
+
+# Excel column widths, fixed up front: write-only sheets cannot be resized
+# after the rows are written.
+DD10_WIDTHS = [7, 28, 14, 13, 14, 26, 40, 14, 14, 12, 30]
+NA17_WIDTHS = [7, 28, 13, 23, 14, 18, 18, 26, 16, 14, 14, 24, 18, 30, 24, 19, 20, 12]
+
+GUEST_FIELDS = [
+    "full_name",
+    "date_of_birth",
+    "gender",
+    "nationality",
+    "id_number",
+    "address",
+    "passport_type",
+    "visa_type",
+    "visa_number",
+    "visa_expiry_date",
+    "visa_issue_date",
+    "visa_issuing_authority",
+    "entry_date",
+    "entry_port",
+    "entry_purpose",
+]
+
+
+def fmt_date(d):
+    """Format a date as DD/MM/YYYY."""
+    return d.strftime("%d/%m/%Y") if d else ""
+
+
+def fmt_gender(g):
+    return "Nam" if g == "male" else ("Nữ" if g == "female" else "")
+
+
+def fmt_nationality(nat):
+    return NATIONALITY_MAP.get((nat or "").strip().lower(), nat or "Việt Nam")
+
+
+def declared_bookings(date_from, date_to):
+    """Bookings covered by a declaration for check-ins in [date_from, date_to]."""
+    return Booking.objects.filter(
+        check_in_date__gte=date_from,
+        check_in_date__lte=date_to,
+        status__in=[Booking.Status.CHECKED_IN, Booking.Status.CHECKED_OUT],
+    )
+
+
+def form_bookings(date_from, date_to, form):
+    """
+    Bookings for one form: "dd10" (Vietnamese or unknown nationality) or "na17".
+    """
+    bookings = (
+        declared_bookings(date_from, date_to)
+        .select_related("guest", "room")
+        .only(
+            "check_in_date",
+            "check_out_date",
+            "notes",
+            "room__number",
+            *(f"guest__{field}" for field in GUEST_FIELDS),
+        )
+        .annotate(guest_nationality=Lower(Trim(Coalesce("guest__nationality", Value("")))))
+    )
+    vietnamese = Q(guest_nationality__in=VN_ALIASES) | Q(guest_nationality="")
+    if form == "dd10":
+        return bookings.filter(vietnamese)
+    return bookings.exclude(vietnamese)
+
+
+def _chunks(bookings, chunk_size):
+    iterator = bookings.iterator(chunk_size=chunk_size)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def dd10_rows(bookings, executor=None, chunk_size=500):
+    number = 0
+    for chunk in _chunks(bookings, chunk_size):
+        id_numbers = decrypt_many([bk.guest.id_number for bk in chunk], executor)
+        for bk, id_number in zip(chunk, id_numbers):
+            g = bk.guest
+            number += 1
+            yield [
+                number,
+                g.full_name,
+                fmt_date(g.date_of_birth),
+                fmt_gender(g.gender),
+                fmt_nationality(g.nationality),
+                id_number or "",
+                g.address or "",
+                fmt_date(bk.check_in_date),
+                fmt_date(bk.check_out_date),
+                bk.room.number,
+                bk.notes or "",
+            ]
+
+
+def na17_rows(bookings, executor=None, chunk_size=500):
+    number = 0
+    for chunk in _chunks(bookings, chunk_size):
+        values = decrypt_many(
+            [bk.guest.id_number for bk in chunk] + [bk.guest.visa_number for bk in chunk],
+            executor,
+        )
+        for bk, id_number, visa_number in zip(chunk, values, values[len(chunk) :]):
+            g = bk.guest
+            number += 1
+            yield [
+                number,
+                g.full_name,
+                fmt_gender(g.gender),
+                fmt_date(g.date_of_birth),
+                fmt_nationality(g.nationality),
+                id_number or "",
+                g.get_passport_type_display() if g.passport_type else "",
+                g.get_visa_type_display() if g.visa_type else "",
+                visa_number or "",
+                fmt_date(g.visa_expiry_date),
+                fmt_date(g.visa_issue_date),
+                g.visa_issuing_authority or "",
+                fmt_date(g.entry_date),
+                g.entry_port or "",
+                g.entry_purpose or "",
+                fmt_date(bk.check_in_date),
+                fmt_date(bk.check_out_date),
+                bk.room.number,
+            ]
+
+
+# form key -> (sheet name, form title, headers, column widths, row builder)
+FORMS = {
+    "dd10": (
+        "ĐD10 - Khách Việt Nam",
+        "SỔ QUẢN LÝ LƯU TRÚ (Mẫu ĐD10)",
+        DD10_HEADERS,
+        DD10_WIDTHS,
+        dd10_rows,
+    ),
+    "na17": (
+        "NA17 - Khách nước ngoài",
+        "PHIẾU KHAI BÁO TẠM TRÚ CHO NGƯỜI NƯỚC NGOÀI (Mẫu NA17)",
+        NA17_HEADERS,
+        NA17_WIDTHS,
+        na17_rows,
+    ),
+}
+
+
+def selected_forms(form_type):
+    return ["dd10", "na17"] if form_type == "all" else [form_type]
+
+
+@contextmanager
+def decrypt_pool():
+    """Thread pool for batched decryption, or None when disabled."""
+    workers = getattr(settings, "DECLARATION_EXPORT_DECRYPT_WORKERS", 0)
+    if workers < 1:
+        yield None
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield executor
+
+
+def _preamble(title, date_from, date_to):
+    """The establishment / title lines printed above the column headers."""
+    return [
+        [HOTEL_NAME],
+        [f"Địa chỉ: {HOTEL_ADDRESS}"],
+        [f"Điện thoại: {HOTEL_PHONE}"],
+        [],
+        [title],
+        [f"Từ ngày {fmt_date(date_from)} đến ngày {fmt_date(date_to)}"],
+        [],
+    ]
+
+
+def stream_csv(date_from, date_to, form_type):
+    """
+    Yield the CSV export as UTF-8 byte chunks (BOM first, for Excel).
+
+    Sections are separated by a "=" rule when form_type is "all".
+    """
+    chunk_size = getattr(settings, "DECLARATION_EXPORT_CHUNK_SIZE", 500)
+    yield codecs.BOM_UTF8
+
+    with decrypt_pool() as executor:
+
+        def lines():
+            for index, form in enumerate(selected_forms(form_type)):
+                _, title, headers, _, build_rows = FORMS[form]
+                if index:
+                    yield from ([], ["=" * 80], [])
+                yield from _preamble(title, date_from, date_to)
+                yield headers
+                yield from build_rows(form_bookings(date_from, date_to, form), executor, chunk_size)
+
+        yield from iter_csv(lines(), chunk_size)
+
+
+def write_excel(date_from, date_to, form_type, fileobj):
+    """
+    Write the Excel export (one sheet per form) to a binary file object.
+
+    Uses an openpyxl write-only workbook, which streams rows to disk; the
+    establishment lines are therefore written unmerged in column A.
+    """
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    chunk_size = getattr(settings, "DECLARATION_EXPORT_CHUNK_SIZE", 500)
+    header_font = Font(bold=True)
+    header_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
+    header_alignment = Alignment(horizontal="center", wrap_text=True)
+
+    wb = openpyxl.Workbook(write_only=True)
+
+    def styled(ws, value, **style):
+        cell = WriteOnlyCell(ws, value=value)
+        for name, attr in style.items():
+            setattr(cell, name, attr)
+        return cell
+
+    with decrypt_pool() as executor:
+        for form in selected_forms(form_type):
+            sheet_name, title, headers, widths, build_rows = FORMS[form]
+            ws = wb.create_sheet(title=sheet_name)
+            for col, width in enumerate(widths, 1):
+                ws.column_dimensions[get_column_letter(col)].width = width
+
+            preamble = _preamble(title, date_from, date_to)
+            preamble[0] = [styled(ws, HOTEL_NAME, font=Font(bold=True, size=14))]
+            preamble[4] = [styled(ws, title, font=Font(bold=True, size=12))]
+            for row in preamble:
+                ws.append(row)
+            ws.append(
+                [
+                    styled(ws, h, font=header_font, fill=header_fill, alignment=header_alignment)
+                    for h in headers
+                ]
+            )
+
+            rows = build_rows(form_bookings(date_from, date_to, form), executor, chunk_size)
+            for row in rows:
+                ws.append(row)
+
+    wb.save(fileobj)
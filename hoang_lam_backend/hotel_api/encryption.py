@@ -7,24 +7,73 @@ from the `cryptography` library.
 Encryption is controlled by the FIELD_ENCRYPTION_KEY setting:
 - If set: fields are encrypted/decrypted transparently
 - If empty: encryption is disabled (dev/test mode)
+
+Key rotation: move the old key to FIELD_ENCRYPTION_OLD_KEYS (comma-separated)
+and set a new FIELD_ENCRYPTION_KEY. New values are encrypted with the new key;
+values under any listed key still decrypt (MultiFernet), so rotation needs no
+downtime. rotate() re-encrypts a token under the current key.
+
+The cipher is built once per process and rebuilt only when the key settings
+change.
 """
 
 import hashlib
 import logging
 
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 
-from cryptography.fernet import Fernet, InvalidToken
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 
 logger = logging.getLogger("hotel_api")
 
+# Every Fernet token starts with version byte 0x80 followed by a 64-bit
+# timestamp whose high bytes are zero, i.e. "gAAAAA" in urlsafe base64.
+TOKEN_PREFIX = "gAAAAA"
+# version (1) + timestamp (8) + IV (16) + one AES block (16) + HMAC (32), base64-encoded
+MIN_TOKEN_LENGTH = 100
+
+_cipher_cache = {"keys": None, "cipher": None}
+
+
+def configured_keys():
+    primary = getattr(settings, "FIELD_ENCRYPTION_KEY", "")
+    if not primary:
+        return ()
+    old = getattr(settings, "FIELD_ENCRYPTION_OLD_KEYS", "")
+    if isinstance(old, str):
+        old = old.split(",")
+    return (primary, *(key.strip() for key in old if key and key.strip()))
+
 
 def _get_fernet():
-    """Get Fernet instance from settings key. Returns None if no key configured."""
-    key = getattr(settings, "FIELD_ENCRYPTION_KEY", "")
-    if not key:
+    """
+    Get the cached cipher for the configured keys. Returns None if no key configured.
+
+    A MultiFernet when old keys are configured: encrypts with the primary key,
+    decrypts with any key.
+    """
+    keys = configured_keys()
+    if keys != _cipher_cache["keys"]:
+        _cipher_cache.update(keys=keys, cipher=build_cipher(keys))
+    return _cipher_cache["cipher"]
+
+
+def build_cipher(keys):
+    """Fernet for one key, MultiFernet (primary key first) for several, None for none."""
+    fernets = [Fernet(key.encode() if isinstance(key, str) else key) for key in keys]
+    if not fernets:
         return None
-    return Fernet(key.encode() if isinstance(key, str) else key)
+    if len(fernets) == 1:
+        return fernets[0]
+    return MultiFernet(fernets)
+
+
+@receiver(setting_changed)
+def _reset_cipher(setting, **kwargs):
+    if setting in ("FIELD_ENCRYPTION_KEY", "FIELD_ENCRYPTION_OLD_KEYS"):
+        _cipher_cache.update(keys=None, cipher=None)
 
 
 def encrypt(plaintext):
@@ -56,7 +105,7 @@ def decrypt(ciphertext):
         return ciphertext
 
     fernet = _get_fernet()
-    if fernet is None:
+    if fernet is None or not looks_encrypted(ciphertext):
         return ciphertext
 
     try:
@@ -66,7 +115,25 @@ def decrypt(ciphertext):
         return ciphertext
 
 
-def hash_value(plaintext):
+def _decrypt_slice(values):
+    return [decrypt(value) for value in values]
+
+
+def decrypt_many(values, executor=None, slice_size=100):
+    """
+    Decrypt a batch of values, preserving order.
+
+    With an executor the batch is split into slices of slice_size decrypted
+    concurrently; small batches are decrypted inline.
+    """
+    values = list(values)
+    if executor is None or len(values) <= slice_size:
+        return _decrypt_slice(values)
+    slices = [values[i : i + slice_size] for i in range(0, len(values), slice_size)]
+    return [value for part in executor.map(_decrypt_slice, slices) for value in part]
+
+
+def hash_value(plaintext, pepper=None):
     """
     Compute peppered SHA-256 hash of a plaintext value for lookup/uniqueness.
 
@@ -78,13 +145,60 @@ def hash_value(plaintext):
     """
     if not plaintext:
         return ""
-    pepper = getattr(settings, "HASH_PEPPER", "")
+    if pepper is None:
+        pepper = getattr(settings, "HASH_PEPPER", "")
     return hashlib.sha256((pepper + plaintext.strip()).encode()).hexdigest()
 
 
+def looks_encrypted(value):
+    """Cheap check: does the value have the shape of a Fernet token? No decryption."""
+    return bool(value) and len(value) >= MIN_TOKEN_LENGTH and value.startswith(TOKEN_PREFIX)
+
+
+def protect(value):
+    """
+    Prepare a sensitive field value for storage.
+
+    Returns (stored, plaintext): the value encrypted under the current key
+    (already-encrypted values are kept as-is) and its plaintext for hashing.
+    Costs one decrypt for encrypted values and one encrypt for plaintext.
+    """
+    fernet = _get_fernet()
+    if fernet is None or not value:
+        return value, value
+
+    if looks_encrypted(value):
+        try:
+            return value, fernet.decrypt(value.encode()).decode()
+        except (InvalidToken, ValueError, UnicodeDecodeError):
+            pass  # Token-shaped plaintext, or a key that is no longer configured
+    return fernet.encrypt(value.encode()).decode(), value
+
+
+def rotate(ciphertext):
+    """
+    Re-encrypt a token under the current primary key.
+
+    Plaintext values are encrypted. Returns the value unchanged when
+    encryption is disabled or the token cannot be decrypted with any key.
+    """
+    fernet = _get_fernet()
+    if fernet is None or not ciphertext:
+        return ciphertext
+    if not looks_encrypted(ciphertext):
+        return fernet.encrypt(ciphertext.encode()).decode()
+    try:
+        if isinstance(fernet, MultiFernet):
+            return fernet.rotate(ciphertext.encode()).decode()
+        return fernet.encrypt(fernet.decrypt(ciphertext.encode())).decode()
+    except (InvalidToken, ValueError, UnicodeDecodeError):
+        logger.warning("Could not rotate a value: no configured key decrypts it")
+        return ciphertext
+
+
 def is_encrypted(value):
-    """Check if a value appears to be Fernet-encrypted."""
-    if not value:
+    """Check if a value is Fernet-encrypted under a configured key (trial decryption)."""
+    if not looks_encrypted(value):
         return False
     try:
         fernet = _get_fernet()
@@ -94,3 +208,55 @@ def is_encrypted(value):
         return True
     except (InvalidToken, ValueError, UnicodeDecodeError):
         return False
+
+
+def rotate_fields(rows, keys, pepper):
+    """
+    Re-encrypt sensitive guest fields under the primary key.
+
+    Settings-free so it can run in worker processes.
+
+    Args:
+        rows: iterable of (pk, id_number, id_number_hash, visa_number, visa_number_hash)
+        keys: key tuple, primary first (see configured_keys())
+        pepper: HASH_PEPPER value
+
+    Returns:
+        (changed, undecryptable): rows in the same shape whose stored values
+        or hashes changed, and the number of token values no configured key
+        could decrypt (left untouched).
+    """
+    primary = build_cipher(keys[:1])
+    cipher = build_cipher(keys)
+    changed, undecryptable = [], 0
+
+    def convert(value):
+        nonlocal undecryptable
+        if not value:
+            return value, value
+        if looks_encrypted(value):
+            try:
+                return value, primary.decrypt(value.encode()).decode()
+            except (InvalidToken, ValueError, UnicodeDecodeError):
+                pass  # Older key, or token-shaped plaintext
+            try:
+                plaintext = cipher.decrypt(value.encode()).decode()
+                return primary.encrypt(plaintext.encode()).decode(), plaintext
+            except (InvalidToken, ValueError, UnicodeDecodeError):
+                undecryptable += 1
+                return value, None
+        return primary.encrypt(value.encode()).decode(), value
+
+    for pk, id_number, id_hash, visa_number, visa_hash in rows:
+        new_id, id_plain = convert(id_number)
+        new_visa, visa_plain = convert(visa_number)
+        new_id_hash = id_hash if id_plain is None else (hash_value(id_plain, pepper) or None)
+        new_visa_hash = visa_hash if visa_plain is None else hash_value(visa_plain, pepper)
+        if (new_id, new_id_hash, new_visa, new_visa_hash) != (
+            id_number,
+            id_hash,
+            visa_number,
+            visa_hash,
+        ):
+            changed.append((pk, new_id, new_id_hash, new_visa, new_visa_hash))
+    return changed, undecryptable
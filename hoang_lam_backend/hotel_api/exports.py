@@ -0,0 +1,510 @@
+"""
+Shared CSV/XLSX export framework for Hoang Lam Heritage Management.
+
+Exports never hold the whole file in memory:
+
+- Exporters registered with @exporter(name) take the request's query params
+  and return an Export: a filename, headers and a lazy row generator. Row
+  producers read values_list() with the joins they need, in EXPORT_CHUNK_SIZE
+  chunks via iterator(), instead of loading model instances per row.
+- csv_response() streams rows through StreamingHttpResponse; xlsx_response()
+  writes an openpyxl write-only workbook to a temporary file for FileResponse.
+- For very large ranges the views accept mode=async: start_export_job()
+  records an ExportJob and the run_export_job Celery task writes the file to
+  private storage outside MEDIA_ROOT (models.ExportStorage) under a random
+  name; the client polls /export-jobs/{id}/ and downloads the file through
+  the authenticated download action.
+"""
+
+import csv
+import importlib.util
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from hotel_api.models import ExportJob, FinancialEntry, NightAudit
+
+logger = logging.getLogger("hotel_api")
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+EXPORTERS = {}
+
+
+def exporter(export_type):
+    """Register a function(params) -> Export under an export type."""
+
+    def register(func):
+        EXPORTERS[export_type] = func
+        return func
+
+    return register
+
+
+class Export:
+    """A file export: name, column headers and a lazy row iterator."""
+
+    def __init__(self, filename, headers, rows, title="Export", widths=None):
+        self.filename = filename
+        self.headers = headers
+        self.rows = rows
+        self.title = title
+        self.widths = widths or [15] * len(headers)
+        self.row_count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.row_count += 1
+            yield row
+
+
+def chunk_size():
+    return getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+
+
+def full_name(first_name, last_name):
+    """User.get_full_name() from values_list columns."""
+    return f"{first_name or ''} {last_name or ''}".strip()
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+
+
+class Echo:
+    """File-like object whose write() hands back the line csv.writer produced."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, chunk_rows=500):
+    """Encode rows as CSV, yielding UTF-8 bytes every chunk_rows rows."""
+    writer = csv.writer(Echo())
+    lines = []
+    for row in rows:
+        lines.append(writer.writerow(row))
+        if len(lines) >= chunk_rows:
+            yield "".join(lines).encode("utf-8")
+            lines = []
+    if lines:
+        yield "".join(lines).encode("utf-8")
+
+
+def _with_headers(export):
+    yield export.headers
+    yield from export
+
+
+def write_csv(export, fileobj):
+    for chunk in iter_csv(_with_headers(export)):
+        fileobj.write(chunk)
+
+
+def write_xlsx(export, fileobj):
+    """Write one sheet with a styled header row using a write-only workbook."""
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=export.title[:31])
+    for col, width in enumerate(export.widths, 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+    header_font = Font(bold=True)
+    header_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
+    header = []
+    for value in export.headers:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = header_font
+        cell.fill = header_fill
+        header.append(cell)
+    ws.append(header)
+
+    for row in export:
+        ws.append(row)
+    wb.save(fileobj)
+
+
+def xlsx_available():
+    return importlib.util.find_spec("openpyxl") is not None
+
+
+def csv_response(export):
+    response = StreamingHttpResponse(iter_csv(_with_headers(export)), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{export.filename}.csv"'
+    return response
+
+
+def xlsx_response(export):
+    # Rows go to disk as they are written; FileResponse streams the file and
+    # closes (deletes) it when the download finishes.
+    fileobj = tempfile.TemporaryFile()
+    write_xlsx(export, fileobj)
+    fileobj.seek(0)
+    return FileResponse(
+        fileobj,
+        as_attachment=True,
+        filename=f"{export.filename}.xlsx",
+        content_type=XLSX_CONTENT_TYPE,
+    )
+
+
+def export_response(export_type, params, file_format="csv"):
+    """Serve an export synchronously; xlsx falls back to CSV without openpyxl."""
+    export = EXPORTERS[export_type](params)
+    if file_format == ExportJob.Format.XLSX and xlsx_available():
+        return xlsx_response(export)
+    return csv_response(export)
+
+
+# ---------------------------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------------------------
+
+
+def filter_financial_entries(queryset, params):
+    """Apply the FinancialEntryViewSet query-param filters."""
+    entry_type = params.get("entry_type")
+    if entry_type:
+        queryset = queryset.filter(entry_type=entry_type)
+
+    category = params.get("category")
+    if category:
+        queryset = queryset.filter(category_id=category)
+
+    date_from = params.get("date_from")
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+
+    date_to = params.get("date_to")
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+
+    payment_method = params.get("payment_method")
+    if payment_method:
+        queryset = queryset.filter(payment_method=payment_method)
+
+    return queryset.order_by("-date", "-created_at")
+
+
+def filter_night_audits(queryset, params):
+    """Apply the NightAuditViewSet query-param filters."""
+    status_filter = params.get("status")
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+
+    date_from = params.get("date_from")
+    date_to = params.get("date_to")
+    if date_from:
+        queryset = queryset.filter(audit_date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(audit_date__lte=date_to)
+
+    return queryset.order_by("-audit_date")
+
+
+@exporter("financial_entries")
+def financial_entries_export(params):
+    entries = filter_financial_entries(FinancialEntry.objects.all(), params).values_list(
+        "date",
+        "entry_type",
+        "category__name",
+        "amount",
+        "payment_method",
+        "description",
+        "receipt_number",
+        "created_by__first_name",
+        "created_by__last_name",
+    )
+
+    def rows():
+        for (
+            day,
+            entry_type,
+            category,
+            amount,
+            payment_method,
+            description,
+            receipt_number,
+            first_name,
+            last_name,
+        ) in entries.iterator(chunk_size=chunk_size()):
+            yield [
+                day.isoformat(),
+                entry_type,
+                category or "",
+                amount,
+                payment_method,
+                description,
+                receipt_number,
+                full_name(first_name, last_name),
+            ]
+
+    return Export(
+        "financial_entries",
+        [
+            "Ngày",
+            "Loại",
+            "Danh mục",
+            "Số tiền",
+            "Phương thức thanh toán",
+            "Mô tả",
+            "Số tham chiếu",
+            "Người tạo",
+        ],
+        rows(),
+        title="Thu chi",
+        widths=[12, 10, 20, 15, 20, 40, 16, 20],
+    )
+
+
+@exporter("night_audits")
+def night_audits_export(params):
+    audits = filter_night_audits(NightAudit.objects.all(), params).values_list(
+        "audit_date",
+        "status",
+        "total_rooms",
+        "rooms_occupied",
+        "occupancy_rate",
+        "room_revenue",
+        "other_revenue",
+        "total_income",
+        "check_ins_today",
+        "check_outs_today",
+        "performed_by__first_name",
+        "performed_by__last_name",
+    )
+
+    def rows():
+        for values in audits.iterator(chunk_size=chunk_size()):
+            yield [values[0].isoformat(), *values[1:10], full_name(*values[10:])]
+
+    return Export(
+        "night_audits",
+        [
+            "Ngày",
+            "Trạng thái",
+            "Tổng phòng",
+            "Phòng có khách",
+            "Tỷ lệ lấp đầy (%)",
+            "Doanh thu phòng",
+            "Doanh thu khác",
+            "Tổng doanh thu",
+            "Check-in",
+            "Check-out",
+            "Người thực hiện",
+        ],
+        rows(),
+        title="Kiểm toán đêm",
+        widths=[12, 12, 12, 15, 17, 17, 16, 16, 10, 10, 20],
+    )
+
+
+# report_type -> (report view name, headers, row builder)
+REPORTS = {
+    "occupancy": (
+        "OccupancyReportView",
+        ["Date", "Total Rooms", "Occupied", "Available", "Occupancy %", "Revenue"],
+        lambda d: [
+            d.get("date") or d.get("period"),
+            d["total_rooms"],
+            d["occupied_rooms"],
+            d["available_rooms"],
+            d["occupancy_rate"],
+            d["revenue"],
+        ],
+    ),
+    "revenue": (
+        "RevenueReportView",
+        [
+            "Date",
+            "Room Revenue",
+            "Additional",
+            "Minibar",
+            "Total Revenue",
+            "Expenses",
+            "Net Profit",
+            "Margin %",
+        ],
+        lambda d: [
+            d.get("date") or d.get("period"),
+            d["room_revenue"],
+            d["additional_revenue"],
+            d["minibar_revenue"],
+            d["total_revenue"],
+            d["total_expenses"],
+            d["net_profit"],
+            d["profit_margin"],
+        ],
+    ),
+    "expenses": (
+        "ExpenseReportView",
+        ["Category", "Amount", "Transactions", "Percentage"],
+        lambda d: [
+            d["category_name"],
+            d["total_amount"],
+            d["transaction_count"],
+            d["percentage"],
+        ],
+    ),
+    "channels": (
+        "ChannelPerformanceView",
+        [
+            "Channel",
+            "Bookings",
+            "Nights",
+            "Revenue",
+            "Avg Rate",
+            "Cancellations",
+            "Cancel %",
+            "Revenue %",
+        ],
+        lambda d: [
+            d["source_display"],
+            d["booking_count"],
+            d["total_nights"],
+            d["total_revenue"],
+            d["average_rate"],
+            d["cancellation_count"],
+            d["cancellation_rate"],
+            d["percentage_of_revenue"],
+        ],
+    ),
+    "demographics": (
+        "GuestDemographicsView",
+        ["Group", "Guests", "Bookings", "Nights", "Revenue", "Percentage", "Avg Stay"],
+        lambda d: [
+            d["label"],
+            d["guest_count"],
+            d["booking_count"],
+            d["total_nights"],
+            d["total_revenue"],
+            d["percentage"],
+            d["average_stay"],
+        ],
+    ),
+}
+
+
+def report_request(params):
+    """A GET request carrying params, for calling report views outside a request."""
+    from django.http import HttpRequest, QueryDict
+
+    from rest_framework.request import Request
+
+    http_request = HttpRequest()
+    http_request.method = "GET"
+    http_request.GET = QueryDict(mutable=True)
+    for key, value in params.items():
+        http_request.GET[key] = value
+    return Request(http_request)
+
+
+@exporter("report")
+def report_export(params):
+    from hotel_api import views
+
+    report_type = params["report_type"]
+    view_name, headers, build_row = REPORTS[report_type]
+    view = getattr(views, view_name)()
+    view.request = request = report_request(params)
+    data = view.get(request).data.get("data", [])
+
+    return Export(
+        f"{report_type}_report_{params['start_date']}_{params['end_date']}",
+        headers,
+        (build_row(d) for d in data),
+        title=report_type.title(),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Export jobs
+# ---------------------------------------------------------------------------
+
+
+def start_export_job(user, export_type, params, file_format):
+    """Record an export job and queue it once the transaction commits."""
+    if export_type not in EXPORTERS:
+        raise ValueError(f"Unknown export type: {export_type}")
+
+    job = ExportJob.objects.create(
+        export_type=export_type,
+        params={key: params[key] for key in params if key != "mode"},
+        file_format=file_format,
+        created_by=user,
+    )
+    transaction.on_commit(lambda: dispatch_export_job(job.pk))
+    return job
+
+
+def dispatch_export_job(job_id):
+    """Queue the export task, running it inline if the broker is unreachable."""
+    from hotel_api.tasks import run_export_job as run_export_job_task
+
+    try:
+        run_export_job_task.delay(job_id)
+    except Exception as e:
+        logger.warning("EXPORT: could not queue job %s, running inline: %s", job_id, e)
+        run_export_job(job_id)
+
+
+def run_export_job(job_id):
+    """Write a pending job's file to export storage. Returns the job."""
+    claimed = ExportJob.objects.filter(pk=job_id, status=ExportJob.Status.PENDING).update(
+        status=ExportJob.Status.RUNNING
+    )
+    job = ExportJob.objects.get(pk=job_id)
+    if not claimed:
+        return job  # Already run by another worker
+
+    try:
+        export = EXPORTERS[job.export_type](job.params)
+        file_format = job.file_format
+        if file_format == ExportJob.Format.XLSX and not xlsx_available():
+            file_format = ExportJob.Format.CSV
+
+        with tempfile.TemporaryFile() as fileobj:
+            if file_format == ExportJob.Format.XLSX:
+                write_xlsx(export, fileobj)
+            else:
+                write_csv(export, fileobj)
+            fileobj.seek(0)
+            job.filename = f"{export.filename}.{file_format}"
+            job.file.save(job.filename, File(fileobj), save=False)
+
+        job.file_format = file_format
+        job.row_count = export.row_count
+        job.status = ExportJob.Status.DONE
+    except Exception as e:
+        logger.exception("EXPORT: job %s failed", job_id)
+        job.status = ExportJob.Status.FAILED
+        job.error = str(e)
+
+    job.completed_at = timezone.now()
+    job.save()
+    return job
+
+
+def purge_export_jobs(days=None):
+    """Delete jobs (and their files) older than EXPORT_JOB_RETENTION_DAYS."""
+    if days is None:
+        days = getattr(settings, "EXPORT_JOB_RETENTION_DAYS", 7)
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = 0
+    for job in ExportJob.objects.filter(created_at__lt=cutoff).iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        deleted += 1
+    return deleted
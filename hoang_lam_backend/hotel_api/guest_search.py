@@ -0,0 +1,283 @@
+"""
+Guest search for Hoang Lam Heritage Management.
+
+The front desk types names without diacritics ("nguyen van an" for
+"Nguyễn Văn An") and often only the last digits of a phone number, so guest
+lookup does not use icontains on the raw columns:
+
+- Guest.save() keeps two derived columns: `search_name`, the name folded to
+  lowercase ASCII-ish words (`fold`), and `phone_reversed`, the phone digits
+  reversed so a suffix lookup becomes an indexed prefix scan
+  (`phone_suffix_q`).
+- Names match when every query word is a substring of the folded name.
+
+Backends (chosen automatically, see `get_backend`):
+- postgresql: LIKE on `search_name`, served by a pg_trgm GIN index
+  (migration 0029), ranked by word_similarity()
+- ngram: an in-process trigram index over (id, search_name), rebuilt when the
+  guest table changes (SQLite / development)
+
+Rows changed without Guest.save() (queryset.update, raw SQL, imports) are
+re-folded with `python manage.py reindex_guest_search`.
+"""
+
+import re
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, FloatField, Func, Max, Q, Value
+from django.utils import timezone
+
+from hotel_api.models import Guest
+
+BACKENDS = ("postgresql", "ngram")
+
+# "Nguyễn" -> "nguyen"; đ/Đ has no decomposition and is mapped explicitly
+_STROKES = str.maketrans({"đ": "d", "Đ": "D", "ø": "o", "Ø": "O", "ł": "l", "Ł": "L"})
+_NON_WORD = re.compile(r"[\W_]+")
+_PHONE_QUERY = re.compile(r"[\d\s+().-]+")
+
+# Digits that identify a phone number regardless of trunk / country prefix
+MIN_PHONE_DIGITS = 3
+
+
+def fold(text):
+    """Lowercase, strip diacritics and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFD", (text or "").translate(_STROKES))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def digits(text):
+    return "".join(c for c in (text or "") if c.isdigit())
+
+
+def reverse_phone(phone):
+    return digits(phone)[::-1]
+
+
+def get_backend():
+    return "postgresql" if connection.vendor == "postgresql" else "ngram"
+
+
+def phone_suffix_q(number):
+    """
+    Guests whose phone ends with `number`.
+
+    phone_reversed starts with the reversed digits. PostgreSQL serves LIKE
+    'prefix%' from the varchar_pattern_ops index Django adds for db_index; a
+    range would follow the database collation, where "9" < ":" need not hold.
+    SQLite's case-insensitive LIKE skips the index, but it compares bytes, so
+    the half-open range is used there.
+    """
+    prefix = reverse_phone(number)
+    if connection.vendor == "postgresql":
+        return Q(phone_reversed__startswith=prefix)
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(phone_reversed__gte=prefix, phone_reversed__lt=upper)
+
+
+def _phone_q(query):
+    number = digits(query)
+    q = Q(phone__startswith=query) | phone_suffix_q(number)
+    # A full national number ("0901234567") also matches the stored
+    # international form ("+84901234567"): drop the trunk prefix
+    if len(number) >= 10 and number.startswith("0"):
+        q |= phone_suffix_q(number[1:])
+    return q
+
+
+def is_phone_query(query):
+    return bool(_PHONE_QUERY.fullmatch(query)) and len(digits(query)) >= MIN_PHONE_DIGITS
+
+
+# ==================== In-process n-gram index ====================
+
+
+def _trigrams(word):
+    return {word[i : i + 3] for i in range(len(word) - 2)}
+
+
+def _padded_trigrams(text):
+    """pg_trgm's trigram set: every word padded with two leading and one trailing space."""
+    grams = set()
+    for word in text.split():
+        grams |= _trigrams(f"  {word} ")
+    return grams
+
+
+def similarity(query, name):
+    """pg_trgm similarity(): shared trigrams over all trigrams of both strings."""
+    a, b = _padded_trigrams(query), _padded_trigrams(name)
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+class NgramIndex:
+    """
+    Trigram -> guest ids over folded names.
+
+    A query word of three or more characters narrows the candidates to the
+    ids holding all its trigrams; candidates are then confirmed by substring,
+    so lookups cost O(matching rows), not O(guests).
+    """
+
+    def __init__(self, rows=()):
+        self.names = {}
+        self.grams = {}
+        for pk, name in rows:
+            self.names[pk] = name
+            for word in name.split():
+                for gram in _trigrams(word):
+                    self.grams.setdefault(gram, set()).add(pk)
+
+    def search(self, folded):
+        """Return {guest id: similarity} for names containing every query word."""
+        words = folded.split()
+        if not words:
+            return {}
+
+        candidates = None
+        for word in words:
+            for gram in _trigrams(word):
+                ids = self.grams.get(gram, set())
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return {}
+        if candidates is None:
+            candidates = self.names  # Only words under three characters: scan
+
+        matches = {}
+        for pk in candidates:
+            name = self.names[pk]
+            if all(word in name for word in words):
+                matches[pk] = similarity(folded, name)
+        return matches
+
+
+class _IndexCache:
+    """The process-wide NgramIndex, rebuilt when the guest table has changed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._index = NgramIndex()
+
+    def get(self):
+        # Inserts and deletes move the count or max id, saves move updated_at
+        stamp = tuple(
+            Guest.objects.aggregate(
+                count=Count("id"), last_id=Max("id"), last_update=Max("updated_at")
+            ).values()
+        )
+        with self._lock:
+            if stamp != self._stamp:
+                rows = Guest.objects.values_list("id", "search_name").iterator(chunk_size=5000)
+                self._index = NgramIndex(rows)
+                self._stamp = stamp
+            return self._index
+
+    def clear(self):
+        with self._lock:
+            self._stamp = None
+            self._index = NgramIndex()
+
+
+ngram_index = _IndexCache()
+
+
+# ==================== Search ====================
+
+
+def search_q(query, search_by="all", backend=None):
+    """
+    Filter matching guests by name, phone or exact ID number.
+
+    Returns:
+        (Q, name_scores): name_scores maps guest id -> similarity for the ngram
+        backend, None otherwise
+    """
+    from hotel_api.encryption import hash_value
+
+    backend = backend or get_backend()
+    q = Q(pk__in=[])
+    name_scores = None
+
+    if search_by in ("all", "phone") and is_phone_query(query):
+        q |= _phone_q(query)
+    if search_by in ("all", "id_number"):
+        q |= Q(id_number_hash=hash_value(query))
+    folded = fold(query)
+    if search_by in ("all", "name") and folded and not is_phone_query(query):
+        if backend == "postgresql":
+            name_q = Q()
+            for word in folded.split():
+                name_q &= Q(search_name__contains=word)
+            q |= name_q
+        else:
+            name_scores = ngram_index.get().search(folded)
+            q |= Q(pk__in=list(name_scores))
+    return q, name_scores
+
+
+def search_guests(query, search_by="all", queryset=None, limit=None, backend=None):
+    """
+    Matching guests, best match first: closest names, then most recent.
+
+    Args:
+        limit: maximum results (default GUEST_SEARCH_LIMIT)
+
+    Returns:
+        list of Guest
+    """
+    backend = backend or get_backend()
+    if queryset is None:
+        queryset = Guest.objects.all()
+    if limit is None:
+        limit = getattr(settings, "GUEST_SEARCH_LIMIT", 50)
+
+    q, name_scores = search_q(query, search_by, backend)
+    queryset = queryset.filter(q)
+
+    if backend == "postgresql":
+        rank = Func(
+            Value(fold(query)),
+            F("search_name"),
+            function="word_similarity",
+            output_field=FloatField(),
+        )
+        return list(queryset.annotate(rank=rank).order_by("-rank", "-created_at")[:limit])
+
+    guests = sorted(
+        queryset.order_by("-created_at"), key=lambda g: -(name_scores or {}).get(g.pk, 0)
+    )
+    return guests[:limit]
+
+
+def reindex(queryset=None, batch_size=1000):
+    """
+    Recompute search_name / phone_reversed where stale. Returns the number of rows fixed.
+
+    Fixed rows also get a new updated_at, so other processes rebuild their n-gram index.
+    """
+    fields = ["search_name", "phone_reversed", "updated_at"]
+    queryset = Guest.objects.all() if queryset is None else queryset
+    rows = queryset.only("id", "full_name", "phone", *fields).iterator(chunk_size=batch_size)
+    stale = []
+    fixed = 0
+    for guest in rows:
+        search_name, phone_reversed = fold(guest.full_name), reverse_phone(guest.phone)
+        if (guest.search_name, guest.phone_reversed) != (search_name, phone_reversed):
+            guest.search_name, guest.phone_reversed = search_name, phone_reversed
+            guest.updated_at = timezone.now()
+            stale.append(guest)
+        if len(stale) >= batch_size:
+            Guest.objects.bulk_update(stale, fields)
+            fixed += len(stale)
+            stale = []
+    if stale:
+        Guest.objects.bulk_update(stale, fields)
+        fixed += len(stale)
+    ngram_index.clear()
+    return fixed
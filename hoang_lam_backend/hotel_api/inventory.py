@@ -0,0 +1,160 @@
+"""
+Room-night inventory ledger for Hoang Lam Heritage Management.
+
+Every night held by an active booking (confirmed or checked in) is stored as
+one RoomNight row, unique on (room, date). Availability and overlap checks
+become index lookups on the ledger instead of range scans over Booking, and
+the unique constraint rejects double-bookings at the database level.
+
+The ledger is maintained by Booking.save(). Bulk queryset updates that touch
+room, dates or status bypass it — run `rebuild_room_nights` after those.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+
+from hotel_api.models import Booking, RoomNight
+
+logger = logging.getLogger("hotel_api")
+
+# Booking statuses that hold rooms in the ledger
+ACTIVE_STATUSES = (Booking.Status.CONFIRMED, Booking.Status.CHECKED_IN)
+
+# Booking fields whose change requires a ledger resync
+LEDGER_FIELDS = frozenset({"room", "room_id", "check_in_date", "check_out_date", "status"})
+
+
+class RoomNightConflict(IntegrityError):
+    """Raised when a booking would occupy a room-night already held by another booking."""
+
+    def __init__(self, conflict=None):
+        self.conflict = conflict
+        if conflict is not None:
+            message = (
+                f"Room is already booked from {conflict.booking.check_in_date} "
+                f"to {conflict.booking.check_out_date}."
+            )
+        else:
+            message = "Room is already booked for the selected dates."
+        super().__init__(message)
+
+
+def night_dates(check_in_date, check_out_date):
+    """Return the list of nights covered by a stay (check-out day excluded)."""
+    return [check_in_date + timedelta(days=i) for i in range((check_out_date - check_in_date).days)]
+
+
+def find_conflict(room, check_in_date, check_out_date, exclude_booking=None):
+    """
+    Return the first ledger row blocking the room for the date range, or None.
+
+    Args:
+        room: Room instance or primary key
+        check_in_date: first night of the stay
+        check_out_date: departure date (not a night)
+        exclude_booking: Optional Booking (or pk) whose own nights are ignored
+    """
+    queryset = RoomNight.objects.filter(room=room, date__gte=check_in_date, date__lt=check_out_date)
+    if exclude_booking is not None:
+        queryset = queryset.exclude(booking=exclude_booking)
+    return queryset.select_related("booking").order_by("date").first()
+
+
+def booked_room_ids(check_in_date, check_out_date):
+    """Queryset of room IDs holding at least one night in the date range."""
+    return (
+        RoomNight.objects.filter(date__gte=check_in_date, date__lt=check_out_date)
+        .values_list("room_id", flat=True)
+        .distinct()
+    )
+
+
+def sync_room_nights(booking):
+    """
+    Bring the ledger rows of one booking in line with its current state.
+
+    Removes nights the booking no longer holds and inserts the missing ones.
+    Raises RoomNightConflict if another booking already holds one of them.
+    """
+    if booking.status not in ACTIVE_STATUSES or booking.check_out_date <= booking.check_in_date:
+        RoomNight.objects.filter(booking=booking).delete()
+        return
+
+    # Drop rows outside the current room/date range (swap-room, shortened stays)
+    RoomNight.objects.filter(booking=booking).exclude(
+        room_id=booking.room_id,
+        date__gte=booking.check_in_date,
+        date__lt=booking.check_out_date,
+    ).delete()
+
+    held = set(
+        RoomNight.objects.filter(booking=booking, room_id=booking.room_id).values_list(
+            "date", flat=True
+        )
+    )
+    missing = [
+        RoomNight(room_id=booking.room_id, date=night, booking=booking)
+        for night in night_dates(booking.check_in_date, booking.check_out_date)
+        if night not in held
+    ]
+    if not missing:
+        return
+
+    try:
+        # Savepoint so the conflict lookup below still works on PostgreSQL
+        with transaction.atomic():
+            RoomNight.objects.bulk_create(missing)
+    except IntegrityError:
+        raise RoomNightConflict(
+            find_conflict(
+                booking.room_id,
+                booking.check_in_date,
+                booking.check_out_date,
+                exclude_booking=booking,
+            )
+        )
+
+
+def rebuild_room_nights(batch_size=1000):
+    """
+    Rebuild the whole ledger from active bookings.
+
+    Bookings are processed in check-in order, so when legacy data contains
+    overlaps the earliest booking keeps the night and later ones are skipped.
+
+    Returns:
+        dict with `bookings`, `nights` (rows written) and `conflicts` (nights skipped)
+    """
+    with transaction.atomic():
+        RoomNight.objects.all().delete()
+
+        taken = set()
+        pending = []
+        nights = conflicts = 0
+        bookings = (
+            Booking.objects.filter(status__in=ACTIVE_STATUSES)
+            .order_by("check_in_date", "pk")
+            .values_list("pk", "room_id", "check_in_date", "check_out_date")
+        )
+        booking_count = 0
+        for pk, room_id, check_in_date, check_out_date in bookings.iterator(chunk_size=batch_size):
+            booking_count += 1
+            for night in night_dates(check_in_date, check_out_date):
+                if (room_id, night) in taken:
+                    conflicts += 1
+                    continue
+                taken.add((room_id, night))
+                pending.append(RoomNight(room_id=room_id, date=night, booking_id=pk))
+            if len(pending) >= batch_size:
+                RoomNight.objects.bulk_create(pending, batch_size=batch_size)
+                nights += len(pending)
+                pending = []
+        if pending:
+            RoomNight.objects.bulk_create(pending, batch_size=batch_size)
+            nights += len(pending)
+
+    if conflicts:
+        logger.warning("ROOM_NIGHTS: skipped %d overlapping night(s) during rebuild", conflicts)
+    return {"bookings": booking_count, "nights": nights, "conflicts": conflicts}
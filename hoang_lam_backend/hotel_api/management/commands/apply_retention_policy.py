@@ -5,11 +5,13 @@ Usage:
     python manage.py apply_retention_policy              # Apply all retention rules
     python manage.py apply_retention_policy --dry-run    # Preview without deleting
     python manage.py apply_retention_policy --model notification  # Only notifications
+    python manage.py apply_retention_policy --time-budget 600 --batch-size 5000
+    python manage.py apply_retention_policy --restart    # Ignore saved progress
 """
 
 from django.core.management.base import BaseCommand
 
-from hotel_api.retention import DATA_RETENTION_DAYS, apply_retention_policy
+from hotel_api.retention import DATA_RETENTION_DAYS, _get_retention_days, run_retention
 
 
 class Command(BaseCommand):
@@ -26,6 +28,26 @@ class Command(BaseCommand):
             type=str,
             help=f"Only process a specific model. Options: {', '.join(sorted(DATA_RETENTION_DAYS.keys()))}",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Rows deleted per batch (default: RETENTION_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            help="Seconds to pause between batches (default: RETENTION_BATCH_SLEEP)",
+        )
+        parser.add_argument(
+            "--time-budget",
+            type=int,
+            help="Stop after this many seconds; the next run resumes (default: RETENTION_TIME_BUDGET)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore progress saved by an unfinished run",
+        )
 
     def handle(self, *args, **options):
         dry_run = options["dry_run"]
@@ -43,15 +65,33 @@ class Command(BaseCommand):
         prefix = "[DRY RUN] " if dry_run else ""
         self.stdout.write(f"{prefix}Applying data retention policy...")
 
-        results = apply_retention_policy(dry_run=dry_run, model_filter=model_filter)
+        report = run_retention(
+            dry_run=dry_run,
+            model_filter=model_filter,
+            batch_size=options.get("batch_size"),
+            sleep=options.get("sleep"),
+            time_budget=options.get("time_budget"),
+            restart=options["restart"],
+        )
 
-        total = sum(results.values())
-        for model_name, count in results.items():
-            if count > 0:
-                retention = DATA_RETENTION_DAYS[model_name]
-                action = "Would delete" if dry_run else "Deleted"
-                self.stdout.write(
-                    f"  {action} {count} {model_name} record(s) " f"(retention: {retention} days)"
+        days = _get_retention_days()
+        total = sum(stats["deleted"] for stats in report.values())
+        for model_name, stats in report.items():
+            count = stats["deleted"]
+            if dry_run:
+                if count > 0:
+                    self.stdout.write(
+                        f"  Would delete {count} {model_name} record(s) "
+                        f"(retention: {days[model_name]} days)"
+                    )
+                continue
+            if count > 0 or not stats["complete"]:
+                line = (
+                    f"  Deleted {count} {model_name} record(s) in {stats['seconds']:.1f}s "
+                    f"({stats['rows_per_second']:.0f} rows/s, retention: {days[model_name]} days)"
                 )
+                if not stats["complete"]:
+                    line += " — unfinished, resumes next run"
+                self.stdout.write(line)
 
         self.stdout.write(self.style.SUCCESS(f"{prefix}Done. Total: {total} record(s) affected."))
@@ -0,0 +1,69 @@
+"""
+Management command to backfill the DailyHotelStats fact table.
+
+Defaults to the whole history: from the earliest booking, financial entry or
+minibar sale up to today. Rows in the range are recomputed and replaced.
+
+Usage:
+    python manage.py backfill_daily_stats
+    python manage.py backfill_daily_stats --start 2025-01-01 --end 2025-12-31
+    python manage.py backfill_daily_stats --chunk-days 7
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from hotel_api.models import Booking, FinancialEntry, MinibarSale
+from hotel_api.stats import refresh_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily KPI fact table for a date range"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="First date (YYYY-MM-DD)")
+        parser.add_argument("--end", type=date.fromisoformat, help="Last date (YYYY-MM-DD)")
+        parser.add_argument(
+            "--chunk-days",
+            type=int,
+            default=31,
+            help="Number of days recomputed per transaction (default: 31)",
+        )
+
+    def handle(self, *args, **options):
+        end_date = options["end"] or timezone.localdate()
+        start_date = options["start"] or self._earliest_date()
+        chunk_days = options["chunk_days"]
+
+        if start_date is None:
+            self.stdout.write(self.style.SUCCESS("Nothing to backfill."))
+            return
+        if start_date > end_date:
+            raise CommandError("--start must be on or before --end")
+        if chunk_days < 1:
+            raise CommandError("--chunk-days must be at least 1")
+
+        self.stdout.write(f"Backfilling daily stats from {start_date} to {end_date}...")
+
+        total_rows = 0
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+            rows = refresh_daily_stats(chunk_start, chunk_end)
+            total_rows += rows
+            self.stdout.write(f"  {chunk_start} → {chunk_end}: {rows} row(s)")
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {total_rows} row(s) written."))
+
+    def _earliest_date(self):
+        candidates = [
+            Booking.objects.aggregate(first=Min("check_in_date"))["first"],
+            FinancialEntry.objects.aggregate(first=Min("date"))["first"],
+            MinibarSale.objects.aggregate(first=Min("date"))["first"],
+        ]
+        candidates = [d for d in candidates if d is not None]
+        return min(candidates) if candidates else None
@@ -0,0 +1,102 @@
+"""
+Microbenchmark of the field-encryption work done by Guest.save().
+
+Compares the previous per-save crypto path (a new Fernet per call and a trial
+decryption to detect encrypted values) with the current one (cached cipher,
+token-prefix check, one decrypt or one encrypt per field). No database access.
+
+Usage:
+    python manage.py benchmark_guest_crypto
+    python manage.py benchmark_guest_crypto --iterations 5000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from hotel_api.encryption import hash_value, protect
+
+
+def _legacy_fernet(key):
+    return Fernet(key.encode())
+
+
+def _legacy_is_encrypted(key, value):
+    try:
+        _legacy_fernet(key).decrypt(value.encode())
+        return True
+    except (InvalidToken, ValueError, UnicodeDecodeError):
+        return False
+
+
+def _legacy_protect(key, value):
+    """Guest.save() field handling before the cipher was cached."""
+    already_encrypted = _legacy_is_encrypted(key, value)
+    if already_encrypted:
+        plaintext = _legacy_fernet(key).decrypt(value.encode()).decode()
+    else:
+        plaintext = value
+    hash_value(plaintext)
+    if not already_encrypted:
+        value = _legacy_fernet(key).encrypt(value.encode()).decode()
+    return value
+
+
+def _current_protect(value):
+    value, plaintext = protect(value)
+    hash_value(plaintext)
+    return value
+
+
+class Command(BaseCommand):
+    help = "Measure per-save encryption cost of Guest sensitive fields"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=2000,
+            help="Saves simulated per scenario (default: 2000)",
+        )
+
+    def _time(self, func, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - start) / iterations * 1_000_000
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        key = Fernet.generate_key().decode()
+        plain_id, plain_visa = "079201001234", "B1234567"
+
+        with override_settings(FIELD_ENCRYPTION_KEY=key, FIELD_ENCRYPTION_OLD_KEYS=""):
+            cipher_id = _current_protect(plain_id)
+            cipher_visa = _current_protect(plain_visa)
+
+            scenarios = [
+                ("new guest (plaintext fields)", plain_id, plain_visa),
+                ("update (encrypted fields)", cipher_id, cipher_visa),
+            ]
+            self.stdout.write(f"Per-save crypto cost, 2 fields, {iterations} iterations:")
+            for label, id_number, visa_number in scenarios:
+                before = self._time(
+                    lambda: (
+                        _legacy_protect(key, id_number),
+                        _legacy_protect(key, visa_number),
+                    ),
+                    iterations,
+                )
+                after = self._time(
+                    lambda: (_current_protect(id_number), _current_protect(visa_number)),
+                    iterations,
+                )
+                self.stdout.write(
+                    f"  {label}: before {before:.1f} µs, after {after:.1f} µs "
+                    f"({before / after:.1f}x)"
+                )
+
+        self.stdout.write(self.style.SUCCESS("Done."))
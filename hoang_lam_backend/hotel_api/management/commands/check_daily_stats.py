@@ -0,0 +1,68 @@
+"""
+Management command to verify the DailyHotelStats fact table.
+
+Recomputes the facts from Booking / FinancialEntry / MinibarSale and reports
+every stored value that differs. Defaults to the last 30 days.
+
+Usage:
+    python manage.py check_daily_stats
+    python manage.py check_daily_stats --start 2025-01-01 --end 2025-12-31
+    python manage.py check_daily_stats --fix    # Recompute mismatched dates
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from hotel_api.stats import check_daily_stats, date_runs, refresh_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Diff the daily KPI fact table against a raw recomputation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="First date (YYYY-MM-DD)")
+        parser.add_argument("--end", type=date.fromisoformat, help="Last date (YYYY-MM-DD)")
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Recompute the dates that have mismatches",
+        )
+
+    def handle(self, *args, **options):
+        end_date = options["end"] or timezone.localdate()
+        start_date = options["start"] or end_date - timedelta(days=29)
+        if start_date > end_date:
+            raise CommandError("--start must be on or before --end")
+
+        self.stdout.write(f"Checking daily stats from {start_date} to {end_date}...")
+
+        mismatches = check_daily_stats(start_date, end_date)
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("Done. Fact table is consistent."))
+            return
+
+        for item in mismatches:
+            scope = (
+                f"room_type={item['room_type']} source={item['source']}"
+                if item["room_type"]
+                else "total"
+            )
+            self.stdout.write(
+                f"  {item['date']} [{scope}] {item['field']}: "
+                f"stored={item['stored']} expected={item['expected']}"
+            )
+
+        dates = sorted({item["date"] for item in mismatches})
+        if options["fix"]:
+            for first, last in date_runs(dates):
+                refresh_daily_stats(first, last)
+            self.stdout.write(self.style.SUCCESS(f"Done. Recomputed {len(dates)} date(s)."))
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{len(mismatches)} mismatch(es) on {len(dates)} date(s). "
+                    "Run with --fix to recompute."
+                )
+            )
@@ -5,6 +5,7 @@ Run this after setting FIELD_ENCRYPTION_KEY in .env:
     python manage.py encrypt_guest_data
 
 This command is idempotent — already-encrypted values are skipped.
+For large tables or key rotation use rotate_guest_encryption instead.
 """
 
 from django.core.management.base import BaseCommand
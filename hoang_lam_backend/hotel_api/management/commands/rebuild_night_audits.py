@@ -0,0 +1,67 @@
+"""
+Management command to rebuild NightAudit rows for a date range.
+
+Use after a data correction: every date in the range gets fresh statistics
+from a single sweep over bookings and financial entries (see
+hotel_api/night_audit.py). Missing dates are created as drafts; closed audits
+are left untouched.
+
+Room status counts and pending payments have no history: only today's audit
+gets the live snapshot. Past dates take rooms occupied from their bookings
+and keep their stored available/cleaning/maintenance counts and pending
+payments (zero on newly created audits).
+
+Usage:
+    python manage.py rebuild_night_audits --start 2025-01-01
+    python manage.py rebuild_night_audits --start 2025-01-01 --end 2025-03-31
+    python manage.py rebuild_night_audits --start 2025-01-01 --existing-only
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from hotel_api.night_audit import rebuild_audits
+
+
+class Command(BaseCommand):
+    help = "Recompute night audits for a date range in one pass (closed audits are skipped)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start", type=date.fromisoformat, required=True, help="First date (YYYY-MM-DD)"
+        )
+        parser.add_argument(
+            "--end", type=date.fromisoformat, help="Last date (YYYY-MM-DD, default: today)"
+        )
+        parser.add_argument(
+            "--existing-only",
+            action="store_true",
+            help="Only recompute dates that already have an audit",
+        )
+
+    def handle(self, *args, **options):
+        start_date = options["start"]
+        end_date = options["end"] or timezone.localdate()
+
+        if start_date > end_date:
+            raise CommandError("--start must be on or before --end")
+        if end_date > timezone.localdate():
+            raise CommandError("--end cannot be in the future")
+
+        self.stdout.write(f"Rebuilding night audits from {start_date} to {end_date}...")
+
+        result = rebuild_audits(start_date, end_date, create_missing=not options["existing_only"])
+
+        timings = result["timings_ms"]
+        self.stdout.write(
+            f"  statistics {timings['statistics']}ms, write {timings['write']}ms, "
+            f"daily stats {timings['daily_stats']}ms"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done in {timings['total']}ms. {result['created']} created, "
+                f"{result['updated']} updated, {result['skipped_closed']} closed skipped."
+            )
+        )
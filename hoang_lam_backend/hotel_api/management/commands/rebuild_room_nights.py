@@ -0,0 +1,43 @@
+"""
+Management command to rebuild the room-night inventory ledger from bookings.
+
+Run after bulk data corrections that bypass Booking.save() (queryset.update(),
+raw SQL, fixture loads).
+
+Usage:
+    python manage.py rebuild_room_nights
+    python manage.py rebuild_room_nights --batch-size 5000
+"""
+
+from django.core.management.base import BaseCommand
+
+from hotel_api.inventory import rebuild_room_nights
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-room, per-night occupancy ledger from active bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of ledger rows inserted per query (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding room-night ledger...")
+
+        result = rebuild_room_nights(batch_size=options["batch_size"])
+
+        self.stdout.write(
+            f"  {result['nights']} night(s) written for {result['bookings']} active booking(s)"
+        )
+        if result["conflicts"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"  {result['conflicts']} overlapping night(s) skipped — "
+                    "review double-booked rooms"
+                )
+            )
+        self.stdout.write(self.style.SUCCESS("Done."))
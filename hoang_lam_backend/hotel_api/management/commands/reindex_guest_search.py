@@ -0,0 +1,30 @@
+"""
+Management command to refresh the guest search columns.
+
+Guest.save() keeps search_name (accent-folded name) and phone_reversed up to
+date; run this after changing guests without it — queryset.update(), raw SQL
+or a bulk import (see hotel_api/guest_search.py).
+
+Usage:
+    python manage.py reindex_guest_search
+"""
+
+from django.core.management.base import BaseCommand
+
+from hotel_api.guest_search import reindex
+
+
+class Command(BaseCommand):
+    help = "Recompute the accent-folded name and reversed phone used by guest search"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows per bulk_update statement (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        fixed = reindex(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Updated search columns of {fixed} guest(s)."))
@@ -0,0 +1,182 @@
+"""
+Re-encrypt guest sensitive fields under the current FIELD_ENCRYPTION_KEY.
+
+Use after key rotation (old key moved to FIELD_ENCRYPTION_OLD_KEYS) or to
+encrypt plaintext left from before encryption was enabled. Hashes are
+recomputed with the current HASH_PEPPER.
+
+Guests are read in primary-key order, chunk by chunk; chunks are encrypted in
+a process pool and the changed rows written back with bulk_update. After each
+chunk the last guest id is written to the checkpoint file, so an interrupted
+run resumes where it stopped. Rows already under the primary key are left as
+they are, so re-running is safe. Run it in a maintenance window: a guest
+edited between a chunk being read and written back would lose that edit.
+
+Usage:
+    python manage.py rotate_guest_encryption
+    python manage.py rotate_guest_encryption --workers 8 --chunk-size 5000
+    python manage.py rotate_guest_encryption --checkpoint /var/tmp/rotate.ckpt
+    python manage.py rotate_guest_encryption --restart
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from hotel_api.encryption import configured_keys, rotate_fields
+from hotel_api.models import Guest
+
+FIELDS = ("id_number", "id_number_hash", "visa_number", "visa_number_hash")
+
+
+class Command(BaseCommand):
+    help = "Re-encrypt guest id_number/visa_number under the current key, in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Guests read and encrypted per chunk (default: 1000)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows per bulk_update statement (default: 500)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Encryption processes; 0 encrypts in this process (default: CPU count)",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default="rotate_guest_encryption.checkpoint",
+            help="File holding the last processed guest id (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint and start from the first guest",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count rows that would change without writing them",
+        )
+
+    def handle(self, *args, **options):
+        keys = configured_keys()
+        if not keys:
+            raise CommandError("FIELD_ENCRYPTION_KEY is not set.")
+        pepper = getattr(settings, "HASH_PEPPER", "")
+
+        chunk_size = options["chunk_size"]
+        batch_size = options["batch_size"]
+        workers = options["workers"]
+        dry_run = options["dry_run"]
+        if chunk_size < 1 or batch_size < 1 or workers < 0:
+            raise CommandError("--chunk-size and --batch-size must be positive, --workers >= 0.")
+
+        checkpoint = Path(options["checkpoint"])
+        last_pk = 0
+        if checkpoint.exists() and not options["restart"]:
+            last_pk = int(checkpoint.read_text().strip() or 0)
+            self.stdout.write(f"Resuming after guest #{last_pk}")
+
+        remaining = Guest.objects.filter(pk__gt=last_pk).count()
+        self.stdout.write(f"Processing {remaining} guest(s) with {workers or 'no'} worker(s)...")
+
+        started = time.perf_counter()
+        scanned = updated = undecryptable = 0
+
+        executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+        try:
+            for chunk_last_pk, rows, (changed, failed) in self._results(
+                executor, workers, last_pk, chunk_size, keys, pepper
+            ):
+                if changed and not dry_run:
+                    with transaction.atomic():
+                        Guest.objects.bulk_update(
+                            [Guest(pk=row[0], **dict(zip(FIELDS, row[1:]))) for row in changed],
+                            FIELDS,
+                            batch_size=batch_size,
+                        )
+                if not dry_run:
+                    checkpoint.write_text(str(chunk_last_pk))
+
+                scanned += rows
+                updated += len(changed)
+                undecryptable += failed
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"  up to guest #{chunk_last_pk}: {scanned}/{remaining} scanned, "
+                    f"{updated} updated ({scanned / elapsed:.0f} rows/s)"
+                )
+        finally:
+            if executor:
+                executor.shutdown()
+
+        if not dry_run and checkpoint.exists():
+            checkpoint.unlink()
+
+        elapsed = time.perf_counter() - started
+        rate = scanned / elapsed if elapsed else 0
+        prefix = "[DRY RUN] " if dry_run else ""
+        if undecryptable:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{undecryptable} value(s) could not be decrypted with any configured key "
+                    "and were left unchanged."
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}Done. Scanned: {scanned}, Updated: {updated}, "
+                f"Time: {elapsed:.1f}s ({rate:.0f} rows/s)"
+            )
+        )
+
+    def _chunks(self, last_pk, chunk_size):
+        """Keyset-paginated chunks of (pk, *FIELDS) rows."""
+        while True:
+            rows = list(
+                Guest.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", *FIELDS)[:chunk_size]
+            )
+            if not rows:
+                return
+            last_pk = rows[-1][0]
+            yield rows
+
+    def _results(self, executor, workers, last_pk, chunk_size, keys, pepper):
+        """
+        Yield (last_pk, row_count, rotate_fields result) per chunk, in pk order.
+
+        Keeps at most two chunks per worker in flight so memory stays bounded.
+        """
+        if executor is None:
+            for rows in self._chunks(last_pk, chunk_size):
+                yield rows[-1][0], len(rows), rotate_fields(rows, keys, pepper)
+            return
+
+        pending = deque()
+        for rows in self._chunks(last_pk, chunk_size):
+            pending.append(
+                (rows[-1][0], len(rows), executor.submit(rotate_fields, rows, keys, pepper))
+            )
+            if len(pending) >= workers * 2:
+                chunk_last_pk, count, future = pending.popleft()
+                yield chunk_last_pk, count, future.result()
+        while pending:
+            chunk_last_pk, count, future = pending.popleft()
+            yield chunk_last_pk, count, future.result()
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:00
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_room_nights(apps, schema_editor):
+    """Populate the ledger from confirmed/checked-in bookings (earliest wins on overlap)."""
+    Booking = apps.get_model("hotel_api", "Booking")
+    RoomNight = apps.get_model("hotel_api", "RoomNight")
+
+    taken = set()
+    nights = []
+    bookings = (
+        Booking.objects.filter(status__in=["confirmed", "checked_in"])
+        .order_by("check_in_date", "pk")
+        .values_list("pk", "room_id", "check_in_date", "check_out_date")
+    )
+    for pk, room_id, check_in_date, check_out_date in bookings.iterator():
+        for i in range((check_out_date - check_in_date).days):
+            night = check_in_date + timedelta(days=i)
+            if (room_id, night) in taken:
+                continue
+            taken.add((room_id, night))
+            nights.append(RoomNight(room_id=room_id, date=night, booking_id=pk))
+    RoomNight.objects.bulk_create(nights, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0021_add_indexes_and_constraints"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoomNight",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Đêm")),
+                (
+                    "booking",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="room_nights",
+                        to="hotel_api.booking",
+                        verbose_name="Đặt phòng",
+                    ),
+                ),
+                (
+                    "room",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="nights",
+                        to="hotel_api.room",
+                        verbose_name="Phòng",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Đêm phòng",
+                "verbose_name_plural": "Đêm phòng",
+                "ordering": ["date", "room"],
+                "indexes": [
+                    models.Index(fields=["date", "room"], name="hotel_api_r_date_1ff0e9_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(fields=("room", "date"), name="unique_room_night")
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_room_nights, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0022_room_night_ledger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyHotelStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Ngày")),
+                (
+                    "source",
+                    models.CharField(blank=True, default="", max_length=20, verbose_name="Nguồn"),
+                ),
+                ("total_rooms", models.PositiveIntegerField(default=0, verbose_name="Tổng phòng")),
+                (
+                    "rooms_sold",
+                    models.PositiveIntegerField(default=0, verbose_name="Đêm phòng đã bán"),
+                ),
+                (
+                    "room_revenue",
+                    models.DecimalField(
+                        decimal_places=0, default=0, max_digits=15, verbose_name="Doanh thu phòng"
+                    ),
+                ),
+                ("arrivals", models.PositiveIntegerField(default=0, verbose_name="Lượt đến")),
+                (
+                    "total_income",
+                    models.DecimalField(
+                        decimal_places=0, default=0, max_digits=15, verbose_name="Tổng thu"
+                    ),
+                ),
+                (
+                    "total_expense",
+                    models.DecimalField(
+                        decimal_places=0, default=0, max_digits=15, verbose_name="Tổng chi"
+                    ),
+                ),
+                (
+                    "minibar_revenue",
+                    models.DecimalField(
+                        decimal_places=0, default=0, max_digits=15, verbose_name="Doanh thu minibar"
+                    ),
+                ),
+                ("computed_at", models.DateTimeField(auto_now=True, verbose_name="Tính lúc")),
+                (
+                    "room_type",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="hotel_api.roomtype",
+                        verbose_name="Loại phòng",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Thống kê ngày",
+                "verbose_name_plural": "Thống kê ngày",
+                "ordering": ["date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("room_type__isnull", True), ("source", "")),
+                        fields=("date",),
+                        name="unique_daily_stats_total",
+                    ),
+                    models.UniqueConstraint(
+                        fields=("date", "room_type", "source"), name="unique_daily_stats_breakdown"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0023_daily_hotel_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyStatsDirtyDate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("date", models.DateField(unique=True, verbose_name="Ngày")),
+                (
+                    "marked_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Đánh dấu lúc"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ngày cần tính lại thống kê",
+                "verbose_name_plural": "Ngày cần tính lại thống kê",
+                "ordering": ["date"],
+            },
+        ),
+    ]
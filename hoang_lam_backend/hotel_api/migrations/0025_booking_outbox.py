@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0024_daily_stats_dirty_queue"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("event_type", models.CharField(max_length=50, verbose_name="Loại sự kiện")),
+                ("payload", models.JSONField(blank=True, default=dict, verbose_name="Dữ liệu")),
+                (
+                    "idempotency_key",
+                    models.CharField(max_length=200, unique=True, verbose_name="Khóa idempotency"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Chờ xử lý"),
+                            ("done", "Hoàn thành"),
+                            ("failed", "Thất bại"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="Trạng thái",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(default=0, verbose_name="Số lần thử"),
+                ),
+                (
+                    "available_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Xử lý từ"
+                    ),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="Lỗi gần nhất")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "processed_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Xử lý lúc"),
+                ),
+            ],
+            options={
+                "verbose_name": "Sự kiện outbox",
+                "verbose_name_plural": "Sự kiện outbox",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "available_at"], name="hotel_api_o_status_2b6422_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0025_booking_outbox"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("export_type", models.CharField(max_length=50, verbose_name="Loại xuất")),
+                ("params", models.JSONField(blank=True, default=dict, verbose_name="Tham số")),
+                (
+                    "file_format",
+                    models.CharField(
+                        choices=[("csv", "CSV"), ("xlsx", "Excel")],
+                        default="csv",
+                        max_length=10,
+                        verbose_name="Định dạng",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Chờ xử lý"),
+                            ("running", "Đang xử lý"),
+                            ("done", "Hoàn thành"),
+                            ("failed", "Thất bại"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="Trạng thái",
+                    ),
+                ),
+                (
+                    "file",
+                    models.FileField(blank=True, upload_to="exports/%Y/%m/", verbose_name="Tệp"),
+                ),
+                ("row_count", models.PositiveIntegerField(default=0, verbose_name="Số dòng")),
+                ("error", models.TextField(blank=True, verbose_name="Lỗi")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "completed_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Hoàn thành lúc"),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="export_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Người yêu cầu",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tác vụ xuất dữ liệu",
+                "verbose_name_plural": "Tác vụ xuất dữ liệu",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
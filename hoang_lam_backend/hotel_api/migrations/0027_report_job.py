@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0026_export_job"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("report_type", models.CharField(max_length=30, verbose_name="Loại báo cáo")),
+                ("params", models.JSONField(blank=True, default=dict, verbose_name="Tham số")),
+                ("params_hash", models.CharField(max_length=64, verbose_name="Mã tham số")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Chờ xử lý"),
+                            ("running", "Đang xử lý"),
+                            ("done", "Hoàn thành"),
+                            ("failed", "Thất bại"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="Trạng thái",
+                    ),
+                ),
+                ("result", models.JSONField(blank=True, null=True, verbose_name="Kết quả")),
+                ("error", models.TextField(blank=True, verbose_name="Lỗi")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "started_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Bắt đầu lúc"),
+                ),
+                (
+                    "completed_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Hoàn thành lúc"),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="report_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Người yêu cầu",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tác vụ báo cáo",
+                "verbose_name_plural": "Tác vụ báo cáo",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["params_hash", "status", "completed_at"],
+                        name="hotel_api_r_params__982058_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:36
+
+import django.db.models.functions.datetime
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0027_report_job"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["check_out_date", "status"], name="hotel_api_b_check_o_af9f5c_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                django.db.models.functions.datetime.TruncDate("created_at"),
+                name="booking_created_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                django.db.models.functions.datetime.TruncDate("updated_at"),
+                models.F("status"),
+                name="booking_updated_date_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:14
+
+from django.db import migrations, models
+
+TRIGRAM_INDEX = "guest_search_name_trgm_idx"
+
+
+def backfill_search_columns(apps, schema_editor):
+    from hotel_api.guest_search import fold, reverse_phone
+
+    Guest = apps.get_model("hotel_api", "Guest")
+    batch = []
+    for guest in Guest.objects.only("id", "full_name", "phone").iterator(chunk_size=1000):
+        guest.search_name = fold(guest.full_name)
+        guest.phone_reversed = reverse_phone(guest.phone)
+        batch.append(guest)
+        if len(batch) >= 1000:
+            Guest.objects.bulk_update(batch, ["search_name", "phone_reversed"])
+            batch = []
+    if batch:
+        Guest.objects.bulk_update(batch, ["search_name", "phone_reversed"])
+
+
+def create_trigram_index(apps, schema_editor):
+    """pg_trgm GIN index for LIKE '%word%' on search_name (PostgreSQL only)."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = schema_editor.quote_name(apps.get_model("hotel_api", "Guest")._meta.db_table)
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON {table} "
+        "USING gin (search_name gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0028_night_audit_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="guest",
+            name="phone_reversed",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default="",
+                editable=False,
+                max_length=20,
+                verbose_name="Số điện thoại đảo ngược",
+            ),
+        ),
+        migrations.AddField(
+            model_name="guest",
+            name="search_name",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=100, verbose_name="Tên không dấu"
+            ),
+        ),
+        migrations.RunPython(backfill_search_columns, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0029_guest_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sensitivedataaccesslog",
+            name="entry_id",
+            field=models.UUIDField(
+                blank=True, editable=False, null=True, unique=True, verbose_name="Mã bản ghi"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="sensitivedataaccesslog",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name="Thời gian"),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0030_sensitive_access_log_entry_id"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="notification",
+            name="hotel_api_n_recipie_d9b0a9_idx",
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(fields=["-created_at", "-id"], name="auditlog_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="financialentry",
+            index=models.Index(fields=["-date", "-id"], name="financialentry_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="guestmessage",
+            index=models.Index(fields=["-created_at", "-id"], name="guestmessage_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["recipient", "-created_at", "-id"], name="notification_keyset_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sensitivedataaccesslog",
+            index=models.Index(fields=["-timestamp", "-id"], name="sensitiveaccess_keyset_idx"),
+        ),
+    ]
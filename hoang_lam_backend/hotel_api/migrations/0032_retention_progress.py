@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0031_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RetentionProgress",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "model_name",
+                    models.CharField(max_length=50, unique=True, verbose_name="Loại dữ liệu"),
+                ),
+                ("cutoff", models.DateTimeField(verbose_name="Mốc thời gian xóa")),
+                ("last_pk", models.BigIntegerField(default=0, verbose_name="Khóa chính cuối cùng")),
+                (
+                    "deleted",
+                    models.PositiveBigIntegerField(default=0, verbose_name="Số bản ghi đã xóa"),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Bắt đầu lúc"
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "completed_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Hoàn thành lúc"),
+                ),
+            ],
+            options={
+                "verbose_name": "Tiến độ xóa dữ liệu hết hạn",
+                "verbose_name_plural": "Tiến độ xóa dữ liệu hết hạn",
+                "ordering": ["model_name"],
+            },
+        ),
+    ]
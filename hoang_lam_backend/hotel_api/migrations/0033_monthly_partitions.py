@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:10
+
+from django.db import migrations
+
+# Model name -> partition column; see hotel_api/partitions.py
+PARTITIONED = {
+    "AuditLog": "created_at",
+    "SensitiveDataAccessLog": "timestamp",
+    "Notification": "created_at",
+    "GuestMessage": "created_at",
+}
+
+
+def partition_tables(apps, schema_editor):
+    """Rebuild the append-only tables as monthly partitions (PostgreSQL only)."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    from hotel_api.partitions import partition_table
+
+    for model_name, column in PARTITIONED.items():
+        partition_table(schema_editor, apps.get_model("hotel_api", model_name), column)
+
+
+def unpartition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    from hotel_api.partitions import unpartition_table
+
+    for model_name, column in PARTITIONED.items():
+        unpartition_table(schema_editor, apps.get_model("hotel_api", model_name), column)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0032_retention_progress"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:10
+
+from django.db import migrations, models
+
+
+def seed_payment_counters(apps, schema_editor):
+    """Start each day's counter after the highest PMT-YYYYMMDD-NNNN already issued."""
+    from hotel_api.numbering import SCHEMES
+
+    Payment = apps.get_model("hotel_api", "Payment")
+    DocumentCounter = apps.get_model("hotel_api", "DocumentCounter")
+    scheme = SCHEMES["payment"]
+    highest = {}
+    numbers = Payment.objects.filter(receipt_number__startswith=f"{scheme.prefix}-")
+    for number in numbers.values_list("receipt_number", flat=True).iterator(chunk_size=2000):
+        parsed = scheme.parse(number)
+        if parsed:
+            period, value = parsed
+            highest[period] = max(value, highest.get(period, 0))
+    DocumentCounter.objects.bulk_create(
+        DocumentCounter(scheme="payment", period=period, value=value)
+        for period, value in highest.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0033_monthly_partitions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="receipt_number",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=50,
+                null=True,
+                unique=True,
+                verbose_name="Số hóa đơn",
+            ),
+        ),
+        migrations.CreateModel(
+            name="DocumentCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("scheme", models.CharField(max_length=30, verbose_name="Loại chứng từ")),
+                ("period", models.CharField(max_length=20, verbose_name="Kỳ")),
+                ("value", models.PositiveBigIntegerField(default=0, verbose_name="Số cuối cùng")),
+            ],
+            options={
+                "verbose_name": "Bộ đếm số chứng từ",
+                "verbose_name_plural": "Bộ đếm số chứng từ",
+                "ordering": ["scheme", "-period"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("scheme", "period"), name="unique_document_counter"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(seed_payment_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:37
+
+import os
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+import hotel_api.models
+
+
+def move_export_files(apps, schema_editor):
+    """Move finished export files out of public media storage, under random names."""
+    ExportJob = apps.get_model("hotel_api", "ExportJob")
+    storage = hotel_api.models.ExportStorage()
+    for job in ExportJob.objects.exclude(file="").iterator():
+        old_name = job.file.name
+        if not default_storage.exists(old_name):
+            continue
+        filename = os.path.basename(old_name)
+        with default_storage.open(old_name, "rb") as fileobj:
+            new_name = storage.save(hotel_api.models.export_upload_to(job, filename), fileobj)
+        default_storage.delete(old_name)
+        ExportJob.objects.filter(pk=job.pk).update(file=new_name, filename=filename)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0034_document_numbering"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportjob",
+            name="filename",
+            field=models.CharField(blank=True, max_length=255, verbose_name="Tên tệp tải về"),
+        ),
+        migrations.AlterField(
+            model_name="exportjob",
+            name="file",
+            field=models.FileField(
+                blank=True,
+                storage=hotel_api.models.ExportStorage(),
+                upload_to=hotel_api.models.export_upload_to,
+                verbose_name="Tệp",
+            ),
+        ),
+        migrations.RunPython(move_export_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel_api", "0035_export_private_storage"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reportjob",
+            name="subscribers",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="subscribed_report_jobs",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Người chờ kết quả",
+            ),
+        ),
+    ]
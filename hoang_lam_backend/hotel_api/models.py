@@ -4,23 +4,32 @@ Data models for Hoang Lam Heritage Management.
 Models:
 - Room, RoomType: Room inventory and configuration
 - Booking: Guest reservations
+- RoomNight: Per-night room occupancy ledger
 - FinancialEntry, FinancialCategory: Income and expense tracking
 - HotelUser: User profiles with roles
 - HousekeepingTask: Room cleaning tasks
 - MinibarItem, MinibarSale: Minibar inventory and sales
 - ExchangeRate: Currency conversion
+- DailyHotelStats: Precomputed daily KPI fact table for reports
+- DailyStatsDirtyDate: Queue of dates whose KPI facts need recomputing
 - Notification: Push notification records
 - DeviceToken: FCM device tokens
 - MessageTemplate: Guest message templates (Phase 5)
 - GuestMessage: Guest communication records (Phase 5)
 """
 
+import os
+import uuid
 from decimal import Decimal
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.functions import TruncDate
+from django.utils import timezone
 
 
 def validate_image_file(value):
@@ -285,6 +294,19 @@ class Guest(models.Model):
     first_stay = models.DateField(null=True, blank=True, verbose_name="Lần đầu ở")
     last_stay = models.DateField(null=True, blank=True, verbose_name="Lần cuối ở")
 
+    # Search columns, derived on save (hotel_api/guest_search.py)
+    search_name = models.CharField(
+        max_length=100, blank=True, default="", editable=False, verbose_name="Tên không dấu"
+    )
+    phone_reversed = models.CharField(
+        max_length=20,
+        blank=True,
+        default="",
+        editable=False,
+        db_index=True,
+        verbose_name="Số điện thoại đảo ngược",
+    )
+
     # Audit
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -302,25 +324,31 @@ class Guest(models.Model):
         return f"{self.full_name} - {self.phone}"
 
     def save(self, *args, **kwargs):
-        from hotel_api.encryption import decrypt, encrypt, hash_value, is_encrypted
+        from hotel_api.encryption import hash_value, protect
+        from hotel_api.guest_search import fold, reverse_phone
+
+        # Accent-folded name and reversed phone digits for guest search
+        self.search_name = fold(self.full_name)
+        self.phone_reversed = reverse_phone(self.phone)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            derived = {"full_name": "search_name", "phone": "phone_reversed"}
+            kwargs["update_fields"] = {
+                *update_fields,
+                *(derived[name] for name in update_fields if name in derived),
+            }
 
         # Encrypt id_number and compute hash from plaintext
         if self.id_number:
-            already_encrypted = is_encrypted(self.id_number)
-            plaintext = decrypt(self.id_number) if already_encrypted else self.id_number
+            self.id_number, plaintext = protect(self.id_number)
             self.id_number_hash = hash_value(plaintext)
-            if not already_encrypted:
-                self.id_number = encrypt(self.id_number)
         else:
             self.id_number_hash = None
 
         # Encrypt visa_number and compute hash from plaintext
         if self.visa_number:
-            already_encrypted = is_encrypted(self.visa_number)
-            plaintext = decrypt(self.visa_number) if already_encrypted else self.visa_number
+            self.visa_number, plaintext = protect(self.visa_number)
             self.visa_number_hash = hash_value(plaintext)
-            if not already_encrypted:
-                self.visa_number = encrypt(self.visa_number)
         else:
             self.visa_number_hash = ""
 
@@ -534,6 +562,11 @@ class Booking(models.Model):
         null=True, blank=True, verbose_name="Thời gian khai báo"
     )
 
+    # Receipt (INV-YYYYMMDD-NNNN), assigned when the receipt is first issued
+    receipt_number = models.CharField(
+        max_length=50, blank=True, null=True, unique=True, editable=False, verbose_name="Số hóa đơn"
+    )
+
     # Notes and metadata
     notes = models.TextField(blank=True, verbose_name="Ghi chú")
     special_requests = models.TextField(blank=True, verbose_name="Yêu cầu đặc biệt")
@@ -563,6 +596,10 @@ class Booking(models.Model):
             models.Index(fields=["status", "room"]),
             models.Index(fields=["guest", "check_in_date"]),
             models.Index(fields=["-created_at"]),
+            # Night audit: departures, bookings made and cancelled on a (local) date
+            models.Index(fields=["check_out_date", "status"]),
+            models.Index(TruncDate("created_at"), name="booking_created_date_idx"),
+            models.Index(TruncDate("updated_at"), "status", name="booking_updated_date_idx"),
         ]
 
     def __str__(self):
@@ -590,6 +627,48 @@ class Booking(models.Model):
         """Check if this is an hourly booking"""
         return self.booking_type == self.BookingType.HOURLY
 
+    def save(self, *args, **kwargs):
+        from django.db import transaction
+
+        from hotel_api.inventory import LEDGER_FIELDS, sync_room_nights
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not LEDGER_FIELDS.intersection(update_fields):
+            super().save(*args, **kwargs)
+            return
+
+        # Keep the room-night ledger in step with the booking row. The unique
+        # (room, date) constraint rolls the booking back on a double-booking.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            sync_room_nights(self)
+
+
+class RoomNight(models.Model):
+    """Per-room, per-night occupancy ledger derived from active bookings"""
+
+    room = models.ForeignKey(
+        Room, on_delete=models.CASCADE, related_name="nights", verbose_name="Phòng"
+    )
+    date = models.DateField(verbose_name="Đêm")
+    booking = models.ForeignKey(
+        Booking, on_delete=models.CASCADE, related_name="room_nights", verbose_name="Đặt phòng"
+    )
+
+    class Meta:
+        verbose_name = "Đêm phòng"
+        verbose_name_plural = "Đêm phòng"
+        ordering = ["date", "room"]
+        constraints = [
+            models.UniqueConstraint(fields=["room", "date"], name="unique_room_night"),
+        ]
+        indexes = [
+            models.Index(fields=["date", "room"]),
+        ]
+
+    def __str__(self):
+        return f"{self.room_id} - {self.date} (booking {self.booking_id})"
+
 
 class FinancialCategory(models.Model):
     """Categories for income and expenses"""
@@ -692,6 +771,7 @@ class FinancialEntry(models.Model):
             models.Index(fields=["date", "entry_type"]),
             models.Index(fields=["category", "date"]),
             models.Index(fields=["payment_method"]),
+            models.Index(fields=["-date", "-id"], name="financialentry_keyset_idx"),
         ]
 
     def __str__(self):
@@ -803,25 +883,21 @@ class Payment(models.Model):
         if not self.receipt_number:
             self.receipt_number = None
 
-        # Generate receipt number for completed payments
+        # Generate receipt number (PMT-YYYYMMDD-NNNN) for completed payments,
+        # in the transaction of the INSERT so a failed save returns the number
         if self.receipt_number is None and self.status == self.Status.COMPLETED:
-            from django.utils import timezone
-
-            today = timezone.now()
-            date_str = today.strftime("%Y%m%d")
-            prefix = f"PMT-{date_str}-"
-            # Find the highest existing sequence number for today
-            last = (
-                Payment.objects.filter(receipt_number__startswith=prefix)
-                .order_by("-receipt_number")
-                .values_list("receipt_number", flat=True)
-                .first()
-            )
-            if last:
-                seq = int(last.split("-")[-1]) + 1
-            else:
-                seq = 1
-            self.receipt_number = f"{prefix}{seq:04d}"
+            from django.db import transaction
+
+            from hotel_api.numbering import next_number
+
+            try:
+                with transaction.atomic():
+                    self.receipt_number = next_number("payment")
+                    super().save(*args, **kwargs)
+            except Exception:
+                self.receipt_number = None
+                raise
+            return
         super().save(*args, **kwargs)
 
 
@@ -1359,111 +1435,19 @@ class NightAudit(models.Model):
         return f"Night Audit - {self.audit_date} ({self.get_status_display()})"
 
     def calculate_statistics(self):
-        """Calculate all statistics for this audit date"""
-        from django.db.models import Count, Q, Sum
-
-        audit_date = self.audit_date
-
-        # Room statistics
-        room_stats = Room.objects.filter(is_active=True).aggregate(
-            total=Count("id"),
-            occupied=Count("id", filter=Q(status=Room.Status.OCCUPIED)),
-            available=Count("id", filter=Q(status=Room.Status.AVAILABLE)),
-            cleaning=Count("id", filter=Q(status=Room.Status.CLEANING)),
-            maintenance=Count("id", filter=Q(status=Room.Status.MAINTENANCE)),
-        )
-        self.total_rooms = room_stats["total"] or 0
-        self.rooms_occupied = room_stats["occupied"] or 0
-        self.rooms_available = room_stats["available"] or 0
-        self.rooms_cleaning = room_stats["cleaning"] or 0
-        self.rooms_maintenance = room_stats["maintenance"] or 0
-
-        if self.total_rooms > 0:
-            self.occupancy_rate = (self.rooms_occupied / self.total_rooms) * 100
-        else:
-            self.occupancy_rate = 0
-
-        # Booking statistics
-        booking_stats = Booking.objects.filter(
-            Q(check_in_date=audit_date)
-            | Q(check_out_date=audit_date)
-            | Q(created_at__date=audit_date)
-        ).aggregate(
-            check_ins=Count(
-                "id", filter=Q(check_in_date=audit_date, status=Booking.Status.CHECKED_IN)
-            ),
-            check_outs=Count(
-                "id", filter=Q(check_out_date=audit_date, status=Booking.Status.CHECKED_OUT)
-            ),
-            no_shows=Count("id", filter=Q(check_in_date=audit_date, status=Booking.Status.NO_SHOW)),
-            cancellations=Count(
-                "id", filter=Q(status=Booking.Status.CANCELLED, updated_at__date=audit_date)
-            ),
-            new_bookings=Count("id", filter=Q(created_at__date=audit_date)),
-        )
-        self.check_ins_today = booking_stats["check_ins"] or 0
-        self.check_outs_today = booking_stats["check_outs"] or 0
-        self.no_shows = booking_stats["no_shows"] or 0
-        self.cancellations = booking_stats["cancellations"] or 0
-        self.new_bookings = booking_stats["new_bookings"] or 0
-
-        # Financial statistics from FinancialEntry
-        financial_stats = FinancialEntry.objects.filter(date=audit_date).aggregate(
-            total_income=Sum("amount", filter=Q(entry_type=FinancialEntry.EntryType.INCOME)),
-            total_expense=Sum("amount", filter=Q(entry_type=FinancialEntry.EntryType.EXPENSE)),
-            cash=Sum(
-                "amount",
-                filter=Q(
-                    entry_type=FinancialEntry.EntryType.INCOME,
-                    payment_method=Booking.PaymentMethod.CASH,
-                ),
-            ),
-            bank_transfer=Sum(
-                "amount",
-                filter=Q(
-                    entry_type=FinancialEntry.EntryType.INCOME,
-                    payment_method=Booking.PaymentMethod.BANK_TRANSFER,
-                ),
-            ),
-            momo=Sum(
-                "amount",
-                filter=Q(
-                    entry_type=FinancialEntry.EntryType.INCOME,
-                    payment_method=Booking.PaymentMethod.MOMO,
-                ),
-            ),
-        )
-        self.total_income = financial_stats["total_income"] or 0
-        self.total_expense = financial_stats["total_expense"] or 0
-        self.cash_collected = financial_stats["cash"] or 0
-        self.bank_transfer_collected = financial_stats["bank_transfer"] or 0
-        self.momo_collected = financial_stats["momo"] or 0
-        self.other_payments = (
-            self.total_income
-            - self.cash_collected
-            - self.bank_transfer_collected
-            - self.momo_collected
-        )
+        """
+        Calculate all statistics for this audit date.
 
-        # Room revenue from bookings checked out today
-        room_revenue = Booking.objects.filter(
-            check_out_date=audit_date,
-            status=Booking.Status.CHECKED_OUT,
-        ).aggregate(total=Sum("total_amount"))
-        self.room_revenue = room_revenue["total"] or 0
-        self.other_revenue = self.total_income - self.room_revenue
-        self.net_revenue = self.total_income - self.total_expense
-
-        # Pending payments - bookings that are checked in but not fully paid
-        pending = Booking.objects.filter(
-            status=Booking.Status.CHECKED_IN,
-            is_paid=False,
-        ).aggregate(
-            total=Sum("total_amount"),
-            count=Count("id"),
-        )
-        self.pending_payments = pending["total"] or 0
-        self.unpaid_bookings_count = pending["count"] or 0
+        See hotel_api/night_audit.py; rebuild_audits does a whole range at once.
+        """
+        from hotel_api.night_audit import audit_statistics
+        from hotel_api.stats import refresh_daily_stats
+
+        for field, value in audit_statistics(self.audit_date)[self.audit_date].items():
+            setattr(self, field, value)
+
+        # Feed the daily KPI fact table for this date
+        refresh_daily_stats(self.audit_date)
 
     def close_audit(self, user):
         """Close the audit - no more changes allowed"""
@@ -1475,6 +1459,326 @@ class NightAudit(models.Model):
         self.save()
 
 
+class DailyHotelStats(models.Model):
+    """
+    Precomputed daily KPI facts, maintained by night audit and hotel_api.stats.
+
+    One hotel-wide row per date (room_type NULL, source "") carries every
+    metric; breakdown rows per (room_type, source) carry the booking metrics
+    only (rooms_sold, room_revenue, arrivals).
+    """
+
+    date = models.DateField(verbose_name="Ngày")
+    room_type = models.ForeignKey(
+        RoomType,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="daily_stats",
+        verbose_name="Loại phòng",
+    )
+    source = models.CharField(max_length=20, blank=True, default="", verbose_name="Nguồn")
+
+    # Room statistics
+    total_rooms = models.PositiveIntegerField(default=0, verbose_name="Tổng phòng")
+    rooms_sold = models.PositiveIntegerField(default=0, verbose_name="Đêm phòng đã bán")
+    room_revenue = models.DecimalField(
+        max_digits=15, decimal_places=0, default=0, verbose_name="Doanh thu phòng"
+    )
+    arrivals = models.PositiveIntegerField(default=0, verbose_name="Lượt đến")
+
+    # Financial summary (hotel-wide rows only)
+    total_income = models.DecimalField(
+        max_digits=15, decimal_places=0, default=0, verbose_name="Tổng thu"
+    )
+    total_expense = models.DecimalField(
+        max_digits=15, decimal_places=0, default=0, verbose_name="Tổng chi"
+    )
+    minibar_revenue = models.DecimalField(
+        max_digits=15, decimal_places=0, default=0, verbose_name="Doanh thu minibar"
+    )
+
+    computed_at = models.DateTimeField(auto_now=True, verbose_name="Tính lúc")
+
+    class Meta:
+        verbose_name = "Thống kê ngày"
+        verbose_name_plural = "Thống kê ngày"
+        ordering = ["date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date"],
+                condition=models.Q(room_type__isnull=True, source=""),
+                name="unique_daily_stats_total",
+            ),
+            models.UniqueConstraint(
+                fields=["date", "room_type", "source"],
+                name="unique_daily_stats_breakdown",
+            ),
+        ]
+
+    def __str__(self):
+        scope = f"{self.room_type_id}/{self.source}" if self.room_type_id else "total"
+        return f"Stats {self.date} ({scope})"
+
+    @property
+    def occupancy_rate(self):
+        return (self.rooms_sold / self.total_rooms) * 100 if self.total_rooms else 0
+
+    @property
+    def adr(self):
+        return self.room_revenue / self.rooms_sold if self.rooms_sold else 0
+
+    @property
+    def revpar(self):
+        return self.room_revenue / self.total_rooms if self.total_rooms else 0
+
+
+class DailyStatsDirtyDate(models.Model):
+    """
+    Coalescing queue of dates whose DailyHotelStats rows are out of date.
+
+    One row per date: repeated writes on the same day only bump marked_at.
+    """
+
+    date = models.DateField(unique=True, verbose_name="Ngày")
+    marked_at = models.DateTimeField(default=timezone.now, verbose_name="Đánh dấu lúc")
+
+    class Meta:
+        verbose_name = "Ngày cần tính lại thống kê"
+        verbose_name_plural = "Ngày cần tính lại thống kê"
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"Dirty stats {self.date}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Transactional outbox for side effects of booking actions.
+
+    Rows are written in the same transaction as the state change and drained
+    by the drain_outbox Celery task (see hotel_api/outbox.py).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Chờ xử lý"
+        DONE = "done", "Hoàn thành"
+        FAILED = "failed", "Thất bại"
+
+    event_type = models.CharField(max_length=50, verbose_name="Loại sự kiện")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Dữ liệu")
+    idempotency_key = models.CharField(max_length=200, unique=True, verbose_name="Khóa idempotency")
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Trạng thái",
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Số lần thử")
+    available_at = models.DateTimeField(default=timezone.now, verbose_name="Xử lý từ")
+    last_error = models.TextField(blank=True, verbose_name="Lỗi gần nhất")
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name="Xử lý lúc")
+
+    class Meta:
+        verbose_name = "Sự kiện outbox"
+        verbose_name_plural = "Sự kiện outbox"
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} ({self.idempotency_key}) - {self.status}"
+
+
+class ExportStorage(FileSystemStorage):
+    """
+    Private storage for export files, under EXPORT_STORAGE_ROOT.
+
+    Exports hold financial data: they live outside MEDIA_ROOT, which the web
+    server serves without authentication, and have no URL. They are only
+    streamed by ExportJobViewSet.download to the job's owner.
+    """
+
+    @property
+    def base_location(self):
+        return settings.EXPORT_STORAGE_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    @property
+    def base_url(self):
+        return None
+
+
+def export_upload_to(instance, filename):
+    """exports/YYYY/MM/<uuid>.<ext>: stored names reveal nothing and cannot be guessed."""
+    extension = os.path.splitext(filename)[1]
+    return f"exports/{timezone.now():%Y/%m}/{uuid.uuid4().hex}{extension}"
+
+
+class ExportJob(models.Model):
+    """
+    File export generated in the background for large date ranges.
+
+    The run_export_job Celery task writes the file to private storage
+    (ExportStorage); the requester polls the job and downloads it through the
+    API (see hotel_api/exports.py).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Chờ xử lý"
+        RUNNING = "running", "Đang xử lý"
+        DONE = "done", "Hoàn thành"
+        FAILED = "failed", "Thất bại"
+
+    class Format(models.TextChoices):
+        CSV = "csv", "CSV"
+        XLSX = "xlsx", "Excel"
+
+    export_type = models.CharField(max_length=50, verbose_name="Loại xuất")
+    params = models.JSONField(default=dict, blank=True, verbose_name="Tham số")
+    file_format = models.CharField(
+        max_length=10, choices=Format.choices, default=Format.CSV, verbose_name="Định dạng"
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Trạng thái",
+    )
+    file = models.FileField(
+        upload_to=export_upload_to, storage=ExportStorage(), blank=True, verbose_name="Tệp"
+    )
+    filename = models.CharField(max_length=255, blank=True, verbose_name="Tên tệp tải về")
+    row_count = models.PositiveIntegerField(default=0, verbose_name="Số dòng")
+    error = models.TextField(blank=True, verbose_name="Lỗi")
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="export_jobs",
+        verbose_name="Người yêu cầu",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Hoàn thành lúc")
+
+    class Meta:
+        verbose_name = "Tác vụ xuất dữ liệu"
+        verbose_name_plural = "Tác vụ xuất dữ liệu"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.export_type} ({self.file_format}) - {self.status}"
+
+
+class ReportJob(models.Model):
+    """
+    Report computed by a Celery worker instead of in the request.
+
+    Results are stored with a hash of the report parameters, so identical
+    requests within REPORT_JOB_FRESHNESS_SECONDS reuse them (see
+    hotel_api/report_jobs.py).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Chờ xử lý"
+        RUNNING = "running", "Đang xử lý"
+        DONE = "done", "Hoàn thành"
+        FAILED = "failed", "Thất bại"
+
+    report_type = models.CharField(max_length=30, verbose_name="Loại báo cáo")
+    params = models.JSONField(default=dict, blank=True, verbose_name="Tham số")
+    params_hash = models.CharField(max_length=64, verbose_name="Mã tham số")
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Trạng thái",
+    )
+    result = models.JSONField(null=True, blank=True, verbose_name="Kết quả")
+    error = models.TextField(blank=True, verbose_name="Lỗi")
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="report_jobs",
+        verbose_name="Người yêu cầu",
+    )
+    # Later requesters of the same report while it was being computed
+    subscribers = models.ManyToManyField(
+        User,
+        blank=True,
+        related_name="subscribed_report_jobs",
+        verbose_name="Người chờ kết quả",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Bắt đầu lúc")
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Hoàn thành lúc")
+
+    class Meta:
+        verbose_name = "Tác vụ báo cáo"
+        verbose_name_plural = "Tác vụ báo cáo"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["params_hash", "status", "completed_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.report_type} ({self.params_hash[:8]}) - {self.status}"
+
+
+class RetentionProgress(models.Model):
+    """
+    Where the retention run stopped for one model (see hotel_api/retention.py).
+
+    Rows are deleted in primary-key order; a run that hits its time budget
+    leaves last_pk and the cutoff it used here, and the next run resumes from
+    them instead of starting over.
+    """
+
+    model_name = models.CharField(max_length=50, unique=True, verbose_name="Loại dữ liệu")
+    cutoff = models.DateTimeField(verbose_name="Mốc thời gian xóa")
+    last_pk = models.BigIntegerField(default=0, verbose_name="Khóa chính cuối cùng")
+    deleted = models.PositiveBigIntegerField(default=0, verbose_name="Số bản ghi đã xóa")
+    started_at = models.DateTimeField(default=timezone.now, verbose_name="Bắt đầu lúc")
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Hoàn thành lúc")
+
+    class Meta:
+        verbose_name = "Tiến độ xóa dữ liệu hết hạn"
+        verbose_name_plural = "Tiến độ xóa dữ liệu hết hạn"
+        ordering = ["model_name"]
+
+    def __str__(self):
+        state = "done" if self.completed_at else f"at pk {self.last_pk}"
+        return f"Retention {self.model_name} ({state})"
+
+
+class DocumentCounter(models.Model):
+    """
+    Last number handed out for a numbered document type in one period.
+
+    Advanced only by hotel_api.numbering, with a single atomic statement.
+    """
+
+    scheme = models.CharField(max_length=30, verbose_name="Loại chứng từ")
+    period = models.CharField(max_length=20, verbose_name="Kỳ")
+    value = models.PositiveBigIntegerField(default=0, verbose_name="Số cuối cùng")
+
+    class Meta:
+        verbose_name = "Bộ đếm số chứng từ"
+        verbose_name_plural = "Bộ đếm số chứng từ"
+        ordering = ["scheme", "-period"]
+        constraints = [
+            models.UniqueConstraint(fields=["scheme", "period"], name="unique_document_counter"),
+        ]
+
+    def __str__(self):
+        return f"{self.scheme} {self.period}: {self.value}"
+
+
 class LostAndFound(models.Model):
     """Track items left by guests or found in the hotel"""
 
@@ -2131,7 +2435,9 @@ class Notification(models.Model):
         verbose_name_plural = "Thông báo"
         ordering = ["-created_at"]
         indexes = [
-            models.Index(fields=["recipient", "-created_at"]),
+            models.Index(
+                fields=["recipient", "-created_at", "-id"], name="notification_keyset_idx"
+            ),
             models.Index(fields=["recipient", "is_read"]),
         ]
 
@@ -2351,6 +2657,7 @@ class GuestMessage(models.Model):
             models.Index(fields=["guest", "-created_at"]),
             models.Index(fields=["booking", "-created_at"]),
             models.Index(fields=["status"]),
+            models.Index(fields=["-created_at", "-id"], name="guestmessage_keyset_idx"),
         ]
 
     def __str__(self):
@@ -2384,7 +2691,12 @@ class SensitiveDataAccessLog(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True, verbose_name="Địa chỉ IP")
     user_agent = models.CharField(max_length=500, blank=True, verbose_name="User Agent")
     details = models.JSONField(default=dict, blank=True, verbose_name="Chi tiết bổ sung")
-    timestamp = models.DateTimeField(auto_now_add=True, verbose_name="Thời gian")
+    # Set when the access happens, not when the buffered entry is written
+    timestamp = models.DateTimeField(default=timezone.now, verbose_name="Thời gian")
+    # Idempotency key: replaying a spooled entry twice writes it once
+    entry_id = models.UUIDField(
+        null=True, blank=True, unique=True, editable=False, verbose_name="Mã bản ghi"
+    )
 
     class Meta:
         verbose_name = "Nhật ký truy cập dữ liệu nhạy cảm"
@@ -2394,6 +2706,7 @@ class SensitiveDataAccessLog(models.Model):
             models.Index(fields=["user", "-timestamp"]),
             models.Index(fields=["action", "-timestamp"]),
             models.Index(fields=["resource_type", "resource_id"]),
+            models.Index(fields=["-timestamp", "-id"], name="sensitiveaccess_keyset_idx"),
         ]
 
     def __str__(self):
@@ -2428,6 +2741,7 @@ class AuditLog(models.Model):
             models.Index(fields=["entity_type", "-created_at"]),
             models.Index(fields=["entity_type", "entity_id"]),
             models.Index(fields=["action", "-created_at"]),
+            models.Index(fields=["-created_at", "-id"], name="auditlog_keyset_idx"),
         ]
 
     def __str__(self):
@@ -0,0 +1,446 @@
+"""
+Night audit statistics engine for Hoang Lam Heritage Management.
+
+Every figure of a NightAudit is computed for a whole date range at once, so
+auditing one day and backfilling a quarter cost the same number of queries:
+
+- postgresql: one query; per-day CTEs over bookings and financial entries are
+  left-joined onto generate_series, each CTE filtering on a sargable range
+  (check_in_date, check_out_date, the local date of created_at / updated_at,
+  FinancialEntry.date) backed by an index
+- python: the same CTEs as grouped ORM queries (a fixed seven queries for any
+  range), merged in Python
+
+`rebuild_audits` upserts the audits of a range from one such pass (used by
+the rebuild_night_audits command and POST /night-audits/rebuild/).
+
+Room status counts and pending payments are the current snapshot (room status
+and unpaid checked-in bookings have no history), as a live audit would record
+them. They are only right for today: `rebuild_audits` writes them to today's
+audit only, and takes occupancy of past dates from the bookings that stayed.
+"""
+
+import logging
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from hotel_api.models import Booking, FinancialEntry, NightAudit, Room
+
+logger = logging.getLogger("hotel_api")
+
+BACKENDS = ("postgresql", "python")
+
+# Columns computed per date (before the derived totals)
+COUNT_FIELDS = (
+    "total_rooms",
+    "rooms_occupied",
+    "rooms_available",
+    "rooms_cleaning",
+    "rooms_maintenance",
+    "check_ins_today",
+    "check_outs_today",
+    "no_shows",
+    "cancellations",
+    "new_bookings",
+    "unpaid_bookings_count",
+)
+AMOUNT_FIELDS = (
+    "total_income",
+    "total_expense",
+    "cash_collected",
+    "bank_transfer_collected",
+    "momo_collected",
+    "room_revenue",
+    "pending_payments",
+)
+
+# Every NightAudit field written by `audit_statistics`
+STAT_FIELDS = (
+    COUNT_FIELDS
+    + AMOUNT_FIELDS
+    + (
+        "occupancy_rate",
+        "other_payments",
+        "other_revenue",
+        "net_revenue",
+    )
+)
+
+
+# Current state with no history: only written to the audit of today
+SNAPSHOT_FIELDS = (
+    "rooms_available",
+    "rooms_cleaning",
+    "rooms_maintenance",
+    "pending_payments",
+    "unpaid_bookings_count",
+)
+
+
+def get_backend():
+    """Pick the backend for the current database."""
+    if connection.vendor == "postgresql":
+        return "postgresql"
+    return "python"
+
+
+def audit_statistics(start_date, end_date=None, backend=None):
+    """
+    Compute NightAudit statistics for each date in [start_date, end_date].
+
+    Args:
+        start_date: first audit date
+        end_date: last audit date (inclusive, default start_date)
+        backend: Force a backend from BACKENDS (default: `get_backend()`)
+
+    Returns:
+        dict of date -> {field: value} for every field in STAT_FIELDS
+    """
+    end_date = end_date or start_date
+    backend = backend or get_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown night audit backend: {backend}")
+
+    if backend == "postgresql":
+        rows = _statistics_sql(start_date, end_date)
+    else:
+        rows = _statistics_orm(start_date, end_date)
+    return {day: _with_totals(row) for day, row in rows.items()}
+
+
+def _with_totals(row):
+    """Add the derived columns (occupancy rate, other payments, net revenue)."""
+    for field in COUNT_FIELDS:
+        row[field] = int(row[field] or 0)
+    for field in AMOUNT_FIELDS:
+        row[field] = Decimal(row[field] or 0)
+
+    total_rooms = row["total_rooms"]
+    row["occupancy_rate"] = (
+        (Decimal(row["rooms_occupied"] * 100) / total_rooms).quantize(Decimal("0.01"))
+        if total_rooms
+        else Decimal("0")
+    )
+    row["other_payments"] = (
+        row["total_income"]
+        - row["cash_collected"]
+        - row["bank_transfer_collected"]
+        - row["momo_collected"]
+    )
+    row["other_revenue"] = row["total_income"] - row["room_revenue"]
+    row["net_revenue"] = row["total_income"] - row["total_expense"]
+    return row
+
+
+def _statistics_orm(start_date, end_date):
+    room_stats = Room.objects.filter(is_active=True).aggregate(
+        total_rooms=Count("id"),
+        rooms_occupied=Count("id", filter=Q(status=Room.Status.OCCUPIED)),
+        rooms_available=Count("id", filter=Q(status=Room.Status.AVAILABLE)),
+        rooms_cleaning=Count("id", filter=Q(status=Room.Status.CLEANING)),
+        rooms_maintenance=Count("id", filter=Q(status=Room.Status.MAINTENANCE)),
+    )
+    pending = Booking.objects.filter(status=Booking.Status.CHECKED_IN, is_paid=False).aggregate(
+        pending_payments=Sum("total_amount"),
+        unpaid_bookings_count=Count("id"),
+    )
+
+    days = (end_date - start_date).days + 1
+    rows = {
+        start_date
+        + timedelta(days=i): {
+            **{field: 0 for field in COUNT_FIELDS + AMOUNT_FIELDS},
+            **room_stats,
+            **pending,
+        }
+        for i in range(days)
+    }
+
+    def merge(queryset):
+        for stats in queryset:
+            rows[stats.pop("day")].update(stats)
+
+    merge(
+        Booking.objects.filter(check_in_date__range=(start_date, end_date))
+        .values(day=F("check_in_date"))
+        .annotate(
+            check_ins_today=Count("id", filter=Q(status=Booking.Status.CHECKED_IN)),
+            no_shows=Count("id", filter=Q(status=Booking.Status.NO_SHOW)),
+        )
+        .order_by()
+    )
+    merge(
+        Booking.objects.filter(
+            check_out_date__range=(start_date, end_date), status=Booking.Status.CHECKED_OUT
+        )
+        .values(day=F("check_out_date"))
+        .annotate(check_outs_today=Count("id"), room_revenue=Sum("total_amount"))
+        .order_by()
+    )
+    merge(
+        Booking.objects.filter(created_at__date__range=(start_date, end_date))
+        .values(day=TruncDate("created_at"))
+        .annotate(new_bookings=Count("id"))
+        .order_by()
+    )
+    merge(
+        Booking.objects.filter(
+            updated_at__date__range=(start_date, end_date), status=Booking.Status.CANCELLED
+        )
+        .values(day=TruncDate("updated_at"))
+        .annotate(cancellations=Count("id"))
+        .order_by()
+    )
+    income = Q(entry_type=FinancialEntry.EntryType.INCOME)
+    merge(
+        FinancialEntry.objects.filter(date__range=(start_date, end_date))
+        .values(day=F("date"))
+        .annotate(
+            total_income=Sum("amount", filter=income),
+            total_expense=Sum("amount", filter=Q(entry_type=FinancialEntry.EntryType.EXPENSE)),
+            cash_collected=Sum(
+                "amount", filter=income & Q(payment_method=Booking.PaymentMethod.CASH)
+            ),
+            bank_transfer_collected=Sum(
+                "amount", filter=income & Q(payment_method=Booking.PaymentMethod.BANK_TRANSFER)
+            ),
+            momo_collected=Sum(
+                "amount", filter=income & Q(payment_method=Booking.PaymentMethod.MOMO)
+            ),
+        )
+        .order_by()
+    )
+    return rows
+
+
+def _statistics_sql(start_date, end_date):
+    params = {
+        "start": start_date,
+        "end": end_date,
+        "tz": timezone.get_current_timezone_name(),
+        "occupied": Room.Status.OCCUPIED.value,
+        "available": Room.Status.AVAILABLE.value,
+        "cleaning": Room.Status.CLEANING.value,
+        "maintenance": Room.Status.MAINTENANCE.value,
+        "checked_in": Booking.Status.CHECKED_IN.value,
+        "checked_out": Booking.Status.CHECKED_OUT.value,
+        "no_show": Booking.Status.NO_SHOW.value,
+        "cancelled": Booking.Status.CANCELLED.value,
+        "income": FinancialEntry.EntryType.INCOME.value,
+        "expense": FinancialEntry.EntryType.EXPENSE.value,
+        "cash": Booking.PaymentMethod.CASH.value,
+        "bank_transfer": Booking.PaymentMethod.BANK_TRANSFER.value,
+        "momo": Booking.PaymentMethod.MOMO.value,
+    }
+    bookings = Booking._meta.db_table
+    rooms = Room._meta.db_table
+    entries = FinancialEntry._meta.db_table
+
+    # The local-date expressions match the functional indexes on Booking
+    sql = f"""
+        WITH room_stats AS (
+            SELECT COUNT(*) AS total_rooms,
+                   COUNT(*) FILTER (WHERE status = %(occupied)s) AS rooms_occupied,
+                   COUNT(*) FILTER (WHERE status = %(available)s) AS rooms_available,
+                   COUNT(*) FILTER (WHERE status = %(cleaning)s) AS rooms_cleaning,
+                   COUNT(*) FILTER (WHERE status = %(maintenance)s) AS rooms_maintenance
+            FROM {rooms}
+            WHERE is_active
+        ),
+        pending AS (
+            SELECT SUM(total_amount) AS pending_payments, COUNT(*) AS unpaid_bookings_count
+            FROM {bookings}
+            WHERE status = %(checked_in)s AND NOT is_paid
+        ),
+        arrivals AS (
+            SELECT check_in_date AS day,
+                   COUNT(*) FILTER (WHERE status = %(checked_in)s) AS check_ins_today,
+                   COUNT(*) FILTER (WHERE status = %(no_show)s) AS no_shows
+            FROM {bookings}
+            WHERE check_in_date BETWEEN %(start)s AND %(end)s
+            GROUP BY check_in_date
+        ),
+        departures AS (
+            SELECT check_out_date AS day,
+                   COUNT(*) AS check_outs_today,
+                   SUM(total_amount) AS room_revenue
+            FROM {bookings}
+            WHERE check_out_date BETWEEN %(start)s AND %(end)s AND status = %(checked_out)s
+            GROUP BY check_out_date
+        ),
+        created AS (
+            SELECT (created_at AT TIME ZONE %(tz)s)::date AS day, COUNT(*) AS new_bookings
+            FROM {bookings}
+            WHERE (created_at AT TIME ZONE %(tz)s)::date BETWEEN %(start)s AND %(end)s
+            GROUP BY 1
+        ),
+        cancelled AS (
+            SELECT (updated_at AT TIME ZONE %(tz)s)::date AS day, COUNT(*) AS cancellations
+            FROM {bookings}
+            WHERE (updated_at AT TIME ZONE %(tz)s)::date BETWEEN %(start)s AND %(end)s
+              AND status = %(cancelled)s
+            GROUP BY 1
+        ),
+        finance AS (
+            SELECT date AS day,
+                   SUM(amount) FILTER (WHERE entry_type = %(income)s) AS total_income,
+                   SUM(amount) FILTER (WHERE entry_type = %(expense)s) AS total_expense,
+                   SUM(amount) FILTER (
+                       WHERE entry_type = %(income)s AND payment_method = %(cash)s
+                   ) AS cash_collected,
+                   SUM(amount) FILTER (
+                       WHERE entry_type = %(income)s AND payment_method = %(bank_transfer)s
+                   ) AS bank_transfer_collected,
+                   SUM(amount) FILTER (
+                       WHERE entry_type = %(income)s AND payment_method = %(momo)s
+                   ) AS momo_collected
+            FROM {entries}
+            WHERE date BETWEEN %(start)s AND %(end)s
+            GROUP BY date
+        )
+        SELECT days.day::date AS day,
+               room_stats.total_rooms, room_stats.rooms_occupied, room_stats.rooms_available,
+               room_stats.rooms_cleaning, room_stats.rooms_maintenance,
+               arrivals.check_ins_today, departures.check_outs_today, arrivals.no_shows,
+               cancelled.cancellations, created.new_bookings,
+               pending.unpaid_bookings_count,
+               finance.total_income, finance.total_expense, finance.cash_collected,
+               finance.bank_transfer_collected, finance.momo_collected,
+               departures.room_revenue, pending.pending_payments
+        FROM generate_series(%(start)s::date, %(end)s::date, interval '1 day') AS days(day)
+        CROSS JOIN room_stats
+        CROSS JOIN pending
+        LEFT JOIN arrivals ON arrivals.day = days.day::date
+        LEFT JOIN departures ON departures.day = days.day::date
+        LEFT JOIN created ON created.day = days.day::date
+        LEFT JOIN cancelled ON cancelled.day = days.day::date
+        LEFT JOIN finance ON finance.day = days.day::date
+        ORDER BY days.day
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return {row[0]: dict(zip(columns[1:], row[1:])) for row in cursor.fetchall()}
+
+
+def rebuild_audits(start_date, end_date, user=None, create_missing=True):
+    """
+    Recompute the NightAudit rows of [start_date, end_date] in one sweep.
+
+    Statistics for the whole range come from one `audit_statistics` pass and
+    are upserted in date order with bulk_create(update_conflicts=True): new
+    dates become DRAFT audits performed by `user`, existing ones get fresh
+    statistics and keep their status, notes and performer. CLOSED audits are
+    never touched. The daily KPI facts of the range are refreshed afterwards.
+
+    Past dates cannot be given today's room snapshot: their rooms_occupied
+    comes from the bookings that stayed that night (hotel_api/occupancy.py)
+    against the current number of active rooms, and SNAPSHOT_FIELDS are left
+    as they are (zero on created audits). Only today's audit gets the full
+    live snapshot.
+
+    Args:
+        create_missing: also create audits for dates that have none
+
+    Returns:
+        dict with created / updated / skipped_closed counts and timings_ms
+        (statistics, write, daily_stats, total)
+    """
+    from hotel_api.stats import refresh_daily_stats
+
+    started = time.perf_counter()
+    timings = {}
+
+    with transaction.atomic():
+        # Lock the existing rows so an audit cannot be closed mid-rebuild
+        existing = dict(
+            NightAudit.objects.select_for_update()
+            .filter(audit_date__range=(start_date, end_date))
+            .values_list("audit_date", "status")
+        )
+        closed = {day for day, status in existing.items() if status == NightAudit.Status.CLOSED}
+
+        mark = time.perf_counter()
+        today = timezone.localdate()
+        stats = audit_statistics(start_date, end_date)
+        history_end = min(end_date, today - timedelta(days=1))
+        if start_date <= history_end:
+            _with_past_occupancy(stats, start_date, history_end)
+        timings["statistics"] = _ms(mark)
+
+        now = timezone.now()
+        audits = [
+            NightAudit(
+                audit_date=day,
+                status=NightAudit.Status.DRAFT,
+                performed_by=user,
+                performed_at=now,
+                **row,
+            )
+            for day, row in sorted(stats.items())
+            if day not in closed and (create_missing or day in existing)
+        ]
+
+        mark = time.perf_counter()
+        history_fields = [field for field in STAT_FIELDS if field not in SNAPSHOT_FIELDS]
+        for batch, fields in (
+            ([audit for audit in audits if audit.audit_date != today], history_fields),
+            ([audit for audit in audits if audit.audit_date == today], STAT_FIELDS),
+        ):
+            if batch:
+                NightAudit.objects.bulk_create(
+                    batch,
+                    batch_size=500,
+                    update_conflicts=True,
+                    unique_fields=["audit_date"],
+                    update_fields=[*fields, "updated_at"],
+                )
+        timings["write"] = _ms(mark)
+
+    mark = time.perf_counter()
+    refresh_daily_stats(start_date, end_date)
+    timings["daily_stats"] = _ms(mark)
+    timings["total"] = _ms(started)
+
+    updated = sum(1 for audit in audits if audit.audit_date in existing)
+    result = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "created": len(audits) - updated,
+        "updated": updated,
+        "skipped_closed": len(closed),
+        "timings_ms": timings,
+    }
+    logger.info(
+        "NIGHT AUDIT: rebuilt %s → %s: %s created, %s updated, %s closed skipped in %sms",
+        start_date,
+        end_date,
+        result["created"],
+        result["updated"],
+        result["skipped_closed"],
+        timings["total"],
+    )
+    return result
+
+
+def _with_past_occupancy(stats, start_date, end_date):
+    """Replace the room snapshot of past dates with what the bookings record."""
+    from hotel_api.occupancy import daily_occupancy
+
+    occupancy = daily_occupancy(start_date, end_date)
+    for day, occupied in zip(occupancy.dates, occupancy.occupied):
+        row = stats[day]
+        for field in SNAPSHOT_FIELDS:
+            row[field] = NightAudit._meta.get_field(field).get_default()
+        row["rooms_occupied"] = int(occupied)
+        _with_totals(row)
+
+
+def _ms(since):
+    return round((time.perf_counter() - since) * 1000, 1)
@@ -0,0 +1,123 @@
+"""
+Document numbering for Hoang Lam Heritage Management.
+
+Numbered documents (payment receipt numbers, receipt PDFs) are
+PREFIX-<period>-<sequence>, the sequence restarting every period (day). The
+last number handed out is kept in DocumentCounter, one row per scheme and
+period, advanced by a single statement:
+
+    INSERT ... ON CONFLICT (scheme, period) DO UPDATE SET value = value + n
+    RETURNING value
+
+so two cashiers can never read the same "highest number" and both add one,
+and allocating costs one query. Numbering another document type takes an
+entry in SCHEMES.
+
+- next_number(scheme) hands out one number.
+- allocate(scheme, count) reserves a block of consecutive numbers in one
+  statement; number_all() fills a batch of unsaved rows for bulk_create().
+- assign(instance, field, scheme) numbers a saved row once, under a row lock.
+
+The counter row stays locked until the allocating transaction ends, so
+allocations inside long transactions queue behind each other. Numbers are
+gapless as long as the number is allocated in the same transaction that stores
+it: Payment.save() and assign() do so, and a failed save rolls the counter
+back with the row.
+"""
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+
+class NumberingScheme:
+    """Format of a numbered document: PREFIX-<period>-<zero-padded sequence>."""
+
+    def __init__(self, prefix, width=4, period_format="%Y%m%d"):
+        self.prefix = prefix
+        self.width = width
+        self.period_format = period_format
+
+    def period(self, when=None):
+        return (when or timezone.now()).strftime(self.period_format)
+
+    def format(self, period, value):
+        return f"{self.prefix}-{period}-{value:0{self.width}d}"
+
+    def parse(self, number):
+        """(period, value) of a number of this scheme, or None."""
+        prefix, _, rest = number.partition("-")
+        period, _, value = rest.rpartition("-")
+        if prefix != self.prefix or not period or not value.isdigit():
+            return None
+        return period, int(value)
+
+
+SCHEMES = {
+    "payment": NumberingScheme("PMT"),
+    "receipt": NumberingScheme("INV"),
+}
+
+
+def allocate(scheme, count=1, when=None, using=DEFAULT_DB_ALIAS):
+    """
+    Reserve `count` consecutive numbers of `scheme`.
+
+    Args:
+        scheme: Name in SCHEMES
+        count: How many numbers to reserve
+        when: Datetime whose period the numbers belong to (default: now)
+
+    Returns:
+        list of formatted numbers, in order
+    """
+    from hotel_api.models import DocumentCounter
+
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    numbering = SCHEMES[scheme]
+    period = numbering.period(when)
+
+    connection = connections[using]
+    table = connection.ops.quote_name(DocumentCounter._meta.db_table)
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (scheme, period, value) VALUES (%s, %s, %s) "
+            f"ON CONFLICT (scheme, period) DO UPDATE SET value = {table}.value + EXCLUDED.value "
+            "RETURNING value",
+            [scheme, period, count],
+        )
+        last = cursor.fetchone()[0]
+    return [numbering.format(period, value) for value in range(last - count + 1, last + 1)]
+
+
+def next_number(scheme, when=None, using=DEFAULT_DB_ALIAS):
+    """The next number of `scheme`."""
+    return allocate(scheme, 1, when=when, using=using)[0]
+
+
+def assign(instance, field, scheme):
+    """Give a saved row a number of `scheme` in `field` unless it has one. Returns the number."""
+    model = type(instance)
+    with transaction.atomic():
+        number = (
+            model.objects.select_for_update().filter(pk=instance.pk).values_list(field, flat=True)
+        ).get()
+        if not number:
+            number = next_number(scheme)
+            model.objects.filter(pk=instance.pk).update(**{field: number})
+    setattr(instance, field, number)
+    return number
+
+
+def number_all(instances, field, scheme):
+    """
+    Fill `field` on unsaved instances that have no number, from one block.
+
+    For bulk_create(), which skips save(): e.g. completed payments of an
+    import get their receipt numbers with a single counter update.
+    """
+    pending = [instance for instance in instances if not getattr(instance, field)]
+    if pending:
+        for instance, number in zip(pending, allocate(scheme, len(pending))):
+            setattr(instance, field, number)
+    return instances
@@ -0,0 +1,241 @@
+"""
+Occupancy report engine for Hoang Lam Heritage Management.
+
+Daily occupied-room counts and room revenue are computed with a difference
+array: every booking adds +1 / +nightly_rate on its first night inside the
+report range and -1 / -nightly_rate on the day after its last one, and a
+prefix sum turns those deltas into per-day totals. Cost is
+O(bookings + days) instead of O(bookings × days).
+
+Backends (chosen automatically, see `get_backend`):
+- postgresql: the sweep runs in SQL (generate_series + window SUM), one query
+- numpy: vectorized np.add.at + cumsum, if NumPy is installed
+- python: the same sweep over plain lists (SQLite / no NumPy)
+
+Week and month grouping fold from the same daily arrays.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+
+from hotel_api.models import Booking, Room
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# Booking statuses counted as occupying a room
+OCCUPYING_STATUSES = (
+    Booking.Status.CONFIRMED,
+    Booking.Status.CHECKED_IN,
+    Booking.Status.CHECKED_OUT,
+)
+
+BACKENDS = ("postgresql", "numpy", "python")
+
+
+class DailyOccupancy:
+    """Per-day occupied rooms and revenue for an inclusive date range."""
+
+    def __init__(self, start_date, occupied, revenue):
+        self.start_date = start_date
+        self.occupied = occupied
+        self.revenue = revenue
+
+    def __len__(self):
+        return len(self.occupied)
+
+    @property
+    def dates(self):
+        return [self.start_date + timedelta(days=i) for i in range(len(self))]
+
+    @property
+    def occupied_nights(self):
+        return sum(self.occupied)
+
+    @property
+    def total_revenue(self):
+        return sum(self.revenue, Decimal("0"))
+
+    def fold(self, group_by):
+        """
+        Group the daily arrays into weeks (starting Monday) or calendar months.
+
+        Returns:
+            list of (period_start, days, occupied_sum, revenue_sum), in date order
+        """
+        if group_by == "week":
+            key = lambda d: d - timedelta(days=d.weekday())  # noqa: E731
+        elif group_by == "month":
+            key = lambda d: d.replace(day=1)  # noqa: E731
+        else:
+            raise ValueError(f"Unsupported group_by: {group_by}")
+
+        buckets = []
+        dates = self.dates
+        start = 0
+        for i in range(1, len(dates) + 1):
+            if i == len(dates) or key(dates[i]) != key(dates[start]):
+                buckets.append(
+                    (
+                        key(dates[start]),
+                        i - start,
+                        sum(self.occupied[start:i]),
+                        sum(self.revenue[start:i], Decimal("0")),
+                    )
+                )
+                start = i
+        return buckets
+
+
+def get_backend():
+    """Pick the fastest backend available for the current database."""
+    if connection.vendor == "postgresql":
+        return "postgresql"
+    if np is not None:
+        return "numpy"
+    return "python"
+
+
+def daily_occupancy(start_date, end_date, room_type_id=None, backend=None):
+    """
+    Compute occupied rooms and room revenue for each day in [start_date, end_date].
+
+    A booking occupies day d when check_in_date <= d < check_out_date.
+
+    Args:
+        start_date: first report day
+        end_date: last report day (inclusive)
+        room_type_id: Optional room type filter
+        backend: Force a backend from BACKENDS (default: `get_backend()`)
+
+    Returns:
+        DailyOccupancy
+    """
+    backend = backend or get_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown occupancy backend: {backend}")
+    if backend == "numpy" and np is None:
+        raise ValueError("NumPy is not installed")
+
+    if backend == "postgresql":
+        return _sweep_sql(start_date, end_date, room_type_id)
+
+    stays = _overlapping_stays(start_date, end_date, room_type_id)
+    if backend == "numpy":
+        return _sweep_numpy(start_date, end_date, stays)
+    return _sweep_python(start_date, end_date, stays)
+
+
+def _overlapping_stays(start_date, end_date, room_type_id):
+    queryset = Booking.objects.filter(
+        status__in=OCCUPYING_STATUSES,
+        check_in_date__lte=end_date,
+        check_out_date__gt=start_date,
+    )
+    if room_type_id:
+        queryset = queryset.filter(room__room_type_id=room_type_id)
+    return list(queryset.values_list("check_in_date", "check_out_date", "nightly_rate"))
+
+
+def _sweep_python(start_date, end_date, stays):
+    days = (end_date - start_date).days + 1
+    occupied_delta = [0] * (days + 1)
+    revenue_delta = [Decimal("0")] * (days + 1)
+
+    for check_in, check_out, nightly_rate in stays:
+        first = max((check_in - start_date).days, 0)
+        stop = min((check_out - start_date).days, days)
+        if first >= stop:
+            continue
+        occupied_delta[first] += 1
+        occupied_delta[stop] -= 1
+        revenue_delta[first] += nightly_rate
+        revenue_delta[stop] -= nightly_rate
+
+    occupied, revenue = [], []
+    running_occupied, running_revenue = 0, Decimal("0")
+    for i in range(days):
+        running_occupied += occupied_delta[i]
+        running_revenue += revenue_delta[i]
+        occupied.append(running_occupied)
+        revenue.append(running_revenue)
+    return DailyOccupancy(start_date, occupied, revenue)
+
+
+def _sweep_numpy(start_date, end_date, stays):
+    days = (end_date - start_date).days + 1
+    occupied_delta = np.zeros(days + 1, dtype=np.int64)
+    revenue_delta = np.zeros(days + 1, dtype=np.int64)
+
+    if stays:
+        origin = start_date.toordinal()
+        check_ins, check_outs, rates = zip(*stays)
+        first = np.clip(np.fromiter((d.toordinal() for d in check_ins), np.int64) - origin, 0, days)
+        stop = np.clip(np.fromiter((d.toordinal() for d in check_outs), np.int64) - origin, 0, days)
+        # Rates are whole VND (decimal_places=0), so int64 is exact
+        rates = np.fromiter((int(r) for r in rates), np.int64)
+        valid = first < stop
+
+        np.add.at(occupied_delta, first[valid], 1)
+        np.add.at(occupied_delta, stop[valid], -1)
+        np.add.at(revenue_delta, first[valid], rates[valid])
+        np.add.at(revenue_delta, stop[valid], -rates[valid])
+
+    occupied = np.cumsum(occupied_delta[:days])
+    revenue = np.cumsum(revenue_delta[:days])
+    return DailyOccupancy(
+        start_date,
+        [int(n) for n in occupied],
+        [Decimal(int(r)) for r in revenue],
+    )
+
+
+def _sweep_sql(start_date, end_date, room_type_id):
+    room_filter = ""
+    params = {
+        "start": start_date,
+        "end": end_date,
+        "statuses": tuple(str(s) for s in OCCUPYING_STATUSES),
+    }
+    if room_type_id:
+        room_filter = (
+            f"AND room_id IN (SELECT id FROM {Room._meta.db_table} "
+            "WHERE room_type_id = %(room_type)s)"
+        )
+        params["room_type"] = room_type_id
+
+    sql = f"""
+        WITH stays AS (
+            SELECT GREATEST(check_in_date, %(start)s::date) AS first_night,
+                   LEAST(check_out_date, %(end)s::date + 1) AS stop,
+                   nightly_rate
+            FROM {Booking._meta.db_table}
+            WHERE status IN %(statuses)s
+              AND check_in_date <= %(end)s
+              AND check_out_date > %(start)s
+              {room_filter}
+        ),
+        deltas AS (
+            SELECT first_night AS day, 1 AS rooms, nightly_rate AS revenue FROM stays
+            UNION ALL
+            SELECT stop, -1, -nightly_rate FROM stays
+        )
+        SELECT SUM(COALESCE(SUM(deltas.rooms), 0)) OVER (ORDER BY days.day),
+               SUM(COALESCE(SUM(deltas.revenue), 0)) OVER (ORDER BY days.day)
+        FROM generate_series(%(start)s::date, %(end)s::date, interval '1 day') AS days(day)
+        LEFT JOIN deltas ON deltas.day = days.day::date
+        GROUP BY days.day
+        ORDER BY days.day
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return DailyOccupancy(
+        start_date,
+        [int(rooms) for rooms, _ in rows],
+        [Decimal(revenue) for _, revenue in rows],
+    )
@@ -0,0 +1,283 @@
+"""
+Transactional outbox for booking side effects in Hoang Lam Heritage Management.
+
+Booking actions (create, check-in, check-out, status changes) commit only the
+core state change; everything else — staff notifications, the checkout
+housekeeping task, the room revenue entry, guest stay counts — is recorded as
+an OutboxEvent in the same transaction and applied later by the drain_outbox
+Celery task, so the front desk does not wait for it.
+
+- enqueue() writes the event; its idempotency key makes repeated enqueues of
+  the same effect (client retries, double submits) a no-op.
+- drain_outbox() claims due events in batches and runs each handler in its own
+  transaction together with marking the event done, so an effect is applied
+  exactly once. Failures are retried with exponential backoff up to
+  OUTBOX_MAX_ATTEMPTS, then left as FAILED for inspection.
+- With OUTBOX_EAGER=True (development, tests) handlers run inline inside the
+  caller's transaction, preserving synchronous behaviour without a worker.
+"""
+
+import logging
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from hotel_api.models import (
+    Booking,
+    FinancialCategory,
+    FinancialEntry,
+    Guest,
+    HousekeepingTask,
+    OutboxEvent,
+)
+
+logger = logging.getLogger("hotel_api")
+
+# Cache key held while a drain task is queued, so bursts of events share one task
+DRAIN_SCHEDULED_KEY = "outbox:drain_scheduled"
+
+HANDLERS = {}
+
+
+def handler(event_type):
+    """Register a function(payload) as the handler of an event type."""
+
+    def register(func):
+        HANDLERS[event_type] = func
+        return func
+
+    return register
+
+
+# ---------------------------------------------------------------------------
+# Handlers
+# ---------------------------------------------------------------------------
+
+
+@handler("notify_staff")
+def notify_staff(payload):
+    from hotel_api.services import PushNotificationService
+
+    exclude_user = None
+    if payload.get("exclude_user_id"):
+        from django.contrib.auth import get_user_model
+
+        exclude_user = get_user_model()(pk=payload["exclude_user_id"])
+
+    PushNotificationService.notify_staff(
+        notification_type=payload["notification_type"],
+        title=payload["title"],
+        body=payload["body"],
+        data=payload.get("data"),
+        booking=Booking(pk=payload["booking_id"]) if payload.get("booking_id") else None,
+        exclude_user=exclude_user,
+    )
+
+
+@handler("checkout_housekeeping")
+def create_checkout_housekeeping(payload):
+    booking = Booking.objects.select_related("room").get(pk=payload["booking_id"])
+    HousekeepingTask.objects.create(
+        room=booking.room,
+        task_type=HousekeepingTask.TaskType.CHECKOUT_CLEAN,
+        status=HousekeepingTask.Status.PENDING,
+        scheduled_date=date.fromisoformat(payload["date"]),
+        booking=booking,
+        created_by_id=payload.get("user_id"),
+        notes=f"Auto-created: Checkout cleaning for room {booking.room.number}",
+    )
+
+
+@handler("guest_stay_completed")
+def increment_guest_stays(payload):
+    Guest.objects.filter(pk=payload["guest_id"]).update(total_stays=F("total_stays") + 1)
+
+
+@handler("checkout_room_revenue")
+def create_room_revenue_entry(payload):
+    room_income_category = FinancialCategory.objects.filter(
+        category_type=FinancialCategory.CategoryType.INCOME,
+        is_default=True,
+        is_active=True,
+    ).first()
+    if not room_income_category:
+        # Fallback: find "Tiền phòng" category or any active income category
+        room_income_category = FinancialCategory.objects.filter(
+            category_type=FinancialCategory.CategoryType.INCOME,
+            is_active=True,
+        ).first()
+    if not room_income_category:
+        return
+
+    booking = Booking.objects.select_related("room", "guest").get(pk=payload["booking_id"])
+    total_revenue = (
+        booking.total_amount
+        + booking.additional_charges
+        + booking.early_check_in_fee
+        + booking.late_check_out_fee
+    )
+    FinancialEntry.objects.create(
+        entry_type=FinancialEntry.EntryType.INCOME,
+        category=room_income_category,
+        amount=total_revenue,
+        currency=booking.currency,
+        date=date.fromisoformat(payload["date"]),
+        description=f"Tiền phòng {booking.room.number} - {booking.guest.full_name} ({booking.check_in_date} → {booking.check_out_date}, {booking.nights} đêm)",
+        booking=booking,
+        payment_method=booking.payment_method,
+        created_by_id=payload.get("user_id"),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Producer side
+# ---------------------------------------------------------------------------
+
+
+def enqueue(event_type, payload, key):
+    """
+    Record a side effect to run after the current transaction commits.
+
+    Args:
+        event_type: key of HANDLERS
+        payload: JSON-serializable dict passed to the handler
+        key: idempotency key; an event with the same key is not recorded twice
+
+    Returns:
+        The OutboxEvent, or None when the key was already used
+    """
+    if event_type not in HANDLERS:
+        raise ValueError(f"Unknown outbox event type: {event_type}")
+
+    event, created = OutboxEvent.objects.get_or_create(
+        idempotency_key=key,
+        defaults={"event_type": event_type, "payload": payload},
+    )
+    if not created:
+        logger.info("OUTBOX: duplicate event %s ignored", key)
+        return None
+
+    if getattr(settings, "OUTBOX_EAGER", False):
+        # Errors propagate and roll back the caller, as before the outbox existed
+        _run(event)
+    else:
+        transaction.on_commit(schedule_drain)
+    return event
+
+
+def notify_booking_staff(booking, notification_type, title, body, action, user, key):
+    """Enqueue a notify_staff fan-out about a booking, excluding the acting user."""
+    return enqueue(
+        "notify_staff",
+        {
+            "notification_type": notification_type,
+            "title": title,
+            "body": body,
+            "data": {
+                "booking_id": str(booking.id),
+                "room_number": booking.room.number,
+                "action": action,
+            },
+            "booking_id": booking.id,
+            "exclude_user_id": user.pk if user else None,
+        },
+        key=f"notify:{key}",
+    )
+
+
+def schedule_drain():
+    """Queue one drain task for a burst of committed events."""
+    if not cache.add(DRAIN_SCHEDULED_KEY, True, timeout=60):
+        return  # A queued task will pick these events up
+
+    from hotel_api.tasks import drain_outbox as drain_outbox_task
+
+    try:
+        drain_outbox_task.delay()
+    except Exception as e:
+        # The beat schedule drains within a minute; never fail the request
+        cache.delete(DRAIN_SCHEDULED_KEY)
+        logger.warning("OUTBOX: could not queue drain task: %s", e)
+
+
+# ---------------------------------------------------------------------------
+# Consumer side
+# ---------------------------------------------------------------------------
+
+
+def _run(event):
+    HANDLERS[event.event_type](event.payload)
+    event.status = OutboxEvent.Status.DONE
+    event.attempts += 1
+    event.processed_at = timezone.now()
+    event.last_error = ""
+    event.save(update_fields=["status", "attempts", "processed_at", "last_error"])
+
+
+def _process(event_id):
+    """Apply one event exactly once. Returns True if it was applied."""
+    try:
+        with transaction.atomic():
+            event = (
+                OutboxEvent.objects.select_for_update(skip_locked=True)
+                .filter(pk=event_id, status=OutboxEvent.Status.PENDING)
+                .first()
+            )
+            if event is None:
+                return False  # Taken by another worker or already done
+            _run(event)
+            return True
+    except Exception as e:
+        event = OutboxEvent.objects.get(pk=event_id)
+        event.attempts += 1
+        event.last_error = str(e)
+        max_attempts = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5)
+        if event.attempts >= max_attempts:
+            event.status = OutboxEvent.Status.FAILED
+            logger.error("OUTBOX: %s failed permanently: %s", event.idempotency_key, e)
+        else:
+            event.available_at = timezone.now() + timedelta(seconds=2**event.attempts * 5)
+            logger.warning(
+                "OUTBOX: %s failed (attempt %d): %s", event.idempotency_key, event.attempts, e
+            )
+        event.save(update_fields=["attempts", "last_error", "status", "available_at"])
+        return False
+
+
+def drain_outbox(batch_size=100):
+    """
+    Apply every due pending event, batch_size events per claim query.
+
+    Returns:
+        Number of events applied
+    """
+    applied = 0
+    last_id = 0
+    while True:
+        batch = list(
+            OutboxEvent.objects.filter(
+                status=OutboxEvent.Status.PENDING,
+                available_at__lte=timezone.now(),
+                pk__gt=last_id,
+            )
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not batch:
+            return applied
+        for event_id in batch:
+            applied += _process(event_id)
+        last_id = batch[-1]
+
+
+def purge_outbox(days=7):
+    """Delete events applied more than `days` ago. Returns the number deleted."""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = OutboxEvent.objects.filter(
+        status=OutboxEvent.Status.DONE, processed_at__lt=cutoff
+    ).delete()
+    return deleted
@@ -0,0 +1,203 @@
+"""
+Pagination for high-volume, append-mostly tables in Hoang Lam Heritage Management.
+
+Audit logs, notifications, guest messages and financial entries grow without
+bound, and OFFSET/COUNT(*) pages get slower the deeper and bigger they get.
+
+KeysetPagination keeps the default page-number responses, and adds:
+
+- Keyset (cursor) pages: `?cursor=` (empty for the first page) returns
+  {next, previous, results}. The cursor holds the sort key of the last row
+  ((created_at, id) by default, `keyset_ordering` on the view), and the next
+  page is a range condition on it, served by a composite index, so every page
+  costs the same however far the client scrolls. No COUNT(*) is run.
+- Estimated counts: `?count=estimated` replaces COUNT(*) with PostgreSQL's
+  planner estimate (pg_class.reltuples when unfiltered, the EXPLAIN row
+  estimate otherwise), in the page-number `count` and, for cursor pages, the
+  X-Total-Count header. Below PAGINATION_ESTIMATE_THRESHOLD rows the exact
+  count is used; other databases always count exactly.
+
+EstimatedCountPaginator applies the same estimate to admin changelists.
+"""
+
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimated_count(queryset):
+    """Row count of queryset, estimated by the PostgreSQL planner for large results."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+        else:
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        row = cursor.fetchone()
+
+    estimate = row[0] if isinstance(row[0], int) else _plan_rows(row[0])
+    # reltuples is -1 before the first ANALYZE; small tables count cheaply
+    if estimate < getattr(settings, "PAGINATION_ESTIMATE_THRESHOLD", 10000):
+        return queryset.count()
+    return estimate
+
+
+def _plan_rows(plan):
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Django paginator whose count is estimated_count() (admin changelists)."""
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, "query"):
+            return estimated_count(self.object_list)
+        return len(self.object_list)
+
+
+class KeysetPagination(PageNumberPagination):
+    """Page-number pagination with opt-in keyset pages and estimated counts."""
+
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    ordering = ("-created_at", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        self.total = None
+        if request.query_params.get(self.count_query_param) == "estimated":
+            self.django_paginator_class = EstimatedCountPaginator
+            if self.cursor_mode:
+                self.total = estimated_count(queryset)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.keyset = tuple(getattr(view, "keyset_ordering", self.ordering))
+        page_size = self.get_page_size(request)
+        cursor = self._decode(request.query_params[self.cursor_query_param])
+
+        reverse = False
+        ordering = self.keyset
+        if cursor is not None:
+            reverse = cursor["reverse"]
+            if reverse:
+                ordering = tuple(_flip(field) for field in self.keyset)
+            try:
+                after = self._after(ordering, cursor["values"], queryset.model)
+            except ValidationError:
+                raise NotFound("Con trỏ phân trang không hợp lệ.")
+            queryset = queryset.filter(after)
+
+        rows = list(queryset.order_by(*ordering)[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # Moving forward there is a previous page whenever we came from one
+        has_next = has_more if not reverse else True
+        has_previous = cursor is not None if not reverse else has_more
+        self.next_cursor = self._encode(rows[-1], False) if rows and has_next else None
+        self.previous_cursor = self._encode(rows[0], True) if rows and has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            response = super().get_paginated_response(data)
+        else:
+            response = Response(
+                {
+                    "next": self._link(self.next_cursor),
+                    "previous": self._link(self.previous_cursor),
+                    "results": data,
+                }
+            )
+        if self.total is not None:
+            response["X-Total-Count"] = self.total
+        return response
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset page cursor; pass it empty for the first page.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "'estimated' to use the database's row estimate for counts.",
+                "schema": {"type": "string", "enum": ["estimated"]},
+            },
+        ]
+
+    # ---------------------------------------------------------------------
+
+    @staticmethod
+    def _after(ordering, values, model):
+        """Rows strictly after `values` in `ordering`: (a, b) < (x, y) spelled out as OR/AND."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip("-")
+            value = model._meta.get_field(name).to_python(value)
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _encode(self, row, reverse):
+        values = [getattr(row, field.lstrip("-")) for field in self.keyset]
+        payload = json.dumps(
+            {"r": reverse, "v": [v.isoformat() if hasattr(v, "isoformat") else v for v in values]}
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def _decode(self, encoded):
+        if not encoded:
+            return None
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values = payload["v"]
+            if not isinstance(values, list) or len(values) != len(self.keyset):
+                raise ValueError
+            return {"reverse": bool(payload["r"]), "values": values}
+        except (ValueError, KeyError, TypeError, binascii.Error):
+            raise NotFound("Con trỏ phân trang không hợp lệ.")
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+
+def _flip(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
@@ -0,0 +1,295 @@
+"""
+Monthly table partitioning for Hoang Lam Heritage Management.
+
+AuditLog, SensitiveDataAccessLog, Notification and GuestMessage only ever grow.
+On PostgreSQL their tables are range-partitioned by month on their creation
+time (migration 0033):
+
+- <table>_pYYYYMM holds one calendar month (UTC). <table>_pdefault catches rows
+  outside every monthly partition, so inserts never fail when maintenance is
+  late; creating the month's partition later moves them out of it.
+- PostgreSQL requires the partition column in every unique constraint, so the
+  primary key is (id, <time column>) and SensitiveDataAccessLog.entry_id is
+  unique together with timestamp. Django still uses id alone.
+- Queries on a recent window (lists ordered by time, date filters) are pruned
+  to the partitions they touch.
+
+maintain_partitions() runs daily from Celery Beat. It creates partitions
+PARTITION_PREMAKE_MONTHS ahead, and removes monthly partitions that lie wholly
+before the model's retention period (hotel_api/retention.py). Expired
+partitions are dropped, or detached and kept as plain tables with
+PARTITION_EXPIRED_ACTION=detach. The retention run does the same before
+deleting row by row, so an expired month costs one DROP TABLE instead of
+batched DELETEs and leaves no bloat.
+
+Every function is a no-op on other databases (SQLite in development and tests).
+"""
+
+import logging
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger("hotel_api")
+
+# Retention name (see DATA_RETENTION_DAYS) -> (model, partition column)
+PARTITIONED_MODELS = {
+    "audit_log": ("AuditLog", "created_at"),
+    "sensitive_data_access_log": ("SensitiveDataAccessLog", "timestamp"),
+    "notification": ("Notification", "created_at"),
+    "guest_message": ("GuestMessage", "created_at"),
+}
+
+
+def add_months(month, count):
+    """First day of the month `count` months after `month` (a date on the 1st)."""
+    years, index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def month_of(value):
+    """First day of the UTC month containing a datetime or date."""
+    if isinstance(value, datetime):
+        value = value.astimezone(dt_timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def month_start(month):
+    """Aware UTC datetime at the start of `month`."""
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+
+def default_partition_name(table):
+    return f"{table}_pdefault"
+
+
+def _literal(month):
+    # Bounds are part of the DDL, which cannot take query parameters
+    return f"'{month_start(month).isoformat()}'"
+
+
+def is_partitioned(model, using=DEFAULT_DB_ALIAS):
+    """Whether the model's table is a partitioned table (always False outside PostgreSQL)."""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def list_partitions(table, cursor):
+    """{month: partition name} of the monthly partitions attached to `table`."""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s)",
+        [table],
+    )
+    prefix = f"{table}_p"
+    months = {}
+    for (name,) in cursor.fetchall():
+        suffix = name[len(prefix) :]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            months[date(int(suffix[:4]), int(suffix[4:]), 1)] = name
+    return months
+
+
+def create_partition(connection, table, column, month):
+    """Attach the partition for `month`, moving its rows out of the default partition."""
+    q = connection.ops.quote_name
+    name = partition_name(table, month)
+    lower, upper = _literal(month), _literal(add_months(month, 1))
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {q(name)} (LIKE {q(table)} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {q(default_partition_name(table))} "
+            f"WHERE {q(column)} >= {lower} AND {q(column)} < {upper} RETURNING *) "
+            f"INSERT INTO {q(name)} SELECT * FROM moved"
+        )
+        cursor.execute(
+            f"ALTER TABLE {q(table)} ATTACH PARTITION {q(name)} "
+            f"FOR VALUES FROM ({lower}) TO ({upper})"
+        )
+    return name
+
+
+def ensure_partitions(months_ahead=None, using=DEFAULT_DB_ALIAS):
+    """Create missing partitions from this month to `months_ahead` ahead. Returns their names."""
+    if months_ahead is None:
+        months_ahead = getattr(settings, "PARTITION_PREMAKE_MONTHS", 3)
+    connection = connections[using]
+    current = month_of(timezone.now())
+    created = []
+    for model_name, column in PARTITIONED_MODELS.values():
+        model = apps.get_model("hotel_api", model_name)
+        if not is_partitioned(model, using):
+            continue
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            existing = list_partitions(table, cursor)
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month not in existing:
+                created.append(create_partition(connection, table, column, month))
+    if created:
+        logger.info("PARTITIONS: created %s", ", ".join(created))
+    return created
+
+
+def expire_partitions(name, cutoff, using=DEFAULT_DB_ALIAS):
+    """
+    Drop (or detach) the monthly partitions of `name` that end before `cutoff`.
+
+    Returns [(partition, rows)], rows being the planner's row estimate: the
+    point is not to read the partition.
+    """
+    model_name, _ = PARTITIONED_MODELS[name]
+    model = apps.get_model("hotel_api", model_name)
+    if not is_partitioned(model, using):
+        return []
+
+    connection = connections[using]
+    q = connection.ops.quote_name
+    table = model._meta.db_table
+    detach = getattr(settings, "PARTITION_EXPIRED_ACTION", "drop") == "detach"
+    expired = []
+    with connection.cursor() as cursor:
+        for month, partition in sorted(list_partitions(table, cursor).items()):
+            if month_start(add_months(month, 1)) > cutoff:
+                break
+            cursor.execute(
+                "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [partition],
+            )
+            rows = cursor.fetchone()[0]
+            if detach:
+                cursor.execute(f"ALTER TABLE {q(table)} DETACH PARTITION {q(partition)}")
+            else:
+                cursor.execute(f"DROP TABLE {q(partition)}")
+            expired.append((partition, rows))
+    if expired:
+        logger.info(
+            "PARTITIONS: %s %s",
+            "detached" if detach else "dropped",
+            ", ".join(partition for partition, _ in expired),
+        )
+    return expired
+
+
+def maintain_partitions(using=DEFAULT_DB_ALIAS):
+    """Create upcoming partitions and expire old ones. Returns {"created", "expired"} names."""
+    from hotel_api.retention import _cutoff, _get_retention_days
+
+    result = {"created": [], "expired": []}
+    if connections[using].vendor != "postgresql":
+        return result
+
+    result["created"] = ensure_partitions(using=using)
+    days = _get_retention_days()
+    for name in PARTITIONED_MODELS:
+        # AuditLog has no retention period: its partitions are kept
+        if name in days:
+            expired = expire_partitions(name, _cutoff(days[name]), using=using)
+            result["expired"] += [partition for partition, _ in expired]
+    return result
+
+
+# ==================== Migration helpers ====================
+
+
+def partition_table(schema_editor, model, column, months_ahead=None):
+    """Rebuild the model's table as monthly partitions on `column`, copying its rows."""
+    _rebuild(schema_editor, model, column, partitioned=True, months_ahead=months_ahead)
+
+
+def unpartition_table(schema_editor, model, column):
+    """Rebuild a partitioned table as a plain one (reverse of partition_table)."""
+    _rebuild(schema_editor, model, column, partitioned=False)
+
+
+def _rebuild(schema_editor, model, column, partitioned, months_ahead=None):
+    q = schema_editor.quote_name
+    table = model._meta.db_table
+    pk = model._meta.pk.column
+    old = f"{table}_old"
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT attidentity FROM pg_attribute WHERE attrelid = %s::regclass AND attname = %s",
+            [table, pk],
+        )
+        identity = cursor.fetchone()[0] != ""
+        cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", [table, pk])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f"SELECT MIN({q(column)}) FROM {q(table)}")
+        oldest = cursor.fetchone()[0]
+
+    schema_editor.execute(f"ALTER TABLE {q(table)} RENAME TO {q(old)}")
+    suffix = f" PARTITION BY RANGE ({q(column)})" if partitioned else ""
+    schema_editor.execute(
+        f"CREATE TABLE {q(table)} (LIKE {q(old)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){suffix}"
+    )
+
+    if partitioned:
+        schema_editor.execute(
+            f"CREATE TABLE {q(default_partition_name(table))} PARTITION OF {q(table)} DEFAULT"
+        )
+        if months_ahead is None:
+            months_ahead = getattr(settings, "PARTITION_PREMAKE_MONTHS", 3)
+        month = month_of(oldest or timezone.now())
+        last = add_months(month_of(timezone.now()), months_ahead)
+        while month <= last:
+            schema_editor.execute(
+                f"CREATE TABLE {q(partition_name(table, month))} PARTITION OF {q(table)} "
+                f"FOR VALUES FROM ({_literal(month)}) TO ({_literal(add_months(month, 1))})"
+            )
+            month = add_months(month, 1)
+
+    schema_editor.execute(f"INSERT INTO {q(table)} SELECT * FROM {q(old)}")
+    if sequence and not identity:
+        # A serial column: the copied default still uses the old table's sequence
+        schema_editor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {q(table)}.{q(pk)}")
+    schema_editor.execute(f"DROP TABLE {q(old)}")
+    if identity:
+        # Partitioned tables take identity columns only from PostgreSQL 17 on:
+        # the identity (dropped with the old table) becomes an owned sequence
+        sequence = q(f"{table}_{pk}_seq")
+        schema_editor.execute(f"CREATE SEQUENCE {sequence} OWNED BY {q(table)}.{q(pk)}")
+        schema_editor.execute(
+            f"ALTER TABLE {q(table)} ALTER COLUMN {q(pk)} SET DEFAULT nextval('{sequence}')"
+        )
+        schema_editor.execute(
+            f"SELECT setval('{sequence}', COALESCE(MAX({q(pk)}), 0) + 1, false) FROM {q(table)}"
+        )
+
+    # Constraints and indexes are created after the copy, under Django's names
+    key = [pk, column] if partitioned else [pk]
+    schema_editor.execute(f"ALTER TABLE {q(table)} ADD PRIMARY KEY ({', '.join(map(q, key))})")
+    for field in model._meta.local_concrete_fields:
+        if field.unique and not field.primary_key:
+            if partitioned:
+                columns = [field.column, column]
+                name = schema_editor._create_index_name(table, columns, suffix="_uniq")
+                schema_editor.execute(
+                    f"ALTER TABLE {q(table)} ADD CONSTRAINT {q(name)} "
+                    f"UNIQUE ({', '.join(map(q, columns))})"
+                )
+            else:
+                schema_editor.execute(schema_editor._create_unique_sql(model, [field]))
+        if field.remote_field and field.db_constraint:
+            schema_editor.execute(
+                schema_editor._create_fk_sql(model, field, "_fk_%(to_table)s_%(to_column)s")
+            )
+    for statement in schema_editor._model_indexes_sql(model):
+        schema_editor.execute(statement)
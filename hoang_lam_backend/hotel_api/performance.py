@@ -0,0 +1,382 @@
+"""
+Request performance instrumentation for Hoang Lam Heritage Management.
+
+PerformanceMiddleware measures every request:
+
+- wall time, from the top of the middleware stack to the rendered response;
+- database query count and time, from a connection.execute_wrapper;
+- serializer time, spent in top-level `serializer.data` (the DRF hook
+  installed by instrument_serializers() from HotelApiConfig.ready);
+- response size in bytes (Content-Length for streamed responses).
+
+Requests are tagged with the DRF view class and action (`BookingViewSet`,
+`list`), taken from the resolved view in process_view, so label cardinality
+stays bounded by the URLconf rather than by paths.
+
+Aggregates are exported in the Prometheus text format at /metrics, guarded by
+PERFORMANCE_METRICS_TOKEN (not served without one unless DEBUG is on). Requests
+slower than PERFORMANCE_SLOW_REQUEST_MS are kept, with their slowest queries
+(SQL text only; parameters may hold guest data and are never recorded), in a
+ring buffer of PERFORMANCE_SLOW_REQUEST_BUFFER entries served by
+SlowRequestsView to managers.
+
+Counters and the ring buffer live in process memory: each worker reports its
+own requests, and Prometheus sums series across scraped instances. The
+per-query cost is two perf_counter calls and a heap push, and nothing is
+recorded when PERFORMANCE_MONITORING_ENABLED is off (the middleware removes
+itself from the stack).
+"""
+
+import contextvars
+import heapq
+import hmac
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+
+logger = logging.getLogger("hotel_api")
+
+# Histogram buckets for request duration, in seconds
+DURATION_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+MAX_SQL_LENGTH = 2000
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_current = contextvars.ContextVar("hotel_api_request_metrics", default=None)
+
+
+def is_enabled():
+    return getattr(settings, "PERFORMANCE_MONITORING_ENABLED", True)
+
+
+class RequestMetrics:
+    """Measurements of one request, filled in by the query wrapper and serializer hook."""
+
+    __slots__ = (
+        "started",
+        "queries",
+        "db_time",
+        "serializer_time",
+        "serializing",
+        "top_queries",
+        "top_size",
+        "view",
+        "action",
+    )
+
+    def __init__(self, top_size):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.top_queries = []  # min-heap of (duration, sequence, sql)
+        self.top_size = top_size
+        self.view = "unresolved"
+        self.action = ""
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook: time the query and keep the slowest ones."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += elapsed
+            if self.top_size:
+                entry = (elapsed, self.queries, sql)
+                if len(self.top_queries) < self.top_size:
+                    heapq.heappush(self.top_queries, entry)
+                elif elapsed > self.top_queries[0][0]:
+                    heapq.heapreplace(self.top_queries, entry)
+
+
+class MetricsRegistry:
+    """Thread-safe per-process aggregates, keyed by (view, action)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}  # (view, action, method, status) -> count
+            self.endpoints = {}  # (view, action) -> running sums and histogram
+            self.slow_requests = deque(
+                maxlen=getattr(settings, "PERFORMANCE_SLOW_REQUEST_BUFFER", 100)
+            )
+
+    def record(self, metrics, method, status, duration, response_bytes, slow_sample=None):
+        key = (metrics.view, metrics.action)
+        with self._lock:
+            request_key = (*key, method, str(status))
+            self.requests[request_key] = self.requests.get(request_key, 0) + 1
+
+            endpoint = self.endpoints.get(key)
+            if endpoint is None:
+                endpoint = self.endpoints[key] = {
+                    "count": 0,
+                    "duration": 0.0,
+                    "buckets": [0] * len(DURATION_BUCKETS),
+                    "db_queries": 0,
+                    "db_time": 0.0,
+                    "serializer_time": 0.0,
+                    "response_bytes": 0,
+                    "slow": 0,
+                }
+            endpoint["count"] += 1
+            endpoint["duration"] += duration
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    endpoint["buckets"][i] += 1
+                    break
+            endpoint["db_queries"] += metrics.queries
+            endpoint["db_time"] += metrics.db_time
+            endpoint["serializer_time"] += metrics.serializer_time
+            endpoint["response_bytes"] += response_bytes
+            if slow_sample is not None:
+                endpoint["slow"] += 1
+                self.slow_requests.append(slow_sample)
+
+    def slow_samples(self):
+        """Sampled slow requests, most recent first."""
+        with self._lock:
+            return list(reversed(self.slow_requests))
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.requests), {
+                key: {**value, "buckets": list(value["buckets"])}
+                for key, value in self.endpoints.items()
+            }
+
+
+registry = MetricsRegistry()
+
+
+def _response_size(response):
+    if getattr(response, "streaming", False):
+        return int(response.get("Content-Length") or 0)
+    return len(response.content)
+
+
+def _slow_sample(request, metrics, status, duration, response_bytes):
+    return {
+        "timestamp": timezone.now().isoformat(),
+        "method": request.method,
+        "path": request.path,  # Query strings can carry search terms (names, phones)
+        "view": metrics.view,
+        "action": metrics.action,
+        "status": status,
+        "user_id": getattr(getattr(request, "user", None), "pk", None),
+        "duration_ms": round(duration * 1000, 2),
+        "db_queries": metrics.queries,
+        "db_time_ms": round(metrics.db_time * 1000, 2),
+        "serializer_ms": round(metrics.serializer_time * 1000, 2),
+        "response_bytes": response_bytes,
+        "top_queries": [
+            {"duration_ms": round(elapsed * 1000, 2), "sql": sql[:MAX_SQL_LENGTH]}
+            for elapsed, _, sql in sorted(metrics.top_queries, reverse=True)
+        ],
+    }
+
+
+class PerformanceMiddleware:
+    """
+    Record wall time, DB and serializer time and response size per request.
+
+    Place first in MIDDLEWARE so the measurement covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_threshold = getattr(settings, "PERFORMANCE_SLOW_REQUEST_MS", 500) / 1000
+        self.top_size = getattr(settings, "PERFORMANCE_SLOW_REQUEST_TOP_QUERIES", 5)
+
+    def __call__(self, request):
+        metrics = RequestMetrics(self.top_size)
+        token = _current.set(metrics)
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        duration = time.perf_counter() - metrics.started
+        response_bytes = _response_size(response)
+        slow_sample = None
+        if duration >= self.slow_threshold:
+            slow_sample = _slow_sample(
+                request, metrics, response.status_code, duration, response_bytes
+            )
+        registry.record(
+            metrics, request.method, response.status_code, duration, response_bytes, slow_sample
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is None:
+            return None
+        view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+        if view_class is not None:
+            metrics.view = view_class.__name__
+            # Viewsets map HTTP methods to actions; plain APIViews use the method
+            actions = getattr(view_func, "actions", None) or {}
+            metrics.action = actions.get(request.method.lower(), request.method.lower())
+        else:
+            metrics.view = getattr(view_func, "__name__", "function")
+            metrics.action = request.method.lower()
+        return None
+
+
+def instrument_serializers():
+    """
+    Time top-level `serializer.data` evaluations into the current request.
+
+    Wraps BaseSerializer.data once; nested and repeated evaluations inside an
+    outer one are counted in the outer measurement only.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    data = BaseSerializer.data
+    if getattr(data.fget, "instrumented", False):
+        return
+
+    original = data.fget
+
+    def timed_data(serializer):
+        metrics = _current.get()
+        if metrics is None or metrics.serializing:
+            return original(serializer)
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return original(serializer)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics.serializing = False
+
+    timed_data.instrumented = True
+    BaseSerializer.data = property(timed_data, doc=data.__doc__)
+
+
+# ==================== Prometheus export ====================
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _metric(lines, name, kind, help_text, samples):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for suffix, labels, value in samples:
+        lines.append(f"{name}{suffix}{labels} {value}")
+
+
+def render_prometheus():
+    """All aggregates in the Prometheus text exposition format (version 0.0.4)."""
+    requests, endpoints = registry.snapshot()
+    lines = []
+
+    _metric(
+        lines,
+        "hotel_http_requests_total",
+        "counter",
+        "HTTP requests by view, action, method and status.",
+        [
+            ("", _labels(view=view, action=action, method=method, status=status), count)
+            for (view, action, method, status), count in sorted(requests.items())
+        ],
+    )
+
+    items = sorted(endpoints.items())
+    duration_samples = []
+    for (view, action), endpoint in items:
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, endpoint["buckets"]):
+            cumulative += count
+            duration_samples.append(
+                ("_bucket", _labels(view=view, action=action, le=bound), cumulative)
+            )
+        labels = _labels(view=view, action=action)
+        duration_samples.append(
+            ("_bucket", _labels(view=view, action=action, le="+Inf"), endpoint["count"])
+        )
+        duration_samples.append(("_sum", labels, round(endpoint["duration"], 6)))
+        duration_samples.append(("_count", labels, endpoint["count"]))
+    _metric(
+        lines,
+        "hotel_http_request_duration_seconds",
+        "histogram",
+        "Request wall time.",
+        duration_samples,
+    )
+
+    for name, field, help_text, digits in (
+        ("hotel_db_queries_total", "db_queries", "Database queries executed.", None),
+        ("hotel_db_query_seconds_total", "db_time", "Time spent in database queries.", 6),
+        (
+            "hotel_serializer_seconds_total",
+            "serializer_time",
+            "Time spent evaluating serializer.data.",
+            6,
+        ),
+        ("hotel_http_response_bytes_total", "response_bytes", "Response body bytes.", None),
+        ("hotel_slow_requests_total", "slow", "Requests over the slow threshold.", None),
+    ):
+        _metric(
+            lines,
+            name,
+            "counter",
+            help_text,
+            [
+                (
+                    "",
+                    _labels(view=view, action=action),
+                    round(endpoint[field], digits) if digits else endpoint[field],
+                )
+                for (view, action), endpoint in items
+            ],
+        )
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """
+    GET /metrics: Prometheus scrape endpoint.
+
+    The scraper must send PERFORMANCE_METRICS_TOKEN as
+    `Authorization: Bearer <token>`. Without a token the endpoint is only
+    served when DEBUG is on: /metrics is reachable through the public proxy,
+    and the metrics name every view with its traffic and latency.
+    """
+    if not is_enabled():
+        raise Http404
+    expected = getattr(settings, "PERFORMANCE_METRICS_TOKEN", "")
+    if not expected:
+        if not settings.DEBUG:
+            logger.warning("PERFORMANCE: /metrics refused, PERFORMANCE_METRICS_TOKEN is not set")
+            raise Http404
+    else:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(supplied.encode(), expected.encode()):
+            return HttpResponse("Unauthorized\n", status=401, content_type="text/plain")
+    return HttpResponse(render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
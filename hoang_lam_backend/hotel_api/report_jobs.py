@@ -0,0 +1,219 @@
+"""
+Background report jobs for Hoang Lam Heritage Management.
+
+Year-over-year comparisons and long-range reports can take longer than the
+gateway timeout when computed in the request. A client instead submits the
+report parameters to /report-jobs/; a Celery worker computes the report with
+the same view code and stores the result on a ReportJob:
+
+- The parameters are validated with the report's request serializer and
+  hashed (params_hash). A finished job with the same hash younger than
+  REPORT_JOB_FRESHNESS_SECONDS is returned as-is; an identical job still
+  pending or running is shared rather than computed twice.
+- The client polls /report-jobs/{id}/ and also gets a push notification when
+  the job finishes. Everyone who requested a shared in-flight job is recorded
+  in ReportJob.subscribers and notified; a requester reusing a finished job
+  gets the result in the response and no notification.
+- Jobs older than REPORT_JOB_RETENTION_DAYS are purged by the task.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from hotel_api.models import Notification, ReportJob
+
+logger = logging.getLogger("hotel_api")
+
+# report_type -> (report view name, request serializer name)
+REPORTS = {
+    "occupancy": ("OccupancyReportView", "OccupancyReportRequestSerializer"),
+    "revenue": ("RevenueReportView", "RevenueReportRequestSerializer"),
+    "kpi": ("KPIReportView", "KPIReportRequestSerializer"),
+    "comparative": ("ComparativeReportView", "ComparativeReportRequestSerializer"),
+    "demographics": ("GuestDemographicsView", "GuestDemographicsRequestSerializer"),
+    "channels": ("ChannelPerformanceView", "ChannelPerformanceRequestSerializer"),
+}
+
+REPORT_TITLES = {
+    "occupancy": "Báo cáo công suất phòng",
+    "revenue": "Báo cáo doanh thu",
+    "kpi": "Báo cáo KPI",
+    "comparative": "Báo cáo so sánh",
+    "demographics": "Báo cáo khách theo quốc tịch",
+    "channels": "Báo cáo kênh đặt phòng",
+}
+
+
+def _to_json(data):
+    """Round-trip through DRF's encoder so stored results match the API output."""
+    return json.loads(json.dumps(data, cls=JSONEncoder))
+
+
+def clean_params(report_type, params):
+    """
+    Validate report parameters with the report's own request serializer.
+
+    Returns:
+        (params, params_hash): the recognised raw parameters, and a hash of the
+        validated values (defaults included), so equivalent requests match.
+
+    Raises:
+        rest_framework.exceptions.ValidationError
+    """
+    from hotel_api import serializers
+
+    serializer = getattr(serializers, REPORTS[report_type][1])(data=params)
+    serializer.is_valid(raise_exception=True)
+
+    raw = {key: str(params[key]) for key in serializer.fields if key in params}
+    canonical = json.dumps(
+        {"report_type": report_type, "params": _to_json(serializer.validated_data)},
+        sort_keys=True,
+    )
+    return raw, hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def submit(user, report_type, params):
+    """
+    Return a job for the report, reusing a fresh or in-flight identical one.
+
+    Returns:
+        (job, created): created is False when an existing job was reused
+    """
+    params, params_hash = clean_params(report_type, params)
+    freshness = getattr(settings, "REPORT_JOB_FRESHNESS_SECONDS", 900)
+    since = timezone.now() - timedelta(seconds=freshness)
+
+    # Finished within the freshness window, or still being computed
+    existing = (
+        ReportJob.objects.filter(params_hash=params_hash)
+        .filter(
+            Q(status=ReportJob.Status.DONE, completed_at__gte=since)
+            | Q(
+                status__in=[ReportJob.Status.PENDING, ReportJob.Status.RUNNING],
+                created_at__gte=since,
+            )
+        )
+        .order_by("-created_at")
+        .first()
+    )
+    if existing:
+        if existing.status == ReportJob.Status.DONE:
+            return existing, False  # The response carries the result
+        with transaction.atomic():
+            # Locked so run() cannot finish the job between the status check and
+            # the subscription: a job still in flight notifies its subscribers
+            # when it finishes, one that has finished is returned as-is
+            existing = ReportJob.objects.select_for_update().get(pk=existing.pk)
+            in_flight = existing.status in (ReportJob.Status.PENDING, ReportJob.Status.RUNNING)
+            if in_flight and user.pk != existing.created_by_id:
+                existing.subscribers.add(user)
+        return existing, False
+
+    job = ReportJob.objects.create(
+        report_type=report_type,
+        params=params,
+        params_hash=params_hash,
+        created_by=user,
+    )
+    transaction.on_commit(lambda: dispatch(job.pk))
+    return job, True
+
+
+def dispatch(job_id):
+    """Queue the report task, computing inline if the broker is unreachable."""
+    from hotel_api.tasks import run_report_job as run_report_job_task
+
+    try:
+        run_report_job_task.delay(job_id)
+    except Exception as e:
+        logger.warning("REPORT JOB: could not queue job %s, running inline: %s", job_id, e)
+        run(job_id)
+
+
+def compute(report_type, params):
+    """Run the report view for params and return its JSON-ready data."""
+    from hotel_api import views
+    from hotel_api.exports import report_request
+
+    view = getattr(views, REPORTS[report_type][0])()
+    view.request = request = report_request(params)
+    response = view.get(request)
+    if response.status_code >= 400:
+        raise ValueError(f"{report_type} report returned {response.status_code}: {response.data}")
+    return _to_json(response.data)
+
+
+def run(job_id):
+    """Compute a pending job, store the result and notify its requesters."""
+    claimed = ReportJob.objects.filter(pk=job_id, status=ReportJob.Status.PENDING).update(
+        status=ReportJob.Status.RUNNING, started_at=timezone.now()
+    )
+    job = ReportJob.objects.select_related("created_by").get(pk=job_id)
+    if not claimed:
+        return job  # Already taken by another worker
+
+    try:
+        job.result = compute(job.report_type, job.params)
+        job.status = ReportJob.Status.DONE
+    except Exception as e:
+        logger.exception("REPORT JOB: job %s failed", job_id)
+        job.status = ReportJob.Status.FAILED
+        job.error = str(e)
+
+    job.completed_at = timezone.now()
+    job.save(update_fields=["result", "status", "error", "completed_at"])
+    notify(job)
+    return job
+
+
+def notify(job, recipients=None):
+    """
+    Tell the requesters (in-app and push) that their report finished.
+
+    Args:
+        recipients: users to notify (default: the creator and every subscriber)
+    """
+    from hotel_api.services import PushNotificationService
+
+    if recipients is None:
+        recipients = [job.created_by, *job.subscribers.exclude(pk=job.created_by_id)]
+
+    title = REPORT_TITLES.get(job.report_type, "Báo cáo")
+    if job.status == ReportJob.Status.DONE:
+        body = f"{title} đã sẵn sàng."
+    else:
+        body = f"{title} không thể tạo. Vui lòng thử lại."
+
+    for user in recipients:
+        PushNotificationService.notify_user(
+            user,
+            notification_type=Notification.NotificationType.GENERAL,
+            title=title,
+            body=body,
+            data={
+                "action": "report_ready",
+                "report_job_id": str(job.pk),
+                "report_type": job.report_type,
+                "status": job.status,
+            },
+        )
+
+
+def purge(days=None):
+    """Delete jobs older than REPORT_JOB_RETENTION_DAYS. Returns the number deleted."""
+    if days is None:
+        days = getattr(settings, "REPORT_JOB_RETENTION_DAYS", 7)
+    deleted, _ = ReportJob.objects.filter(
+        created_at__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
@@ -18,12 +18,31 @@ Retention periods:
 - Exchange rates: 3 years
 - Date rate overrides: 3 years
 - Sensitive data access logs: 7 years
+
+Expired rows are deleted in primary-key order, RETENTION_BATCH_SIZE at a time,
+each batch in its own short transaction and with RETENTION_BATCH_SLEEP
+seconds between batches, so the weekly run never holds long locks. Models
+nothing cascades to (and without delete signals) are deleted with a plain
+DELETE ... WHERE id IN (...); the others go through Django's collector one
+batch at a time.
+
+A run stops after RETENTION_TIME_BUDGET seconds. Where each model stopped is
+kept in RetentionProgress (last primary key and the cutoff used), and the next
+run resumes unfinished models first, from where they stopped.
+
+On PostgreSQL, notifications, guest messages and access logs are partitioned
+by month (hotel_api/partitions.py): months wholly past the cutoff are dropped
+as partitions first, and only the rest is deleted in batches.
 """
 
 import logging
+import time
 from datetime import timedelta
 
 from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.deletion import Collector
 from django.utils import timezone
 
 logger = logging.getLogger("hotel_api")
@@ -67,17 +86,8 @@ def _cutoff(days):
     return timezone.now() - timedelta(days=days)
 
 
-def apply_retention_policy(dry_run=False, model_filter=None):
-    """
-    Apply data retention policy — delete records past their retention period.
-
-    Args:
-        dry_run: If True, only count records without deleting.
-        model_filter: If set, only process the specified model name.
-
-    Returns:
-        dict of {model_name: deleted_count}
-    """
+def _cleanup_specs():
+    """(model_name, model, condition) where condition(cutoff) selects expired rows."""
     from hotel_api.models import (
         Booking,
         DateRateOverride,
@@ -94,116 +104,251 @@ def apply_retention_policy(dry_run=False, model_filter=None):
         SensitiveDataAccessLog,
     )
 
-    days = _get_retention_days()
-    results = {}
-
-    cleanup_specs = [
-        (
-            "notification",
-            Notification.objects.filter(created_at__lt=_cutoff(days["notification"])),
-        ),
+    return [
+        ("notification", Notification, lambda cutoff: Q(created_at__lt=cutoff)),
         (
             "device_token",
-            DeviceToken.objects.filter(
-                is_active=False, updated_at__lt=_cutoff(days["device_token"])
-            ),
-        ),
-        (
-            "guest_message",
-            GuestMessage.objects.filter(created_at__lt=_cutoff(days["guest_message"])),
+            DeviceToken,
+            lambda cutoff: Q(is_active=False, updated_at__lt=cutoff),
         ),
+        ("guest_message", GuestMessage, lambda cutoff: Q(created_at__lt=cutoff)),
         (
             "housekeeping_task",
-            HousekeepingTask.objects.filter(
+            HousekeepingTask,
+            lambda cutoff: Q(
                 status__in=[
                     HousekeepingTask.Status.COMPLETED,
                     HousekeepingTask.Status.VERIFIED,
                 ],
-                created_at__lt=_cutoff(days["housekeeping_task"]),
+                created_at__lt=cutoff,
             ),
         ),
         (
             "maintenance_request",
-            MaintenanceRequest.objects.filter(
+            MaintenanceRequest,
+            lambda cutoff: Q(
                 status__in=[
                     MaintenanceRequest.Status.COMPLETED,
                     MaintenanceRequest.Status.CANCELLED,
                 ],
-                created_at__lt=_cutoff(days["maintenance_request"]),
+                created_at__lt=cutoff,
             ),
         ),
         (
             "room_inspection",
-            RoomInspection.objects.filter(
-                completed_at__isnull=False,
-                created_at__lt=_cutoff(days["room_inspection"]),
-            ),
+            RoomInspection,
+            lambda cutoff: Q(completed_at__isnull=False, created_at__lt=cutoff),
         ),
         (
             "lost_and_found",
-            LostAndFound.objects.filter(
-                status=LostAndFound.Status.DISPOSED,
-                created_at__lt=_cutoff(days["lost_and_found"]),
-            ),
+            LostAndFound,
+            lambda cutoff: Q(status=LostAndFound.Status.DISPOSED, created_at__lt=cutoff),
         ),
         (
             "booking",
-            Booking.objects.filter(
+            Booking,
+            lambda cutoff: Q(
                 status__in=[
                     Booking.Status.CHECKED_OUT,
                     Booking.Status.CANCELLED,
                     Booking.Status.NO_SHOW,
                 ],
-                check_out_date__lt=_cutoff(days["booking"]).date(),
+                check_out_date__lt=cutoff.date(),
             ),
         ),
         (
             "night_audit",
-            NightAudit.objects.filter(
-                status=NightAudit.Status.CLOSED,
-                audit_date__lt=_cutoff(days["night_audit"]).date(),
-            ),
+            NightAudit,
+            lambda cutoff: Q(status=NightAudit.Status.CLOSED, audit_date__lt=cutoff.date()),
         ),
         (
             "financial_entry",
-            FinancialEntry.objects.filter(
-                booking__isnull=True,
-                date__lt=_cutoff(days["financial_entry"]).date(),
-            ),
-        ),
-        (
-            "exchange_rate",
-            ExchangeRate.objects.filter(date__lt=_cutoff(days["exchange_rate"]).date()),
-        ),
-        (
-            "date_rate_override",
-            DateRateOverride.objects.filter(date__lt=_cutoff(days["date_rate_override"]).date()),
+            FinancialEntry,
+            lambda cutoff: Q(booking__isnull=True, date__lt=cutoff.date()),
         ),
+        ("exchange_rate", ExchangeRate, lambda cutoff: Q(date__lt=cutoff.date())),
+        ("date_rate_override", DateRateOverride, lambda cutoff: Q(date__lt=cutoff.date())),
         (
             "sensitive_data_access_log",
-            SensitiveDataAccessLog.objects.filter(
-                timestamp__lt=_cutoff(days["sensitive_data_access_log"])
-            ),
+            SensitiveDataAccessLog,
+            lambda cutoff: Q(timestamp__lt=cutoff),
         ),
     ]
 
-    for model_name, queryset in cleanup_specs:
-        if model_filter and model_name != model_filter:
-            continue
 
-        count = queryset.count()
-        if count > 0 and not dry_run:
-            queryset.delete()
+def run_retention(
+    dry_run=False,
+    model_filter=None,
+    batch_size=None,
+    sleep=None,
+    time_budget=None,
+    restart=False,
+):
+    """
+    Delete expired records in batches within a time budget.
+
+    Args:
+        dry_run: If True, only count records without deleting.
+        model_filter: If set, only process the specified model name.
+        batch_size / sleep / time_budget: Override the RETENTION_* settings.
+        restart: Ignore saved progress and start every model from the beginning.
+
+    Returns:
+        dict of {model_name: {"deleted", "seconds", "rows_per_second", "complete"}}.
+        seconds is time spent deleting, without the sleeps between batches;
+        complete is False for a model the time budget cut short.
+    """
+    from hotel_api.models import RetentionProgress
+
+    batch_size = batch_size or getattr(settings, "RETENTION_BATCH_SIZE", 1000)
+    sleep = getattr(settings, "RETENTION_BATCH_SLEEP", 0.1) if sleep is None else sleep
+    if time_budget is None:
+        time_budget = getattr(settings, "RETENTION_TIME_BUDGET", 1800)
+    deadline = time.monotonic() + time_budget
+
+    days = _get_retention_days()
+    specs = [spec for spec in _cleanup_specs() if not model_filter or spec[0] == model_filter]
+    if not restart:
+        # Models a previous run left unfinished go first, so none is starved
+        unfinished = set(
+            RetentionProgress.objects.filter(completed_at__isnull=True).values_list(
+                "model_name", flat=True
+            )
+        )
+        specs.sort(key=lambda spec: spec[0] not in unfinished)
+
+    report = {}
+    for model_name, model, condition in specs:
+        if dry_run:
+            count = model.objects.filter(condition(_cutoff(days[model_name]))).count()
+            report[model_name] = _stats(count, 0.0, complete=True)
+        elif time.monotonic() >= deadline:
+            report[model_name] = _stats(0, 0.0, complete=False)
+        else:
+            report[model_name] = _purge(
+                model_name, model, condition, days[model_name], batch_size, sleep, deadline, restart
+            )
+        _log(model_name, report[model_name], days[model_name], dry_run)
+
+    return report
+
+
+def apply_retention_policy(dry_run=False, model_filter=None, **options):
+    """
+    Apply data retention policy — delete records past their retention period.
+
+    Args:
+        dry_run: If True, only count records without deleting.
+        model_filter: If set, only process the specified model name.
+        options: Passed to run_retention() (batch_size, sleep, time_budget, restart).
+
+    Returns:
+        dict of {model_name: deleted_count}
+    """
+    report = run_retention(dry_run=dry_run, model_filter=model_filter, **options)
+    return {model_name: stats["deleted"] for model_name, stats in report.items()}
+
+
+def _stats(deleted, seconds, complete):
+    return {
+        "deleted": deleted,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(deleted / seconds, 1) if seconds else 0.0,
+        "complete": complete,
+    }
+
+
+def _purge(model_name, model, condition, days, batch_size, sleep, deadline, restart):
+    """Delete one model's expired rows in primary-key batches until done or out of time."""
+    from hotel_api.models import RetentionProgress
+    from hotel_api.partitions import PARTITIONED_MODELS, expire_partitions
+
+    progress = RetentionProgress.objects.filter(model_name=model_name).first()
+    if restart or progress is None or progress.completed_at is not None:
+        progress, _ = RetentionProgress.objects.update_or_create(
+            model_name=model_name,
+            defaults={
+                "cutoff": _cutoff(days),
+                "last_pk": 0,
+                "deleted": 0,
+                "started_at": timezone.now(),
+                "completed_at": None,
+            },
+        )
+
+    # A resumed run keeps the cutoff it started with
+    queryset = model.objects.filter(condition(progress.cutoff))
+    fast = Collector(using=queryset.db).can_fast_delete(queryset)
+
+    deleted, seconds = 0, 0.0
+    if model_name in PARTITIONED_MODELS:
+        # Whole expired months go with their partition; batches handle the rest
+        started = time.monotonic()
+        deleted = sum(
+            rows for _, rows in expire_partitions(model_name, progress.cutoff, using=queryset.db)
+        )
+        seconds = time.monotonic() - started
+        progress.deleted += deleted
 
-        results[model_name] = count
-        action = "Would delete" if dry_run else "Deleted"
-        if count > 0:
+    while True:
+        started = time.monotonic()
+        with transaction.atomic(using=queryset.db):
+            ids = list(
+                queryset.filter(pk__gt=progress.last_pk)
+                .select_for_update()
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            count = _delete(model, ids, fast, queryset.db) if ids else 0
+            if ids:
+                progress.last_pk = ids[-1]
+            progress.deleted += count
+            if len(ids) < batch_size:
+                progress.completed_at = timezone.now()
+            progress.save(update_fields=["last_pk", "deleted", "completed_at", "updated_at"])
+        seconds += time.monotonic() - started
+        deleted += count
+
+        if progress.completed_at is not None or time.monotonic() + sleep >= deadline:
+            break
+        time.sleep(sleep)
+
+    return _stats(deleted, seconds, complete=progress.completed_at is not None)
+
+
+def _delete(model, ids, fast, using):
+    """Delete rows by primary key. Returns the number of `model` rows deleted."""
+    if not fast:
+        # Cascades, SET_NULLs and delete signals need the collector
+        _, per_model = model.objects.using(using).filter(pk__in=ids).delete()
+        return per_model.get(model._meta.label, 0)
+
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", ids)
+        return cursor.rowcount
+
+
+def _log(model_name, stats, days, dry_run):
+    if dry_run:
+        if stats["deleted"]:
             logger.info(
-                "RETENTION: %s %d %s record(s) (retention: %d days)",
-                action,
-                count,
+                "RETENTION: Would delete %d %s record(s) (retention: %d days)",
+                stats["deleted"],
                 model_name,
-                days[model_name],
+                days,
             )
-
-    return results
+        return
+    if stats["deleted"] or not stats["complete"]:
+        logger.info(
+            "RETENTION: Deleted %d %s record(s) in %.1fs (%.0f rows/s, retention: %d days)%s",
+            stats["deleted"],
+            model_name,
+            stats["seconds"],
+            stats["rows_per_second"],
+            days,
+            "" if stats["complete"] else "; time budget reached, will resume next run",
+        )
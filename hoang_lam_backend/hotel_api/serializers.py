@@ -12,12 +12,15 @@ from django.db import models
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from . import annotations
+from .annotations import AnnotatedCount
 from .models import (
     AuditLog,
     Booking,
     DateRateOverride,
     DeviceToken,
     ExchangeRate,
+    ExportJob,
     FinancialCategory,
     FinancialEntry,
     FolioItem,
@@ -35,6 +38,7 @@ from .models import (
     Notification,
     Payment,
     RatePlan,
+    ReportJob,
     Room,
     RoomInspection,
     RoomType,
@@ -190,8 +194,8 @@ class AdminResetPasswordSerializer(serializers.Serializer):
 class RoomTypeSerializer(serializers.ModelSerializer):
     """RoomType serializer with full details."""
 
-    room_count = serializers.SerializerMethodField()
-    available_room_count = serializers.SerializerMethodField()
+    room_count = AnnotatedCount(annotations.room_count)
+    available_room_count = AnnotatedCount(annotations.available_room_count)
 
     class Meta:
         model = RoomType
@@ -217,14 +221,6 @@ class RoomTypeSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
 
-    def get_room_count(self, obj):
-        """Get total number of rooms of this type."""
-        return obj.rooms.filter(is_active=True).count()
-
-    def get_available_room_count(self, obj):
-        """Get number of available rooms of this type."""
-        return obj.rooms.filter(is_active=True, status=Room.Status.AVAILABLE).count()
-
     def validate_base_rate(self, value):
         """Validate that base rate is positive."""
         if value <= 0:
@@ -241,8 +237,8 @@ class RoomTypeSerializer(serializers.ModelSerializer):
 class RoomTypeListSerializer(serializers.ModelSerializer):
     """Simplified RoomType serializer for list views."""
 
-    room_count = serializers.SerializerMethodField()
-    available_room_count = serializers.SerializerMethodField()
+    room_count = AnnotatedCount(annotations.room_count)
+    available_room_count = AnnotatedCount(annotations.available_room_count)
 
     class Meta:
         model = RoomType
@@ -259,12 +255,6 @@ class RoomTypeListSerializer(serializers.ModelSerializer):
             "available_room_count",
         ]
 
-    def get_room_count(self, obj):
-        return obj.rooms.filter(is_active=True).count()
-
-    def get_available_room_count(self, obj):
-        return obj.rooms.filter(is_active=True, status=Room.Status.AVAILABLE).count()
-
 
 class RoomSerializer(serializers.ModelSerializer):
     """Room serializer with full details."""
@@ -371,7 +361,7 @@ class GuestSerializer(serializers.ModelSerializer):
     """Guest serializer with full details."""
 
     is_returning_guest = serializers.ReadOnlyField()
-    booking_count = serializers.SerializerMethodField()
+    booking_count = AnnotatedCount(annotations.booking_count)
 
     is_foreign_guest = serializers.ReadOnlyField()
 
@@ -432,11 +422,6 @@ class GuestSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
 
-    @extend_schema_field(serializers.IntegerField)
-    def get_booking_count(self, obj):
-        """Get total number of bookings for this guest."""
-        return obj.bookings.count()
-
     def validate_phone(self, value):
         """Validate phone number format and uniqueness, normalize input."""
         import re
@@ -493,7 +478,7 @@ class GuestListSerializer(serializers.ModelSerializer):
     """Simplified Guest serializer for list views."""
 
     is_returning_guest = serializers.ReadOnlyField()
-    booking_count = serializers.IntegerField(read_only=True)  # From annotation
+    booking_count = AnnotatedCount(annotations.booking_count)
 
     class Meta:
         model = Guest
@@ -653,26 +638,18 @@ class BookingSerializer(serializers.ModelSerializer):
                 {"deposit_amount": "Deposit amount cannot exceed total amount."}
             )
 
-        # Check for overlapping bookings with row-level locking to prevent race conditions
+        # Check for overlapping bookings against the room-night ledger. Concurrent
+        # writers are caught by its unique (room, date) constraint on save.
         if room and check_in and check_out:
-            # Use select_for_update() within a transaction to lock the room
-            overlapping = (
-                Booking.objects.select_for_update()
-                .filter(
-                    room=room,
-                    status__in=[Booking.Status.CONFIRMED, Booking.Status.CHECKED_IN],
-                )
-                .exclude(pk=self.instance.pk if self.instance else None)
-            )
+            from .inventory import find_conflict
 
-            # Check if new booking overlaps with existing ones
-            for booking in overlapping:
-                if not (check_out <= booking.check_in_date or check_in >= booking.check_out_date):
-                    raise serializers.ValidationError(
-                        {
-                            "room": f"Room is already booked from {booking.check_in_date} to {booking.check_out_date}."
-                        }
-                    )
+            conflict = find_conflict(room, check_in, check_out, exclude_booking=self.instance)
+            if conflict:
+                raise serializers.ValidationError(
+                    {
+                        "room": f"Room is already booked from {conflict.booking.check_in_date} to {conflict.booking.check_out_date}."
+                    }
+                )
 
         return attrs
 
@@ -700,7 +677,21 @@ class BookingSerializer(serializers.ModelSerializer):
             if not validated_data.get("total_amount"):
                 validated_data["total_amount"] = pricing["total_amount"]
 
-        return super().create(validated_data)
+        from .inventory import RoomNightConflict
+
+        try:
+            return super().create(validated_data)
+        except RoomNightConflict as e:
+            raise serializers.ValidationError({"room": str(e)})
+
+    def update(self, instance, validated_data):
+        """Update booking, surfacing room-night conflicts as validation errors."""
+        from .inventory import RoomNightConflict
+
+        try:
+            return super().update(instance, validated_data)
+        except RoomNightConflict as e:
+            raise serializers.ValidationError({"room": str(e)})
 
 
 class BookingListSerializer(serializers.ModelSerializer):
@@ -938,7 +929,7 @@ class PartialRefundSerializer(serializers.Serializer):
 class FinancialCategorySerializer(serializers.ModelSerializer):
     """Serializer for FinancialCategory model."""
 
-    entry_count = serializers.SerializerMethodField()
+    entry_count = AnnotatedCount(annotations.entry_count)
 
     class Meta:
         model = FinancialCategory
@@ -956,13 +947,6 @@ class FinancialCategorySerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id"]
 
-    @extend_schema_field(int)
-    def get_entry_count(self, obj):
-        """Get number of entries in this category."""
-        if hasattr(obj, "entry_count"):
-            return obj.entry_count
-        return obj.entries.count()
-
 
 class FinancialCategoryListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for listing financial categories."""
@@ -1205,6 +1189,32 @@ class NightAuditCreateSerializer(serializers.Serializer):
         return value
 
 
+class NightAuditRebuildSerializer(serializers.Serializer):
+    """Date range for rebuilding night audits."""
+
+    # Keeps a single request within one sweep of a year
+    MAX_DAYS = 366
+
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    create_missing = serializers.BooleanField(default=True)
+
+    def validate(self, attrs):
+        from django.utils import timezone
+
+        if attrs["start_date"] > attrs["end_date"]:
+            raise serializers.ValidationError({"end_date": "Ngày kết thúc phải sau ngày bắt đầu."})
+        if attrs["end_date"] > timezone.localdate():
+            raise serializers.ValidationError(
+                {"end_date": "Không thể tạo kiểm toán cho ngày trong tương lai."}
+            )
+        if (attrs["end_date"] - attrs["start_date"]).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                {"end_date": f"Khoảng thời gian tối đa là {self.MAX_DAYS} ngày."}
+            )
+        return attrs
+
+
 # ============================================================
 # Payment Serializers (Phase 2.1.3)
 # ============================================================
@@ -2342,6 +2352,73 @@ class ExportReportRequestSerializer(serializers.Serializer):
         return attrs
 
 
+class ExportJobSerializer(serializers.ModelSerializer):
+    """Background export job; download_url is set once the file is ready."""
+
+    status_display = serializers.CharField(source="get_status_display", read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "export_type",
+            "params",
+            "file_format",
+            "status",
+            "status_display",
+            "row_count",
+            "error",
+            "download_url",
+            "created_at",
+            "completed_at",
+        ]
+        read_only_fields = fields
+
+    @extend_schema_field(serializers.URLField(allow_null=True))
+    def get_download_url(self, obj):
+        if obj.status != ExportJob.Status.DONE or not obj.file:
+            return None
+        from django.urls import reverse
+
+        url = reverse("exportjob-download", args=[obj.pk])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+
+class ReportJobCreateSerializer(serializers.Serializer):
+    """Submit a report to be computed in the background."""
+
+    report_type = serializers.ChoiceField(
+        choices=["occupancy", "revenue", "kpi", "comparative", "demographics", "channels"]
+    )
+    params = serializers.DictField(
+        help_text="Query parameters of the report endpoint, e.g. start_date/end_date."
+    )
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """Background report job; result holds the report endpoint's response once done."""
+
+    status_display = serializers.CharField(source="get_status_display", read_only=True)
+
+    class Meta:
+        model = ReportJob
+        fields = [
+            "id",
+            "report_type",
+            "params",
+            "status",
+            "status_display",
+            "result",
+            "error",
+            "created_at",
+            "started_at",
+            "completed_at",
+        ]
+        read_only_fields = fields
+
+
 # ============================================================
 # Lost & Found Serializers (Phase 3)
 # ============================================================
@@ -12,6 +12,16 @@ logger = logging.getLogger("hotel_api")
 
 User = get_user_model()
 
+# FCM caps a multicast message at 500 tokens
+FCM_BATCH_SIZE = 500
+
+# FCM error codes meaning the device token will never work again
+INVALID_TOKEN_CODES = ("NOT_FOUND", "UNREGISTERED", "INVALID_ARGUMENT")
+
+
+class PushDeliveryError(Exception):
+    """Raised by the delivery task when some notifications could not be sent, to retry them."""
+
 
 class PushNotificationService:
     """
@@ -79,76 +89,153 @@ class PushNotificationService:
         Returns:
             bool: True if sent successfully (or FCM disabled), False on error
         """
-        from .models import DeviceToken
+        return cls.send_push_batch([notification])
 
-        if not cls._init_firebase():
-            logger.debug(f"FCM not available. Notification {notification.id} stored in DB only.")
-            return True
+    @classmethod
+    def _build_message(cls, tokens, notification):
+        from firebase_admin import messaging
+
+        return messaging.MulticastMessage(
+            tokens=tokens,
+            notification=messaging.Notification(
+                title=notification.title,
+                body=notification.body,
+            ),
+            data=({k: str(v) for k, v in notification.data.items()} if notification.data else {}),
+            android=messaging.AndroidConfig(
+                priority="high",
+                notification=messaging.AndroidNotification(
+                    click_action="FLUTTER_NOTIFICATION_CLICK",
+                ),
+            ),
+            apns=messaging.APNSConfig(
+                payload=messaging.APNSPayload(
+                    aps=messaging.Aps(
+                        badge=1,
+                        sound="default",
+                    ),
+                ),
+            ),
+        )
 
-        try:
-            from firebase_admin import messaging
+    @staticmethod
+    def _chunks(group, tokens_by_user):
+        """
+        Pack a group's notifications into multicast chunks of at most FCM_BATCH_SIZE tokens.
 
-            tokens = list(
-                DeviceToken.objects.filter(
-                    user=notification.recipient,
-                    is_active=True,
-                ).values_list("token", flat=True)
-            )
+        A recipient's tokens never straddle two chunks, so each notification is
+        delivered (or fails) with exactly one chunk. Recipients without tokens
+        are left out. Yields (notifications, tokens).
+        """
+        notifications, tokens = [], []
+        for notification in group:
+            own = tokens_by_user.get(notification.recipient_id, [])
+            if not own:
+                continue
+            if tokens and len(tokens) + len(own) > FCM_BATCH_SIZE:
+                yield notifications, tokens
+                notifications, tokens = [], []
+            notifications.append(notification)
+            tokens.extend(own)
+        if tokens:
+            yield notifications, tokens
 
-            if not tokens:
-                logger.info(f"No active device tokens for user {notification.recipient.username}")
-                return True
+    @classmethod
+    def send_push_batch(cls, notifications):
+        """
+        Deliver Notification records via FCM in as few multicast calls as possible.
 
-            message = messaging.MulticastMessage(
-                tokens=tokens,
-                notification=messaging.Notification(
-                    title=notification.title,
-                    body=notification.body,
-                ),
-                data=(
-                    {k: str(v) for k, v in notification.data.items()} if notification.data else {}
-                ),
-                android=messaging.AndroidConfig(
-                    priority="high",
-                    notification=messaging.AndroidNotification(
-                        click_action="FLUTTER_NOTIFICATION_CLICK",
-                    ),
-                ),
-                apns=messaging.APNSConfig(
-                    payload=messaging.APNSPayload(
-                        aps=messaging.Aps(
-                            badge=1,
-                            sound="default",
-                        ),
-                    ),
-                ),
-            )
+        Notifications with the same title/body/data (one notify_staff fan-out)
+        share multicast messages of up to FCM_BATCH_SIZE tokens. A notification
+        is marked sent when its chunk goes out, so a later failing chunk only
+        records an error on its own notifications. Device tokens are read in
+        one query; invalid tokens, sent flags and errors are each written with
+        one UPDATE.
 
-            response = messaging.send_each_for_multicast(message)
+        Args:
+            notifications: list of Notification instances
+
+        Returns:
+            bool: True if every batch was sent (or FCM disabled), False on error
+        """
+        import json
 
-            # Deactivate invalid tokens
-            if response.failure_count > 0:
-                for i, send_response in enumerate(response.responses):
-                    if send_response.exception:
-                        error_code = getattr(send_response.exception, "code", "")
-                        if error_code in ["NOT_FOUND", "UNREGISTERED", "INVALID_ARGUMENT"]:
-                            DeviceToken.objects.filter(token=tokens[i]).update(is_active=False)
-                            logger.info(f"Deactivated invalid token: {tokens[i][:20]}...")
+        from .models import DeviceToken, Notification
 
-            notification.is_sent = True
-            notification.sent_at = timezone.now()
-            notification.save(update_fields=["is_sent", "sent_at"])
+        if not notifications:
+            return True
 
-            logger.info(
-                f"Push notification sent: {response.success_count}/{len(tokens)} successful"
+        if not cls._init_firebase():
+            logger.debug(
+                f"FCM not available. {len(notifications)} notification(s) stored in DB only."
             )
             return True
 
-        except Exception as e:
-            logger.error(f"Failed to send push notification: {e}")
-            notification.send_error = str(e)
-            notification.save(update_fields=["send_error"])
-            return False
+        from firebase_admin import messaging
+
+        tokens_by_user = {}
+        for user_id, token in DeviceToken.objects.filter(
+            user_id__in={n.recipient_id for n in notifications},
+            is_active=True,
+        ).values_list("user_id", "token"):
+            tokens_by_user.setdefault(user_id, []).append(token)
+
+        groups = {}
+        for notification in notifications:
+            key = (
+                notification.title,
+                notification.body,
+                json.dumps(notification.data or {}, sort_keys=True, default=str),
+            )
+            groups.setdefault(key, []).append(notification)
+
+        sent_ids, invalid_tokens, errors = [], [], {}
+        success_count = token_count = 0
+        for group in groups.values():
+            for chunk_notifications, tokens in cls._chunks(group, tokens_by_user):
+                try:
+                    for i in range(0, len(tokens), FCM_BATCH_SIZE):
+                        chunk = tokens[i : i + FCM_BATCH_SIZE]
+                        response = messaging.send_each_for_multicast(
+                            cls._build_message(chunk, group[0])
+                        )
+                        success_count += response.success_count
+                        token_count += len(chunk)
+                        if response.failure_count > 0:
+                            for token, send_response in zip(chunk, response.responses):
+                                error_code = getattr(send_response.exception, "code", "")
+                                if error_code in INVALID_TOKEN_CODES:
+                                    invalid_tokens.append(token)
+                    sent_ids.extend(n.pk for n in chunk_notifications)
+                except Exception as e:
+                    logger.error(f"Failed to send push notification: {e}")
+                    errors.setdefault(str(e), []).extend(n.pk for n in chunk_notifications)
+
+        if invalid_tokens:
+            DeviceToken.objects.filter(token__in=invalid_tokens).update(is_active=False)
+            logger.info(f"Deactivated {len(invalid_tokens)} invalid token(s)")
+
+        if sent_ids:
+            sent_ids = set(sent_ids)
+            sent_at = timezone.now()
+            Notification.objects.filter(pk__in=sent_ids).update(is_sent=True, sent_at=sent_at)
+            for notification in notifications:
+                if notification.pk in sent_ids:
+                    notification.is_sent = True
+                    notification.sent_at = sent_at
+
+        for error, ids in errors.items():
+            ids = set(ids)
+            Notification.objects.filter(pk__in=ids).update(send_error=error)
+            for notification in notifications:
+                if notification.pk in ids:
+                    notification.send_error = error
+
+        logger.info(
+            f"Push notifications sent: {success_count}/{token_count} successful "
+            f"for {len(notifications)} notification(s)"
+        )
+        return not errors
 
     @classmethod
     def notify_staff(
@@ -163,8 +250,11 @@ class PushNotificationService:
         """
         Send a notification to all staff who have notifications enabled.
 
-        Creates Notification records for each eligible staff member
-        and sends push notifications.
+        Creates Notification records for each eligible staff member in one
+        INSERT and hands push delivery to the send_push_notifications Celery
+        task once the surrounding transaction commits, so request latency
+        does not depend on FCM. With PUSH_NOTIFICATIONS_ASYNC=False (or when
+        the broker is unreachable) delivery runs inline after commit.
 
         Args:
             notification_type: Notification.NotificationType value
@@ -177,6 +267,8 @@ class PushNotificationService:
         Returns:
             list[Notification]: Created notification records
         """
+        from django.db import transaction
+
         from .models import Notification
 
         staff_users = User.objects.filter(
@@ -188,21 +280,68 @@ class PushNotificationService:
         if exclude_user:
             staff_users = staff_users.exclude(pk=exclude_user.pk)
 
-        notifications = []
-        for user in staff_users:
-            notification = Notification.objects.create(
-                recipient=user,
-                notification_type=notification_type,
-                title=title,
-                body=body,
-                data=data or {},
-                booking=booking,
-            )
-            cls.send_push_notification(notification)
-            notifications.append(notification)
+        notifications = Notification.objects.bulk_create(
+            [
+                Notification(
+                    recipient=user,
+                    notification_type=notification_type,
+                    title=title,
+                    body=body,
+                    data=data or {},
+                    booking=booking,
+                )
+                for user in staff_users
+            ]
+        )
+
+        if notifications and getattr(settings, "FCM_ENABLED", False):
+            ids = [n.pk for n in notifications]
+            transaction.on_commit(lambda: cls.dispatch_push(ids))
 
         return notifications
 
+    @classmethod
+    def notify_user(cls, user, notification_type, title, body, data=None):
+        """
+        Send a notification to one user, e.g. about a job they requested.
+
+        Stored even when the user has turned off staff notifications; push
+        delivery follows the same on-commit path as notify_staff.
+
+        Returns:
+            Notification: The created record
+        """
+        from django.db import transaction
+
+        from .models import Notification
+
+        notification = Notification.objects.create(
+            recipient=user,
+            notification_type=notification_type,
+            title=title,
+            body=body,
+            data=data or {},
+        )
+        if getattr(settings, "FCM_ENABLED", False):
+            transaction.on_commit(lambda: cls.dispatch_push([notification.pk]))
+        return notification
+
+    @classmethod
+    def dispatch_push(cls, notification_ids):
+        """Queue push delivery for stored notifications, sending inline as a fallback."""
+        if getattr(settings, "PUSH_NOTIFICATIONS_ASYNC", True):
+            from .tasks import send_push_notifications
+
+            try:
+                send_push_notifications.delay(notification_ids)
+                return
+            except Exception as e:
+                logger.warning(f"Could not queue push delivery, sending inline: {e}")
+
+        from .models import Notification
+
+        cls.send_push_batch(list(Notification.objects.filter(pk__in=notification_ids)))
+
 
 class RatePricingService:
     """
@@ -0,0 +1,138 @@
+"""
+Model signal handlers for Hoang Lam Heritage Management.
+
+Change capture for the DailyHotelStats fact table: every save or delete of a
+row that feeds the daily KPIs marks the dates it touched — before and after
+the change, so extend-stay and swap-room dirty both the old and new stay — in
+the dirty-date queue (see hotel_api/stats.py).
+
+The same snapshot drives invalidation of the cached dashboard summary (see
+hotel_api/dashboard.py) when a booking, room status or financial entry changes.
+
+Original values are snapshotted on post_init, so no extra query is needed to
+find the old date range.
+"""
+
+from datetime import timedelta
+
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+from hotel_api.dashboard import invalidate_dashboard
+from hotel_api.models import (
+    Booking,
+    DailyHotelStats,
+    FinancialEntry,
+    MinibarSale,
+    Room,
+)
+from hotel_api.occupancy import OCCUPYING_STATUSES
+from hotel_api.stats import mark_dates_dirty
+
+# Fields (attnames) whose values decide which dates a row contributes to
+TRACKED_FIELDS = {
+    Booking: ("check_in_date", "check_out_date", "status", "room_id", "nightly_rate", "source"),
+    FinancialEntry: ("date", "entry_type", "amount"),
+    MinibarSale: ("date", "total"),
+    Room: ("is_active",),
+}
+
+# Fields shown on the dashboard summary
+DASHBOARD_FIELDS = {
+    Booking: ("check_in_date", "check_out_date", "status"),
+    FinancialEntry: ("date", "entry_type", "amount"),
+    Room: ("status", "is_active"),
+}
+
+SNAPSHOT_FIELDS = {
+    model: tuple(dict.fromkeys(TRACKED_FIELDS.get(model, ()) + DASHBOARD_FIELDS.get(model, ())))
+    for model in {**TRACKED_FIELDS, **DASHBOARD_FIELDS}
+}
+
+
+def _snapshot(instance, fields=None):
+    fields = fields or SNAPSHOT_FIELDS[type(instance)]
+    return {field: instance.__dict__.get(field) for field in fields}
+
+
+def _subset(values, fields):
+    return {field: values[field] for field in fields} if values else None
+
+
+def _update_touches(sender, update_fields, fields):
+    if update_fields is None:
+        return True
+    names = {sender._meta.get_field(name).attname for name in update_fields}
+    return bool(names & set(fields))
+
+
+def _affected_dates(model, values):
+    """Dates whose facts depend on a row with these tracked values."""
+    if model is Booking:
+        check_in, check_out = values["check_in_date"], values["check_out_date"]
+        if values["status"] not in OCCUPYING_STATUSES or not check_in or not check_out:
+            return set()
+        # Arrival and departure days too, so same-day stays are not missed
+        nights = {check_in + timedelta(days=i) for i in range((check_out - check_in).days)}
+        return nights | {check_in, check_out}
+    return {values["date"]}
+
+
+def _open_fact_dates():
+    """Stored fact dates from today on; their total_rooms follows the live inventory."""
+    return DailyHotelStats.objects.filter(
+        date__gte=timezone.localdate(), room_type__isnull=True, source=""
+    ).values_list("date", flat=True)
+
+
+def snapshot_tracked_fields(sender, instance, **kwargs):
+    instance._stats_snapshot = _snapshot(instance)
+
+
+def handle_saved(sender, instance, created, update_fields=None, **kwargs):
+    old = getattr(instance, "_stats_snapshot", None)
+    new = _snapshot(instance)
+    instance._stats_snapshot = new
+
+    dashboard_fields = DASHBOARD_FIELDS.get(sender)
+    if dashboard_fields and _update_touches(sender, update_fields, dashboard_fields):
+        if created or _subset(old, dashboard_fields) != _subset(new, dashboard_fields):
+            invalidate_dashboard()
+
+    tracked = TRACKED_FIELDS.get(sender)
+    if tracked and _update_touches(sender, update_fields, tracked):
+        mark_saved_dates(sender, _subset(old, tracked), _subset(new, tracked), created)
+
+
+def handle_deleted(sender, instance, **kwargs):
+    if sender in DASHBOARD_FIELDS:
+        invalidate_dashboard()
+    if sender in TRACKED_FIELDS:
+        mark_deleted_dates(sender, _snapshot(instance, TRACKED_FIELDS[sender]))
+
+
+def mark_saved_dates(sender, old, new, created):
+    if not created and old == new:
+        return
+
+    if sender is Room:
+        mark_dates_dirty(_open_fact_dates())
+        return
+
+    dates = _affected_dates(sender, new)
+    if not created and old:
+        dates |= _affected_dates(sender, old)
+    mark_dates_dirty(dates)
+
+
+def mark_deleted_dates(sender, values):
+    if sender is Room:
+        mark_dates_dirty(_open_fact_dates())
+        return
+    mark_dates_dirty(_affected_dates(sender, values))
+
+
+for _model in SNAPSHOT_FIELDS:
+    post_init.connect(snapshot_tracked_fields, sender=_model, dispatch_uid=f"stats_init_{_model}")
+    post_save.connect(handle_saved, sender=_model, dispatch_uid=f"stats_save_{_model}")
+    post_delete.connect(handle_deleted, sender=_model, dispatch_uid=f"stats_delete_{_model}")
@@ -0,0 +1,367 @@
+"""
+Daily KPI fact table maintenance for Hoang Lam Heritage Management.
+
+DailyHotelStats holds one hotel-wide row per date plus breakdown rows per
+(room type, booking source). Reports read the hotel-wide rows with a single
+range scan instead of recomputing from Booking / FinancialEntry / MinibarSale.
+
+Rows are written by:
+- NightAudit.calculate_statistics (the audit date) and night_audit.rebuild_audits
+- refresh_dirty_dates, run by the refresh_dirty_daily_stats Celery task: saves
+  and deletes of Booking, FinancialEntry, MinibarSale and Room (see
+  hotel_api/signals.py) mark the affected dates in DailyStatsDirtyDate,
+  and the task recomputes only those dates, coalescing bursts of writes
+- ensure_daily_stats, called by reports for dates with no row or a pending
+  dirty mark, so reads never wait for the worker
+- the backfill_daily_stats command for history
+
+Queryset .update() and raw SQL bypass the signals; run check_daily_stats
+--fix after bulk corrections.
+
+A refresh replaces a range's rows (delete, then insert) under per-date
+advisory locks on PostgreSQL, so concurrent reports refreshing the same stale
+dates queue behind each other instead of colliding on the unique constraints.
+SQLite serializes writers by itself.
+
+check_daily_stats diffs the stored rows against a raw recomputation.
+"""
+
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from hotel_api.models import (
+    Booking,
+    DailyHotelStats,
+    DailyStatsDirtyDate,
+    FinancialEntry,
+    MinibarSale,
+    Room,
+)
+from hotel_api.occupancy import OCCUPYING_STATUSES
+
+logger = logging.getLogger("hotel_api")
+
+# Cache key held while a refresh task is queued, so bursts of writes share one task
+REFRESH_SCHEDULED_KEY = "daily_stats:refresh_scheduled"
+
+# First key of the per-date advisory locks taken by refresh_daily_stats ("DS")
+REFRESH_LOCK_NAMESPACE = 0x4453
+
+# Metric columns of DailyHotelStats
+STAT_FIELDS = (
+    "total_rooms",
+    "rooms_sold",
+    "room_revenue",
+    "arrivals",
+    "total_income",
+    "total_expense",
+    "minibar_revenue",
+)
+
+
+def _empty_row():
+    return {
+        "total_rooms": 0,
+        "rooms_sold": 0,
+        "room_revenue": Decimal("0"),
+        "arrivals": 0,
+        "total_income": Decimal("0"),
+        "total_expense": Decimal("0"),
+        "minibar_revenue": Decimal("0"),
+    }
+
+
+def compute_daily_stats(start_date, end_date):
+    """
+    Recompute the facts for [start_date, end_date] from the raw tables.
+
+    Returns:
+        dict keyed by (date, room_type_id, source) -> metrics dict. The
+        hotel-wide row of each date uses (date, None, "") and always exists.
+    """
+    facts = {}
+
+    def row(day, room_type_id=None, source=""):
+        key = (day, room_type_id, source)
+        if key not in facts:
+            facts[key] = _empty_row()
+        return facts[key]
+
+    total_rooms = Room.objects.filter(is_active=True).count()
+    day = start_date
+    while day <= end_date:
+        row(day)["total_rooms"] = total_rooms
+        day += timedelta(days=1)
+
+    # Room-nights sold and room revenue, clipped to the range
+    stays = Booking.objects.filter(
+        status__in=OCCUPYING_STATUSES,
+        check_in_date__lte=end_date,
+        check_out_date__gt=start_date,
+    ).values_list("check_in_date", "check_out_date", "nightly_rate", "room__room_type_id", "source")
+    range_stop = end_date + timedelta(days=1)
+    for check_in, check_out, nightly_rate, room_type_id, source in stays.iterator():
+        night = max(check_in, start_date)
+        stop = min(check_out, range_stop)
+        while night < stop:
+            for target in (row(night), row(night, room_type_id, source)):
+                target["rooms_sold"] += 1
+                target["room_revenue"] += nightly_rate
+            night += timedelta(days=1)
+
+    # Arrivals
+    arrivals = (
+        Booking.objects.filter(
+            status__in=OCCUPYING_STATUSES,
+            check_in_date__gte=start_date,
+            check_in_date__lte=end_date,
+        )
+        .values("check_in_date", "room__room_type_id", "source")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for item in arrivals:
+        day = item["check_in_date"]
+        for target in (row(day), row(day, item["room__room_type_id"], item["source"])):
+            target["arrivals"] += item["count"]
+
+    # Income and expenses
+    entries = (
+        FinancialEntry.objects.filter(date__gte=start_date, date__lte=end_date)
+        .values("date")
+        .annotate(
+            income=Sum("amount", filter=Q(entry_type=FinancialEntry.EntryType.INCOME)),
+            expense=Sum("amount", filter=Q(entry_type=FinancialEntry.EntryType.EXPENSE)),
+        )
+        .order_by()
+    )
+    for item in entries:
+        row(item["date"])["total_income"] = item["income"] or Decimal("0")
+        row(item["date"])["total_expense"] = item["expense"] or Decimal("0")
+
+    # Minibar sales
+    minibar = (
+        MinibarSale.objects.filter(date__gte=start_date, date__lte=end_date)
+        .values("date")
+        .annotate(total=Sum("total"))
+        .order_by()
+    )
+    for item in minibar:
+        row(item["date"])["minibar_revenue"] = item["total"] or Decimal("0")
+
+    return facts
+
+
+def refresh_daily_stats(start_date, end_date=None):
+    """
+    Recompute and store the fact rows for [start_date, end_date].
+
+    Returns:
+        Number of rows written
+    """
+    end_date = end_date or start_date
+    facts = compute_daily_stats(start_date, end_date)
+    rows = [
+        DailyHotelStats(date=day, room_type_id=room_type_id, source=source, **metrics)
+        for (day, room_type_id, source), metrics in facts.items()
+    ]
+    with transaction.atomic():
+        _lock_dates(start_date, end_date)
+        DailyHotelStats.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+        DailyHotelStats.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def _lock_dates(start_date, end_date):
+    """
+    Hold a transaction-level advisory lock on each date of the range (PostgreSQL).
+
+    Locks are taken in date order, so overlapping ranges cannot deadlock. The
+    delete that follows runs after the lock is granted and so sees the rows a
+    concurrent refresh committed.
+    """
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(%s, day) FROM generate_series(%s, %s) AS day "
+            "ORDER BY day",
+            [REFRESH_LOCK_NAMESPACE, start_date.toordinal(), end_date.toordinal()],
+        )
+
+
+def date_runs(dates):
+    """Split a sorted list of dates into contiguous (first, last) runs."""
+    runs = []
+    for day in dates:
+        if runs and day == runs[-1][1] + timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
+
+
+def ensure_daily_stats(start_date, end_date):
+    """
+    Make sure every date in the range has fresh fact rows.
+
+    Dates without a hotel-wide row, or still waiting in the dirty queue, are
+    recomputed before the caller reads them.
+    """
+    stored = set(
+        DailyHotelStats.objects.filter(
+            date__gte=start_date,
+            date__lte=end_date,
+            room_type__isnull=True,
+            source="",
+        ).values_list("date", flat=True)
+    )
+    dirty = set(
+        DailyStatsDirtyDate.objects.filter(date__gte=start_date, date__lte=end_date).values_list(
+            "date", flat=True
+        )
+    )
+    stale = []
+    day = start_date
+    while day <= end_date:
+        if day not in stored or day in dirty:
+            stale.append(day)
+        day += timedelta(days=1)
+
+    started = timezone.now()
+    for first, last in date_runs(stale):
+        refresh_daily_stats(first, last)
+        _clear_dirty(first, last, started)
+
+
+def hotel_totals(start_date, end_date):
+    """
+    Sum the hotel-wide fact rows over [start_date, end_date] in one query.
+
+    `total_rooms` is returned as room-nights available over the range.
+    """
+    ensure_daily_stats(start_date, end_date)
+    totals = DailyHotelStats.objects.filter(
+        date__gte=start_date,
+        date__lte=end_date,
+        room_type__isnull=True,
+        source="",
+    ).aggregate(**{field: Sum(field) for field in STAT_FIELDS})
+    return {field: totals[field] or 0 for field in STAT_FIELDS}
+
+
+def check_daily_stats(start_date, end_date):
+    """
+    Diff stored fact rows against a raw recomputation.
+
+    Returns:
+        list of dicts with date, room_type, source, field, stored, expected
+    """
+    expected = compute_daily_stats(start_date, end_date)
+    stored = {
+        (row["date"], row["room_type_id"], row["source"]): row
+        for row in DailyHotelStats.objects.filter(date__gte=start_date, date__lte=end_date).values(
+            "date", "room_type_id", "source", *STAT_FIELDS
+        )
+    }
+
+    mismatches = []
+    for key in sorted(set(expected) | set(stored), key=lambda k: (k[0], k[1] or 0, k[2])):
+        want = expected.get(key, _empty_row())
+        have = stored.get(key, _empty_row())
+        for field in STAT_FIELDS:
+            if have[field] != want[field]:
+                mismatches.append(
+                    {
+                        "date": key[0],
+                        "room_type": key[1],
+                        "source": key[2],
+                        "field": field,
+                        "stored": have[field] if key in stored else None,
+                        "expected": want[field],
+                    }
+                )
+    if mismatches:
+        logger.warning(
+            "DAILY_STATS: %d mismatch(es) between %s and %s",
+            len(mismatches),
+            start_date,
+            end_date,
+        )
+    return mismatches
+
+
+# ---------------------------------------------------------------------------
+# Dirty-date queue
+# ---------------------------------------------------------------------------
+
+
+def mark_dates_dirty(dates):
+    """
+    Queue dates for recomputation and schedule the refresh task on commit.
+
+    Marks coalesce: a date already queued only gets its marked_at bumped.
+    """
+    dates = {d for d in dates if d is not None}
+    if not dates:
+        return
+    now = timezone.now()
+    DailyStatsDirtyDate.objects.bulk_create(
+        [DailyStatsDirtyDate(date=d, marked_at=now) for d in dates],
+        update_conflicts=True,
+        unique_fields=["date"],
+        update_fields=["marked_at"],
+    )
+    transaction.on_commit(schedule_dirty_refresh)
+
+
+def schedule_dirty_refresh():
+    """Queue one refresh task per DAILY_STATS_REFRESH_DELAY window."""
+    if not getattr(settings, "DAILY_STATS_AUTO_REFRESH", True):
+        return
+    delay = getattr(settings, "DAILY_STATS_REFRESH_DELAY", 5)
+    if not cache.add(REFRESH_SCHEDULED_KEY, True, timeout=delay):
+        return  # A task is already queued and will pick these dates up
+
+    from hotel_api.tasks import refresh_dirty_daily_stats
+
+    try:
+        refresh_dirty_daily_stats.apply_async(countdown=delay)
+    except Exception as e:
+        # The beat schedule retries within a minute; never fail the write
+        cache.delete(REFRESH_SCHEDULED_KEY)
+        logger.warning("DAILY_STATS: could not queue refresh task: %s", e)
+
+
+def refresh_dirty_dates(batch_days=31):
+    """
+    Recompute every queued date, batch_days contiguous days per transaction.
+
+    Dates re-marked while the batch was running stay queued for the next run.
+
+    Returns:
+        Number of dates recomputed
+    """
+    started = timezone.now()
+    dates = list(DailyStatsDirtyDate.objects.order_by("date").values_list("date", flat=True))
+    for first, last in date_runs(dates):
+        while first <= last:
+            chunk_end = min(first + timedelta(days=batch_days - 1), last)
+            refresh_daily_stats(first, chunk_end)
+            _clear_dirty(first, chunk_end, started)
+            first = chunk_end + timedelta(days=1)
+    return len(dates)
+
+
+def _clear_dirty(first, last, started):
+    """Drop queue entries for a recomputed range, keeping ones re-marked since `started`."""
+    DailyStatsDirtyDate.objects.filter(
+        date__gte=first, date__lte=last, marked_at__lte=started
+    ).delete()
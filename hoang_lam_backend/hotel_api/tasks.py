@@ -143,7 +143,9 @@ def apply_data_retention_policy():
     """
     Apply data retention policy — delete records past their retention period.
 
-    Scheduled weekly on Sundays at 3:00 AM via Celery Beat.
+    Scheduled weekly on Sundays at 3:00 AM via Celery Beat. Deletes in batches
+    for at most RETENTION_TIME_BUDGET seconds, logging rows/s per model; what
+    is left resumes on the next run.
     See hotel_api/retention.py for retention periods and logic.
     """
     from hotel_api.retention import apply_retention_policy
@@ -152,3 +154,168 @@ def apply_data_retention_policy():
     total = sum(results.values())
     logger.info(f"Retention policy applied. Deleted {total} record(s): {results}")
     return f"Deleted {total} record(s): {results}"
+
+
+@shared_task(
+    name="hotel_api.tasks.maintain_partitions",
+    autoretry_for=(Exception,),
+    max_retries=3,
+    retry_backoff=True,
+    retry_backoff_max=600,
+)
+def maintain_partitions():
+    """
+    Create upcoming monthly partitions and drop or detach expired ones.
+
+    Scheduled daily at 2:30 AM via Celery Beat; does nothing outside
+    PostgreSQL (see hotel_api/partitions.py).
+    """
+    from hotel_api import partitions
+
+    result = partitions.maintain_partitions()
+    return f"Created {len(result['created'])} partition(s), expired {len(result['expired'])}."
+
+
+@shared_task(
+    name="hotel_api.tasks.refresh_dirty_daily_stats",
+    autoretry_for=(Exception,),
+    max_retries=3,
+    retry_backoff=True,
+    retry_backoff_max=600,
+)
+def refresh_dirty_daily_stats():
+    """
+    Recompute DailyHotelStats for the dates queued in DailyStatsDirtyDate.
+
+    Queued a few seconds after writes (see hotel_api/stats.py) and every
+    minute via Celery Beat as a safety net.
+    """
+    from hotel_api.stats import refresh_dirty_dates
+
+    count = refresh_dirty_dates()
+    if count:
+        logger.info(f"Refreshed daily stats for {count} date(s).")
+    return f"Refreshed {count} date(s)."
+
+
+@shared_task(
+    name="hotel_api.tasks.send_push_notifications",
+    autoretry_for=(Exception,),
+    max_retries=3,
+    retry_backoff=True,
+    retry_backoff_max=600,
+)
+def send_push_notifications(notification_ids):
+    """
+    Deliver stored notifications via FCM in batched multicast calls.
+
+    Queued by PushNotificationService.notify_staff after the triggering
+    transaction commits. If FCM fails for some notifications the task raises
+    PushDeliveryError and is retried; already-sent notifications are skipped,
+    so a retry only pushes the ones that failed.
+    """
+    from hotel_api.models import Notification
+    from hotel_api.services import PushDeliveryError, PushNotificationService
+
+    notifications = list(
+        Notification.objects.filter(pk__in=notification_ids, is_sent=False).select_related(
+            "recipient"
+        )
+    )
+    if not PushNotificationService.send_push_batch(notifications):
+        failed = [n.pk for n in notifications if n.send_error and not n.is_sent]
+        raise PushDeliveryError(f"Push delivery failed for notification(s) {failed}")
+    return f"Processed {len(notifications)} notification(s)."
+
+
+@shared_task(
+    name="hotel_api.tasks.drain_outbox",
+    autoretry_for=(Exception,),
+    max_retries=3,
+    retry_backoff=True,
+    retry_backoff_max=600,
+)
+def drain_outbox():
+    """
+    Apply pending booking side effects from the outbox.
+
+    Queued when a booking action commits, and every minute via Celery Beat
+    as a safety net for retries and missed triggers.
+    """
+    from django.core.cache import cache
+
+    from hotel_api import outbox
+
+    # Release the coalescing key first so events committed from now on queue a new run
+    cache.delete(outbox.DRAIN_SCHEDULED_KEY)
+    applied = outbox.drain_outbox()
+    purged = outbox.purge_outbox()
+    logger.info(f"Outbox: applied {applied} event(s), purged {purged}.")
+    return f"Applied {applied} event(s)."
+
+
+@shared_task(
+    name="hotel_api.tasks.flush_sensitive_access_logs",
+    autoretry_for=(Exception,),
+    max_retries=3,
+    retry_backoff=True,
+    retry_backoff_max=600,
+)
+def flush_sensitive_access_logs():
+    """
+    Write buffered sensitive-data access log entries.
+
+    Queued every AUDIT_LOG_BATCH_SIZE entries in celery mode, and every
+    minute via Celery Beat, which also replays spool files of crashed
+    processes (see hotel_api/audit.py).
+    """
+    from hotel_api import audit
+
+    written = audit.flush_sensitive_access_logs()
+    if written:
+        logger.info(f"Audit: wrote {written} sensitive access log entries.")
+    return f"Wrote {written} entries."
+
+
+@shared_task(
+    name="hotel_api.tasks.run_export_job",
+    autoretry_for=(Exception,),
+    max_retries=3,
+    retry_backoff=True,
+    retry_backoff_max=600,
+)
+def run_export_job(job_id):
+    """
+    Write a background export (mode=async) to media storage.
+
+    Queued when the ExportJob commits; also removes jobs past
+    EXPORT_JOB_RETENTION_DAYS together with their files.
+    """
+    from hotel_api import exports
+
+    job = exports.run_export_job(job_id)
+    purged = exports.purge_export_jobs()
+    logger.info(f"Export job {job_id}: {job.status}, {job.row_count} row(s); purged {purged}.")
+    return f"Export job {job_id}: {job.status}."
+
+
+@shared_task(
+    name="hotel_api.tasks.run_report_job",
+    autoretry_for=(Exception,),
+    max_retries=3,
+    retry_backoff=True,
+    retry_backoff_max=600,
+)
+def run_report_job(job_id):
+    """
+    Compute a background report (POST /report-jobs/) and notify the requester.
+
+    Queued when the ReportJob commits; also removes jobs past
+    REPORT_JOB_RETENTION_DAYS.
+    """
+    from hotel_api import report_jobs
+
+    job = report_jobs.run(job_id)
+    purged = report_jobs.purge()
+    logger.info(f"Report job {job_id}: {job.status}; purged {purged}.")
+    return f"Report job {job_id}: {job.status}."
@@ -0,0 +1,35 @@
+"""
+Shared pytest fixtures for hotel_api tests.
+"""
+
+from django.core.cache import cache
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Database rollbacks fire no signals, so cached summaries would leak between tests."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Print the per-endpoint table recorded by test_query_budget.py."""
+    rows = [
+        value
+        for report in terminalreporter.stats.get("passed", [])
+        + terminalreporter.stats.get("failed", [])
+        for name, value in getattr(report, "user_properties", [])
+        if name == "query_budget" and report.when == "call"
+    ]
+    if not rows:
+        return
+
+    terminalreporter.section("query budget")
+    terminalreporter.write_line(
+        f"{'endpoint':<28} {'list (N)':>9} {'list (10N)':>11} {'detail':>7} {'ms (10N)':>9}"
+    )
+    for endpoint, small, large, detail, ms in sorted(rows):
+        terminalreporter.write_line(f"{endpoint:<28} {small:>9} {large:>11} {detail:>7} {ms:>9}")
@@ -1,11 +1,17 @@
 """Tests for sensitive data access audit logging."""
 
+import json
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
 
+import pytest
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from hotel_api import audit
 from hotel_api.models import Guest, HotelUser, SensitiveDataAccessLog
 
 User = get_user_model()
@@ -125,3 +131,197 @@ class TestAuditLogging(TestCase):
         self.assertFalse(admin_instance.has_add_permission(None))
         self.assertFalse(admin_instance.has_change_permission(None))
         self.assertFalse(admin_instance.has_delete_permission(None))
+
+
+# ==================== Buffered writer ====================
+
+
+class FakeRedis:
+    """The list and lock operations drain_redis() uses."""
+
+    def __init__(self):
+        self.items = []
+
+    def rpush(self, key, value):
+        self.items.append(value.encode())
+        return len(self.items)
+
+    def lrange(self, key, start, end):
+        return self.items[start : end + 1]
+
+    def ltrim(self, key, start, end):
+        self.items = self.items[start:]
+
+    def lock(self, key, timeout):
+        class Lock:
+            def acquire(self, blocking):
+                return True
+
+            def release(self):
+                pass
+
+        return Lock()
+
+
+@pytest.fixture
+def staff_client(db):
+    user = User.objects.create_user(username="staff_audit", password="testpass123")
+    HotelUser.objects.create(user=user, role=HotelUser.Role.STAFF)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def guest(db):
+    return Guest.objects.create(full_name="Khách Kiểm Toán", phone="0900000002")
+
+
+@pytest.fixture
+def thread_mode(settings, tmp_path, monkeypatch):
+    settings.AUDIT_LOG_MODE = "thread"
+    settings.AUDIT_LOG_SPOOL_DIR = str(tmp_path)
+    settings.AUDIT_LOG_BATCH_SIZE = 100
+    buffer = audit.AuditBuffer(background=False)
+    monkeypatch.setattr(audit, "buffer", buffer)
+    return buffer
+
+
+def _segments(tmp_path):
+    return sorted(tmp_path.glob("*.jsonl"))
+
+
+@pytest.mark.django_db
+class TestBufferedAuditWriter:
+    def test_thread_mode_journals_then_flushes(self, thread_mode, staff_client, guest, tmp_path):
+        staff_client.get(f"/api/v1/guests/{guest.pk}/")
+        staff_client.get("/api/v1/guests/")
+
+        # Off the request path: journaled, not yet in the database
+        assert SensitiveDataAccessLog.objects.count() == 0
+        (segment,) = _segments(tmp_path)
+        actions = [json.loads(line)["action"] for line in segment.read_text().splitlines()]
+        assert actions == ["view_guest", "list_guests"]
+
+        assert thread_mode.flush() == 2
+        assert _segments(tmp_path) == []
+        log = SensitiveDataAccessLog.objects.get(action="view_guest")
+        assert log.user.username == "staff_audit"
+        assert log.resource_id == guest.pk
+        assert log.entry_id is not None
+
+    def test_failed_flush_keeps_entries(self, thread_mode, staff_client, guest, monkeypatch):
+        staff_client.get(f"/api/v1/guests/{guest.pk}/")
+
+        def fail(entries):
+            raise RuntimeError("database unavailable")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(audit, "write_entries", fail)
+            assert thread_mode.flush() == 0
+
+        assert thread_mode.flush() == 1
+        assert SensitiveDataAccessLog.objects.count() == 1
+
+    def test_replay_spool_of_crashed_process(self, thread_mode, staff_client, guest, tmp_path):
+        staff_client.get(f"/api/v1/guests/{guest.pk}/")
+        (segment,) = _segments(tmp_path)
+
+        # Owner alive: its segment is locked and left alone
+        assert audit.replay_spool() == 0
+
+        # Simulate a crash: the process dies with the segment unwritten
+        thread_mode._segment[1].close()
+        with open(segment, "a") as f:
+            f.write('{"entry_id": "torn')  # Partial last line
+        assert audit.replay_spool() == 1
+        assert not segment.exists()
+        assert SensitiveDataAccessLog.objects.filter(action="view_guest").count() == 1
+
+    def test_replay_is_idempotent(self, thread_mode, staff_client, guest, tmp_path):
+        staff_client.get(f"/api/v1/guests/{guest.pk}/")
+        (segment,) = _segments(tmp_path)
+        copy = tmp_path / "copy.jsonl"
+        copy.write_text(segment.read_text())
+
+        thread_mode.flush()
+        assert audit.replay_spool() == 1
+        assert SensitiveDataAccessLog.objects.count() == 1
+
+    def test_replay_skips_segment_flushed_meanwhile(
+        self, thread_mode, staff_client, guest, tmp_path, monkeypatch
+    ):
+        staff_client.get(f"/api/v1/guests/{guest.pk}/")
+        flock = audit.fcntl.flock
+
+        class OwnerFlushesFirst:
+            LOCK_EX, LOCK_NB = audit.fcntl.LOCK_EX, audit.fcntl.LOCK_NB
+
+            @staticmethod
+            def flock(fd, operation):
+                # The owner writes, unlinks and closes the segment after replay opened it
+                thread_mode.flush()
+                flock(fd, operation)
+
+        monkeypatch.setattr(audit, "fcntl", OwnerFlushesFirst)
+        assert audit.replay_spool() == 0
+        assert SensitiveDataAccessLog.objects.count() == 1
+
+    def test_rejected_entries_are_quarantined(self, thread_mode, tmp_path):
+        entry = {
+            "entry_id": uuid.uuid4().hex,
+            "user_id": None,
+            "action": "view_guest",
+            "timestamp": timezone.now(),
+        }
+        segment = tmp_path / "123-dead.jsonl"
+        bad_line = audit._dumps({**entry, "entry_id": uuid.uuid4().hex, "resource_id": "x"})
+        segment.write_text(f"{audit._dumps(entry)}\n{bad_line}\n")
+
+        assert audit.replay_spool() == 1
+        assert not segment.exists()
+        assert (tmp_path / "123-dead.bad").read_text() == f"{bad_line}\n"
+        assert audit.replay_spool() == 0
+        assert SensitiveDataAccessLog.objects.get().entry_id.hex == entry["entry_id"]
+
+    def test_celery_mode_redis_queue(self, settings, staff_client, guest, monkeypatch):
+        settings.AUDIT_LOG_MODE = "celery"
+        settings.AUDIT_LOG_BATCH_SIZE = 2
+        settings.AUDIT_LOG_SPOOL_DIR = ""
+        redis = FakeRedis()
+        monkeypatch.setattr(audit, "_redis", lambda: redis)
+        queued = []
+        monkeypatch.setattr(
+            "hotel_api.tasks.flush_sensitive_access_logs.delay", lambda: queued.append(1)
+        )
+
+        for _ in range(3):
+            staff_client.get(f"/api/v1/guests/{guest.pk}/")
+
+        assert len(redis.items) == 3
+        assert queued == [1]  # Once per full batch
+        assert SensitiveDataAccessLog.objects.count() == 0
+
+        assert audit.drain_redis() == 3
+        assert redis.items == []
+        assert SensitiveDataAccessLog.objects.filter(action="view_guest").count() == 3
+
+    def test_celery_mode_falls_back_to_journal(
+        self, thread_mode, settings, staff_client, guest, monkeypatch, tmp_path
+    ):
+        settings.AUDIT_LOG_MODE = "celery"
+
+        def unreachable():
+            raise ConnectionError("redis down")
+
+        monkeypatch.setattr(audit, "_redis", unreachable)
+        staff_client.get(f"/api/v1/guests/{guest.pk}/")
+
+        assert len(_segments(tmp_path)) == 1
+        assert thread_mode.flush() == 1
+        assert SensitiveDataAccessLog.objects.count() == 1
+
+    def test_sync_mode_writes_in_request(self, settings, staff_client, guest):
+        settings.AUDIT_LOG_MODE = "sync"
+        staff_client.get(f"/api/v1/guests/{guest.pk}/")
+        assert SensitiveDataAccessLog.objects.count() == 1
@@ -0,0 +1,408 @@
+"""
+Tests for the DailyHotelStats fact table.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+from rest_framework.test import APIClient
+
+from hotel_api.models import (
+    Booking,
+    DailyHotelStats,
+    DailyStatsDirtyDate,
+    FinancialCategory,
+    FinancialEntry,
+    Guest,
+    HotelUser,
+    MinibarItem,
+    MinibarSale,
+    NightAudit,
+    Payment,
+    Room,
+    RoomType,
+)
+from hotel_api.stats import (
+    REFRESH_SCHEDULED_KEY,
+    check_daily_stats,
+    hotel_totals,
+    mark_dates_dirty,
+    refresh_daily_stats,
+    refresh_dirty_dates,
+)
+
+DAY = date(2026, 3, 10)
+
+requires_postgresql = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Requires PostgreSQL"
+)
+
+
+@pytest.fixture
+def manager_client(db):
+    user = User.objects.create_user(username="stats_manager", password="testpass123")
+    HotelUser.objects.create(user=user, role="manager", phone="+84900000020")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def hotel(db):
+    """Two room types, four rooms, bookings from two sources and some money movements."""
+    single = RoomType.objects.create(name="Đơn", base_rate=Decimal("300000"))
+    double = RoomType.objects.create(name="Đôi", base_rate=Decimal("500000"))
+    rooms = [
+        Room.objects.create(number="101", room_type=single, floor=1),
+        Room.objects.create(number="102", room_type=single, floor=1),
+        Room.objects.create(number="201", room_type=double, floor=2),
+        Room.objects.create(number="202", room_type=double, floor=2, is_active=False),
+    ]
+    guest = Guest.objects.create(full_name="Nguyễn Văn A", phone="0901234567")
+
+    def book(room, check_in, nights, rate, source, status=Booking.Status.CHECKED_OUT):
+        return Booking.objects.create(
+            room=room,
+            guest=guest,
+            check_in_date=check_in,
+            check_out_date=check_in + timedelta(days=nights),
+            nightly_rate=rate,
+            total_amount=rate * nights,
+            source=source,
+            status=status,
+        )
+
+    first = book(rooms[0], DAY - timedelta(days=1), 3, 300000, Booking.Source.WALK_IN)
+    book(rooms[1], DAY, 1, 320000, Booking.Source.BOOKING_COM)
+    book(rooms[2], DAY, 2, 500000, Booking.Source.BOOKING_COM)
+    book(rooms[1], DAY + timedelta(days=1), 1, 320000, Booking.Source.PHONE, Booking.Status.PENDING)
+
+    income = FinancialCategory.objects.create(name="Tiền phòng", category_type="income")
+    expense = FinancialCategory.objects.create(name="Điện", category_type="expense")
+    FinancialEntry.objects.create(
+        entry_type="income", category=income, amount=900000, date=DAY, booking=first
+    )
+    FinancialEntry.objects.create(entry_type="income", category=income, amount=100000, date=DAY)
+    FinancialEntry.objects.create(entry_type="expense", category=expense, amount=250000, date=DAY)
+
+    item = MinibarItem.objects.create(name="Coca Cola", price=20000, cost=10000)
+    MinibarSale.objects.create(booking=first, item=item, quantity=2, unit_price=20000, date=DAY)
+
+    return {"single": single, "double": double, "rooms": rooms, "first": first}
+
+
+def _total_row(day):
+    return DailyHotelStats.objects.get(date=day, room_type__isnull=True, source="")
+
+
+@pytest.mark.django_db
+class TestRefreshDailyStats:
+    def test_hotel_wide_row(self, hotel):
+        refresh_daily_stats(DAY)
+        row = _total_row(DAY)
+
+        assert row.total_rooms == 3
+        assert row.rooms_sold == 3
+        assert row.room_revenue == Decimal("1120000")
+        assert row.arrivals == 2
+        assert row.total_income == Decimal("1000000")
+        assert row.total_expense == Decimal("250000")
+        assert row.minibar_revenue == Decimal("40000")
+        assert row.occupancy_rate == 100
+        assert row.revpar == Decimal("1120000") / 3
+
+    def test_breakdown_rows(self, hotel):
+        refresh_daily_stats(DAY)
+        row = DailyHotelStats.objects.get(
+            date=DAY, room_type=hotel["single"], source=Booking.Source.BOOKING_COM
+        )
+        assert (row.rooms_sold, row.room_revenue, row.arrivals) == (1, Decimal("320000"), 1)
+        assert row.total_income == 0
+
+        # Breakdown rows add up to the hotel-wide row
+        breakdown = DailyHotelStats.objects.filter(date=DAY, room_type__isnull=False)
+        assert sum(r.rooms_sold for r in breakdown) == _total_row(DAY).rooms_sold
+
+    def test_refresh_replaces_rows(self, hotel):
+        refresh_daily_stats(DAY - timedelta(days=1), DAY + timedelta(days=1))
+        refresh_daily_stats(DAY - timedelta(days=1), DAY + timedelta(days=1))
+        assert DailyHotelStats.objects.filter(room_type__isnull=True).count() == 3
+
+    def test_pending_bookings_ignored(self, hotel):
+        refresh_daily_stats(DAY + timedelta(days=1))
+        assert not DailyHotelStats.objects.filter(source=Booking.Source.PHONE).exists()
+
+
+@requires_postgresql
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_refreshes_do_not_collide(hotel):
+    """Reports refreshing the same stale dates at once must not hit the unique constraints."""
+    first, last = DAY - timedelta(days=3), DAY + timedelta(days=3)
+
+    def refresh(_):
+        try:
+            return refresh_daily_stats(first, last)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        written = list(pool.map(refresh, range(40)))
+
+    assert len(set(written)) == 1
+    assert DailyHotelStats.objects.count() == written[0]
+    assert DailyHotelStats.objects.filter(room_type__isnull=True).count() == 7
+
+
+@pytest.mark.django_db
+class TestHotelTotals:
+    def test_fills_missing_dates(self, hotel):
+        totals = hotel_totals(DAY - timedelta(days=1), DAY + timedelta(days=1))
+        assert DailyHotelStats.objects.filter(room_type__isnull=True).count() == 3
+        assert totals["total_rooms"] == 9
+        assert totals["rooms_sold"] == 1 + 3 + 2
+
+    def test_clean_dates_are_served_from_table(self, hotel):
+        hotel_totals(DAY, DAY)
+        DailyStatsDirtyDate.objects.all().delete()
+        # Queryset updates bypass change capture, so the stored row is served as-is
+        FinancialEntry.objects.filter(date=DAY, entry_type="expense").update(amount=1)
+        assert hotel_totals(DAY, DAY)["total_expense"] == Decimal("250000")
+
+    def test_dirty_dates_are_recomputed_on_read(self, hotel):
+        hotel_totals(DAY, DAY)
+        FinancialEntry.objects.get(date=DAY, entry_type="expense").delete()
+        assert hotel_totals(DAY, DAY)["total_expense"] == 0
+        assert not DailyStatsDirtyDate.objects.filter(date=DAY).exists()
+
+    def test_open_dates_are_recomputed(self, hotel):
+        today = timezone.localdate()
+        hotel_totals(today, today)
+        Booking.objects.create(
+            room=hotel["rooms"][0],
+            guest=hotel["first"].guest,
+            check_in_date=today,
+            check_out_date=today + timedelta(days=1),
+            nightly_rate=300000,
+            total_amount=300000,
+            status=Booking.Status.CONFIRMED,
+        )
+        assert hotel_totals(today, today)["rooms_sold"] == 1
+
+
+@pytest.mark.django_db
+class TestConsistency:
+    def test_consistent_after_refresh(self, hotel):
+        refresh_daily_stats(DAY - timedelta(days=2), DAY + timedelta(days=2))
+        assert check_daily_stats(DAY - timedelta(days=2), DAY + timedelta(days=2)) == []
+
+    def test_detects_drift(self, hotel):
+        refresh_daily_stats(DAY)
+        DailyHotelStats.objects.filter(date=DAY, room_type__isnull=True).update(rooms_sold=7)
+
+        mismatches = check_daily_stats(DAY, DAY)
+        assert mismatches == [
+            {
+                "date": DAY,
+                "room_type": None,
+                "source": "",
+                "field": "rooms_sold",
+                "stored": 7,
+                "expected": 3,
+            }
+        ]
+
+    def test_check_command_fix(self, hotel):
+        refresh_daily_stats(DAY)
+        DailyHotelStats.objects.filter(date=DAY, room_type__isnull=True).update(total_expense=0)
+
+        out = StringIO()
+        call_command("check_daily_stats", start=DAY, end=DAY, fix=True, stdout=out)
+        assert "total_expense" in out.getvalue()
+        assert check_daily_stats(DAY, DAY) == []
+
+    def test_backfill_command(self, hotel):
+        out = StringIO()
+        call_command(
+            "backfill_daily_stats",
+            start=DAY - timedelta(days=3),
+            end=DAY + timedelta(days=3),
+            chunk_days=2,
+            stdout=out,
+        )
+        assert DailyHotelStats.objects.filter(room_type__isnull=True).count() == 7
+        assert "Done." in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestStatsConsumers:
+    def test_night_audit_writes_fact_row(self, hotel):
+        audit = NightAudit(audit_date=DAY)
+        audit.calculate_statistics()
+        assert _total_row(DAY).rooms_sold == 3
+
+    def test_kpi_report_reads_fact_table(self, manager_client, hotel):
+        response = manager_client.get(
+            reverse("report_kpi"),
+            {
+                "start_date": (DAY - timedelta(days=1)).isoformat(),
+                "end_date": DAY.isoformat(),
+                "compare_previous": "false",
+            },
+        )
+        current = response.json()["current"]
+        assert current["total_room_nights_available"] == 6
+        assert current["total_room_nights_sold"] == 4
+        assert current["adr"] == round(1420000 / 4)
+        assert current["total_revenue"] == 1040000
+        assert DailyHotelStats.objects.filter(room_type__isnull=True).count() == 2
+
+
+def _dirty_dates():
+    return set(DailyStatsDirtyDate.objects.values_list("date", flat=True))
+
+
+def _nights(first, count):
+    return {first + timedelta(days=i) for i in range(count)}
+
+
+@pytest.mark.django_db
+class TestDirtyDateQueue:
+    @pytest.fixture(autouse=True)
+    def _clean_queue(self, hotel):
+        DailyStatsDirtyDate.objects.all().delete()
+
+    def test_booking_create_marks_stay_and_departure(self, hotel):
+        Booking.objects.create(
+            room=hotel["rooms"][2],
+            guest=hotel["first"].guest,
+            check_in_date=DAY + timedelta(days=5),
+            check_out_date=DAY + timedelta(days=7),
+            nightly_rate=500000,
+            total_amount=1000000,
+            status=Booking.Status.CONFIRMED,
+        )
+        assert _dirty_dates() == _nights(DAY + timedelta(days=5), 3)
+
+    def test_extend_stay_marks_old_and_new_range(self, hotel):
+        booking = Booking.objects.get(pk=hotel["first"].pk)
+        booking.check_in_date = DAY + timedelta(days=1)
+        booking.check_out_date = DAY + timedelta(days=4)
+        booking.save()
+        assert _dirty_dates() == _nights(DAY - timedelta(days=1), 6)
+
+    def test_swap_room_marks_stay(self, hotel):
+        booking = Booking.objects.get(pk=hotel["first"].pk)
+        booking.room = hotel["rooms"][1]
+        booking.status = Booking.Status.CANCELLED
+        booking.save(update_fields=["room", "status"])
+        assert _dirty_dates() == _nights(DAY - timedelta(days=1), 4)
+
+    def test_untracked_change_marks_nothing(self, hotel):
+        booking = Booking.objects.get(pk=hotel["first"].pk)
+        booking.notes = "Khách VIP"
+        booking.save()
+        booking.special_requests = "Phòng yên tĩnh"
+        booking.save(update_fields=["special_requests"])
+        assert _dirty_dates() == set()
+
+    def test_pending_booking_marks_nothing(self, hotel):
+        pending = Booking.objects.get(status=Booking.Status.PENDING)
+        pending.nightly_rate = 1
+        pending.save()
+        assert _dirty_dates() == set()
+
+    def test_financial_entry_date_change_marks_both_dates(self, hotel):
+        entry = FinancialEntry.objects.get(entry_type="expense")
+        entry.date = DAY + timedelta(days=10)
+        entry.save()
+        assert _dirty_dates() == {DAY, DAY + timedelta(days=10)}
+
+        entry.delete()
+        assert _dirty_dates() == {DAY, DAY + timedelta(days=10)}
+
+    def test_same_day_booking_marks_its_day(self, hotel):
+        Booking.objects.create(
+            room=hotel["rooms"][2],
+            guest=hotel["first"].guest,
+            check_in_date=DAY + timedelta(days=5),
+            check_out_date=DAY + timedelta(days=5),
+            nightly_rate=200000,
+            total_amount=200000,
+            status=Booking.Status.CHECKED_OUT,
+        )
+        assert _dirty_dates() == {DAY + timedelta(days=5)}
+
+    def test_minibar_marks_date(self, hotel):
+        item = MinibarItem.objects.get()
+        MinibarSale.objects.create(
+            booking=hotel["first"], item=item, quantity=1, unit_price=20000, date=DAY
+        )
+        assert _dirty_dates() == {DAY}
+
+    def test_payment_marks_nothing(self, hotel):
+        # Payments feed no daily fact
+        Payment.objects.create(booking=hotel["first"], amount=100000, payment_method="cash")
+        assert _dirty_dates() == set()
+
+    def test_room_change_marks_open_fact_dates(self, hotel):
+        today = timezone.localdate()
+        refresh_daily_stats(today - timedelta(days=2), today + timedelta(days=2))
+        room = hotel["rooms"][3]
+        room.is_active = True
+        room.save()
+        assert _dirty_dates() == _nights(today, 3)
+
+    def test_refresh_dirty_dates(self, hotel):
+        refresh_daily_stats(DAY)
+        FinancialEntry.objects.get(entry_type="expense").delete()
+        mark_dates_dirty([DAY + timedelta(days=40)])
+
+        assert refresh_dirty_dates(batch_days=7) == 2
+        assert _dirty_dates() == set()
+        assert _total_row(DAY).total_expense == 0
+        assert _total_row(DAY + timedelta(days=40)).total_rooms == 3
+
+    def test_refresh_keeps_dates_marked_during_run(self, hotel):
+        mark_dates_dirty([DAY])
+        DailyStatsDirtyDate.objects.update(marked_at=timezone.now() + timedelta(minutes=1))
+        refresh_dirty_dates()
+        assert _dirty_dates() == {DAY}
+
+    def test_refresh_task_scheduled_once_per_window(
+        self, hotel, django_capture_on_commit_callbacks
+    ):
+        cache.delete(REFRESH_SCHEDULED_KEY)
+        with patch("hotel_api.tasks.refresh_dirty_daily_stats.apply_async") as mock_apply:
+            with django_capture_on_commit_callbacks(execute=True):
+                mark_dates_dirty([DAY])
+                mark_dates_dirty([DAY + timedelta(days=1)])
+        mock_apply.assert_called_once_with(countdown=5)
+        cache.delete(REFRESH_SCHEDULED_KEY)
+
+    def test_refresh_task_not_scheduled_when_disabled(
+        self, hotel, settings, django_capture_on_commit_callbacks
+    ):
+        settings.DAILY_STATS_AUTO_REFRESH = False
+        cache.delete(REFRESH_SCHEDULED_KEY)
+        with patch("hotel_api.tasks.refresh_dirty_daily_stats.apply_async") as mock_apply:
+            with django_capture_on_commit_callbacks(execute=True):
+                mark_dates_dirty([DAY])
+        mock_apply.assert_not_called()
+
+    def test_refresh_task(self, hotel):
+        from hotel_api.tasks import refresh_dirty_daily_stats
+
+        mark_dates_dirty([DAY])
+        assert refresh_dirty_daily_stats() == "Refreshed 1 date(s)."
+        assert _dirty_dates() == set()
@@ -6,12 +6,23 @@ from datetime import date, timedelta
 from decimal import Decimal
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 import pytest
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from hotel_api.models import Booking, Guest, HotelUser, Room, RoomType
+from hotel_api.models import (
+    Booking,
+    FinancialCategory,
+    FinancialEntry,
+    Guest,
+    HotelUser,
+    Room,
+    RoomType,
+)
 
 
 @pytest.fixture
@@ -232,3 +243,109 @@ class TestDashboardView:
         assert data["bookings"]["pending"] == 0
         assert data["bookings"]["confirmed"] == 0
         assert data["bookings"]["checked_in"] == 0
+
+
+@pytest.mark.django_db
+class TestDashboardCache:
+    """Tests for the cached dashboard summary and its invalidation."""
+
+    URL = "/api/v1/dashboard/"
+
+    def _get(self, api_client):
+        response = api_client.get(self.URL)
+        assert response.status_code == status.HTTP_200_OK
+        return response
+
+    def test_miss_uses_one_query_per_table_and_hit_uses_none(
+        self, api_client, staff_user, rooms, bookings
+    ):
+        api_client.force_authenticate(user=staff_user)
+        self._get(api_client)
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as miss:
+            response = self._get(api_client)
+        assert response["X-Cache"] == "MISS"
+        summary_tables = [
+            q["sql"]
+            for q in miss.captured_queries
+            if any(t in q["sql"] for t in ("hotel_api_room", "hotel_api_booking", "hotel_api_fin"))
+        ]
+        assert len(summary_tables) == 3
+
+        with CaptureQueriesContext(connection) as hit:
+            response = self._get(api_client)
+        assert response["X-Cache"] == "HIT"
+        assert len(hit) == len(miss) - 3
+        assert response.json()["room_status"]["total"] == 5
+
+    def test_booking_status_change_invalidates(self, api_client, staff_user, rooms, bookings):
+        api_client.force_authenticate(user=staff_user)
+        assert self._get(api_client).json()["bookings"]["pending"] == 1
+
+        pending = next(b for b in bookings if b.status == Booking.Status.PENDING)
+        pending.status = Booking.Status.CONFIRMED
+        pending.save()
+
+        response = self._get(api_client)
+        assert response["X-Cache"] == "MISS"
+        assert response.json()["bookings"]["pending"] == 0
+        assert response.json()["bookings"]["confirmed"] == 2
+
+    def test_room_status_change_invalidates(self, api_client, staff_user, rooms):
+        api_client.force_authenticate(user=staff_user)
+        assert self._get(api_client).json()["room_status"]["cleaning"] == 1
+
+        rooms[2].status = Room.Status.AVAILABLE
+        rooms[2].save(update_fields=["status"])
+
+        data = self._get(api_client).json()
+        assert data["room_status"]["cleaning"] == 0
+        assert data["room_status"]["available"] == 3
+
+    def test_financial_entry_write_invalidates(self, api_client, staff_user):
+        api_client.force_authenticate(user=staff_user)
+        assert self._get(api_client).json()["today"]["revenue"] == 0
+
+        category = FinancialCategory.objects.create(name="Tiền phòng", category_type="income")
+        entry = FinancialEntry.objects.create(
+            entry_type="income", category=category, amount=Decimal("700000"), date=date.today()
+        )
+        assert self._get(api_client).json()["today"]["revenue"] == 700000
+
+        entry.delete()
+        assert self._get(api_client).json()["today"]["revenue"] == 0
+
+    def test_unrelated_save_keeps_cache(self, api_client, staff_user, rooms):
+        api_client.force_authenticate(user=staff_user)
+        self._get(api_client)
+
+        rooms[0].notes = "Cửa sổ hướng vườn"
+        rooms[0].save()
+
+        assert self._get(api_client)["X-Cache"] == "HIT"
+
+    def test_cache_disabled_with_zero_ttl(self, api_client, staff_user, settings):
+        settings.DASHBOARD_CACHE_TTL = 0
+        api_client.force_authenticate(user=staff_user)
+        self._get(api_client)
+        assert self._get(api_client)["X-Cache"] == "MISS"
+
+    def test_cache_stats_counters(self, api_client, staff_user, create_user, rooms):
+        api_client.force_authenticate(user=staff_user)
+        self._get(api_client)
+        self._get(api_client)
+        self._get(api_client)
+
+        api_client.force_authenticate(user=create_user("manager", "manager"))
+        response = api_client.get("/api/v1/dashboard/cache-stats/")
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["hits"] == 2
+        assert data["misses"] == 1
+        assert data["hit_ratio"] == round(2 / 3, 4)
+
+    def test_cache_stats_requires_manager(self, api_client, staff_user):
+        api_client.force_authenticate(user=staff_user)
+        response = api_client.get("/api/v1/dashboard/cache-stats/")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -16,6 +16,7 @@ import pytest
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from hotel_api.declaration import DD10_HEADERS
 from hotel_api.models import Booking, Guest, HotelUser, Room, RoomType
 
 # ==================== Fixtures ====================
@@ -165,6 +166,11 @@ def _authenticate(client, user):
     client.force_authenticate(user=user)
 
 
+def _content(response):
+    """Body of a streamed export."""
+    return b"".join(response.streaming_content)
+
+
 # ==================== Auth & Validation ====================
 
 
@@ -243,7 +249,7 @@ class TestDD10Export:
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=dd10"
         )
         assert response.status_code == status.HTTP_200_OK
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
 
         # Official ĐD10 headers
         assert "Họ và tên" in content
@@ -265,7 +271,7 @@ class TestDD10Export:
         response = api_client.get(
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=dd10"
         )
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
         assert "Hoàng Lâm Heritage Suites" in content
         assert "Địa chỉ:" in content
         assert "Điện thoại:" in content
@@ -276,7 +282,7 @@ class TestDD10Export:
         response = api_client.get(
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=dd10"
         )
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
         assert "SỔ QUẢN LÝ LƯU TRÚ" in content
         assert "ĐD10" in content
 
@@ -288,7 +294,7 @@ class TestDD10Export:
         response = api_client.get(
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=dd10"
         )
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
         assert "Nguyễn Văn Test" in content
         assert "012345678901" in content
         assert "123 Đường ABC" in content
@@ -301,7 +307,7 @@ class TestDD10Export:
         response = api_client.get(
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=dd10"
         )
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
         assert "John Smith" not in content
 
     def test_dd10_shows_expected_checkout_date(
@@ -312,7 +318,7 @@ class TestDD10Export:
         response = api_client.get(
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=dd10"
         )
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
         expected_checkout = (date.today() + timedelta(days=2)).strftime("%d/%m/%Y")
         assert expected_checkout in content
 
@@ -336,7 +342,7 @@ class TestDD10Export:
         response = api_client.get(
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=dd10"
         )
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
         # Guest name should NOT appear (only pending booking exists)
         assert "Nguyễn Văn Test" not in content
 
@@ -348,7 +354,7 @@ class TestDD10Export:
             f"/api/v1/guests/declaration-export/?date_from={future}&date_to={future}&export_format=csv&form_type=dd10"
         )
         assert response.status_code == status.HTTP_200_OK
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
         assert "SỔ QUẢN LÝ LƯU TRÚ" in content
 
 
@@ -368,7 +374,7 @@ class TestNA17Export:
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=na17"
         )
         assert response.status_code == status.HTTP_200_OK
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
 
         # Official NA17 headers
         assert "Họ tên" in content
@@ -390,7 +396,7 @@ class TestNA17Export:
         response = api_client.get(
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=na17"
         )
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
         assert "NA17" in content
         assert "NGƯỜI NƯỚC NGOÀI" in content
 
@@ -402,7 +408,7 @@ class TestNA17Export:
         response = api_client.get(
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=na17"
         )
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
         assert "John Smith" in content
         assert "AB1234567" in content
         assert "Mỹ" in content  # nationality displayed in Vietnamese
@@ -418,7 +424,7 @@ class TestNA17Export:
         response = api_client.get(
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=na17"
         )
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
         assert "Phổ thông" in content  # Passport type display
 
     def test_na17_csv_contains_visa_info(
@@ -429,7 +435,7 @@ class TestNA17Export:
         response = api_client.get(
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=na17"
         )
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
         assert "Thị thực (Visa)" in content  # visa type display
         assert "VN2026012345" in content  # visa number
         assert "Vietnam Embassy" in content  # issuing authority
@@ -442,7 +448,7 @@ class TestNA17Export:
         response = api_client.get(
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=na17"
         )
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
         assert "Nguyễn Văn Test" not in content
 
     def test_na17_shows_expected_checkout_date(
@@ -453,7 +459,7 @@ class TestNA17Export:
         response = api_client.get(
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=na17"
         )
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
         expected_checkout = (date.today() + timedelta(days=3)).strftime("%d/%m/%Y")
         assert expected_checkout in content
 
@@ -474,7 +480,7 @@ class TestCombinedExport:
             "/api/v1/guests/declaration-export/?export_format=csv&form_type=all"
         )
         assert response.status_code == status.HTTP_200_OK
-        content = response.content.decode("utf-8-sig")
+        content = _content(response).decode("utf-8-sig")
 
         # Both forms present
         assert "SỔ QUẢN LÝ LƯU TRÚ" in content
@@ -501,7 +507,7 @@ class TestCombinedExport:
 
             import openpyxl
 
-            wb = openpyxl.load_workbook(io.BytesIO(response.content))
+            wb = openpyxl.load_workbook(io.BytesIO(_content(response)))
             sheet_names = wb.sheetnames
             assert len(sheet_names) == 2
             assert any("ĐD10" in name for name in sheet_names)
@@ -521,13 +527,106 @@ class TestCombinedExport:
 
             import openpyxl
 
-            wb = openpyxl.load_workbook(io.BytesIO(response.content))
+            wb = openpyxl.load_workbook(io.BytesIO(_content(response)))
             ws = wb.active
             assert "Hoàng Lâm Heritage Suites" in str(ws.cell(row=1, column=1).value)
             assert "Địa chỉ:" in str(ws.cell(row=2, column=1).value)
             assert "Điện thoại:" in str(ws.cell(row=3, column=1).value)
 
 
+# ==================== Streaming ====================
+
+
+@pytest.fixture
+def many_vn_bookings(room, room_type):
+    """Six Vietnamese guests checked in over the last six days."""
+    bookings = []
+    for i in range(6):
+        guest = Guest.objects.create(
+            full_name=f"Khách Số {i}",
+            phone=f"+8490000010{i}",
+            id_number=f"07920100000{i}",
+            nationality="VN",
+        )
+        bookings.append(
+            Booking.objects.create(
+                room=room,
+                guest=guest,
+                check_in_date=date.today() - timedelta(days=i),
+                check_out_date=date.today() + timedelta(days=1),
+                status=Booking.Status.CHECKED_OUT,
+                nightly_rate=room_type.base_rate,
+                total_amount=Decimal("500000"),
+            )
+        )
+    return bookings
+
+
+@pytest.mark.django_db
+class TestStreamingExport:
+    """Exports are streamed chunk by chunk instead of built in memory."""
+
+    url = "/api/v1/guests/declaration-export/?form_type=dd10&date_from={}&export_format={}"
+
+    def test_csv_is_streamed_in_chunks(
+        self, api_client, manager_user, many_vn_bookings, settings, django_assert_num_queries
+    ):
+        settings.DECLARATION_EXPORT_CHUNK_SIZE = 2
+        _authenticate(api_client, manager_user)
+        response = api_client.get(self.url.format(date.today() - timedelta(days=10), "csv"))
+
+        assert response.streaming
+        # Rows are fetched by a single iterator query however many chunks there are
+        with django_assert_num_queries(1):
+            chunks = list(response.streaming_content)
+        body = b"".join(chunks)
+        assert body.count(b"\xef\xbb\xbf") == 1
+        assert len(chunks) > 3
+
+        lines = body.decode("utf-8-sig").splitlines()
+        data = lines[lines.index(",".join(DD10_HEADERS)) + 1 :]
+        assert [line.split(",")[0] for line in data] == ["1", "2", "3", "4", "5", "6"]
+
+    def test_excel_decrypts_in_worker_pool(
+        self, api_client, manager_user, settings, room, room_type
+    ):
+        from cryptography.fernet import Fernet
+
+        settings.FIELD_ENCRYPTION_KEY = Fernet.generate_key().decode()
+        settings.DECLARATION_EXPORT_CHUNK_SIZE = 2
+        settings.DECLARATION_EXPORT_DECRYPT_WORKERS = 2
+        for i in range(5):
+            guest = Guest.objects.create(
+                full_name=f"Khách Số {i}",
+                phone=f"+8490000020{i}",
+                id_number=f"07920100000{i}",
+            )
+            Booking.objects.create(
+                room=room,
+                guest=guest,
+                check_in_date=date.today() - timedelta(days=i),
+                check_out_date=date.today() + timedelta(days=1),
+                status=Booking.Status.CHECKED_OUT,
+                nightly_rate=room_type.base_rate,
+                total_amount=Decimal("500000"),
+            )
+        assert Guest.objects.first().id_number.startswith("gAAAAA")
+
+        _authenticate(api_client, manager_user)
+        response = api_client.get(self.url.format(date.today() - timedelta(days=10), "excel"))
+        assert response.status_code == status.HTTP_200_OK
+
+        import io
+
+        import openpyxl
+
+        ws = openpyxl.load_workbook(io.BytesIO(_content(response))).active
+        rows = list(ws.iter_rows(min_row=9, values_only=True))
+        # Newest check-in first; numbering runs across chunks
+        assert [row[0] for row in rows] == [1, 2, 3, 4, 5]
+        assert [row[5] for row in rows] == [f"07920100000{i}" for i in range(5)]
+
+
 # ==================== Declaration Marking ====================
 
 
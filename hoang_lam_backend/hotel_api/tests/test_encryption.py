@@ -6,12 +6,23 @@ from django.test import TestCase, override_settings
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from hotel_api.encryption import decrypt, encrypt, hash_value, is_encrypted
+from hotel_api.encryption import (
+    _get_fernet,
+    decrypt,
+    decrypt_many,
+    encrypt,
+    hash_value,
+    is_encrypted,
+    looks_encrypted,
+    protect,
+    rotate,
+)
 from hotel_api.models import Guest, HotelUser
 
 User = get_user_model()
 
 FERNET_TEST_KEY = "ZmDfcTF7_60GrrY167zsiPd67pEvs0aGOv2oasOM1Pg="
+FERNET_NEW_KEY = "9mGSYqU0yZQpVd3gW3pWZ2q5rJd0L0c9bTfB5m5vE0A="
 
 
 class TestEncryptionUtility(TestCase):
@@ -92,6 +103,93 @@ class TestEncryptionWithKey(TestCase):
         result = decrypt("001234567890")
         self.assertEqual(result, "001234567890")
 
+    def test_cipher_is_cached(self):
+        """The cipher is built once, not per call."""
+        self.assertIs(_get_fernet(), _get_fernet())
+
+    def test_cipher_follows_setting_changes(self):
+        """Changing the key setting rebuilds the cipher."""
+        encrypted = encrypt("001234567890")
+        with override_settings(FIELD_ENCRYPTION_KEY=FERNET_NEW_KEY):
+            self.assertEqual(decrypt(encrypted), encrypted)
+        self.assertEqual(decrypt(encrypted), "001234567890")
+
+    def test_looks_encrypted_checks_token_shape(self):
+        """Prefix check recognises tokens without decrypting."""
+        self.assertTrue(looks_encrypted(encrypt("001234567890")))
+        self.assertFalse(looks_encrypted("001234567890"))
+        self.assertFalse(looks_encrypted("gAAAAA"))
+        self.assertFalse(looks_encrypted(None))
+
+    def test_protect_encrypts_plaintext_once(self):
+        """protect() encrypts plaintext and keeps existing tokens."""
+        stored, plaintext = protect("001234567890")
+        self.assertEqual(plaintext, "001234567890")
+        self.assertEqual(protect(stored), (stored, "001234567890"))
+
+    def test_protect_token_shaped_plaintext(self):
+        """A plaintext that merely looks like a token is still encrypted."""
+        fake = "gAAAAA" + "x" * 120
+        stored, plaintext = protect(fake)
+        self.assertEqual(plaintext, fake)
+        self.assertEqual(decrypt(stored), fake)
+
+    def test_decrypt_many_keeps_order_across_workers(self):
+        """Batched decryption on a pool returns values in input order."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        values = [f"07920100{i:04d}" for i in range(25)]
+        batch = [encrypt(v) if i % 3 else v for i, v in enumerate(values)] + [None, ""]
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            result = decrypt_many(batch, executor, slice_size=4)
+        self.assertEqual(result, values + [None, ""])
+        self.assertEqual(decrypt_many(batch), result)
+
+
+class TestKeyRotation(TestCase):
+    """MultiFernet key rotation via FIELD_ENCRYPTION_OLD_KEYS."""
+
+    def test_old_key_values_decrypt_after_rotation(self):
+        """Values written under the old key stay readable."""
+        with override_settings(FIELD_ENCRYPTION_KEY=FERNET_TEST_KEY):
+            old_token = encrypt("001234567890")
+
+        with override_settings(
+            FIELD_ENCRYPTION_KEY=FERNET_NEW_KEY, FIELD_ENCRYPTION_OLD_KEYS=FERNET_TEST_KEY
+        ):
+            self.assertEqual(decrypt(old_token), "001234567890")
+            self.assertTrue(is_encrypted(old_token))
+
+    def test_rotate_reencrypts_under_primary_key(self):
+        """rotate() moves a token to the new key."""
+        with override_settings(FIELD_ENCRYPTION_KEY=FERNET_TEST_KEY):
+            old_token = encrypt("001234567890")
+
+        with override_settings(
+            FIELD_ENCRYPTION_KEY=FERNET_NEW_KEY, FIELD_ENCRYPTION_OLD_KEYS=FERNET_TEST_KEY
+        ):
+            new_token = rotate(old_token)
+        self.assertNotEqual(new_token, old_token)
+
+        with override_settings(FIELD_ENCRYPTION_KEY=FERNET_NEW_KEY):
+            self.assertEqual(decrypt(new_token), "001234567890")
+
+    def test_guest_save_keeps_old_key_value(self):
+        """Saving a guest under rotation neither re-encrypts nor breaks the hash."""
+        with override_settings(FIELD_ENCRYPTION_KEY=FERNET_TEST_KEY):
+            guest = Guest.objects.create(
+                full_name="Test User", phone="0900000010", id_number="001234567890"
+            )
+            old_token = guest.id_number
+
+        with override_settings(
+            FIELD_ENCRYPTION_KEY=FERNET_NEW_KEY, FIELD_ENCRYPTION_OLD_KEYS=FERNET_TEST_KEY
+        ):
+            guest.full_name = "Updated"
+            guest.save()
+        self.assertEqual(guest.id_number, old_token)
+        self.assertEqual(guest.id_number_hash, hash_value("001234567890"))
+
 
 @override_settings(FIELD_ENCRYPTION_KEY=FERNET_TEST_KEY)
 class TestGuestModelEncryption(TestCase):
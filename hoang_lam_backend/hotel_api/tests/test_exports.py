@@ -0,0 +1,288 @@
+"""
+Tests for the shared streaming export framework and background export jobs.
+"""
+
+import csv
+import importlib
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+import openpyxl
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from hotel_api import exports
+from hotel_api.models import ExportJob, FinancialCategory, FinancialEntry, HotelUser, NightAudit
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def create_user(db):
+    def _create_user(username, role="manager"):
+        user = User.objects.create_user(
+            username=username, password="testpass123", first_name="Văn", last_name="An"
+        )
+        HotelUser.objects.create(user=user, role=role, phone=f"+84{username[-6:]}")
+        return user
+
+    return _create_user
+
+
+@pytest.fixture
+def manager_user(create_user):
+    return create_user("manager_export")
+
+
+@pytest.fixture
+def manager_client(api_client, manager_user):
+    api_client.force_authenticate(user=manager_user)
+    return api_client
+
+
+@pytest.fixture
+def entries(manager_user):
+    categories = [
+        FinancialCategory.objects.create(
+            name=f"Danh mục {i}", category_type=FinancialCategory.CategoryType.INCOME
+        )
+        for i in range(3)
+    ]
+    return [
+        FinancialEntry.objects.create(
+            entry_type=FinancialEntry.EntryType.INCOME,
+            category=categories[i % 3],
+            amount=Decimal("100000") * (i + 1),
+            date=date(2026, 3, 1) + timedelta(days=i),
+            description=f"Thu {i}",
+            created_by=manager_user if i % 2 else None,
+        )
+        for i in range(6)
+    ]
+
+
+@pytest.fixture
+def export_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.EXPORT_STORAGE_ROOT = tmp_path / "private"
+    return settings.EXPORT_STORAGE_ROOT
+
+
+def _content(response):
+    return b"".join(response.streaming_content)
+
+
+def _csv_rows(content):
+    return list(csv.reader(io.StringIO(content.decode("utf-8"))))
+
+
+@pytest.mark.django_db
+class TestFinancialEntryExport:
+    url = "/api/v1/finance/entries/export/"
+
+    def test_csv_is_streamed_with_one_query(
+        self, manager_client, entries, django_assert_num_queries
+    ):
+        response = manager_client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert 'filename="financial_entries.csv"' in response["Content-Disposition"]
+
+        # Category and creator come from the same values_list join
+        with django_assert_num_queries(1):
+            rows = _csv_rows(_content(response))
+
+        assert rows[0][0] == "Ngày"
+        assert len(rows) == 7
+        assert rows[1][:3] == ["2026-03-06", "income", "Danh mục 2"]
+        assert Decimal(rows[1][3]) == 600000
+        assert rows[1][5:] == ["Thu 5", "", "Văn An"]
+        assert rows[2][7] == ""
+
+    def test_filters_apply(self, manager_client, entries):
+        response = manager_client.get(self.url, {"date_from": "2026-03-05"})
+        assert len(_csv_rows(_content(response))) == 3
+
+    def test_xlsx(self, manager_client, entries):
+        response = manager_client.get(self.url, {"export_format": "xlsx"})
+        assert response["Content-Type"] == exports.XLSX_CONTENT_TYPE
+
+        ws = openpyxl.load_workbook(io.BytesIO(_content(response))).active
+        rows = list(ws.iter_rows(values_only=True))
+        assert rows[0][2] == "Danh mục"
+        assert len(rows) == 7
+
+    def test_invalid_format(self, manager_client):
+        response = manager_client.get(self.url, {"export_format": "pdf"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestNightAuditExport:
+    def test_csv(self, manager_client, manager_user):
+        NightAudit.objects.create(
+            audit_date=date(2026, 3, 1),
+            total_rooms=10,
+            rooms_occupied=7,
+            occupancy_rate=Decimal("70.00"),
+            total_income=Decimal("3500000"),
+            check_ins_today=3,
+            performed_by=manager_user,
+        )
+        response = manager_client.get("/api/v1/night-audits/export/")
+        rows = _csv_rows(_content(response))
+        assert rows[1][:4] == ["2026-03-01", "draft", "10", "7"]
+        assert Decimal(rows[1][7]) == 3500000
+        assert rows[1][8:] == ["3", "0", "Văn An"]
+
+
+@pytest.mark.django_db
+class TestReportExport:
+    def test_occupancy_xlsx(self, manager_client):
+        response = manager_client.get(
+            "/api/v1/reports/export/",
+            {"report_type": "occupancy", "start_date": "2026-03-01", "end_date": "2026-03-03"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert 'filename="occupancy_report_2026-03-01_2026-03-03.xlsx"' in (
+            response["Content-Disposition"]
+        )
+        ws = openpyxl.load_workbook(io.BytesIO(_content(response))).active
+        assert ws.title == "Occupancy"
+        assert next(ws.iter_rows(values_only=True))[0] == "Date"
+
+    def test_format_csv(self, manager_client):
+        response = manager_client.get(
+            "/api/v1/reports/export/",
+            {
+                "report_type": "occupancy",
+                "start_date": "2026-03-01",
+                "end_date": "2026-03-03",
+                "format": "csv",
+            },
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "text/csv"
+        assert _csv_rows(_content(response))[0][:2] == ["Date", "Total Rooms"]
+
+
+@pytest.mark.django_db
+class TestExportJobs:
+    url = "/api/v1/finance/entries/export/"
+
+    def _start(self, client, django_capture_on_commit_callbacks, **params):
+        with patch("hotel_api.tasks.run_export_job.delay", side_effect=OSError("no broker")):
+            with django_capture_on_commit_callbacks(execute=True):
+                response = client.get(self.url, {"mode": "async", **params})
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        return response.data
+
+    def test_async_mode_queues_a_job(self, manager_client, entries, export_root):
+        with patch("hotel_api.tasks.run_export_job.delay") as delay:
+            response = manager_client.get(self.url, {"mode": "async", "date_from": "2026-03-05"})
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data["status"] == ExportJob.Status.PENDING
+        assert response.data["download_url"] is None
+        job = ExportJob.objects.get()
+        assert job.params == {"date_from": "2026-03-05"}
+        delay.assert_not_called()  # Queued on commit
+
+    def test_job_writes_file_and_exposes_download(
+        self, manager_client, entries, export_root, django_capture_on_commit_callbacks
+    ):
+        data = self._start(
+            manager_client,
+            django_capture_on_commit_callbacks,
+            date_from="2026-03-05",
+            export_format="xlsx",
+        )
+
+        polled = manager_client.get(f"/api/v1/export-jobs/{data['id']}/").data
+        assert polled["status"] == ExportJob.Status.DONE
+        assert polled["row_count"] == 2
+        assert polled["download_url"].endswith(f"/api/v1/export-jobs/{data['id']}/download/")
+
+        response = manager_client.get(polled["download_url"])
+        ws = openpyxl.load_workbook(io.BytesIO(_content(response))).active
+        assert len(list(ws.iter_rows())) == 3
+
+    def test_jobs_are_private(
+        self, manager_client, create_user, entries, export_root, django_capture_on_commit_callbacks
+    ):
+        data = self._start(manager_client, django_capture_on_commit_callbacks)
+
+        other = APIClient()
+        other.force_authenticate(user=create_user("owner_export", "owner"))
+        assert other.get(f"/api/v1/export-jobs/{data['id']}/").status_code == 404
+        assert other.get("/api/v1/export-jobs/").data["count"] == 0
+
+    def test_failed_job_records_error(self, manager_user):
+        job = ExportJob.objects.create(
+            export_type="report",
+            params={"report_type": "occupancy"},
+            created_by=manager_user,
+        )
+        exports.run_export_job(job.pk)
+        job.refresh_from_db()
+        assert job.status == ExportJob.Status.FAILED
+        assert "start_date" in job.error
+
+    def test_job_runs_once(self, manager_user, entries, export_root):
+        job = ExportJob.objects.create(export_type="financial_entries", created_by=manager_user)
+        exports.run_export_job(job.pk)
+        first = ExportJob.objects.get(pk=job.pk).file.name
+
+        exports.run_export_job(job.pk)
+        assert ExportJob.objects.get(pk=job.pk).file.name == first
+
+    def test_files_are_stored_privately(self, manager_client, manager_user, entries, export_root):
+        job = exports.run_export_job(
+            ExportJob.objects.create(export_type="financial_entries", created_by=manager_user).pk
+        )
+
+        assert (export_root / job.file.name).exists()
+        assert not (export_root.parent / "media").exists()
+        assert "financial_entries" not in job.file.name
+        with pytest.raises(ValueError):
+            job.file.url
+
+        response = manager_client.get(f"/api/v1/export-jobs/{job.pk}/download/")
+        assert 'filename="financial_entries.csv"' in response["Content-Disposition"]
+
+    def test_migration_moves_public_files(self, manager_user, export_root):
+        old_name = default_storage.save("exports/2026/03/night_audits.csv", ContentFile(b"a,b\n"))
+        job = ExportJob.objects.create(export_type="night_audits", created_by=manager_user)
+        ExportJob.objects.filter(pk=job.pk).update(file=old_name)
+
+        migration = importlib.import_module("hotel_api.migrations.0035_export_private_storage")
+        migration.move_export_files(apps, None)
+
+        job.refresh_from_db()
+        assert not default_storage.exists(old_name)
+        assert (export_root / job.file.name).read_bytes() == b"a,b\n"
+        assert job.filename == "night_audits.csv"
+
+    def test_purge_deletes_old_jobs_and_files(self, manager_user, entries, export_root):
+        job = exports.run_export_job(
+            ExportJob.objects.create(export_type="financial_entries", created_by=manager_user).pk
+        )
+        path = export_root / job.file.name
+        assert path.exists()
+
+        ExportJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - timedelta(days=8))
+        assert exports.purge_export_jobs(days=7) == 1
+        assert not path.exists()
+        assert not ExportJob.objects.exists()
@@ -0,0 +1,172 @@
+"""Tests for accent-insensitive guest search (hotel_api/guest_search.py)."""
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+
+import pytest
+from rest_framework.test import APIClient
+
+from hotel_api.guest_search import (
+    NgramIndex,
+    fold,
+    ngram_index,
+    phone_suffix_q,
+    reverse_phone,
+    search_guests,
+    similarity,
+)
+from hotel_api.models import Guest, HotelUser
+
+
+@pytest.fixture
+def staff_client(db):
+    user = User.objects.create_user(username="staff_search", password="testpass123")
+    HotelUser.objects.create(user=user, role="staff", phone="+84900000301")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def guests(db):
+    ngram_index.clear()
+    return {
+        "an": Guest.objects.create(full_name="Nguyễn Văn An", phone="0901234567"),
+        "dung": Guest.objects.create(full_name="Đặng Thị Dung", phone="+84912345678"),
+        "anh": Guest.objects.create(full_name="Trần Ngọc Anh", phone="0987654321"),
+        "john": Guest.objects.create(full_name="John Smith", phone="+1234567890"),
+    }
+
+
+class TestFolding:
+    def test_fold_vietnamese(self):
+        assert fold("Nguyễn Văn An") == "nguyen van an"
+        assert fold("ĐẶNG  thị   Dung") == "dang thi dung"
+        assert fold("Lê-Hoàng, Minh") == "le hoang minh"
+        assert fold("") == ""
+
+    def test_reverse_phone(self):
+        assert reverse_phone("+84 912-345-678") == "87654321948"
+
+    def test_similarity(self):
+        assert similarity("nguyen van an", "nguyen van an") == 1.0
+        assert similarity("nguyen an", "nguyen van an") > similarity("nguyen an", "tran an")
+
+
+class TestNgramIndex:
+    def test_every_word_must_match(self):
+        index = NgramIndex([(1, "nguyen van an"), (2, "nguyen thi binh"), (3, "tran van an")])
+        assert set(index.search("nguyen an")) == {1}
+        assert set(index.search("van")) == {1, 3}
+        assert set(index.search("guy")) == {1, 2}
+        assert index.search("pham") == {}
+
+    def test_short_words_scan(self):
+        index = NgramIndex([(1, "le an"), (2, "le binh")])
+        assert set(index.search("an")) == {1}
+        assert set(index.search("le")) == {1, 2}
+
+    def test_closest_name_scores_highest(self):
+        index = NgramIndex([(1, "nguyen van an"), (2, "nguyen van anh tuan")])
+        scores = index.search("nguyen van an")
+        assert scores[1] > scores[2]
+
+    def test_large_index(self):
+        rows = [(pk, f"khach {pk:05d}") for pk in range(20000)] + [(20000, "nguyen van an")]
+        index = NgramIndex(rows)
+        assert set(index.search("nguyen")) == {20000}
+        assert set(index.search("khach 00042")) == {42}
+
+
+@pytest.mark.django_db
+class TestGuestSearchColumns:
+    def test_maintained_on_save(self, guests):
+        guest = guests["an"]
+        assert (guest.search_name, guest.phone_reversed) == ("nguyen van an", "7654321090")
+
+        guest.full_name = "Nguyễn Văn Bình"
+        guest.save(update_fields=["full_name"])
+        guest.refresh_from_db()
+        assert guest.search_name == "nguyen van binh"
+
+    def test_reindex_command(self, guests):
+        Guest.objects.filter(pk=guests["an"].pk).update(full_name="Phạm Văn Hùng")
+        call_command("reindex_guest_search", stdout=open("/dev/null", "w"))
+
+        assert Guest.objects.get(pk=guests["an"].pk).search_name == "pham van hung"
+        assert [g.pk for g in search_guests("pham hung")] == [guests["an"].pk]
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite query plan")
+    def test_phone_suffix_uses_index(self, guests):
+        sql, params = (
+            Guest.objects.filter(phone_suffix_q("4567")).values("id").query.sql_with_params()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " ".join(str(row) for row in cursor.fetchall())
+        assert "phone_reversed" in plan
+        assert "SCAN hotel_api_guest" not in plan
+
+
+@pytest.mark.django_db
+class TestGuestSearchAPI:
+    url = "/api/v1/guests/search/"
+
+    def _search(self, client, query, **extra):
+        response = client.post(self.url, {"query": query, **extra}, format="json")
+        assert response.status_code == 200, response.data
+        return [guest["full_name"] for guest in response.data]
+
+    def test_without_diacritics(self, staff_client, guests):
+        assert self._search(staff_client, "nguyen van an") == ["Nguyễn Văn An"]
+        assert self._search(staff_client, "dang dung") == ["Đặng Thị Dung"]
+
+    def test_with_diacritics_and_partial_words(self, staff_client, guests):
+        assert self._search(staff_client, "Nguyễn An") == ["Nguyễn Văn An"]
+        assert self._search(staff_client, "smi") == ["John Smith"]
+
+    def test_best_match_first(self, staff_client, guests):
+        # Whole word, then word prefix, then inside a word ("Đặng")
+        assert self._search(staff_client, "an") == [
+            "Nguyễn Văn An",
+            "Trần Ngọc Anh",
+            "Đặng Thị Dung",
+        ]
+
+    def test_phone_suffix(self, staff_client, guests):
+        assert self._search(staff_client, "4567") == ["Nguyễn Văn An"]
+        assert self._search(staff_client, "345 678") == ["Đặng Thị Dung"]
+
+    def test_phone_suffix_starting_with_nine(self, staff_client, guests):
+        # The reversed digits end in "9", whose next character ":" sorts
+        # before the digits under locale collations
+        Guest.objects.create(full_name="Võ Minh Tuấn", phone="+84935551239")
+        assert self._search(staff_client, "935551239") == ["Võ Minh Tuấn"]
+        assert self._search(staff_client, "9 0123 4567") == ["Nguyễn Văn An"]
+        # The national form reaches the stored number through the trunk-stripped "935551239"
+        assert self._search(staff_client, "0935551239") == ["Võ Minh Tuấn"]
+
+    def test_phone_prefix_and_national_form(self, staff_client, guests):
+        assert self._search(staff_client, "0987") == ["Trần Ngọc Anh"]
+        assert self._search(staff_client, "0912345678") == ["Đặng Thị Dung"]
+
+    def test_search_by(self, staff_client, guests):
+        assert self._search(staff_client, "4567", search_by="name") == []
+        assert self._search(staff_client, "nguyen", search_by="phone") == []
+        assert self._search(staff_client, "nguyen", search_by="name") == ["Nguyễn Văn An"]
+
+    def test_index_follows_changes(self, staff_client, guests):
+        assert self._search(staff_client, "hoang") == []
+        Guest.objects.create(full_name="Lê Hoàng Minh", phone="0923456789")
+        assert self._search(staff_client, "hoang") == ["Lê Hoàng Minh"]
+        guests["an"].delete()
+        assert self._search(staff_client, "nguyen") == []
+
+    def test_limit(self, staff_client, guests, settings):
+        settings.GUEST_SEARCH_LIMIT = 1
+        assert len(self._search(staff_client, "an")) == 1
+
+    def test_list_search_param(self, staff_client, guests):
+        response = staff_client.get("/api/v1/guests/?search=tran ngoc")
+        assert [g["full_name"] for g in response.data["results"]] == ["Trần Ngọc Anh"]
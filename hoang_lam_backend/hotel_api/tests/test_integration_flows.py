@@ -798,12 +798,12 @@ class TestRoomStatusConsistency:
         """
         api_client.force_authenticate(user=staff_user)
 
-        # Create first booking — check in
+        # Create first booking — still checked in on its departure day
         Booking.objects.create(
             room=room,
             guest=guest,
-            check_in_date=date.today(),
-            check_out_date=date.today() + timedelta(days=3),
+            check_in_date=date.today() - timedelta(days=3),
+            check_out_date=date.today(),
             status=Booking.Status.CHECKED_IN,
             nightly_rate=room_type.base_rate,
             total_amount=Decimal("1500000"),
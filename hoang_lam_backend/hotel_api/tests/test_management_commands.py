@@ -4,13 +4,19 @@ Unit tests for Django management commands.
 Covers:
   - apply_retention_policy  (wraps hotel_api.retention.apply_retention_policy)
   - encrypt_guest_data       (encrypts Guest id_number / visa_number fields)
+  - rotate_guest_encryption  (re-encrypts Guest fields under the current key)
+  - benchmark_guest_crypto   (per-save crypto microbenchmark)
 """
 
+import tempfile
 from io import StringIO
+from pathlib import Path
 
 from django.core.management import call_command
-from django.test import TestCase
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
 
+from hotel_api.encryption import decrypt, hash_value, is_encrypted
 from hotel_api.models import Guest
 
 # ─────────────────────────────────────────────
@@ -135,3 +141,117 @@ class TestEncryptGuestDataCommand(TestCase):
         self.assertIn("Done", out)
         # encrypted count and skipped count should both be 0
         self.assertIn("Encrypted: 0", out)
+
+
+# ─────────────────────────────────────────────
+# rotate_guest_encryption command
+# ─────────────────────────────────────────────
+
+OLD_KEY = "ZmDfcTF7_60GrrY167zsiPd67pEvs0aGOv2oasOM1Pg="
+NEW_KEY = "9mGSYqU0yZQpVd3gW3pWZ2q5rJd0L0c9bTfB5m5vE0A="
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=NEW_KEY, FIELD_ENCRYPTION_OLD_KEYS=OLD_KEY)
+class TestRotateGuestEncryptionCommand(TestCase):
+    """Tests for the rotate_guest_encryption management command."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.checkpoint = Path(tmp.name) / "rotate.ckpt"
+
+        with override_settings(FIELD_ENCRYPTION_KEY=OLD_KEY, FIELD_ENCRYPTION_OLD_KEYS=""):
+            self.guests = [
+                Guest.objects.create(
+                    full_name=f"Guest {i}",
+                    phone=f"090000010{i}",
+                    id_number=f"00123456789{i}",
+                    visa_number="V12345" if i == 0 else "",
+                )
+                for i in range(3)
+            ]
+        self.old_tokens = {g.pk: g.id_number for g in self.guests}
+
+    def _call(self, *args):
+        out = StringIO()
+        call_command(
+            "rotate_guest_encryption",
+            "--checkpoint",
+            str(self.checkpoint),
+            "--chunk-size",
+            "2",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def _assert_under_new_key(self, guest):
+        guest.refresh_from_db()
+        with override_settings(FIELD_ENCRYPTION_KEY=NEW_KEY, FIELD_ENCRYPTION_OLD_KEYS=""):
+            self.assertTrue(is_encrypted(guest.id_number))
+
+    def test_reencrypts_under_new_key(self):
+        out = self._call("--workers", "0")
+
+        self.assertIn("Scanned: 3, Updated: 3", out)
+        self.assertIn("rows/s", out)
+        for guest in self.guests:
+            self._assert_under_new_key(guest)
+            self.assertNotEqual(guest.id_number, self.old_tokens[guest.pk])
+            self.assertEqual(guest.id_number_hash, hash_value(decrypt(guest.id_number)))
+        self.assertEqual(decrypt(self.guests[0].visa_number), "V12345")
+        self.assertFalse(self.checkpoint.exists())
+
+    def test_rerun_is_a_no_op(self):
+        self._call("--workers", "0")
+        out = self._call("--workers", "0")
+        self.assertIn("Updated: 0", out)
+
+    def test_encrypts_plaintext(self):
+        Guest.objects.filter(pk=self.guests[1].pk).update(id_number="009999999999")
+        self._call("--workers", "0")
+        self._assert_under_new_key(self.guests[1])
+        self.assertEqual(self.guests[1].id_number_hash, hash_value("009999999999"))
+
+    def test_resumes_from_checkpoint(self):
+        self.checkpoint.write_text(str(self.guests[0].pk))
+        out = self._call("--workers", "0")
+
+        self.assertIn(f"Resuming after guest #{self.guests[0].pk}", out)
+        self.assertIn("Scanned: 2", out)
+        self.guests[0].refresh_from_db()
+        self.assertEqual(self.guests[0].id_number, self.old_tokens[self.guests[0].pk])
+
+    def test_restart_ignores_checkpoint(self):
+        self.checkpoint.write_text(str(self.guests[-1].pk))
+        out = self._call("--workers", "0", "--restart")
+        self.assertIn("Scanned: 3", out)
+
+    def test_dry_run_changes_nothing(self):
+        out = self._call("--workers", "0", "--dry-run")
+        self.assertIn("[DRY RUN]", out)
+        self.assertIn("Updated: 3", out)
+        self.guests[0].refresh_from_db()
+        self.assertEqual(self.guests[0].id_number, self.old_tokens[self.guests[0].pk])
+
+    def test_process_pool(self):
+        out = self._call("--workers", "2")
+        self.assertIn("Updated: 3", out)
+        for guest in self.guests:
+            self._assert_under_new_key(guest)
+
+    @override_settings(FIELD_ENCRYPTION_KEY="")
+    def test_requires_key(self):
+        with self.assertRaises(CommandError):
+            self._call()
+
+
+class TestBenchmarkGuestCryptoCommand(TestCase):
+    """Smoke test for the benchmark_guest_crypto command."""
+
+    def test_reports_before_and_after(self):
+        out = StringIO()
+        call_command("benchmark_guest_crypto", "--iterations", "5", stdout=out)
+        output = out.getvalue()
+        self.assertIn("new guest (plaintext fields): before", output)
+        self.assertIn("update (encrypted fields): before", output)
@@ -6,6 +6,7 @@ from datetime import date, timedelta
 from decimal import Decimal
 
 from django.contrib.auth.models import User
+from django.db import connection
 from django.utils import timezone
 
 import pytest
@@ -509,3 +510,243 @@ class TestNightAuditStatistics:
         assert response.status_code == status.HTTP_201_CREATED
         # Financial stats should include the income entry
         assert Decimal(response.data["total_income"]) >= Decimal("1500000")
+
+
+# ==================== Night Audit Engine Tests ====================
+
+
+@pytest.mark.django_db
+class TestNightAuditEngine:
+    """Tests for the range-based statistics engine (hotel_api/night_audit.py)."""
+
+    def _bookings(self, rooms, guest, room_type):
+        """A week of departures with income entries on each day."""
+        category = FinancialCategory.objects.create(
+            name="Tiền phòng", category_type=FinancialCategory.CategoryType.INCOME
+        )
+        start = date.today() - timedelta(days=7)
+        for i in range(7):
+            Booking.objects.create(
+                room=rooms[i % len(rooms)],
+                guest=guest,
+                check_in_date=start + timedelta(days=i - 1),
+                check_out_date=start + timedelta(days=i),
+                status=Booking.Status.CHECKED_OUT,
+                nightly_rate=room_type.base_rate,
+                total_amount=Decimal("500000") * (i + 1),
+            )
+            FinancialEntry.objects.create(
+                entry_type=FinancialEntry.EntryType.INCOME,
+                category=category,
+                amount=Decimal("100000") * (i + 1),
+                date=start + timedelta(days=i),
+                description=f"Thu {i}",
+                payment_method=Booking.PaymentMethod.MOMO if i % 2 else Booking.PaymentMethod.CASH,
+            )
+        return start
+
+    def test_range_matches_single_days(self, rooms, guest, room_type):
+        from hotel_api.night_audit import audit_statistics
+
+        start = self._bookings(rooms, guest, room_type)
+        stats = audit_statistics(start, start + timedelta(days=6))
+
+        assert list(stats) == [start + timedelta(days=i) for i in range(7)]
+        for day, row in stats.items():
+            assert row == audit_statistics(day)[day]
+
+        third = stats[start + timedelta(days=2)]
+        assert third["check_outs_today"] == 1
+        assert third["room_revenue"] == Decimal("1500000")
+        assert third["cash_collected"] == Decimal("300000")
+        assert third["other_revenue"] == Decimal("-1200000")
+        assert third["total_rooms"] == 7
+
+    def test_query_count_does_not_grow_with_range(
+        self, rooms, guest, room_type, django_assert_num_queries
+    ):
+        from hotel_api.night_audit import audit_statistics
+
+        start = self._bookings(rooms, guest, room_type)
+        with django_assert_num_queries(7):
+            audit_statistics(start)
+        with django_assert_num_queries(7):
+            audit_statistics(start - timedelta(days=60), start + timedelta(days=6))
+
+    def test_cancellations_counted_on_cancellation_date(self, rooms, guest, room_type):
+        """A booking cancelled today counts even if its stay is next month."""
+        from hotel_api.night_audit import audit_statistics
+
+        Booking.objects.create(
+            room=rooms[0],
+            guest=guest,
+            check_in_date=date.today() + timedelta(days=30),
+            check_out_date=date.today() + timedelta(days=32),
+            status=Booking.Status.CANCELLED,
+            nightly_rate=room_type.base_rate,
+            total_amount=Decimal("1000000"),
+        )
+        today = timezone.localdate()
+        row = audit_statistics(today)[today]
+        assert row["cancellations"] == 1
+        assert row["new_bookings"] == 1
+
+    def test_rebuild_upserts_and_skips_closed(self, rooms, guest, room_type, manager_user):
+        from hotel_api.night_audit import rebuild_audits
+
+        start = self._bookings(rooms, guest, room_type)
+        draft = NightAudit.objects.create(audit_date=start, notes="Đã kiểm")
+        closed = NightAudit.objects.create(
+            audit_date=start + timedelta(days=1), status=NightAudit.Status.CLOSED
+        )
+
+        result = rebuild_audits(start, start + timedelta(days=6), user=manager_user)
+
+        assert result["created"] == 5
+        assert result["updated"] == 1
+        assert result["skipped_closed"] == 1
+        assert set(result["timings_ms"]) == {"statistics", "write", "daily_stats", "total"}
+
+        draft.refresh_from_db()
+        closed.refresh_from_db()
+        assert draft.total_income == Decimal("100000")
+        assert draft.notes == "Đã kiểm"
+        assert draft.performed_by is None
+        assert closed.total_income == 0
+
+        created = NightAudit.objects.get(audit_date=start + timedelta(days=6))
+        assert created.status == NightAudit.Status.DRAFT
+        assert created.performed_by == manager_user
+        assert created.room_revenue == Decimal("3500000")
+        assert NightAudit.objects.count() == 7
+
+    def test_rebuild_keeps_todays_snapshot_out_of_past_dates(self, rooms, guest, room_type):
+        from hotel_api.night_audit import rebuild_audits
+
+        start = self._bookings(rooms, guest, room_type)
+        today = timezone.localdate()
+        Booking.objects.create(
+            room=rooms[6],
+            guest=guest,
+            check_in_date=today,
+            check_out_date=today + timedelta(days=1),
+            status=Booking.Status.CHECKED_IN,
+            nightly_rate=room_type.base_rate,
+            total_amount=Decimal("800000"),
+        )
+        Room.objects.filter(pk__in=[rooms[5].pk, rooms[6].pk]).update(status=Room.Status.OCCUPIED)
+        Room.objects.filter(pk=rooms[4].pk).update(status=Room.Status.MAINTENANCE)
+        kept = NightAudit.objects.create(
+            audit_date=start, rooms_available=6, pending_payments=Decimal("200000")
+        )
+
+        rebuild_audits(start, today)
+
+        past = NightAudit.objects.get(audit_date=start + timedelta(days=3))
+        assert (past.total_rooms, past.rooms_occupied) == (7, 1)
+        assert past.occupancy_rate == Decimal("14.29")
+        assert (past.rooms_available, past.rooms_maintenance, past.unpaid_bookings_count) == (
+            0,
+            0,
+            0,
+        )
+        assert past.pending_payments == 0
+
+        kept.refresh_from_db()
+        assert kept.rooms_occupied == 1
+        assert kept.rooms_available == 6
+        assert kept.pending_payments == Decimal("200000")
+
+        current = NightAudit.objects.get(audit_date=today)
+        assert (current.rooms_occupied, current.rooms_available, current.rooms_maintenance) == (
+            2,
+            4,
+            1,
+        )
+        assert current.pending_payments == Decimal("800000")
+
+    def test_rebuild_existing_only(self, rooms, guest, room_type):
+        from hotel_api.night_audit import rebuild_audits
+
+        start = self._bookings(rooms, guest, room_type)
+        NightAudit.objects.create(audit_date=start)
+
+        result = rebuild_audits(start, start + timedelta(days=6), create_missing=False)
+
+        assert (result["created"], result["updated"]) == (0, 1)
+        assert NightAudit.objects.count() == 1
+
+    def test_rebuild_command(self, rooms, guest, room_type):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        start = self._bookings(rooms, guest, room_type)
+        out = StringIO()
+        call_command(
+            "rebuild_night_audits",
+            "--start",
+            start.isoformat(),
+            "--end",
+            (start + timedelta(days=2)).isoformat(),
+            stdout=out,
+        )
+
+        assert "3 created, 0 updated, 0 closed skipped" in out.getvalue()
+        assert NightAudit.objects.count() == 3
+
+    def test_rebuild_endpoint_is_manager_only(self, api_client, staff_user):
+        api_client.force_authenticate(user=staff_user)
+        response = api_client.post(
+            "/api/v1/night-audits/rebuild/",
+            {"start_date": str(date.today()), "end_date": str(date.today())},
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_rebuild_endpoint(self, api_client, manager_user, rooms, guest, room_type):
+        start = self._bookings(rooms, guest, room_type)
+        api_client.force_authenticate(user=manager_user)
+
+        response = api_client.post(
+            "/api/v1/night-audits/rebuild/",
+            {"start_date": str(start), "end_date": str(start + timedelta(days=6))},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["created"] == 7
+        assert NightAudit.objects.filter(performed_by=manager_user).count() == 7
+
+    def test_rebuild_endpoint_validates_range(self, api_client, manager_user):
+        api_client.force_authenticate(user=manager_user)
+        url = "/api/v1/night-audits/rebuild/"
+        today = date.today()
+
+        future = api_client.post(
+            url, {"start_date": str(today), "end_date": str(today + timedelta(days=1))}
+        )
+        too_long = api_client.post(
+            url, {"start_date": str(today - timedelta(days=400)), "end_date": str(today)}
+        )
+        assert future.status_code == status.HTTP_400_BAD_REQUEST
+        assert too_long.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_today_does_not_recalculate_existing(
+        self, api_client, manager_user, rooms, django_assert_max_num_queries
+    ):
+        api_client.force_authenticate(user=manager_user)
+        api_client.get("/api/v1/night-audits/today/")
+
+        # Auth/permission lookups plus the audit read; no statistics queries
+        with django_assert_max_num_queries(4):
+            response = api_client.get("/api/v1/night-audits/today/")
+        assert response.status_code == status.HTTP_200_OK
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="Requires PostgreSQL")
+    def test_postgresql_backend_matches_orm(self, rooms, guest, room_type):
+        from hotel_api.night_audit import audit_statistics
+
+        start = self._bookings(rooms, guest, room_type)
+        end = start + timedelta(days=6)
+        assert audit_statistics(start, end, backend="postgresql") == audit_statistics(
+            start, end, backend="python"
+        )
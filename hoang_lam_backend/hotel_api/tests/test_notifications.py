@@ -3,9 +3,13 @@
 from datetime import date, timedelta
 from decimal import Decimal
 from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
 
 from django.contrib.auth.models import User
 from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 import pytest
 from rest_framework import status
@@ -204,6 +208,171 @@ class TestPushNotificationService:
             assert n.booking == booking
 
 
+def _fcm_response(tokens, invalid=()):
+    """Fake BatchResponse: tokens in `invalid` fail with UNREGISTERED."""
+    responses = [
+        SimpleNamespace(exception=SimpleNamespace(code="UNREGISTERED") if t in invalid else None)
+        for t in tokens
+    ]
+    failures = sum(1 for r in responses if r.exception)
+    return SimpleNamespace(
+        responses=responses, success_count=len(tokens) - failures, failure_count=failures
+    )
+
+
+@pytest.fixture
+def fcm():
+    """Pretend FCM is configured and capture multicast calls."""
+    calls = []
+
+    def send(message):
+        calls.append(message.tokens)
+        return _fcm_response(message.tokens, invalid={"tok-bad"})
+
+    with (
+        patch.object(PushNotificationService, "_init_firebase", return_value=True),
+        patch("firebase_admin.messaging.send_each_for_multicast", side_effect=send),
+    ):
+        yield calls
+
+
+@pytest.mark.django_db
+class TestBatchedPush:
+    def _staff(self, count, prefix="batch"):
+        users = []
+        for i in range(count):
+            user = User.objects.create_user(username=f"{prefix}{i}", password="testpass123")
+            HotelUser.objects.create(user=user, role=HotelUser.Role.STAFF)
+            DeviceToken.objects.create(user=user, token=f"tok-{prefix}{i}")
+            users.append(user)
+        return users
+
+    def _notify(self):
+        return PushNotificationService.notify_staff(
+            notification_type=Notification.NotificationType.GENERAL,
+            title="Test",
+            body="Test",
+            data={"booking_id": 1},
+        )
+
+    def test_notify_staff_query_count_is_constant(self):
+        counts = []
+        for prefix, size in (("small", 2), ("large", 10)):
+            self._staff(size, prefix=prefix)
+            with CaptureQueriesContext(connection) as ctx:
+                notifications = self._notify()
+            assert len(notifications) == User.objects.count()
+            counts.append(len(ctx))
+        assert counts[0] == counts[1]
+
+    def test_send_batch_one_multicast_and_bulk_updates(self, fcm):
+        users = self._staff(3)
+        DeviceToken.objects.create(user=users[0], token="tok-bad")
+        notifications = self._notify()
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert PushNotificationService.send_push_batch(notifications)
+
+        assert len(fcm) == 1
+        assert sorted(fcm[0]) == ["tok-bad", "tok-batch0", "tok-batch1", "tok-batch2"]
+        # Token lookup, token deactivation, sent flags
+        assert len(ctx) == 3
+        assert not DeviceToken.objects.get(token="tok-bad").is_active
+        assert Notification.objects.filter(is_sent=True).count() == 3
+
+    def test_send_batch_chunks_tokens(self, fcm):
+        self._staff(5)
+        with patch("hotel_api.services.FCM_BATCH_SIZE", 2):
+            PushNotificationService.send_push_batch(self._notify())
+        assert [len(tokens) for tokens in fcm] == [2, 2, 1]
+
+    def test_recipient_without_tokens_not_marked_sent(self, fcm, owner_user):
+        self._staff(1)
+        PushNotificationService.send_push_batch(self._notify())
+        assert not Notification.objects.get(recipient=owner_user).is_sent
+
+    def test_send_error_recorded(self, owner_user):
+        DeviceToken.objects.create(user=owner_user, token="tok-owner")
+        with (
+            patch.object(PushNotificationService, "_init_firebase", return_value=True),
+            patch(
+                "firebase_admin.messaging.send_each_for_multicast",
+                side_effect=RuntimeError("FCM down"),
+            ),
+        ):
+            assert not PushNotificationService.send_push_batch(self._notify())
+        notification = Notification.objects.get()
+        assert not notification.is_sent
+        assert notification.send_error == "FCM down"
+
+    def test_failed_chunk_only_fails_its_notifications(self):
+        from hotel_api.services import PushDeliveryError
+        from hotel_api.tasks import send_push_notifications
+
+        self._staff(5)
+        ids = [n.pk for n in self._notify()]
+        calls = []
+
+        def flaky(message):
+            calls.append(list(message.tokens))
+            if len(calls) == 2:
+                raise RuntimeError("FCM unavailable")
+            return _fcm_response(message.tokens)
+
+        with (
+            patch.object(PushNotificationService, "_init_firebase", return_value=True),
+            patch("firebase_admin.messaging.send_each_for_multicast", side_effect=flaky),
+            patch("hotel_api.services.FCM_BATCH_SIZE", 2),
+        ):
+            with pytest.raises(PushDeliveryError):
+                send_push_notifications(ids)
+            assert Notification.objects.filter(is_sent=True).count() == 3
+            failed = set(calls[1])
+            assert (
+                set(
+                    Notification.objects.filter(
+                        is_sent=False, send_error="FCM unavailable"
+                    ).values_list("recipient__device_tokens__token", flat=True)
+                )
+                == failed
+            )
+
+            # The retry pushes only the notifications that failed
+            send_push_notifications(ids)
+        assert set(calls[-1]) == failed
+        assert Notification.objects.filter(is_sent=True).count() == 5
+
+    def test_notify_staff_queues_task_after_commit(
+        self, owner_user, settings, django_capture_on_commit_callbacks
+    ):
+        settings.FCM_ENABLED = True
+        with patch("hotel_api.tasks.send_push_notifications.delay") as delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                notifications = self._notify()
+                delay.assert_not_called()
+        delay.assert_called_once_with([n.pk for n in notifications])
+
+    def test_notify_staff_sends_inline_when_sync(
+        self, owner_user, fcm, settings, django_capture_on_commit_callbacks
+    ):
+        settings.FCM_ENABLED = True
+        settings.PUSH_NOTIFICATIONS_ASYNC = False
+        DeviceToken.objects.create(user=owner_user, token="tok-owner")
+        with django_capture_on_commit_callbacks(execute=True):
+            self._notify()
+        assert fcm == [["tok-owner"]]
+        assert Notification.objects.get().is_sent
+
+    def test_task_skips_sent_notifications(self, owner_user, fcm):
+        from hotel_api.tasks import send_push_notifications
+
+        DeviceToken.objects.create(user=owner_user, token="tok-owner")
+        ids = [n.pk for n in self._notify()]
+        send_push_notifications(ids)
+        send_push_notifications(ids)
+        assert len(fcm) == 1
+
+
 # ===== Notification API Tests =====
 
 
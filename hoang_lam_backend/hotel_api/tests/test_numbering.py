@@ -0,0 +1,230 @@
+"""Tests for document numbering (hotel_api/numbering.py)."""
+
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+from rest_framework.test import APIClient
+
+from hotel_api import numbering
+from hotel_api.models import Booking, DocumentCounter, Guest, HotelUser, Payment, Room, RoomType
+
+DAY = datetime(2025, 3, 17, 9, 0, tzinfo=ZoneInfo("Asia/Ho_Chi_Minh"))
+
+requires_postgresql = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Requires PostgreSQL"
+)
+
+
+@pytest.fixture
+def staff_user(db):
+    user = User.objects.create_user(username="numbering_staff", password="testpass123")
+    HotelUser.objects.create(user=user, role="staff", phone="+84900000111")
+    return user
+
+
+@pytest.fixture
+def booking(db):
+    room_type = RoomType.objects.create(name="Phòng Đơn", base_rate=Decimal("400000"))
+    room = Room.objects.create(number="201", room_type=room_type, floor=2)
+    guest = Guest.objects.create(full_name="Trần Thị B", phone="0907654321")
+    return Booking.objects.create(
+        room=room,
+        guest=guest,
+        check_in_date=date.today(),
+        check_out_date=date.today() + timedelta(days=1),
+        nightly_rate=Decimal("400000"),
+        total_amount=Decimal("400000"),
+    )
+
+
+def _payment(booking, user, **kwargs):
+    fields = {
+        "booking": booking,
+        "payment_type": Payment.PaymentType.ROOM_CHARGE,
+        "amount": Decimal("400000"),
+        "payment_method": Booking.PaymentMethod.CASH,
+        "status": Payment.Status.COMPLETED,
+        "created_by": user,
+    }
+    fields.update(kwargs)
+    return Payment(**fields)
+
+
+class TestNumberingScheme:
+    def test_format_and_parse(self):
+        scheme = numbering.SCHEMES["payment"]
+        assert scheme.period(DAY) == "20250317"
+        assert scheme.format("20250317", 7) == "PMT-20250317-0007"
+        assert scheme.parse("PMT-20250317-0007") == ("20250317", 7)
+        # Numbers past the padding width still parse
+        assert scheme.parse("PMT-20250317-12345") == ("20250317", 12345)
+
+    def test_parse_rejects_other_formats(self):
+        scheme = numbering.SCHEMES["payment"]
+        assert scheme.parse("INV-20250317-0001") is None
+        assert scheme.parse("PMT-20250317-") is None
+        assert scheme.parse("PMT-0001") is None
+        assert scheme.parse("imported receipt") is None
+
+
+@pytest.mark.django_db
+class TestAllocate:
+    def test_numbers_are_sequential(self):
+        assert numbering.next_number("payment", when=DAY) == "PMT-20250317-0001"
+        assert numbering.next_number("payment", when=DAY) == "PMT-20250317-0002"
+        assert DocumentCounter.objects.get(scheme="payment", period="20250317").value == 2
+
+    def test_new_day_and_scheme_start_at_one(self):
+        numbering.next_number("payment", when=DAY)
+        assert numbering.next_number("payment", when=DAY + timedelta(days=1)) == (
+            "PMT-20250318-0001"
+        )
+        assert numbering.next_number("receipt", when=DAY) == "INV-20250317-0001"
+
+    def test_block_is_contiguous(self):
+        numbering.next_number("payment", when=DAY)
+        assert numbering.allocate("payment", 3, when=DAY) == [
+            "PMT-20250317-0002",
+            "PMT-20250317-0003",
+            "PMT-20250317-0004",
+        ]
+        assert numbering.next_number("payment", when=DAY) == "PMT-20250317-0005"
+
+    def test_block_is_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            numbering.allocate("payment", 50, when=DAY)
+        statements = [q["sql"] for q in queries.captured_queries if "SAVEPOINT" not in q["sql"]]
+        assert len(statements) == 1
+        assert DocumentCounter._meta.db_table in statements[0]
+
+    def test_invalid_count(self):
+        with pytest.raises(ValueError):
+            numbering.allocate("payment", 0)
+
+    def test_rollback_returns_the_number(self):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                numbering.next_number("payment", when=DAY)
+                raise RuntimeError
+        assert numbering.next_number("payment", when=DAY) == "PMT-20250317-0001"
+
+
+@pytest.mark.django_db
+class TestPaymentNumbers:
+    def test_completed_payment_is_numbered_from_counter(self, booking, staff_user):
+        with CaptureQueriesContext(connection) as queries:
+            payment = _payment(booking, staff_user)
+            payment.save()
+        assert numbering.SCHEMES["payment"].parse(payment.receipt_number)[1] == 1
+        assert not [q for q in queries.captured_queries if "LIKE" in q["sql"]]
+
+        second = _payment(booking, staff_user)
+        second.save()
+        assert numbering.SCHEMES["payment"].parse(second.receipt_number)[1] == 2
+
+    def test_failed_save_returns_the_number(self, booking, staff_user):
+        with pytest.raises(IntegrityError):
+            _payment(booking, staff_user, amount=None).save()
+
+        payment = _payment(booking, staff_user)
+        payment.save()
+        assert numbering.SCHEMES["payment"].parse(payment.receipt_number)[1] == 1
+
+    def test_pending_payment_is_not_numbered(self, booking, staff_user):
+        payment = _payment(booking, staff_user, status=Payment.Status.PENDING)
+        payment.save()
+        assert payment.receipt_number is None
+        assert not DocumentCounter.objects.exists()
+
+    def test_number_all_for_bulk_create(self, booking, staff_user):
+        payments = [_payment(booking, staff_user) for _ in range(3)]
+        payments[1].receipt_number = "IMPORTED-1"
+
+        Payment.objects.bulk_create(numbering.number_all(payments, "receipt_number", "payment"))
+
+        numbers = sorted(Payment.objects.values_list("receipt_number", flat=True))
+        assert "IMPORTED-1" in numbers
+        assert DocumentCounter.objects.get(scheme="payment").value == 2
+
+
+@pytest.mark.django_db
+class TestReceiptNumbers:
+    def test_assign_is_stable(self, booking):
+        number = numbering.assign(booking, "receipt_number", "receipt")
+        assert number.startswith("INV-")
+        assert numbering.assign(booking, "receipt_number", "receipt") == number
+        booking.refresh_from_db()
+        assert booking.receipt_number == number
+        assert DocumentCounter.objects.get(scheme="receipt").value == 1
+
+    def test_save_after_assign_keeps_receipt_number(self, booking):
+        number = numbering.assign(booking, "receipt_number", "receipt")
+        assert booking.receipt_number == number
+
+        booking.status = Booking.Status.CHECKED_IN
+        booking.save()
+
+        booking.refresh_from_db()
+        assert booking.status == Booking.Status.CHECKED_IN
+        assert booking.receipt_number == number
+
+    def test_reprint_keeps_receipt_number(self, booking, staff_user):
+        client = APIClient()
+        client.force_authenticate(user=staff_user)
+
+        first = client.post("/api/v1/receipts/generate/", {"booking_id": booking.id}).json()
+        second = client.post("/api/v1/receipts/generate/", {"booking_id": booking.id}).json()
+
+        assert first["receipt_number"] == second["receipt_number"]
+        assert first["receipt_number"].startswith("INV-")
+
+    def test_payment_receipt_uses_payment_number(self, booking, staff_user):
+        payment = _payment(booking, staff_user)
+        payment.save()
+        client = APIClient()
+        client.force_authenticate(user=staff_user)
+
+        data = client.post("/api/v1/receipts/generate/", {"payment_id": payment.id}).json()
+
+        assert data["receipt_number"] == payment.receipt_number
+
+
+@pytest.mark.django_db
+def test_migration_seeds_counters_from_existing_numbers(booking, staff_user):
+    for number in ["PMT-20250317-0004", "PMT-20250317-0011", "PMT-20250318-0002", "MANUAL-7"]:
+        Payment.objects.bulk_create([_payment(booking, staff_user, receipt_number=number)])
+    DocumentCounter.objects.all().delete()
+
+    migration = importlib.import_module("hotel_api.migrations.0034_document_numbering")
+    migration.seed_payment_counters(apps, None)
+
+    assert dict(DocumentCounter.objects.values_list("period", "value")) == {
+        "20250317": 11,
+        "20250318": 2,
+    }
+    assert numbering.next_number("payment", when=DAY) == "PMT-20250317-0012"
+
+
+@requires_postgresql
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_allocation_is_unique_and_gapless():
+    def allocate(_):
+        try:
+            return numbering.next_number("payment", when=DAY)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        numbers = list(pool.map(allocate, range(80)))
+
+    values = sorted(numbering.SCHEMES["payment"].parse(number)[1] for number in numbers)
+    assert values == list(range(1, 81))
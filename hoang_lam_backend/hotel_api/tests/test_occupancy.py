@@ -0,0 +1,178 @@
+"""
+Tests for the occupancy report engine (difference-array sweep).
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import pytest
+from rest_framework.test import APIClient
+
+from hotel_api.models import Booking, Guest, HotelUser, Room, RoomType
+from hotel_api.occupancy import daily_occupancy
+
+START = date(2026, 3, 1)
+END = date(2026, 3, 31)
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def manager_user(db):
+    user = User.objects.create_user(username="occupancy_manager", password="testpass123")
+    HotelUser.objects.create(user=user, role="manager", phone="+84900000010")
+    return user
+
+
+@pytest.fixture
+def room_types(db):
+    return (
+        RoomType.objects.create(name="Đơn", base_rate=Decimal("300000")),
+        RoomType.objects.create(name="Đôi", base_rate=Decimal("500000")),
+    )
+
+
+@pytest.fixture
+def stays(room_types):
+    """Bookings straddling both range boundaries, plus ones that must be ignored."""
+    single, double = room_types
+    guest = Guest.objects.create(full_name="Nguyễn Văn A", phone="0901234567")
+    rooms = [
+        Room.objects.create(number=f"1{i:02d}", room_type=single if i < 3 else double, floor=1)
+        for i in range(5)
+    ]
+    specs = [
+        # room, check-in, check-out, rate, status
+        (0, date(2026, 2, 25), date(2026, 3, 3), 300000, Booking.Status.CHECKED_OUT),
+        (0, date(2026, 3, 3), date(2026, 3, 10), 320000, Booking.Status.CHECKED_OUT),
+        (1, date(2026, 3, 5), date(2026, 3, 6), 310000, Booking.Status.CHECKED_IN),
+        (2, date(2026, 3, 28), date(2026, 4, 4), 350000, Booking.Status.CONFIRMED),
+        (3, date(2026, 2, 1), date(2026, 5, 1), 500000, Booking.Status.CONFIRMED),
+        (4, date(2026, 3, 10), date(2026, 3, 12), 550000, Booking.Status.PENDING),
+        (4, date(2026, 3, 12), date(2026, 3, 15), 550000, Booking.Status.CANCELLED),
+        (4, date(2026, 4, 1), date(2026, 4, 3), 550000, Booking.Status.CONFIRMED),
+    ]
+    for room, check_in, check_out, rate, status in specs:
+        Booking.objects.create(
+            room=rooms[room],
+            guest=guest,
+            check_in_date=check_in,
+            check_out_date=check_out,
+            nightly_rate=rate,
+            total_amount=rate * (check_out - check_in).days,
+            status=status,
+        )
+    return rooms
+
+
+def brute_force(start_date, end_date, room_type_id=None):
+    """Reference O(days × bookings) implementation."""
+    bookings = Booking.objects.filter(
+        status__in=["confirmed", "checked_in", "checked_out"],
+    )
+    if room_type_id:
+        bookings = bookings.filter(room__room_type_id=room_type_id)
+    bookings = list(bookings)
+
+    occupied, revenue = [], []
+    day = start_date
+    while day <= end_date:
+        active = [b for b in bookings if b.check_in_date <= day < b.check_out_date]
+        occupied.append(len(active))
+        revenue.append(sum((b.nightly_rate for b in active), Decimal("0")))
+        day += timedelta(days=1)
+    return occupied, revenue
+
+
+@pytest.mark.django_db
+class TestDailyOccupancy:
+    def test_python_sweep_matches_brute_force(self, stays):
+        series = daily_occupancy(START, END, backend="python")
+        assert (series.occupied, series.revenue) == brute_force(START, END)
+        assert series.dates[0] == START and series.dates[-1] == END
+
+    def test_numpy_sweep_matches_brute_force(self, stays):
+        pytest.importorskip("numpy")
+        series = daily_occupancy(START, END, backend="numpy")
+        assert (series.occupied, series.revenue) == brute_force(START, END)
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="Requires PostgreSQL")
+    def test_sql_sweep_matches_brute_force(self, stays, room_types):
+        series = daily_occupancy(START, END, backend="postgresql")
+        assert (series.occupied, series.revenue) == brute_force(START, END)
+
+        double = room_types[1]
+        series = daily_occupancy(START, END, room_type_id=double.pk, backend="postgresql")
+        assert (series.occupied, series.revenue) == brute_force(START, END, double.pk)
+
+    def test_room_type_filter(self, stays, room_types):
+        double = room_types[1]
+        series = daily_occupancy(START, END, room_type_id=double.pk, backend="python")
+        assert (series.occupied, series.revenue) == brute_force(START, END, double.pk)
+        assert series.occupied_nights == 31
+
+    def test_single_day_range(self, stays):
+        day = date(2026, 3, 5)
+        series = daily_occupancy(day, day, backend="python")
+        assert series.occupied == [3]
+        assert series.revenue == [Decimal("1130000")]
+
+    def test_no_bookings(self, db):
+        series = daily_occupancy(START, END, backend="python")
+        assert series.occupied == [0] * 31
+        assert series.total_revenue == 0
+
+    def test_unknown_backend_rejected(self, db):
+        with pytest.raises(ValueError):
+            daily_occupancy(START, END, backend="spark")
+
+    def test_fold_week_and_month(self, stays):
+        start, end = date(2026, 2, 20), date(2026, 4, 10)
+        series = daily_occupancy(start, end, backend="python")
+
+        weeks = series.fold("week")
+        assert weeks[0][0] == date(2026, 2, 16)  # Monday of the first week
+        assert sum(days for _, days, _, _ in weeks) == len(series)
+        assert sum(occ for _, _, occ, _ in weeks) == series.occupied_nights
+
+        months = series.fold("month")
+        assert [m[0] for m in months] == [date(2026, 2, 1), date(2026, 3, 1), date(2026, 4, 1)]
+        assert [m[1] for m in months] == [9, 31, 10]
+        assert sum(rev for _, _, _, rev in months) == series.total_revenue
+
+
+@pytest.mark.django_db
+class TestOccupancyReportQueries:
+    def test_report_query_count_is_constant(self, api_client, manager_user, stays):
+        api_client.force_authenticate(user=manager_user)
+        url = reverse("report_occupancy")
+
+        counts = []
+        for end_date in (date(2026, 3, 7), date(2027, 3, 1)):
+            with CaptureQueriesContext(connection) as ctx:
+                response = api_client.get(
+                    url, {"start_date": START.isoformat(), "end_date": end_date.isoformat()}
+                )
+            assert response.status_code == 200
+            counts.append(len(ctx))
+        assert counts[0] == counts[1]
+
+    def test_report_values(self, api_client, manager_user, stays):
+        api_client.force_authenticate(user=manager_user)
+        response = api_client.get(
+            reverse("report_occupancy"),
+            {"start_date": START.isoformat(), "end_date": END.isoformat()},
+        )
+        occupied, revenue = brute_force(START, END)
+        data = response.json()
+        assert [d["occupied_rooms"] for d in data["data"]] == occupied
+        assert data["summary"]["occupied_nights"] == sum(occupied)
+        assert Decimal(str(data["summary"]["total_revenue"])) == sum(revenue)
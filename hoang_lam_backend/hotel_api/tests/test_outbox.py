@@ -0,0 +1,188 @@
+"""
+Tests for the booking side-effect outbox.
+"""
+
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from hotel_api import outbox
+from hotel_api.models import (
+    Booking,
+    FinancialCategory,
+    FinancialEntry,
+    Guest,
+    HotelUser,
+    HousekeepingTask,
+    Notification,
+    OutboxEvent,
+    Room,
+    RoomType,
+)
+
+User = get_user_model()
+
+
+@override_settings(OUTBOX_EAGER=False)
+class OutboxCheckOutTestCase(TestCase):
+    """With the worker mode on, check-out commits only the core state change."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.staff_user = User.objects.create_user(username="staff_outbox", password="testpass123")
+        HotelUser.objects.create(user=self.staff_user, role=HotelUser.Role.STAFF)
+        self.manager = User.objects.create_user(username="manager_outbox", password="testpass123")
+        HotelUser.objects.create(user=self.manager, role=HotelUser.Role.MANAGER)
+        self.client.force_authenticate(user=self.staff_user)
+
+        FinancialCategory.objects.create(name="Tiền phòng", category_type="income", is_default=True)
+        room_type = RoomType.objects.create(name="Outbox", base_rate=500000, max_guests=2)
+        self.room = Room.objects.create(
+            room_type=room_type, number="601", floor=6, status=Room.Status.OCCUPIED
+        )
+        self.guest = Guest.objects.create(full_name="Lê Thị E", phone="0945678901")
+        self.booking = Booking.objects.create(
+            guest=self.guest,
+            room=self.room,
+            check_in_date=date.today() - timedelta(days=2),
+            check_out_date=date.today(),
+            nightly_rate=500000,
+            total_amount=1000000,
+            status=Booking.Status.CHECKED_IN,
+        )
+
+    def _check_out(self):
+        with patch("hotel_api.tasks.drain_outbox.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f"/api/v1/bookings/{self.booking.id}/check-out/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return delay
+
+    def test_check_out_defers_side_effects(self):
+        delay = self._check_out()
+
+        self.booking.refresh_from_db()
+        self.room.refresh_from_db()
+        self.assertEqual(self.booking.status, Booking.Status.CHECKED_OUT)
+        self.assertEqual(self.room.status, Room.Status.CLEANING)
+
+        self.assertFalse(HousekeepingTask.objects.exists())
+        self.assertFalse(FinancialEntry.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(
+            sorted(OutboxEvent.objects.values_list("event_type", flat=True)),
+            [
+                "checkout_housekeeping",
+                "checkout_room_revenue",
+                "guest_stay_completed",
+                "notify_staff",
+            ],
+        )
+        # One drain task for all four events
+        delay.assert_called_once_with()
+
+    def test_drain_applies_side_effects_once(self):
+        self._check_out()
+
+        self.assertEqual(outbox.drain_outbox(), 4)
+        self.assertEqual(outbox.drain_outbox(), 0)
+
+        task = HousekeepingTask.objects.get()
+        self.assertEqual(task.booking, self.booking)
+        self.assertEqual(task.created_by, self.staff_user)
+        entry = FinancialEntry.objects.get()
+        self.assertEqual(entry.amount, 1000000)
+        self.guest.refresh_from_db()
+        self.assertEqual(self.guest.total_stays, 1)
+        # The acting user is excluded from the fan-out
+        self.assertEqual(
+            list(Notification.objects.values_list("recipient", flat=True)), [self.manager.pk]
+        )
+        self.assertFalse(OutboxEvent.objects.exclude(status=OutboxEvent.Status.DONE).exists())
+
+    def test_check_in_queues_notification(self):
+        self.booking.status = Booking.Status.CONFIRMED
+        self.booking.save()
+        self.room.status = Room.Status.AVAILABLE
+        self.room.save()
+
+        with patch("hotel_api.tasks.drain_outbox.delay"):
+            response = self.client.post(f"/api/v1/bookings/{self.booking.id}/check-in/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Notification.objects.exists())
+
+        outbox.drain_outbox()
+        self.assertEqual(Notification.objects.get().notification_type, "checkin_completed")
+
+
+class OutboxEventTestCase(TestCase):
+    """Idempotency keys and retries."""
+
+    def setUp(self):
+        self.guest = Guest.objects.create(full_name="Lê Thị E", phone="0945678901")
+
+    @override_settings(OUTBOX_EAGER=False)
+    def test_duplicate_key_is_ignored(self):
+        first = outbox.enqueue("guest_stay_completed", {"guest_id": self.guest.pk}, key="k1")
+        second = outbox.enqueue("guest_stay_completed", {"guest_id": self.guest.pk}, key="k1")
+        self.assertIsNotNone(first)
+        self.assertIsNone(second)
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+    @override_settings(OUTBOX_EAGER=True)
+    def test_eager_mode_applies_inline(self):
+        event = outbox.enqueue("guest_stay_completed", {"guest_id": self.guest.pk}, key="k2")
+        self.guest.refresh_from_db()
+        self.assertEqual(self.guest.total_stays, 1)
+        self.assertEqual(event.status, OutboxEvent.Status.DONE)
+
+    def test_unknown_event_type_rejected(self):
+        with self.assertRaises(ValueError):
+            outbox.enqueue("send_fax", {}, key="k3")
+
+    @override_settings(OUTBOX_EAGER=False, OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_event_is_retried_with_backoff(self):
+        event = outbox.enqueue("checkout_housekeeping", {"booking_id": 0, "date": "x"}, key="k4")
+
+        self.assertEqual(outbox.drain_outbox(), 0)
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxEvent.Status.PENDING)
+        self.assertEqual(event.attempts, 1)
+        self.assertGreater(event.available_at, timezone.now())
+        self.assertTrue(event.last_error)
+
+        # Not due yet
+        self.assertEqual(outbox.drain_outbox(), 0)
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 1)
+
+        OutboxEvent.objects.filter(pk=event.pk).update(available_at=timezone.now())
+        outbox.drain_outbox()
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxEvent.Status.FAILED)
+        self.assertEqual(event.attempts, 2)
+
+    @override_settings(OUTBOX_EAGER=False)
+    def test_failure_does_not_block_other_events(self):
+        outbox.enqueue("checkout_housekeeping", {"booking_id": 0, "date": "x"}, key="bad")
+        outbox.enqueue("guest_stay_completed", {"guest_id": self.guest.pk}, key="good")
+        self.assertEqual(outbox.drain_outbox(), 1)
+        self.guest.refresh_from_db()
+        self.assertEqual(self.guest.total_stays, 1)
+
+    def test_purge_removes_old_done_events(self):
+        old = OutboxEvent.objects.create(
+            event_type="guest_stay_completed",
+            idempotency_key="old",
+            status=OutboxEvent.Status.DONE,
+            processed_at=timezone.now() - timedelta(days=30),
+        )
+        OutboxEvent.objects.create(event_type="guest_stay_completed", idempotency_key="pending")
+        self.assertEqual(outbox.purge_outbox(days=7), 1)
+        self.assertFalse(OutboxEvent.objects.filter(pk=old.pk).exists())
@@ -0,0 +1,160 @@
+"""Tests for keyset (cursor) pagination and estimated counts (hotel_api/pagination.py)."""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import pytest
+from rest_framework.test import APIClient
+
+from hotel_api.models import AuditLog, FinancialCategory, FinancialEntry, HotelUser, Notification
+from hotel_api.pagination import EstimatedCountPaginator, estimated_count
+
+
+@pytest.fixture
+def manager(db):
+    user = User.objects.create_user(username="manager_pages", password="testpass123")
+    HotelUser.objects.create(user=user, role="manager", phone="+84900000401")
+    return user
+
+
+@pytest.fixture
+def client(manager):
+    client = APIClient()
+    client.force_authenticate(user=manager)
+    return client
+
+
+@pytest.fixture
+def notifications(manager):
+    """45 notifications; created_at ties in groups of five so id must break them."""
+    base = timezone.now()
+    rows = Notification.objects.bulk_create(
+        Notification(recipient=manager, title=f"Thông báo {i}", body="Nội dung") for i in range(45)
+    )
+    for i, row in enumerate(rows):
+        Notification.objects.filter(pk=row.pk).update(created_at=base - timedelta(minutes=i // 5))
+    return list(Notification.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+
+def _walk(client, url, key="next"):
+    ids, pages = [], 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.data
+        ids += [row["id"] for row in response.data["results"]]
+        url = response.data[key]
+        pages += 1
+    return ids, pages
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def test_walks_every_row_once_in_order(self, client, notifications):
+        ids, pages = _walk(client, "/api/v1/notifications/?cursor=")
+        assert ids == notifications
+        assert pages == 3
+
+    def test_first_page_shape(self, client, notifications):
+        response = client.get("/api/v1/notifications/?cursor=")
+        assert set(response.data) == {"next", "previous", "results"}
+        assert response.data["previous"] is None
+        assert len(response.data["results"]) == 20
+
+    def test_previous_links(self, client, notifications):
+        first = client.get("/api/v1/notifications/?cursor=").data
+        second = client.get(first["next"]).data
+        back = client.get(second["previous"]).data
+
+        assert [row["id"] for row in back["results"]] == notifications[:20]
+        assert back["previous"] is None
+        assert back["next"] is not None
+
+    def test_constant_queries_and_no_count(self, client, notifications):
+        first = client.get("/api/v1/notifications/?cursor=").data
+        with CaptureQueriesContext(connection) as first_page:
+            client.get("/api/v1/notifications/?cursor=")
+        with CaptureQueriesContext(connection) as later_page:
+            client.get(first["next"])
+
+        assert len(later_page) == len(first_page)
+        assert not any("COUNT(" in query["sql"].upper() for query in later_page.captured_queries)
+
+    def test_invalid_cursor(self, client, notifications):
+        assert client.get("/api/v1/notifications/?cursor=not-a-cursor").status_code == 404
+
+    def test_page_number_mode_unchanged(self, client, notifications):
+        response = client.get("/api/v1/notifications/?page=3")
+        assert response.data["count"] == 45
+        assert [row["id"] for row in response.data["results"]] == notifications[40:]
+
+    def test_audit_log_limit_ignored_for_cursor(self, client, manager):
+        AuditLog.objects.bulk_create(
+            AuditLog(user=manager, action="create", entity_type="booking") for _ in range(25)
+        )
+        ids, _ = _walk(client, "/api/v1/audit-logs/?cursor=&limit=5")
+        assert len(ids) == 25
+
+    def test_finance_entries_keyed_on_date(self, client):
+        category = FinancialCategory.objects.create(
+            name="Tiền phòng", category_type=FinancialCategory.CategoryType.INCOME
+        )
+        for day in (3, 1, 2, 2):
+            FinancialEntry.objects.create(
+                entry_type=FinancialEntry.EntryType.INCOME,
+                category=category,
+                amount=Decimal("100000"),
+                date=date(2025, 1, day),
+            )
+
+        ids, _ = _walk(client, "/api/v1/finance/entries/?cursor=")
+        expected = list(
+            FinancialEntry.objects.order_by("-date", "-id").values_list("id", flat=True)
+        )
+        assert ids == expected
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite query plan")
+    def test_keyset_page_uses_index(self, client, manager):
+        from hotel_api.pagination import KeysetPagination
+
+        after = KeysetPagination._after(
+            ("-created_at", "-id"), [timezone.now().isoformat(), 10], AuditLog
+        )
+        sql, params = (
+            AuditLog.objects.filter(after).order_by("-created_at", "-id")[:21].query
+        ).sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " ".join(str(row) for row in cursor.fetchall())
+        assert "auditlog_keyset_idx" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.django_db
+class TestEstimatedCount:
+    def test_exact_outside_postgresql(self, client, notifications):
+        assert estimated_count(Notification.objects.all()) == 45
+
+    def test_header_on_cursor_pages(self, client, notifications):
+        response = client.get("/api/v1/notifications/?cursor=&count=estimated")
+        assert response["X-Total-Count"] == "45"
+
+    def test_page_number_count(self, client, notifications):
+        response = client.get("/api/v1/notifications/?count=estimated")
+        assert response.data["count"] == 45
+
+    def test_admin_paginator(self, notifications):
+        paginator = EstimatedCountPaginator(Notification.objects.order_by("-id"), 20)
+        assert paginator.count == 45
+        assert paginator.num_pages == 3
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="Requires PostgreSQL")
+    def test_planner_estimate_on_postgresql(self, notifications, settings):
+        settings.PAGINATION_ESTIMATE_THRESHOLD = 0
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Notification._meta.db_table}")
+        assert estimated_count(Notification.objects.all()) > 0
@@ -0,0 +1,131 @@
+"""Tests for monthly table partitioning (hotel_api/partitions.py)."""
+
+import uuid
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+
+import pytest
+
+from hotel_api import partitions
+from hotel_api.audit import write_entries
+from hotel_api.models import Notification, SensitiveDataAccessLog
+
+requires_postgresql = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Requires PostgreSQL"
+)
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="partition_user", password="testpass123")
+
+
+def _partitions(model):
+    with connection.cursor() as cursor:
+        return partitions.list_partitions(model._meta.db_table, cursor)
+
+
+class TestMonths:
+    def test_add_months(self):
+        assert partitions.add_months(date(2025, 11, 1), 1) == date(2025, 12, 1)
+        assert partitions.add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+        assert partitions.add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+
+    def test_month_of_uses_utc(self):
+        # 1 March 00:30 in Ho Chi Minh City is still February in UTC
+        local = datetime(2025, 3, 1, 0, 30, tzinfo=ZoneInfo("Asia/Ho_Chi_Minh"))
+        assert partitions.month_of(local) == date(2025, 2, 1)
+        assert partitions.month_of(date(2025, 3, 17)) == date(2025, 3, 1)
+
+    def test_names(self):
+        assert partitions.partition_name("hotel_api_auditlog", date(2025, 3, 1)) == (
+            "hotel_api_auditlog_p202503"
+        )
+        assert partitions.month_start(date(2025, 3, 1)) == datetime(
+            2025, 3, 1, tzinfo=dt_timezone.utc
+        )
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor == "postgresql", reason="Fallback outside PostgreSQL")
+class TestWithoutPostgreSQL:
+    def test_maintenance_is_noop(self):
+        assert partitions.maintain_partitions() == {"created": [], "expired": []}
+        assert not partitions.is_partitioned(Notification)
+        assert partitions.expire_partitions("notification", timezone.now()) == []
+
+    def test_task(self):
+        from hotel_api.tasks import maintain_partitions
+
+        assert maintain_partitions() == "Created 0 partition(s), expired 0."
+
+
+@requires_postgresql
+@pytest.mark.django_db
+class TestPostgreSQLPartitions:
+    def test_tables_are_partitioned(self):
+        for model_name, _ in partitions.PARTITIONED_MODELS.values():
+            assert partitions.is_partitioned(apps.get_model("hotel_api", model_name))
+        assert partitions.month_of(timezone.now()) in _partitions(Notification)
+
+    def test_ensure_partitions_is_idempotent(self):
+        partitions.ensure_partitions(months_ahead=6)
+        assert partitions.ensure_partitions(months_ahead=6) == []
+        current = partitions.month_of(timezone.now())
+        assert partitions.add_months(current, 6) in _partitions(Notification)
+
+    def test_new_partition_takes_rows_from_default(self, user):
+        far = timezone.now() + timedelta(days=400)
+        notification = Notification.objects.create(recipient=user, title="Sau", body="Nội dung")
+        Notification.objects.filter(pk=notification.pk).update(created_at=far)
+
+        created = partitions.ensure_partitions(months_ahead=14)
+
+        partition = partitions.partition_name(Notification._meta.db_table, partitions.month_of(far))
+        assert partition in created
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM "{partition}"')
+            assert cursor.fetchone()[0] == 1
+        assert Notification.objects.get(pk=notification.pk).created_at == far
+
+    def test_expired_partitions_dropped(self, user):
+        table = Notification._meta.db_table
+        month = partitions.month_of(timezone.now() - timedelta(days=400))
+        if month not in _partitions(Notification):
+            partitions.create_partition(connection, table, "created_at", month)
+        old = Notification.objects.create(recipient=user, title="Cũ", body="Nội dung")
+        Notification.objects.filter(pk=old.pk).update(
+            created_at=partitions.month_start(month) + timedelta(days=1)
+        )
+        recent = Notification.objects.create(recipient=user, title="Mới", body="Nội dung")
+        with connection.cursor() as cursor:
+            # Foreign keys are deferred: a partition with unchecked rows cannot be dropped
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        expired = partitions.expire_partitions("notification", timezone.now() - timedelta(days=90))
+
+        assert partitions.partition_name(table, month) in [name for name, _ in expired]
+        assert list(Notification.objects.values_list("pk", flat=True)) == [recent.pk]
+
+    def test_entry_id_still_deduplicates(self, user):
+        entry = {
+            "entry_id": uuid.uuid4().hex,
+            "user_id": user.pk,
+            "action": "view_guest",
+            "resource_type": "guest",
+            "resource_id": 1,
+            "fields_accessed": ["id_number"],
+            "ip_address": "127.0.0.1",
+            "user_agent": "",
+            "details": {},
+            "timestamp": timezone.now(),
+        }
+        write_entries([dict(entry)])
+        write_entries([dict(entry)])
+        assert SensitiveDataAccessLog.objects.count() == 1
@@ -0,0 +1,168 @@
+"""Tests for the request performance middleware, /metrics and slow-request samples."""
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+import pytest
+from rest_framework.test import APIClient
+
+from hotel_api.models import HotelUser, RoomType
+from hotel_api.performance import registry, render_prometheus
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+@pytest.fixture
+def manager(db):
+    user = User.objects.create_user(username="manager_perf", password="testpass123")
+    HotelUser.objects.create(user=user, role="manager", phone="+84900000201")
+    return user
+
+
+@pytest.fixture
+def staff(db):
+    user = User.objects.create_user(username="staff_perf", password="testpass123")
+    HotelUser.objects.create(user=user, role="staff", phone="+84900000202")
+    return user
+
+
+def _client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def room_types(db):
+    for i in range(3):
+        RoomType.objects.create(name=f"Loại {i}", base_rate=Decimal("500000"))
+
+
+@pytest.mark.django_db
+class TestPerformanceMiddleware:
+    def test_records_request_tagged_by_viewset_and_action(self, manager, room_types):
+        response = _client(manager).get("/api/v1/room-types/")
+        assert response.status_code == 200
+
+        requests, endpoints = registry.snapshot()
+        assert requests[("RoomTypeViewSet", "list", "GET", "200")] == 1
+        endpoint = endpoints[("RoomTypeViewSet", "list")]
+        assert endpoint["count"] == 1
+        assert endpoint["db_queries"] >= 2  # count + page
+        assert endpoint["db_time"] > 0
+        assert endpoint["serializer_time"] > 0
+        assert endpoint["response_bytes"] == len(response.content)
+
+    def test_custom_action_and_api_view_tags(self, manager):
+        client = _client(manager)
+        client.get("/api/v1/night-audits/today/")
+        client.get("/api/v1/dashboard/")
+
+        requests, _ = registry.snapshot()
+        assert ("NightAuditViewSet", "today", "GET", "200") in requests
+        assert ("DashboardView", "get", "GET", "200") in requests
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_MS=0, PERFORMANCE_SLOW_REQUEST_TOP_QUERIES=2)
+    def test_slow_requests_sampled_with_top_queries(self, manager, room_types):
+        _client(manager).get("/api/v1/room-types/?search=Lo")
+
+        sample = registry.slow_samples()[0]
+        assert sample["view"] == "RoomTypeViewSet"
+        assert sample["action"] == "list"
+        assert sample["path"] == "/api/v1/room-types/"
+        assert sample["user_id"] == manager.pk
+        assert sample["db_queries"] >= 2
+        assert len(sample["top_queries"]) == 2
+        durations = [query["duration_ms"] for query in sample["top_queries"]]
+        assert durations == sorted(durations, reverse=True)
+        assert all("SELECT" in query["sql"] for query in sample["top_queries"])
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_MS=60000)
+    def test_fast_requests_not_sampled(self, manager):
+        _client(manager).get("/api/v1/auth/me/")
+
+        assert registry.slow_samples() == []
+        assert registry.snapshot()[1][("UserProfileView", "get")]["slow"] == 0
+
+    @override_settings(PERFORMANCE_MONITORING_ENABLED=False)
+    def test_disabled(self, manager, room_types):
+        _client(manager).get("/api/v1/room-types/")
+
+        assert registry.snapshot() == ({}, {})
+        assert APIClient().get("/metrics").status_code == 404
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    @override_settings(DEBUG=True)
+    def test_prometheus_format(self, manager, room_types):
+        _client(manager).get("/api/v1/room-types/")
+
+        response = APIClient().get("/metrics")
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        body = response.content.decode()
+        assert "# TYPE hotel_http_requests_total counter" in body
+        assert (
+            'hotel_http_requests_total{view="RoomTypeViewSet",action="list",'
+            'method="GET",status="200"} 1'
+        ) in body
+        assert 'hotel_http_request_duration_seconds_bucket{view="RoomTypeViewSet",' in body
+        assert (
+            'hotel_http_request_duration_seconds_count{view="RoomTypeViewSet",action="list"} 1'
+        ) in body
+        assert 'hotel_db_queries_total{view="RoomTypeViewSet",action="list"}' in body
+
+    def test_histogram_buckets_are_cumulative(self, manager):
+        client = _client(manager)
+        for _ in range(3):
+            client.get("/api/v1/auth/me/")
+
+        lines = [
+            line
+            for line in render_prometheus().splitlines()
+            if line.startswith('hotel_http_request_duration_seconds_bucket{view="UserProfileView"')
+        ]
+        counts = [int(line.rsplit(" ", 1)[1]) for line in lines]
+        assert counts == sorted(counts)
+        assert lines[-1].endswith('le="+Inf"} 3')
+
+    def test_not_served_without_token_outside_debug(self):
+        assert APIClient().get("/metrics").status_code == 404
+
+    @override_settings(PERFORMANCE_METRICS_TOKEN="scrape-secret")
+    def test_token_required_when_configured(self):
+        client = APIClient()
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code == 401
+        response = client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret")
+        assert response.status_code == 200
+
+
+@pytest.mark.django_db
+class TestSlowRequestsView:
+    url = "/api/v1/performance/slow-requests/"
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_MS=0)
+    def test_manager_sees_samples(self, manager, room_types):
+        client = _client(manager)
+        client.get("/api/v1/room-types/")
+
+        response = client.get(self.url)
+        assert response.status_code == 200
+        assert response.data["enabled"] is True
+        assert response.data["threshold_ms"] == 0
+        assert response.data["results"][0]["view"] == "RoomTypeViewSet"
+
+    def test_staff_forbidden(self, staff):
+        assert _client(staff).get(self.url).status_code == 403
+
+    def test_unauthenticated(self):
+        assert APIClient().get(self.url).status_code == 401
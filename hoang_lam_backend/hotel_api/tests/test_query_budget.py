@@ -0,0 +1,429 @@
+"""
+Query-count regression harness for every router-registered viewset.
+
+For each viewset, SEEDERS creates rows with every relation the serializers
+may follow filled in. The list endpoint is called with N and 10×N rows and
+the retrieve endpoint with one row out of each set; the number of queries
+must not change with the data volume, so a serializer that touches a
+relation per row (an N+1) fails here.
+
+A viewset registered on the router without a seeder or an EXEMPT entry fails
+too, so new endpoints are covered by default. Queries and wall time per
+endpoint are printed in the "query budget" section of the pytest summary.
+"""
+
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+from rest_framework.test import APIClient
+
+from hotel_api.models import (
+    AuditLog,
+    Booking,
+    DateRateOverride,
+    ExchangeRate,
+    ExportJob,
+    FinancialCategory,
+    FinancialEntry,
+    FolioItem,
+    GroupBooking,
+    Guest,
+    GuestMessage,
+    HotelUser,
+    HousekeepingTask,
+    InspectionTemplate,
+    LostAndFound,
+    MaintenanceRequest,
+    MessageTemplate,
+    MinibarItem,
+    MinibarSale,
+    NightAudit,
+    Notification,
+    Payment,
+    RatePlan,
+    ReportJob,
+    Room,
+    RoomInspection,
+    RoomType,
+)
+from hotel_api.urls import router
+
+N = 2
+
+# Viewsets without list/retrieve endpoints
+EXEMPT = {
+    "receipt": "action-only viewset (generate / download)",
+}
+
+
+class Seeder:
+    """Creates fully-linked rows; every row gets its own related objects."""
+
+    def __init__(self, user):
+        self.user = user
+        self.counter = 0
+
+    def _next(self):
+        self.counter += 1
+        return self.counter
+
+    def user_row(self):
+        i = self._next()
+        user = User.objects.create_user(
+            username=f"seed_user_{i}", first_name="Nhân", last_name=f"{i}"
+        )
+        HotelUser.objects.create(user=user, role="staff", phone=f"+8491{i:07d}")
+        return user
+
+    def room_type(self):
+        return RoomType.objects.create(name=f"Loại {self._next()}", base_rate=Decimal("500000"))
+
+    def room(self):
+        return Room.objects.create(number=f"R{self._next()}", room_type=self.room_type(), floor=1)
+
+    def guest(self):
+        i = self._next()
+        return Guest.objects.create(
+            full_name=f"Khách {i}", phone=f"09{i:08d}", preferred_room_type=self.room_type()
+        )
+
+    def booking(self):
+        i = self._next()
+        check_in = date(2025, 1, 1) + timedelta(days=i)
+        return Booking.objects.create(
+            room=self.room(),
+            guest=self.guest(),
+            check_in_date=check_in,
+            check_out_date=check_in + timedelta(days=2),
+            status=Booking.Status.CHECKED_OUT,
+            nightly_rate=Decimal("500000"),
+            total_amount=Decimal("1000000"),
+            created_by=self.user_row(),
+        )
+
+    def category(self):
+        return FinancialCategory.objects.create(
+            name=f"Danh mục {self._next()}", category_type=FinancialCategory.CategoryType.INCOME
+        )
+
+    def minibar_item(self):
+        return MinibarItem.objects.create(name=f"Nước {self._next()}", price=Decimal("20000"))
+
+    def minibar_sale(self):
+        return MinibarSale.objects.create(
+            booking=self.booking(),
+            item=self.minibar_item(),
+            unit_price=Decimal("20000"),
+            total=Decimal("20000"),
+            date=date(2025, 1, 2),
+            created_by=self.user_row(),
+        )
+
+    def message_template(self):
+        return MessageTemplate.objects.create(
+            name=f"Mẫu {self._next()}", subject="Xác nhận", body="Xin chào {guest_name}"
+        )
+
+
+def _room_types(seed):
+    room_type = seed.room_type()
+    Room.objects.create(number=f"T{seed._next()}", room_type=room_type, floor=1)
+
+
+def _rooms(seed):
+    seed.room()
+
+
+def _guests(seed):
+    seed.booking()
+
+
+def _bookings(seed):
+    seed.booking()
+
+
+def _categories(seed):
+    FinancialEntry.objects.create(
+        entry_type=FinancialEntry.EntryType.INCOME,
+        category=seed.category(),
+        amount=Decimal("100000"),
+        date=date(2025, 1, 1),
+    )
+
+
+def _entries(seed):
+    FinancialEntry.objects.create(
+        entry_type=FinancialEntry.EntryType.INCOME,
+        category=seed.category(),
+        amount=Decimal("100000"),
+        date=date(2025, 1, 1),
+        booking=seed.booking(),
+        created_by=seed.user_row(),
+    )
+
+
+def _night_audits(seed):
+    NightAudit.objects.create(
+        audit_date=date(2024, 1, 1) + timedelta(days=seed._next()),
+        performed_by=seed.user_row(),
+        closed_by=seed.user_row(),
+    )
+
+
+def _payments(seed):
+    Payment.objects.create(
+        booking=seed.booking(), amount=Decimal("500000"), created_by=seed.user_row()
+    )
+
+
+def _folio_items(seed):
+    sale = seed.minibar_sale()
+    FolioItem.objects.create(
+        booking=sale.booking,
+        item_type="minibar",
+        description="Nước",
+        unit_price=Decimal("20000"),
+        total_price=Decimal("20000"),
+        date=date(2025, 1, 2),
+        minibar_sale=sale,
+        created_by=seed.user_row(),
+    )
+
+
+def _exchange_rates(seed):
+    ExchangeRate.objects.create(
+        from_currency="USD",
+        rate=Decimal("25000"),
+        date=date(2025, 1, 1) + timedelta(days=seed._next()),
+    )
+
+
+def _housekeeping_tasks(seed):
+    HousekeepingTask.objects.create(
+        room=seed.room(),
+        task_type="checkout_clean",
+        scheduled_date=date(2025, 1, 1),
+        assigned_to=seed.user_row(),
+        booking=seed.booking(),
+        created_by=seed.user_row(),
+    )
+
+
+def _maintenance_requests(seed):
+    MaintenanceRequest.objects.create(
+        room=seed.room(),
+        title="Hỏng điều hòa",
+        description="Không lạnh",
+        assigned_to=seed.user_row(),
+        completed_by=seed.user_row(),
+        reported_by=seed.user_row(),
+    )
+
+
+def _minibar_items(seed):
+    seed.minibar_item()
+
+
+def _minibar_sales(seed):
+    seed.minibar_sale()
+
+
+def _lost_and_found(seed):
+    booking = seed.booking()
+    LostAndFound.objects.create(
+        item_name="Điện thoại",
+        found_date=date(2025, 1, 2),
+        room=booking.room,
+        guest=booking.guest,
+        booking=booking,
+        found_by=seed.user_row(),
+        claimed_by_staff=seed.user_row(),
+    )
+
+
+def _group_bookings(seed):
+    group = GroupBooking.objects.create(
+        name=f"Đoàn {seed._next()}",
+        contact_name="Trưởng đoàn",
+        contact_phone="0900000000",
+        check_in_date=date(2025, 1, 1),
+        check_out_date=date(2025, 1, 3),
+        room_count=2,
+        guest_count=4,
+        total_amount=Decimal("2000000"),
+        created_by=seed.user_row(),
+    )
+    group.rooms.add(seed.room(), seed.room())
+
+
+def _inspection_templates(seed):
+    InspectionTemplate.objects.create(
+        name=f"Mẫu {seed._next()}",
+        room_type=seed.room_type(),
+        items=[{"category": "bed", "item": "Ga giường", "critical": False}],
+        created_by=seed.user_row(),
+    )
+
+
+def _room_inspections(seed):
+    booking = seed.booking()
+    RoomInspection.objects.create(
+        room=booking.room,
+        booking=booking,
+        scheduled_date=date(2025, 1, 3),
+        inspector=seed.user_row(),
+    )
+
+
+def _rate_plans(seed):
+    RatePlan.objects.create(
+        name=f"Giá {seed._next()}", room_type=seed.room_type(), base_rate=Decimal("450000")
+    )
+
+
+def _date_rate_overrides(seed):
+    DateRateOverride.objects.create(
+        room_type=seed.room_type(), date=date(2025, 2, 1), rate=Decimal("600000")
+    )
+
+
+def _notifications(seed):
+    Notification.objects.create(
+        recipient=seed.user, booking=seed.booking(), title="Đặt phòng mới", body="Phòng R1"
+    )
+
+
+def _message_templates(seed):
+    seed.message_template()
+
+
+def _guest_messages(seed):
+    booking = seed.booking()
+    GuestMessage.objects.create(
+        guest=booking.guest,
+        booking=booking,
+        template=seed.message_template(),
+        channel="sms",
+        subject="Xác nhận",
+        body="Xin chào",
+        sent_by=seed.user_row(),
+    )
+
+
+def _audit_logs(seed):
+    AuditLog.objects.create(user=seed.user_row(), action="create", entity_type="booking")
+
+
+def _export_jobs(seed):
+    ExportJob.objects.create(export_type="financial_entries", created_by=seed.user)
+
+
+def _report_jobs(seed):
+    ReportJob.objects.create(
+        report_type="kpi", params_hash=f"{seed._next():064d}", created_by=seed.user_row()
+    )
+
+
+# basename -> function(seeder) creating one row of the viewset's model
+SEEDERS = {
+    "roomtype": _room_types,
+    "room": _rooms,
+    "guest": _guests,
+    "booking": _bookings,
+    "financialcategory": _categories,
+    "financialentry": _entries,
+    "nightaudit": _night_audits,
+    "payment": _payments,
+    "folioitem": _folio_items,
+    "exchangerate": _exchange_rates,
+    "housekeepingtask": _housekeeping_tasks,
+    "maintenancerequest": _maintenance_requests,
+    "minibaritem": _minibar_items,
+    "minibarsale": _minibar_sales,
+    "lostandfound": _lost_and_found,
+    "groupbooking": _group_bookings,
+    "inspectiontemplate": _inspection_templates,
+    "roominspection": _room_inspections,
+    "rateplan": _rate_plans,
+    "daterateoverride": _date_rate_overrides,
+    "notification": _notifications,
+    "messagetemplate": _message_templates,
+    "guestmessage": _guest_messages,
+    "auditlog": _audit_logs,
+    "exportjob": _export_jobs,
+    "reportjob": _report_jobs,
+}
+
+ROUTES = [(prefix, basename) for prefix, _, basename in router.registry]
+
+
+@pytest.fixture
+def owner(db):
+    user = User.objects.create_user(username="owner_budget", password="testpass123")
+    HotelUser.objects.create(user=user, role="owner", phone="+84900000099")
+    return user
+
+
+@pytest.fixture
+def owner_client(owner):
+    client = APIClient()
+    client.force_authenticate(user=owner)
+    return client
+
+
+def _rows(data):
+    return data["results"] if isinstance(data, dict) and "results" in data else data
+
+
+def _measure(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = client.get(url)
+        elapsed = (time.perf_counter() - started) * 1000
+    assert response.status_code == 200, (url, response.status_code, response.data)
+    return response, len(queries), elapsed
+
+
+def test_every_viewset_is_covered():
+    missing = {basename for _, basename in ROUTES} - set(SEEDERS) - set(EXEMPT)
+    assert not missing, f"Add a query-budget seeder for: {sorted(missing)}"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "prefix,basename", [route for route in ROUTES if route[1] in SEEDERS], ids=lambda v: v
+)
+def test_query_count_is_independent_of_rows(owner, owner_client, record_property, prefix, basename):
+    seed = Seeder(owner)
+    url = f"/api/v1/{prefix}/"
+
+    for _ in range(N):
+        SEEDERS[basename](seed)
+    small, small_queries, _ = _measure(owner_client, url)
+    first_id = _rows(small.data)[0]["id"]
+    _, detail_queries, _ = _measure(owner_client, f"{url}{first_id}/")
+
+    for _ in range(9 * N):
+        SEEDERS[basename](seed)
+    large, large_queries, large_ms = _measure(owner_client, url)
+    last_id = _rows(large.data)[-1]["id"]
+    _, large_detail_queries, _ = _measure(owner_client, f"{url}{last_id}/")
+
+    record_property(
+        "query_budget",
+        (f"/{prefix}/", small_queries, large_queries, detail_queries, round(large_ms, 1)),
+    )
+
+    # Every seeded row must be listed, or the comparison proves nothing
+    assert len(_rows(large.data)) == 10 * N
+    assert large_queries == small_queries, (
+        f"GET /{prefix}/ ran {small_queries} queries for {N} rows "
+        f"and {large_queries} for {10 * N}"
+    )
+    assert large_detail_queries == detail_queries
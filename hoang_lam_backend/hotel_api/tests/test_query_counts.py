@@ -0,0 +1,146 @@
+"""
+Query-count tests for list endpoints whose serializers expose related counts.
+
+Counts come from queryset annotations (hotel_api/annotations.py), so a list
+costs the same number of queries whatever the number of rows.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+from rest_framework.test import APIClient
+
+from hotel_api.models import (
+    Booking,
+    FinancialCategory,
+    FinancialEntry,
+    Guest,
+    HotelUser,
+    InspectionTemplate,
+    Room,
+    RoomType,
+)
+from hotel_api.serializers import (
+    FinancialCategorySerializer,
+    GuestListSerializer,
+    RoomTypeSerializer,
+)
+
+
+@pytest.fixture
+def manager_client(db):
+    user = User.objects.create_user(username="manager_queries", password="testpass123")
+    HotelUser.objects.create(user=user, role="manager", phone="+84900000001")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def _room_types(start, count):
+    for i in range(start, start + count):
+        room_type = RoomType.objects.create(name=f"Loại {i}", base_rate=Decimal("500000"))
+        for j, room_status in enumerate([Room.Status.AVAILABLE, Room.Status.OCCUPIED]):
+            Room.objects.create(number=f"{i}{j}", room_type=room_type, floor=1, status=room_status)
+
+
+def _categories(start, count):
+    for i in range(start, start + count):
+        category = FinancialCategory.objects.create(
+            name=f"Danh mục {i}", category_type=FinancialCategory.CategoryType.INCOME
+        )
+        FinancialEntry.objects.create(
+            entry_type=FinancialEntry.EntryType.INCOME,
+            category=category,
+            amount=Decimal("100000"),
+            date=date(2026, 3, 1),
+            description="Thu",
+        )
+
+
+def _guests(start, count):
+    room_type = RoomType.objects.create(name=f"Loại khách {start}", base_rate=Decimal("500000"))
+    room = Room.objects.create(number=f"G{start}", room_type=room_type, floor=1)
+    for i in range(start, start + count):
+        guest = Guest.objects.create(full_name=f"Khách {i}", phone=f"09{i:08d}")
+        Booking.objects.create(
+            room=room,
+            guest=guest,
+            check_in_date=date(2026, 1, 1) + timedelta(days=2 * i),
+            check_out_date=date(2026, 1, 2) + timedelta(days=2 * i),
+            status=Booking.Status.CHECKED_OUT,
+            nightly_rate=Decimal("500000"),
+            total_amount=Decimal("500000"),
+        )
+
+
+def _templates(start, count):
+    room_type = RoomType.objects.create(name=f"Loại mẫu {start}", base_rate=Decimal("500000"))
+    for i in range(start, start + count):
+        InspectionTemplate.objects.create(
+            name=f"Mẫu {i}",
+            room_type=room_type,
+            items=[{"category": "bed", "item": "Ga giường", "critical": False}],
+        )
+
+
+def _queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url,make_rows",
+    [
+        ("/api/v1/room-types/", _room_types),
+        ("/api/v1/finance/categories/", _categories),
+        ("/api/v1/guests/", _guests),
+        ("/api/v1/inspection-templates/", _templates),
+    ],
+)
+def test_list_queries_do_not_grow_with_rows(manager_client, url, make_rows):
+    make_rows(0, 2)
+    few = _queries(manager_client, url)
+
+    make_rows(2, 8)
+    assert _queries(manager_client, url) == few
+
+
+@pytest.mark.django_db
+class TestAnnotatedCounts:
+    def test_room_type_counts(self, manager_client):
+        _room_types(0, 1)
+        Room.objects.filter(number="01").update(is_active=False)
+
+        data = manager_client.get("/api/v1/room-types/").data
+        rows = data["results"] if isinstance(data, dict) else data
+        assert (rows[0]["room_count"], rows[0]["available_room_count"]) == (1, 1)
+
+    def test_guest_detail_uses_annotation(self, manager_client):
+        _guests(0, 1)
+        guest = Guest.objects.get()
+
+        response = manager_client.get(f"/api/v1/guests/{guest.pk}/")
+        assert response.data["booking_count"] == 1
+
+    def test_guest_search_includes_booking_count(self, manager_client):
+        _guests(0, 2)
+        response = manager_client.post("/api/v1/guests/search/", {"query": "Khách"})
+        assert [g["booking_count"] for g in response.data] == [1, 1]
+
+    def test_serializers_fall_back_without_annotation(self, db):
+        _room_types(0, 1)
+        _categories(0, 1)
+        _guests(0, 1)
+
+        room_type = RoomTypeSerializer(RoomType.objects.get(name="Loại 0")).data
+        assert (room_type["room_count"], room_type["available_room_count"]) == (2, 1)
+        assert FinancialCategorySerializer(FinancialCategory.objects.get()).data["entry_count"] == 1
+        assert GuestListSerializer(Guest.objects.get()).data["booking_count"] == 1
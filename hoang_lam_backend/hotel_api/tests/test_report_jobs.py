@@ -0,0 +1,209 @@
+"""
+Tests for background report jobs and parameter-hash result reuse.
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from hotel_api import report_jobs
+from hotel_api.models import HotelUser, Notification, ReportJob
+
+URL = "/api/v1/report-jobs/"
+PARAMS = {"start_date": "2026-03-01", "end_date": "2026-03-03"}
+
+
+@pytest.fixture
+def create_user(db):
+    def _create_user(username, role="manager"):
+        user = User.objects.create_user(username=username, password="testpass123")
+        HotelUser.objects.create(user=user, role=role, phone=f"+84{username[-6:]}")
+        return user
+
+    return _create_user
+
+
+@pytest.fixture
+def manager_user(create_user):
+    return create_user("manager_report")
+
+
+@pytest.fixture
+def manager_client(manager_user):
+    client = APIClient()
+    client.force_authenticate(user=manager_user)
+    return client
+
+
+@pytest.fixture
+def submit(django_capture_on_commit_callbacks):
+    """POST a job, running it inline as the broker fallback would."""
+
+    def _submit(client, report_type="occupancy", params=PARAMS):
+        with patch("hotel_api.tasks.run_report_job.delay", side_effect=OSError("no broker")):
+            with django_capture_on_commit_callbacks(execute=True):
+                return client.post(
+                    URL, {"report_type": report_type, "params": params}, format="json"
+                )
+
+    return _submit
+
+
+@pytest.mark.django_db
+class TestReportJobs:
+    def test_submit_queues_job(self, manager_client):
+        with patch("hotel_api.tasks.run_report_job.delay") as delay:
+            response = manager_client.post(
+                URL, {"report_type": "occupancy", "params": PARAMS}, format="json"
+            )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response["X-Cache"] == "MISS"
+        assert response.data["status"] == ReportJob.Status.PENDING
+        assert ReportJob.objects.get().params == PARAMS
+        delay.assert_not_called()  # Queued on commit
+
+    def test_job_result_matches_report_endpoint(self, manager_client, submit):
+        data = submit(manager_client).data
+
+        polled = manager_client.get(f"{URL}{data['id']}/").data
+        assert polled["status"] == ReportJob.Status.DONE
+        direct = manager_client.get("/api/v1/reports/occupancy/", PARAMS)
+        assert polled["result"] == direct.json()
+
+    def test_identical_request_reuses_result(self, manager_client, create_user, submit):
+        first = submit(manager_client).data
+
+        # Reports are hotel-wide: another manager gets the same stored result
+        other = APIClient()
+        other.force_authenticate(user=create_user("owner_report", "owner"))
+        response = submit(other, params={**PARAMS, "group_by": "day"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["X-Cache"] == "HIT"
+        assert response.data["id"] == first["id"]
+        assert ReportJob.objects.count() == 1
+
+    def test_stale_or_different_params_recompute(self, manager_client, submit):
+        first = submit(manager_client).data
+        response = submit(manager_client, params={**PARAMS, "end_date": "2026-03-04"})
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response["X-Cache"] == "MISS"
+
+        ReportJob.objects.filter(pk=first["id"]).update(
+            completed_at=timezone.now() - timedelta(hours=1)
+        )
+        response = submit(manager_client)
+        assert response["X-Cache"] == "MISS"
+        assert response.data["id"] != first["id"]
+        assert ReportJob.objects.count() == 3
+
+    def test_in_flight_job_is_shared(self, manager_client):
+        with patch("hotel_api.tasks.run_report_job.delay"):
+            first = manager_client.post(
+                URL, {"report_type": "kpi", "params": PARAMS}, format="json"
+            )
+            second = manager_client.post(
+                URL, {"report_type": "kpi", "params": PARAMS}, format="json"
+            )
+
+        assert second.status_code == status.HTTP_202_ACCEPTED
+        assert second.data["id"] == first.data["id"]
+
+    def test_invalid_params(self, manager_client):
+        response = manager_client.post(
+            URL, {"report_type": "occupancy", "params": {"start_date": "2026-03-01"}}, format="json"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "end_date" in response.data
+        assert not ReportJob.objects.exists()
+
+    def test_requester_is_notified(self, manager_client, manager_user, submit):
+        job_id = submit(manager_client, report_type="revenue").data["id"]
+
+        notification = Notification.objects.get(recipient=manager_user)
+        assert notification.data["action"] == "report_ready"
+        assert notification.data["report_job_id"] == str(job_id)
+
+    def test_every_requester_of_a_shared_job_is_notified(
+        self, manager_client, manager_user, create_user, django_capture_on_commit_callbacks
+    ):
+        owner = create_user("owner_shared", "owner")
+        other = APIClient()
+        other.force_authenticate(user=owner)
+        with patch("hotel_api.tasks.run_report_job.delay"):
+            job_id = manager_client.post(
+                URL, {"report_type": "kpi", "params": PARAMS}, format="json"
+            ).data["id"]
+            assert (
+                other.post(URL, {"report_type": "kpi", "params": PARAMS}, format="json").data["id"]
+                == job_id
+            )
+        assert list(ReportJob.objects.get(pk=job_id).subscribers.all()) == [owner]
+
+        report_jobs.run(job_id)
+
+        for user in (manager_user, owner):
+            assert Notification.objects.get(recipient=user).data["report_job_id"] == str(job_id)
+
+    def test_reusing_finished_job_sends_no_notification(self, manager_client, create_user, submit):
+        submit(manager_client)
+        owner = create_user("owner_reuse", "owner")
+        other = APIClient()
+        other.force_authenticate(user=owner)
+
+        assert submit(other).status_code == status.HTTP_200_OK
+        assert not Notification.objects.filter(recipient=owner).exists()
+
+    def test_job_finishing_while_joined_notifies_once(
+        self, manager_client, manager_user, create_user
+    ):
+        with patch("hotel_api.tasks.run_report_job.delay"):
+            job_id = manager_client.post(
+                URL, {"report_type": "kpi", "params": PARAMS}, format="json"
+            ).data["id"]
+        owner = create_user("owner_race", "owner")
+        atomic = report_jobs.transaction.atomic
+
+        def finish_first(*args, **kwargs):
+            # The job completes after submit() found it pending
+            report_jobs.transaction.atomic = atomic
+            report_jobs.run(job_id)
+            return atomic(*args, **kwargs)
+
+        with patch.object(report_jobs.transaction, "atomic", finish_first):
+            job, created = report_jobs.submit(owner, "kpi", PARAMS)
+
+        assert job.status == ReportJob.Status.DONE and not created
+        assert not job.subscribers.exists()
+        assert Notification.objects.filter(recipient=manager_user).count() == 1
+        assert not Notification.objects.filter(recipient=owner).exists()
+
+    def test_failed_job_records_error(self, manager_user):
+        job = ReportJob.objects.create(
+            report_type="occupancy", params={}, params_hash="x", created_by=manager_user
+        )
+        report_jobs.run(job.pk)
+
+        job.refresh_from_db()
+        assert job.status == ReportJob.Status.FAILED
+        assert "start_date" in job.error
+
+    def test_purge(self, manager_user):
+        job = ReportJob.objects.create(
+            report_type="kpi", params={}, params_hash="x", created_by=manager_user
+        )
+        ReportJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - timedelta(days=8))
+        assert report_jobs.purge(days=7) == 1
+
+    def test_staff_denied(self, create_user):
+        client = APIClient()
+        client.force_authenticate(user=create_user("staff_report", "staff"))
+        response = client.post(URL, {"report_type": "kpi", "params": PARAMS}, format="json")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
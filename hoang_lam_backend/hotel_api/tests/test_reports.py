@@ -423,6 +423,53 @@ class TestRevenueReport:
             expected_margin = round((net / total) * 100, 2)
             assert data["summary"]["profit_margin"] == expected_margin
 
+    @pytest.mark.parametrize("group_by", ["week", "month"])
+    def test_revenue_report_grouped_matches_daily(
+        self, authenticated_client, financial_entries, minibar_sales, group_by
+    ):
+        """Week/month buckets must add up to the same totals as the daily report."""
+        today = timezone.now().date()
+        url = reverse("report_revenue")
+        params = {
+            "start_date": (today - timedelta(days=40)).isoformat(),
+            "end_date": (today + timedelta(days=10)).isoformat(),
+        }
+        daily = authenticated_client.get(url, {**params, "group_by": "day"}).json()
+        grouped = authenticated_client.get(url, {**params, "group_by": group_by}).json()
+
+        assert len(daily["data"]) == 51
+        assert grouped["summary"] == daily["summary"]
+        for key in ("room_revenue", "minibar_revenue", "total_expenses"):
+            assert sum(row[key] for row in grouped["data"]) == daily["summary"][key]
+        assert all("period" in row for row in grouped["data"])
+
+    def test_revenue_report_query_count_constant(
+        self, authenticated_client, financial_entries, minibar_sales
+    ):
+        """Query count must not grow with the length of the date range."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        today = timezone.now().date()
+        url = reverse("report_revenue")
+
+        counts = []
+        for days in (7, 365):
+            with CaptureQueriesContext(connection) as ctx:
+                response = authenticated_client.get(
+                    url,
+                    {
+                        "start_date": (today - timedelta(days=days)).isoformat(),
+                        "end_date": today.isoformat(),
+                    },
+                )
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.json()["data"]) == days + 1
+            counts.append(len(ctx))
+
+        assert counts[0] == counts[1]
+        assert counts[1] <= 4
+
 
 # ============================================================================
 # KPI REPORT TESTS
@@ -616,6 +663,25 @@ class TestChannelPerformance:
         sources = [item["source"] for item in data["data"]]
         assert "walk_in" in sources or "booking_com" in sources
 
+    def test_channel_totals_in_constant_queries(
+        self, authenticated_client, bookings, django_assert_max_num_queries
+    ):
+        """Nights are summed by the database, not per source in Python."""
+        today = timezone.now().date()
+        params = {
+            "start_date": (today - timedelta(days=10)).isoformat(),
+            "end_date": today.isoformat(),
+        }
+        # Session/permission lookups plus a single aggregate query
+        with django_assert_max_num_queries(4):
+            response = authenticated_client.get(reverse("report_channels"), params)
+
+        walk_in = next(item for item in response.json()["data"] if item["source"] == "walk_in")
+        assert walk_in["booking_count"] == 2
+        assert walk_in["total_nights"] == 4
+        assert walk_in["average_rate"] == 500000
+        assert response.json()["summary"]["total_nights"] == 10
+
 
 # ============================================================================
 # GUEST DEMOGRAPHICS TESTS
@@ -672,6 +738,76 @@ class TestGuestDemographics:
         # Should have multiple nationalities from our test data
         assert len(nationalities) > 1
 
+    def _get(self, client, group_by):
+        today = timezone.now().date()
+        return client.get(
+            reverse("report_demographics"),
+            {
+                "start_date": (today - timedelta(days=10)).isoformat(),
+                "end_date": today.isoformat(),
+                "group_by": group_by,
+            },
+        ).json()
+
+    def test_demographics_by_source(self, authenticated_client, bookings):
+        data = self._get(authenticated_client, "source")
+
+        walk_in = next(item for item in data["data"] if item["source"] == "walk_in")
+        assert walk_in["label"] == "Khách vãng lai"
+        assert walk_in["guest_count"] == 2
+        assert walk_in["booking_count"] == 2
+        assert walk_in["total_nights"] == 4
+        assert walk_in["average_stay"] == 2
+        assert len(data["data"]) == 4
+
+    def test_demographics_by_room_type(self, authenticated_client, bookings, room_type):
+        data = self._get(authenticated_client, "room_type")
+
+        assert data["data"] == [
+            {
+                "room_type_id": room_type.id,
+                "label": "Phòng Đôi",
+                "guest_count": 5,
+                "booking_count": 5,
+                "total_nights": 10,
+                "total_revenue": 5000000,
+                "percentage": 100,
+                "average_stay": 2.0,
+            }
+        ]
+
+    def test_repeat_guest_counted_once(self, authenticated_client, bookings, guests, rooms, user):
+        today = timezone.now().date()
+        Booking.objects.create(
+            room=rooms[5],
+            guest=guests[0],
+            check_in_date=today - timedelta(days=9),
+            check_out_date=today - timedelta(days=8),
+            status="checked_out",
+            nightly_rate=500000,
+            total_amount=500000,
+            created_by=user,
+        )
+        data = self._get(authenticated_client, "nationality")
+
+        vietnam = next(item for item in data["data"] if item["nationality"] == "Vietnam")
+        assert vietnam["guest_count"] == 1
+        assert vietnam["booking_count"] == 2
+        assert vietnam["total_nights"] == 3
+        assert data["summary"] == {
+            "total_guests": 5,
+            "total_bookings": 6,
+            "total_revenue": 5500000,
+        }
+
+    @pytest.mark.parametrize("group_by", ["nationality", "source", "room_type"])
+    def test_demographics_in_constant_queries(
+        self, authenticated_client, bookings, group_by, django_assert_max_num_queries
+    ):
+        # Session/permission lookups plus the summary and group aggregates
+        with django_assert_max_num_queries(5):
+            self._get(authenticated_client, group_by)
+
 
 # ============================================================================
 # COMPARATIVE REPORT TESTS
@@ -729,6 +865,33 @@ class TestComparativeReport:
         assert "occupancy_rate" in metric_keys
         assert "revpar" in metric_keys
 
+    def test_room_revenue_is_nightly_rate_inside_period(self, authenticated_client, rooms, guests):
+        """ADR and RevPAR use nightly_rate x nights in the period, not total_amount."""
+        check_in = timezone.now().date() - timedelta(days=30)
+        Booking.objects.create(
+            room=rooms[0],
+            guest=guests[0],
+            check_in_date=check_in,
+            check_out_date=check_in + timedelta(days=3),
+            status="checked_out",
+            nightly_rate=400000,
+            total_amount=1500000,  # Includes a late check-out fee
+            late_check_out_fee=300000,
+        )
+
+        response = authenticated_client.get(
+            reverse("report_comparative"),
+            {
+                "current_start": (check_in + timedelta(days=1)).isoformat(),
+                "current_end": (check_in + timedelta(days=2)).isoformat(),
+            },
+        )
+
+        metrics = response.json()["current_period"]["metrics"]
+        assert metrics["occupancy_rate"] == round(2 / 14 * 100, 2)
+        assert metrics["adr"] == 400000
+        assert metrics["revpar"] == round(800000 / 14)
+
 
 # ============================================================================
 # EXPORT REPORT TESTS
@@ -1,10 +1,16 @@
 """Tests for data retention policy."""
 
+import itertools
 from datetime import date, timedelta
 from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from hotel_api.models import (
@@ -19,12 +25,13 @@ from hotel_api.models import (
     MaintenanceRequest,
     NightAudit,
     Notification,
+    RetentionProgress,
     Room,
     RoomInspection,
     RoomType,
     SensitiveDataAccessLog,
 )
-from hotel_api.retention import apply_retention_policy
+from hotel_api.retention import apply_retention_policy, run_retention
 
 User = get_user_model()
 
@@ -523,3 +530,119 @@ class TestLostAndFoundRetention(RetentionTestBase):
         results = apply_retention_policy()
         self.assertEqual(results["lost_and_found"], 0)
         self.assertTrue(LostAndFound.objects.filter(pk=item.pk).exists())
+
+
+class TestBatchedRetention(RetentionTestBase):
+    """Tests for batched deletes, the time budget and resuming."""
+
+    def _old_notifications(self, count):
+        rows = Notification.objects.bulk_create(
+            Notification(recipient=self.user, title=f"Old {i}", body="Old body")
+            for i in range(count)
+        )
+        Notification.objects.filter(pk__in=[row.pk for row in rows]).update(
+            created_at=timezone.now() - timedelta(days=91)
+        )
+        return rows
+
+    def test_deletes_in_batches(self):
+        """Expired rows are deleted a batch at a time and reported with a rate."""
+        self._old_notifications(5)
+
+        with CaptureQueriesContext(connection) as queries:
+            report = run_retention(model_filter="notification", batch_size=2, sleep=0)
+
+        deletes = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 3)
+        self.assertTrue(all("hotel_api_notification" in sql and " IN (" in sql for sql in deletes))
+        self.assertEqual(report["notification"]["deleted"], 5)
+        self.assertTrue(report["notification"]["complete"])
+        self.assertGreater(report["notification"]["rows_per_second"], 0)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_cascading_models_use_collector(self):
+        """Models with cascades are deleted through Django so dependants go too."""
+        from hotel_api.models import Payment
+
+        bookings = []
+        for days_ago in (1100, 1101, 1102):
+            checkout = date.today() - timedelta(days=days_ago)
+            booking = Booking.objects.create(
+                room=self.room,
+                guest=self.guest,
+                check_in_date=checkout - timedelta(days=1),
+                check_out_date=checkout,
+                status=Booking.Status.CHECKED_OUT,
+                nightly_rate=500000,
+                total_amount=500000,
+            )
+            Payment.objects.create(booking=booking, amount=500000, payment_date=checkout)
+            bookings.append(booking)
+
+        report = run_retention(model_filter="booking", batch_size=2, sleep=0)
+
+        self.assertEqual(report["booking"]["deleted"], 3)
+        self.assertFalse(Payment.objects.filter(booking__in=bookings).exists())
+
+    def test_time_budget_stops_and_next_run_resumes(self):
+        """A run cut short by the time budget keeps its progress for the next run."""
+        rows = self._old_notifications(5)
+
+        # Every clock reading is one second later: room for a single batch
+        with patch("hotel_api.retention.time.monotonic", side_effect=itertools.count()):
+            report = run_retention(
+                model_filter="notification", batch_size=2, sleep=0, time_budget=3
+            )
+
+        self.assertEqual(report["notification"]["deleted"], 2)
+        self.assertFalse(report["notification"]["complete"])
+        progress = RetentionProgress.objects.get(model_name="notification")
+        self.assertEqual(progress.last_pk, rows[1].pk)
+        self.assertIsNone(progress.completed_at)
+
+        report = run_retention(model_filter="notification", batch_size=2, sleep=0)
+
+        self.assertEqual(report["notification"]["deleted"], 3)
+        resumed = RetentionProgress.objects.get(model_name="notification")
+        self.assertEqual(resumed.cutoff, progress.cutoff)
+        self.assertEqual(resumed.deleted, 5)
+        self.assertIsNotNone(resumed.completed_at)
+
+    def test_unfinished_models_run_first(self):
+        """Models a previous run left unfinished are processed before the others."""
+        RetentionProgress.objects.create(
+            model_name="sensitive_data_access_log", cutoff=timezone.now() - timedelta(days=2555)
+        )
+
+        report = run_retention(sleep=0)
+
+        self.assertEqual(next(iter(report)), "sensitive_data_access_log")
+
+    def test_budget_exhausted_before_model(self):
+        """Models not reached within the budget are reported unfinished, not deleted."""
+        self._old_notifications(1)
+
+        report = run_retention(model_filter="notification", time_budget=0)
+
+        self.assertEqual(report["notification"]["deleted"], 0)
+        self.assertFalse(report["notification"]["complete"])
+        self.assertTrue(Notification.objects.exists())
+
+    def test_command_reports_rate(self):
+        """The management command prints rows per second for each model."""
+        self._old_notifications(3)
+        out = StringIO()
+
+        call_command(
+            "apply_retention_policy",
+            "--model",
+            "notification",
+            "--batch-size",
+            "2",
+            "--sleep",
+            "0",
+            stdout=out,
+        )
+
+        self.assertIn("Deleted 3 notification record(s)", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
@@ -0,0 +1,179 @@
+"""
+Tests for the room-night inventory ledger.
+"""
+
+from datetime import date, timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from hotel_api.inventory import RoomNightConflict
+from hotel_api.models import Booking, Guest, HotelUser, Room, RoomNight, RoomType
+
+User = get_user_model()
+
+
+class RoomNightLedgerTestCase(TestCase):
+    """Ledger rows follow booking create/status/date/room changes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.staff_user = User.objects.create_user(username="staff_ledger", password="testpass123")
+        HotelUser.objects.create(user=self.staff_user, role=HotelUser.Role.STAFF)
+        self.client.force_authenticate(user=self.staff_user)
+
+        self.room_type = RoomType.objects.create(name="Ledger", base_rate=500000, max_guests=2)
+        self.room = Room.objects.create(room_type=self.room_type, number="501", floor=5)
+        self.other_room = Room.objects.create(room_type=self.room_type, number="502", floor=5)
+        self.guest = Guest.objects.create(full_name="Phạm Văn D", phone="0934567890")
+
+        self.today = date.today()
+
+    def _booking(self, room=None, start=0, nights=3, status=Booking.Status.CONFIRMED):
+        check_in = self.today + timedelta(days=start)
+        return Booking.objects.create(
+            guest=self.guest,
+            room=room or self.room,
+            check_in_date=check_in,
+            check_out_date=check_in + timedelta(days=nights),
+            nightly_rate=500000,
+            total_amount=500000 * nights,
+            status=status,
+        )
+
+    def _nights(self, booking):
+        return list(
+            RoomNight.objects.filter(booking=booking)
+            .order_by("date")
+            .values_list("room_id", "date")
+        )
+
+    def test_confirmed_booking_holds_each_night(self):
+        booking = self._booking(nights=3)
+        self.assertEqual(
+            self._nights(booking),
+            [(self.room.pk, self.today + timedelta(days=i)) for i in range(3)],
+        )
+
+    def test_pending_booking_holds_nothing_until_confirmed(self):
+        booking = self._booking(status=Booking.Status.PENDING)
+        self.assertEqual(self._nights(booking), [])
+
+        booking.status = Booking.Status.CONFIRMED
+        booking.save()
+        self.assertEqual(len(self._nights(booking)), 3)
+
+    def test_cancel_releases_nights(self):
+        booking = self._booking()
+        booking.status = Booking.Status.CANCELLED
+        booking.save()
+        self.assertEqual(self._nights(booking), [])
+
+    def test_overlapping_booking_rejected_by_constraint(self):
+        self._booking(start=0, nights=3)
+        with self.assertRaises(RoomNightConflict):
+            self._booking(start=2, nights=2)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_back_to_back_bookings_allowed(self):
+        self._booking(start=0, nights=3)
+        second = self._booking(start=3, nights=2)
+        self.assertEqual(len(self._nights(second)), 2)
+
+    def test_unrelated_update_fields_skip_sync(self):
+        booking = self._booking()
+        booking.notes = "note"
+        with self.assertNumQueries(1):
+            booking.save(update_fields=["notes"])
+
+    def test_create_overlapping_via_api_returns_400(self):
+        self._booking(start=1, nights=3)
+        response = self.client.post(
+            "/api/v1/bookings/",
+            {
+                "guest": self.guest.pk,
+                "room": self.room.pk,
+                "check_in_date": str(self.today + timedelta(days=2)),
+                "check_out_date": str(self.today + timedelta(days=5)),
+                "nightly_rate": 500000,
+                "total_amount": 1500000,
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("already booked", str(response.data["room"]))
+
+    def test_check_availability_uses_ledger(self):
+        self._booking(start=1, nights=2)
+        response = self.client.post(
+            "/api/v1/rooms/check-availability/",
+            {
+                "check_in": str(self.today + timedelta(days=2)),
+                "check_out": str(self.today + timedelta(days=4)),
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        room_ids = {room["id"] for room in response.data["available_rooms"]}
+        self.assertEqual(room_ids, {self.other_room.pk})
+
+    @patch("hotel_api.services.PushNotificationService.notify_staff")
+    def test_extend_stay_adds_nights(self, mock_notify):
+        booking = self._booking(start=-1, nights=3, status=Booking.Status.CHECKED_IN)
+        new_date = booking.check_out_date + timedelta(days=2)
+        response = self.client.post(
+            f"/api/v1/bookings/{booking.pk}/extend-stay/",
+            {"new_check_out_date": new_date.isoformat()},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self._nights(booking)), 5)
+
+    @patch("hotel_api.services.PushNotificationService.notify_staff")
+    def test_swap_room_moves_nights(self, mock_notify):
+        booking = self._booking(start=-1, nights=3, status=Booking.Status.CHECKED_IN)
+        response = self.client.post(
+            f"/api/v1/bookings/{booking.pk}/swap-room/", {"new_room": self.other_room.pk}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({room_id for room_id, _ in self._nights(booking)}, {self.other_room.pk})
+        self.assertFalse(RoomNight.objects.filter(room=self.room).exists())
+
+    @patch("hotel_api.services.PushNotificationService.notify_staff")
+    def test_swap_room_into_booked_room_rejected(self, mock_notify):
+        booking = self._booking(start=-1, nights=3, status=Booking.Status.CHECKED_IN)
+        self._booking(room=self.other_room, start=1, nights=2)
+        response = self.client.post(
+            f"/api/v1/bookings/{booking.pk}/swap-room/", {"new_room": self.other_room.pk}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual({room_id for room_id, _ in self._nights(booking)}, {self.room.pk})
+
+    @patch("hotel_api.services.PushNotificationService.notify_staff")
+    def test_check_out_releases_nights(self, mock_notify):
+        booking = self._booking(start=-1, nights=3, status=Booking.Status.CHECKED_IN)
+        response = self.client.post(f"/api/v1/bookings/{booking.pk}/check-out/", {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._nights(booking), [])
+
+    @patch("hotel_api.services.PushNotificationService.notify_staff")
+    def test_check_in_pending_over_held_nights_rejected(self, mock_notify):
+        self._booking(start=0, nights=2)
+        pending = self._booking(start=1, nights=2, status=Booking.Status.PENDING)
+        response = self.client.post(f"/api/v1/bookings/{pending.pk}/check-in/", {})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, Booking.Status.PENDING)
+
+    def test_rebuild_command_restores_ledger(self):
+        booking = self._booking(nights=4)
+        RoomNight.objects.all().delete()
+
+        out = StringIO()
+        call_command("rebuild_room_nights", stdout=out)
+
+        self.assertEqual(len(self._nights(booking)), 4)
+        self.assertIn("4 night(s) written", out.getvalue())
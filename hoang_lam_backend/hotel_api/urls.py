@@ -12,11 +12,13 @@ from .views import (  # Phase 4: Reports; Phase 5: Notifications; Phase 5.3: Gue
     BookingViewSet,
     ChannelPerformanceView,
     ComparativeReportView,
+    DashboardCacheStatsView,
     DashboardView,
     DateRateOverrideViewSet,
     DeviceTokenView,
     ExchangeRateViewSet,
     ExpenseReportView,
+    ExportJobViewSet,
     ExportReportView,
     FinancialCategoryViewSet,
     FinancialEntryViewSet,
@@ -43,10 +45,12 @@ from .views import (  # Phase 4: Reports; Phase 5: Notifications; Phase 5.3: Gue
     PaymentViewSet,
     RatePlanViewSet,
     ReceiptViewSet,
+    ReportJobViewSet,
     RevenueReportView,
     RoomInspectionViewSet,
     RoomTypeViewSet,
     RoomViewSet,
+    SlowRequestsView,
     StaffListView,
     UserProfileView,
 )
@@ -84,6 +88,10 @@ router.register(r"message-templates", MessageTemplateViewSet, basename="messaget
 router.register(r"guest-messages", GuestMessageViewSet, basename="guestmessage")
 # Audit Logs
 router.register(r"audit-logs", AuditLogViewSet, basename="auditlog")
+# Background file exports
+router.register(r"export-jobs", ExportJobViewSet, basename="exportjob")
+# Background report jobs
+router.register(r"report-jobs", ReportJobViewSet, basename="reportjob")
 
 urlpatterns = [
     # Health check (unauthenticated, for connectivity probing)
@@ -102,6 +110,12 @@ urlpatterns = [
     ),
     # Dashboard
     path("dashboard/", DashboardView.as_view(), name="dashboard"),
+    path(
+        "dashboard/cache-stats/",
+        DashboardCacheStatsView.as_view(),
+        name="dashboard_cache_stats",
+    ),
+    path("performance/slow-requests/", SlowRequestsView.as_view(), name="slow_requests"),
     # Reports (Phase 4)
     path("reports/occupancy/", OccupancyReportView.as_view(), name="report_occupancy"),
     path("reports/revenue/", RevenueReportView.as_view(), name="report_revenue"),
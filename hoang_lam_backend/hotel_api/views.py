@@ -23,11 +23,13 @@ from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .annotations import with_booking_count, with_entry_count, with_room_counts
 from .models import (
     AuditLog,
     Booking,
     DateRateOverride,
     DeviceToken,
+    ExportJob,
     FinancialCategory,
     FinancialEntry,
     FolioItem,
@@ -45,10 +47,12 @@ from .models import (
     Notification,
     Payment,
     RatePlan,
+    ReportJob,
     Room,
     RoomInspection,
     RoomType,
 )
+from .pagination import KeysetPagination
 from .permissions import IsManager, IsOwnerOrManager, IsStaff, IsStaffOrManager
 from .serializers import (  # Phase 3: Room Inspection serializers; Phase 4: Report serializers; RatePlan and DateRateOverride serializers; Phase 5: Notification serializers; Phase 5.3: Guest Messaging serializers
     AdminResetPasswordSerializer,
@@ -70,6 +74,7 @@ from .serializers import (  # Phase 3: Room Inspection serializers; Phase 4: Rep
     DeviceTokenSerializer,
     ExchangeRateSerializer,
     ExpenseReportRequestSerializer,
+    ExportJobSerializer,
     ExportReportRequestSerializer,
     ExtendStaySerializer,
     FinancialCategoryListSerializer,
@@ -119,6 +124,7 @@ from .serializers import (  # Phase 3: Room Inspection serializers; Phase 4: Rep
     MinibarSaleUpdateSerializer,
     NightAuditCreateSerializer,
     NightAuditListSerializer,
+    NightAuditRebuildSerializer,
     NightAuditSerializer,
     NotificationListSerializer,
     NotificationPreferencesSerializer,
@@ -136,6 +142,8 @@ from .serializers import (  # Phase 3: Room Inspection serializers; Phase 4: Rep
     RatePlanUpdateSerializer,
     ReceiptDataSerializer,
     ReceiptGenerateSerializer,
+    ReportJobCreateSerializer,
+    ReportJobSerializer,
     RevenueReportRequestSerializer,
     RoomAvailabilitySerializer,
     RoomInspectionCompleteSerializer,
@@ -157,6 +165,46 @@ from .serializers import (  # Phase 3: Room Inspection serializers; Phase 4: Rep
 
 User = get_user_model()
 
+EXPORT_FORMAT_PARAMETER = OpenApiParameter(
+    name="export_format",
+    type=str,
+    enum=["csv", "xlsx"],
+    description="File format. Defaults to csv.",
+    required=False,
+)
+EXPORT_MODE_PARAMETER = OpenApiParameter(
+    name="mode",
+    type=str,
+    enum=["async"],
+    description="'async' queues a background export job for large ranges and returns 202.",
+    required=False,
+)
+
+
+def export_or_queue(request, export_type, file_format=None):
+    """
+    Stream a file export (see hotel_api/exports.py), or with mode=async queue
+    an ExportJob and return it with 202.
+    """
+    from hotel_api import exports
+
+    params = request.query_params
+    if file_format is None:
+        file_format = params.get("export_format", ExportJob.Format.CSV).lower()
+        if file_format not in ExportJob.Format.values:
+            return Response(
+                {"detail": "export_format không hợp lệ. Sử dụng: csv, xlsx."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    if params.get("mode") == "async":
+        job = exports.start_export_job(request.user, export_type, params, file_format)
+        return Response(
+            ExportJobSerializer(job, context={"request": request}).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
+    return exports.export_response(export_type, params, file_format)
+
 
 @extend_schema_view(
     post=extend_schema(
@@ -429,7 +477,8 @@ class RoomTypeViewSet(viewsets.ModelViewSet):
             is_active_bool = is_active.lower() in ["true", "1", "yes"]
             queryset = queryset.filter(is_active=is_active_bool)
 
-        return queryset.prefetch_related("rooms")
+        # Aggregate annotations drop Meta.ordering, so order explicitly
+        return with_room_counts(queryset).order_by("name")
 
     def destroy(self, request, *args, **kwargs):
         """Delete room type, but prevent if rooms exist."""
@@ -620,19 +669,15 @@ class RoomViewSet(viewsets.ModelViewSet):
         check_out = serializer.validated_data["check_out"]
         room_type = serializer.validated_data.get("room_type")
 
-        # Exclude rooms with overlapping confirmed/checked-in bookings
-        booked_room_ids = Booking.objects.filter(
-            status__in=[Booking.Status.CONFIRMED, Booking.Status.CHECKED_IN],
-            check_in_date__lt=check_out,
-            check_out_date__gt=check_in,
-        ).values_list("room_id", flat=True)
+        # Exclude rooms holding any night of the range in the room-night ledger
+        from .inventory import booked_room_ids
 
         available_rooms = (
             Room.objects.filter(
                 is_active=True,
                 status=Room.Status.AVAILABLE,
             )
-            .exclude(id__in=booked_room_ids)
+            .exclude(id__in=booked_room_ids(check_in, check_out))
             .select_related("room_type")
         )
 
@@ -728,9 +773,7 @@ class GuestViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Get queryset with optional filtering and optimized annotations."""
-        from django.db.models import Count
-
-        queryset = Guest.objects.annotate(booking_count=Count("bookings")).all()
+        queryset = with_booking_count(Guest.objects.all())
 
         # Filter by VIP status
         is_vip = self.request.query_params.get("is_vip")
@@ -742,17 +785,12 @@ class GuestViewSet(viewsets.ModelViewSet):
         if nationality:
             queryset = queryset.filter(nationality=nationality)
 
-        # Search by name, phone, or ID number (exact match for encrypted ID)
-        search = self.request.query_params.get("search")
+        # Search by accent-folded name, phone prefix/suffix, or exact ID number
+        search = self.request.query_params.get("search", "").strip()
         if search:
-            from hotel_api.encryption import hash_value
+            from hotel_api.guest_search import search_q
 
-            id_hash = hash_value(search)
-            queryset = queryset.filter(
-                Q(full_name__icontains=search)
-                | Q(phone__icontains=search)
-                | Q(id_number_hash=id_hash)
-            )
+            queryset = queryset.filter(search_q(search)[0])
 
         return queryset.order_by(*self.ordering)
 
@@ -821,7 +859,10 @@ class GuestViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         summary="Search guests",
-        description="Search for guests by name, phone, or ID number.",
+        description=(
+            "Search for guests by name (diacritics optional), phone number or its last "
+            "digits, or exact ID number. Best matches first, at most GUEST_SEARCH_LIMIT."
+        ),
         request=GuestSearchSerializer,
         responses={200: GuestListSerializer(many=True)},
         tags=["Guest Management"],
@@ -834,18 +875,19 @@ class GuestViewSet(viewsets.ModelViewSet):
 
         query = serializer.validated_data["query"]
         from hotel_api.audit import log_sensitive_access
-        from hotel_api.encryption import hash_value
+        from hotel_api.guest_search import search_guests
         from hotel_api.models import SensitiveDataAccessLog
 
-        id_hash = hash_value(query)
-        guests = Guest.objects.filter(
-            Q(full_name__icontains=query) | Q(phone__icontains=query) | Q(id_number_hash=id_hash)
+        guests = search_guests(
+            query,
+            search_by=serializer.validated_data["search_by"],
+            queryset=with_booking_count(Guest.objects.all()),
         )
 
         log_sensitive_access(
             request,
             SensitiveDataAccessLog.Action.SEARCH_GUEST,
-            details={"query": query, "results_count": guests.count()},
+            details={"query": query, "results_count": len(guests)},
         )
 
         return Response(
@@ -955,14 +997,15 @@ class GuestViewSet(viewsets.ModelViewSet):
         - ĐD10 (Nghị định 144/2021): For Vietnamese guests → reported to Công an phường
         - NA17 (Thông tư 04/2015): For foreign guests → reported to Phòng Quản lý XNC
         """
-        import csv
-        import io
+        import tempfile
         from datetime import date
 
-        from django.http import HttpResponse
+        from django.http import FileResponse, StreamingHttpResponse
         from django.utils import timezone as tz
 
+        from hotel_api import declaration
         from hotel_api.audit import log_sensitive_access
+        from hotel_api.exports import xlsx_available
         from hotel_api.models import SensitiveDataAccessLog
 
         log_sensitive_access(
@@ -971,11 +1014,6 @@ class GuestViewSet(viewsets.ModelViewSet):
             details={"query_params": dict(request.query_params)},
         )
 
-        # ── Hotel establishment info (used in form headers) ──
-        HOTEL_NAME = "Hoàng Lâm Heritage Suites"
-        HOTEL_ADDRESS = "123 Đường ABC, Phường XYZ, TP.HCM"
-        HOTEL_PHONE = "028 1234 5678"
-
         # ── Parse query parameters ──
         date_from = request.query_params.get("date_from")
         date_to = request.query_params.get("date_to")
@@ -1004,316 +1042,43 @@ class GuestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # ── Fetch bookings ──
-        bookings = Booking.objects.filter(
-            check_in_date__gte=date_from,
-            check_in_date__lte=date_to,
-            status__in=[Booking.Status.CHECKED_IN, Booking.Status.CHECKED_OUT],
-        ).select_related("guest", "room")
-
-        # ── Separate Vietnamese and foreign guests ──
-        vn_aliases = {"việt nam", "vietnam", "vn", "viet nam"}
-        vietnamese_bookings = []
-        foreign_bookings = []
-        for booking in bookings:
-            nationality = (booking.guest.nationality or "").strip().lower()
-            if nationality in vn_aliases or not nationality:
-                vietnamese_bookings.append(booking)
-            else:
-                foreign_bookings.append(booking)
-
-        # ── Helper: format date DD/MM/YYYY ──
-        def fmt_date(d):
-            return d.strftime("%d/%m/%Y") if d else ""
-
-        # ── Helper: gender display ──
-        def fmt_gender(g):
-            return "Nam" if g == "male" else ("Nữ" if g == "female" else "")
-
-        # ── Helper: nationality display (Vietnamese name for official forms) ──
-        nationality_map = {
-            "vietnam": "Việt Nam",
-            "united states": "Mỹ",
-            "usa": "Mỹ",
-            "china": "Trung Quốc",
-            "south korea": "Hàn Quốc",
-            "japan": "Nhật Bản",
-            "france": "Pháp",
-            "uk": "Anh",
-            "australia": "Úc",
-            "germany": "Đức",
-            "russia": "Nga",
-            "thailand": "Thái Lan",
-        }
-
-        def fmt_nationality(nat):
-            return nationality_map.get((nat or "").strip().lower(), nat or "Việt Nam")
-
-        # ═══════════════════════════════════════════════════════════
-        # Build ĐD10 rows (Vietnamese guests - Nghị định 144/2021)
-        # ═══════════════════════════════════════════════════════════
-        DD10_HEADERS = [
-            "STT",
-            "Họ và tên",
-            "Ngày sinh",
-            "Giới tính",
-            "Quốc tịch",
-            "Số CMND/CCCD/Hộ chiếu",
-            "Địa chỉ thường trú",
-            "Ngày đến",
-            "Ngày đi",
-            "Số phòng",
-            "Ghi chú",
-        ]
-
-        def build_dd10_rows(bkings):
-            from hotel_api.encryption import decrypt
-
-            rows = []
-            for i, bk in enumerate(bkings, 1):
-                g = bk.guest
-                rows.append(
-                    [
-                        i,
-                        g.full_name,
-                        fmt_date(g.date_of_birth),
-                        fmt_gender(g.gender),
-                        fmt_nationality(g.nationality),
-                        decrypt(g.id_number) or "",
-                        g.address or "",
-                        fmt_date(bk.check_in_date),
-                        fmt_date(bk.check_out_date),
-                        bk.room.number,
-                        bk.notes or "",
-                    ]
-                )
-            return rows
-
-        # ═══════════════════════════════════════════════════════════
-        # Build NA17 rows (Foreign guests - Thông tư 04/2015/TT-BCA)
-        # ═══════════════════════════════════════════════════════════
-        NA17_HEADERS = [
-            "STT",
-            "Họ tên",
-            "Giới tính",
-            "Ngày tháng năm sinh",
-            "Quốc tịch",
-            "Số hộ chiếu",
-            "Loại hộ chiếu",
-            "Loại giấy tờ nhập cảnh",
-            "Số giấy tờ",
-            "Thời hạn",
-            "Ngày cấp",
-            "Cơ quan cấp",
-            "Ngày nhập cảnh",
-            "Cửa khẩu nhập cảnh",
-            "Mục đích nhập cảnh",
-            "Tạm trú từ ngày",
-            "Tạm trú đến ngày",
-            "Số phòng",
-        ]
-
-        def build_na17_rows(bkings):
-            from hotel_api.encryption import decrypt
-
-            rows = []
-            for i, bk in enumerate(bkings, 1):
-                g = bk.guest
-                rows.append(
-                    [
-                        i,
-                        g.full_name,
-                        fmt_gender(g.gender),
-                        fmt_date(g.date_of_birth),
-                        fmt_nationality(g.nationality),
-                        decrypt(g.id_number) or "",
-                        g.get_passport_type_display() if g.passport_type else "",
-                        g.get_visa_type_display() if g.visa_type else "",
-                        decrypt(g.visa_number) or "",
-                        fmt_date(g.visa_expiry_date),
-                        fmt_date(g.visa_issue_date),
-                        g.visa_issuing_authority or "",
-                        fmt_date(g.entry_date),
-                        g.entry_port or "",
-                        g.entry_purpose or "",
-                        fmt_date(bk.check_in_date),
-                        fmt_date(bk.check_out_date),
-                        bk.room.number,
-                    ]
-                )
-            return rows
+        if export_format == "excel" and not xlsx_available():
+            return Response(
+                {"detail": "Thư viện openpyxl chưa được cài đặt. Vui lòng sử dụng format=csv."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         # ── Mark bookings as declared ──
-        now = tz.now()
-        booking_ids = [b.id for b in bookings]
-        if booking_ids:
-            Booking.objects.filter(id__in=booking_ids, declaration_submitted=False).update(
-                declaration_submitted=True,
-                declaration_submitted_at=now,
-            )
+        declaration.declared_bookings(date_from, date_to).filter(
+            declaration_submitted=False
+        ).update(declaration_submitted=True, declaration_submitted_at=tz.now())
 
         # ═══════════════════════════════════════════════════════════
         # EXCEL EXPORT (recommended - separate sheets per form)
         # ═══════════════════════════════════════════════════════════
         if export_format == "excel":
-            try:
-                import openpyxl
-                from openpyxl.styles import Alignment, Font, PatternFill
-            except ImportError:
-                return Response(
-                    {"detail": "Thư viện openpyxl chưa được cài đặt. Vui lòng sử dụng format=csv."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            wb = openpyxl.Workbook()
-            wb.remove(wb.active)  # Remove default sheet
-
-            header_font = Font(bold=True)
-            header_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-            title_font = Font(bold=True, size=14)
-
-            def write_sheet(ws, title, headers, rows, establishment_header):
-                """Write a properly formatted declaration sheet."""
-                # Row 1: Establishment name
-                ws.cell(row=1, column=1, value=establishment_header[0]).font = title_font
-                ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(headers))
-                # Row 2: Address
-                ws.cell(row=2, column=1, value=f"Địa chỉ: {establishment_header[1]}")
-                ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=len(headers))
-                # Row 3: Phone
-                ws.cell(row=3, column=1, value=f"Điện thoại: {establishment_header[2]}")
-                ws.merge_cells(start_row=3, start_column=1, end_row=3, end_column=len(headers))
-                # Row 4: Empty
-                # Row 5: Title
-                ws.cell(row=5, column=1, value=title).font = Font(bold=True, size=12)
-                ws.merge_cells(start_row=5, start_column=1, end_row=5, end_column=len(headers))
-                ws.cell(row=5, column=1).alignment = Alignment(horizontal="center")
-                # Row 6: Date range
-                date_range_str = f"Từ ngày {fmt_date(date_from)} đến ngày {fmt_date(date_to)}"
-                ws.cell(row=6, column=1, value=date_range_str)
-                ws.merge_cells(start_row=6, start_column=1, end_row=6, end_column=len(headers))
-                ws.cell(row=6, column=1).alignment = Alignment(horizontal="center")
-
-                # Row 8: Column headers
-                for col, h in enumerate(headers, 1):
-                    cell = ws.cell(row=8, column=col, value=h)
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = Alignment(horizontal="center", wrap_text=True)
-
-                # Data rows starting at row 9
-                for row_idx, row_data in enumerate(rows, 9):
-                    for col_idx, val in enumerate(row_data, 1):
-                        ws.cell(row=row_idx, column=col_idx, value=val)
-
-                # Auto-adjust column widths
-                for col_idx in range(1, len(headers) + 1):
-                    max_len = len(str(headers[col_idx - 1]))
-                    for row_data in rows:
-                        if col_idx - 1 < len(row_data):
-                            max_len = max(max_len, len(str(row_data[col_idx - 1])))
-                    ws.column_dimensions[openpyxl.utils.get_column_letter(col_idx)].width = min(
-                        max_len + 4, 40
-                    )
-
-            establishment_info = [HOTEL_NAME, HOTEL_ADDRESS, HOTEL_PHONE]
-
-            if form_type in ("dd10", "all"):
-                ws_dd10 = wb.create_sheet(title="ĐD10 - Khách Việt Nam")
-                dd10_rows = build_dd10_rows(vietnamese_bookings)
-                write_sheet(
-                    ws_dd10,
-                    "SỔ QUẢN LÝ LƯU TRÚ (Mẫu ĐD10)",
-                    DD10_HEADERS,
-                    dd10_rows,
-                    establishment_info,
-                )
-
-            if form_type in ("na17", "all"):
-                ws_na17 = wb.create_sheet(title="NA17 - Khách nước ngoài")
-                na17_rows = build_na17_rows(foreign_bookings)
-                na17_header_info = [
-                    HOTEL_NAME,
-                    HOTEL_ADDRESS,
-                    HOTEL_PHONE,
-                ]
-                write_sheet(
-                    ws_na17,
-                    "PHIẾU KHAI BÁO TẠM TRÚ CHO NGƯỜI NƯỚC NGOÀI (Mẫu NA17)",
-                    NA17_HEADERS,
-                    na17_rows,
-                    na17_header_info,
-                )
-
-            # If no sheets created (shouldn't happen but just in case)
-            if not wb.sheetnames:
-                wb.create_sheet(title="Trống")
-
-            buffer = io.BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
-            response = HttpResponse(
-                buffer.getvalue(),
+            # Rows go to disk as they are written; FileResponse streams the file
+            # and closes (deletes) it when the download finishes.
+            fileobj = tempfile.TemporaryFile()
+            declaration.write_excel(date_from, date_to, form_type, fileobj)
+            fileobj.seek(0)
+            return FileResponse(
+                fileobj,
+                as_attachment=True,
+                filename=f"khai_bao_luu_tru_{date_from}_{date_to}.xlsx",
                 content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             )
-            filename = f"khai_bao_luu_tru_{date_from}_{date_to}.xlsx"
-            response["Content-Disposition"] = f'attachment; filename="{filename}"'
-            return response
 
         # ═══════════════════════════════════════════════════════════
-        # CSV EXPORT (single file, sections separated by blank lines)
+        # CSV EXPORT (single file, sections separated by a rule)
         # ═══════════════════════════════════════════════════════════
-        else:
-            buffer = io.StringIO()
-            writer = csv.writer(buffer)
-
-            def write_csv_section(writer, title, headers, rows, establishment_info):
-                writer.writerow([establishment_info[0]])
-                writer.writerow([f"Địa chỉ: {establishment_info[1]}"])
-                writer.writerow([f"Điện thoại: {establishment_info[2]}"])
-                writer.writerow([])
-                writer.writerow([title])
-                writer.writerow([f"Từ ngày {fmt_date(date_from)} đến ngày {fmt_date(date_to)}"])
-                writer.writerow([])
-                writer.writerow(headers)
-                for row in rows:
-                    writer.writerow(row)
-
-            establishment_info = [HOTEL_NAME, HOTEL_ADDRESS, HOTEL_PHONE]
-
-            if form_type in ("dd10", "all"):
-                dd10_rows = build_dd10_rows(vietnamese_bookings)
-                write_csv_section(
-                    writer,
-                    "SỔ QUẢN LÝ LƯU TRÚ (Mẫu ĐD10)",
-                    DD10_HEADERS,
-                    dd10_rows,
-                    establishment_info,
-                )
-
-            if form_type == "all":
-                writer.writerow([])
-                writer.writerow(["=" * 80])
-                writer.writerow([])
-
-            if form_type in ("na17", "all"):
-                na17_rows = build_na17_rows(foreign_bookings)
-                write_csv_section(
-                    writer,
-                    "PHIẾU KHAI BÁO TẠM TRÚ CHO NGƯỜI NƯỚC NGOÀI (Mẫu NA17)",
-                    NA17_HEADERS,
-                    na17_rows,
-                    establishment_info,
-                )
-
-            response = HttpResponse(
-                buffer.getvalue(),
-                content_type="text/csv; charset=utf-8-sig",
-            )
-            filename = f"khai_bao_luu_tru_{date_from}_{date_to}.csv"
-            response["Content-Disposition"] = f'attachment; filename="{filename}"'
-            return response
+        response = StreamingHttpResponse(
+            declaration.stream_csv(date_from, date_to, form_type),
+            content_type="text/csv; charset=utf-8-sig",
+        )
+        filename = f"khai_bao_luu_tru_{date_from}_{date_to}.csv"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
 
 
 # ==================== Booking Management Views ====================
@@ -1452,23 +1217,22 @@ class BookingViewSet(viewsets.ModelViewSet):
         return BookingSerializer
 
     def perform_create(self, serializer):
-        """Create booking and notify staff."""
-        booking = serializer.save()
+        """Create booking and queue the staff notification."""
+        from django.db import transaction
 
-        from .services import PushNotificationService
+        from .outbox import notify_booking_staff
 
-        PushNotificationService.notify_staff(
-            notification_type=Notification.NotificationType.BOOKING_CREATED,
-            title=f"Đặt phòng mới: Phòng {booking.room.number}",
-            body=f"{booking.guest.full_name} - {booking.check_in_date} → {booking.check_out_date}",
-            data={
-                "booking_id": str(booking.id),
-                "room_number": booking.room.number,
-                "action": "booking_created",
-            },
-            booking=booking,
-            exclude_user=self.request.user,
-        )
+        with transaction.atomic():
+            booking = serializer.save()
+            notify_booking_staff(
+                booking,
+                notification_type=Notification.NotificationType.BOOKING_CREATED,
+                title=f"Đặt phòng mới: Phòng {booking.room.number}",
+                body=f"{booking.guest.full_name} - {booking.check_in_date} → {booking.check_out_date}",
+                action="booking_created",
+                user=self.request.user,
+                key=f"booking_created:{booking.pk}",
+            )
 
     @extend_schema(
         summary="Update booking status",
@@ -1487,63 +1251,65 @@ class BookingViewSet(viewsets.ModelViewSet):
         serializer = BookingStatusUpdateSerializer(booking, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
 
-        with transaction.atomic():
-            serializer.save()
-            booking.refresh_from_db()
+        from .inventory import RoomNightConflict
 
-            # Sync room status based on booking status transition
-            room = booking.room
-            if booking.status == Booking.Status.CHECKED_IN:
-                room.status = Room.Status.OCCUPIED
-                room.save()
-            elif booking.status == Booking.Status.CHECKED_OUT:
-                room.status = Room.Status.CLEANING
-                room.save()
-            elif booking.status in [Booking.Status.CANCELLED, Booking.Status.NO_SHOW]:
-                # Only revert room if it was occupied by this booking
-                if old_status == Booking.Status.CHECKED_IN and room.status == Room.Status.OCCUPIED:
-                    # Check if another active booking occupies this room
-                    other_active = (
-                        Booking.objects.filter(
-                            room=room,
-                            status=Booking.Status.CHECKED_IN,
+        try:
+            with transaction.atomic():
+                serializer.save()
+                booking.refresh_from_db()
+
+                # Sync room status based on booking status transition
+                room = booking.room
+                if booking.status == Booking.Status.CHECKED_IN:
+                    room.status = Room.Status.OCCUPIED
+                    room.save()
+                elif booking.status == Booking.Status.CHECKED_OUT:
+                    room.status = Room.Status.CLEANING
+                    room.save()
+                elif booking.status in [Booking.Status.CANCELLED, Booking.Status.NO_SHOW]:
+                    # Only revert room if it was occupied by this booking
+                    if (
+                        old_status == Booking.Status.CHECKED_IN
+                        and room.status == Room.Status.OCCUPIED
+                    ):
+                        # Check if another active booking occupies this room
+                        other_active = (
+                            Booking.objects.filter(
+                                room=room,
+                                status=Booking.Status.CHECKED_IN,
+                            )
+                            .exclude(pk=booking.pk)
+                            .exists()
                         )
-                        .exclude(pk=booking.pk)
-                        .exists()
+                        if not other_active:
+                            room.status = Room.Status.AVAILABLE
+                            room.save()
+
+                # Queue notification for status changes
+                from .outbox import notify_booking_staff
+
+                if booking.status == Booking.Status.CONFIRMED:
+                    notify_booking_staff(
+                        booking,
+                        notification_type=Notification.NotificationType.BOOKING_CONFIRMED,
+                        title=f"Xác nhận: Phòng {booking.room.number}",
+                        body=f"{booking.guest.full_name} - {booking.check_in_date} → {booking.check_out_date}",
+                        action="booking_confirmed",
+                        user=request.user,
+                        key=f"booking_confirmed:{booking.pk}:{booking.updated_at.isoformat()}",
                     )
-                    if not other_active:
-                        room.status = Room.Status.AVAILABLE
-                        room.save()
-
-        # Send notification for status changes
-        from .services import PushNotificationService
-
-        if booking.status == Booking.Status.CONFIRMED:
-            PushNotificationService.notify_staff(
-                notification_type=Notification.NotificationType.BOOKING_CONFIRMED,
-                title=f"Xác nhận: Phòng {booking.room.number}",
-                body=f"{booking.guest.full_name} - {booking.check_in_date} → {booking.check_out_date}",
-                data={
-                    "booking_id": str(booking.id),
-                    "room_number": booking.room.number,
-                    "action": "booking_confirmed",
-                },
-                booking=booking,
-                exclude_user=request.user,
-            )
-        elif booking.status == Booking.Status.CANCELLED:
-            PushNotificationService.notify_staff(
-                notification_type=Notification.NotificationType.BOOKING_CANCELLED,
-                title=f"Hủy đặt phòng: Phòng {booking.room.number}",
-                body=f"{booking.guest.full_name} - {booking.check_in_date}",
-                data={
-                    "booking_id": str(booking.id),
-                    "room_number": booking.room.number,
-                    "action": "booking_cancelled",
-                },
-                booking=booking,
-                exclude_user=request.user,
-            )
+                elif booking.status == Booking.Status.CANCELLED:
+                    notify_booking_staff(
+                        booking,
+                        notification_type=Notification.NotificationType.BOOKING_CANCELLED,
+                        title=f"Hủy đặt phòng: Phòng {booking.room.number}",
+                        body=f"{booking.guest.full_name} - {booking.check_in_date}",
+                        action="booking_cancelled",
+                        user=request.user,
+                        key=f"booking_cancelled:{booking.pk}:{booking.updated_at.isoformat()}",
+                    )
+        except RoomNightConflict as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(
             BookingSerializer(booking).data,
@@ -1580,35 +1346,37 @@ class BookingViewSet(viewsets.ModelViewSet):
         serializer = CheckInSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # Use atomic transaction to ensure consistency
-        with transaction.atomic():
-            booking.status = Booking.Status.CHECKED_IN
-            booking.actual_check_in = serializer.validated_data.get(
-                "actual_check_in", timezone.now()
-            )
-            booking.notes = serializer.validated_data.get("notes", booking.notes or "")
-            booking.save()
+        from .inventory import RoomNightConflict
 
-            # Update room status to OCCUPIED
-            room = booking.room
-            room.status = Room.Status.OCCUPIED
-            room.save()
+        # Use atomic transaction to ensure consistency
+        try:
+            with transaction.atomic():
+                booking.status = Booking.Status.CHECKED_IN
+                booking.actual_check_in = serializer.validated_data.get(
+                    "actual_check_in", timezone.now()
+                )
+                booking.notes = serializer.validated_data.get("notes", booking.notes or "")
+                booking.save()
 
-        # Notify staff about check-in
-        from .services import PushNotificationService
+                # Update room status to OCCUPIED
+                room = booking.room
+                room.status = Room.Status.OCCUPIED
+                room.save()
 
-        PushNotificationService.notify_staff(
-            notification_type=Notification.NotificationType.CHECKIN_COMPLETED,
-            title=f"Check-in: Phòng {booking.room.number}",
-            body=f"{booking.guest.full_name} đã nhận phòng {booking.room.number}",
-            data={
-                "booking_id": str(booking.id),
-                "room_number": booking.room.number,
-                "action": "check_in",
-            },
-            booking=booking,
-            exclude_user=request.user,
-        )
+                # Queue staff notification about check-in
+                from .outbox import notify_booking_staff
+
+                notify_booking_staff(
+                    booking,
+                    notification_type=Notification.NotificationType.CHECKIN_COMPLETED,
+                    title=f"Check-in: Phòng {booking.room.number}",
+                    body=f"{booking.guest.full_name} đã nhận phòng {booking.room.number}",
+                    action="check_in",
+                    user=request.user,
+                    key=f"check_in:{booking.pk}:{booking.actual_check_in.isoformat()}",
+                )
+        except RoomNightConflict as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(
             BookingSerializer(booking).data,
@@ -1665,69 +1433,28 @@ class BookingViewSet(viewsets.ModelViewSet):
             room.status = Room.Status.CLEANING
             room.save()
 
-            # Auto-create housekeeping task for checkout cleaning
-            HousekeepingTask.objects.create(
-                room=room,
-                task_type=HousekeepingTask.TaskType.CHECKOUT_CLEAN,
-                status=HousekeepingTask.Status.PENDING,
-                scheduled_date=timezone.now().date(),
-                booking=booking,
-                created_by=request.user,
-                notes=f"Auto-created: Checkout cleaning for room {room.number}",
-            )
-
-            # Increment guest's total stays
-            guest = booking.guest
-            guest.total_stays += 1
-            guest.save()
+            # Housekeeping task, guest stay count, room revenue and the staff
+            # notification are applied from the outbox after commit
+            from .outbox import enqueue, notify_booking_staff
 
-            # Auto-create financial entry for room revenue
-            room_income_category = FinancialCategory.objects.filter(
-                category_type=FinancialCategory.CategoryType.INCOME,
-                is_default=True,
-                is_active=True,
-            ).first()
-            if not room_income_category:
-                # Fallback: find "Tiền phòng" category or any active income category
-                room_income_category = FinancialCategory.objects.filter(
-                    category_type=FinancialCategory.CategoryType.INCOME,
-                    is_active=True,
-                ).first()
-
-            if room_income_category:
-                total_revenue = (
-                    booking.total_amount
-                    + booking.additional_charges
-                    + booking.early_check_in_fee
-                    + booking.late_check_out_fee
-                )
-                FinancialEntry.objects.create(
-                    entry_type=FinancialEntry.EntryType.INCOME,
-                    category=room_income_category,
-                    amount=total_revenue,
-                    currency=booking.currency,
-                    date=timezone.now().date(),
-                    description=f"Tiền phòng {room.number} - {guest.full_name} ({booking.check_in_date} → {booking.check_out_date}, {booking.nights} đêm)",
-                    booking=booking,
-                    payment_method=booking.payment_method,
-                    created_by=request.user,
-                )
-
-        # Notify staff about check-out
-        from .services import PushNotificationService
-
-        PushNotificationService.notify_staff(
-            notification_type=Notification.NotificationType.CHECKOUT_COMPLETED,
-            title=f"Check-out: Phòng {booking.room.number}",
-            body=f"{booking.guest.full_name} đã trả phòng {booking.room.number}",
-            data={
-                "booking_id": str(booking.id),
-                "room_number": booking.room.number,
-                "action": "check_out",
-            },
-            booking=booking,
-            exclude_user=request.user,
-        )
+            key = f"check_out:{booking.pk}:{booking.actual_check_out.isoformat()}"
+            effect = {
+                "booking_id": booking.pk,
+                "user_id": request.user.pk,
+                "date": timezone.now().date().isoformat(),
+            }
+            enqueue("checkout_housekeeping", effect, key=f"housekeeping:{key}")
+            enqueue("guest_stay_completed", {"guest_id": booking.guest_id}, key=f"stays:{key}")
+            enqueue("checkout_room_revenue", effect, key=f"revenue:{key}")
+            notify_booking_staff(
+                booking,
+                notification_type=Notification.NotificationType.CHECKOUT_COMPLETED,
+                title=f"Check-out: Phòng {booking.room.number}",
+                body=f"{booking.guest.full_name} đã trả phòng {booking.room.number}",
+                action="check_out",
+                user=request.user,
+                key=key,
+            )
 
         return Response(
             BookingSerializer(booking).data,
@@ -2032,36 +1759,49 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        with transaction.atomic():
-            # Update booking to new room
-            booking.room = new_room
-            if reason:
-                booking.notes = (
-                    f"{booking.notes}\n[Đổi phòng] {old_room.number} → {new_room.number}: {reason}"
-                    if booking.notes
-                    else f"[Đổi phòng] {old_room.number} → {new_room.number}: {reason}"
-                )
-            booking.save()
-
-            # Set old room to CLEANING
-            old_room.status = Room.Status.CLEANING
-            old_room.save()
+        from .inventory import RoomNightConflict, find_conflict
 
-            # Set new room to OCCUPIED
-            new_room.status = Room.Status.OCCUPIED
-            new_room.save()
-
-            # Auto-create housekeeping task for old room
-            HousekeepingTask.objects.create(
-                room=old_room,
-                task_type=HousekeepingTask.TaskType.CHECKOUT_CLEAN,
-                status=HousekeepingTask.Status.PENDING,
-                scheduled_date=timezone.now().date(),
-                booking=booking,
-                created_by=request.user,
-                notes=f"Auto-created: Room swap cleaning for room {old_room.number}",
+        if find_conflict(
+            new_room, booking.check_in_date, booking.check_out_date, exclude_booking=booking
+        ):
+            return Response(
+                {"detail": f"Phòng {new_room.number} đã có booking khác trong thời gian lưu trú."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
+        try:
+            with transaction.atomic():
+                # Update booking to new room (moves its room-night ledger rows)
+                booking.room = new_room
+                if reason:
+                    booking.notes = (
+                        f"{booking.notes}\n[Đổi phòng] {old_room.number} → {new_room.number}: {reason}"
+                        if booking.notes
+                        else f"[Đổi phòng] {old_room.number} → {new_room.number}: {reason}"
+                    )
+                booking.save()
+
+                # Set old room to CLEANING
+                old_room.status = Room.Status.CLEANING
+                old_room.save()
+
+                # Set new room to OCCUPIED
+                new_room.status = Room.Status.OCCUPIED
+                new_room.save()
+
+                # Auto-create housekeeping task for old room
+                HousekeepingTask.objects.create(
+                    room=old_room,
+                    task_type=HousekeepingTask.TaskType.CHECKOUT_CLEAN,
+                    status=HousekeepingTask.Status.PENDING,
+                    scheduled_date=timezone.now().date(),
+                    booking=booking,
+                    created_by=request.user,
+                    notes=f"Auto-created: Room swap cleaning for room {old_room.number}",
+                )
+        except RoomNightConflict as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         # Notify staff
         from .services import PushNotificationService
 
@@ -2118,15 +1858,16 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Check for overlapping bookings on this room
-        overlapping = (
+        # Check the extra nights against the room-night ledger; pending bookings
+        # do not hold ledger rows, so they are still checked by date range.
+        from .inventory import RoomNightConflict, find_conflict
+
+        overlapping = find_conflict(
+            booking.room, booking.check_out_date, new_check_out_date, exclude_booking=booking
+        ) or (
             Booking.objects.filter(
                 room=booking.room,
-                status__in=[
-                    Booking.Status.PENDING,
-                    Booking.Status.CONFIRMED,
-                    Booking.Status.CHECKED_IN,
-                ],
+                status=Booking.Status.PENDING,
                 check_in_date__lt=new_check_out_date,
                 check_out_date__gt=booking.check_out_date,
             )
@@ -2141,18 +1882,26 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        with transaction.atomic():
-            booking.check_out_date = new_check_out_date
-            # Recalculate total amount based on room rate and new night count
-            nights = (new_check_out_date - booking.check_in_date).days
-            if booking.room and booking.room.room_type:
-                booking.total_amount = booking.room.room_type.base_rate * nights
-            booking.notes = (
-                f"{booking.notes}\n[Gia hạn] {old_check_out_date} → {new_check_out_date}"
-                if booking.notes
-                else f"[Gia hạn] {old_check_out_date} → {new_check_out_date}"
+        try:
+            with transaction.atomic():
+                booking.check_out_date = new_check_out_date
+                # Recalculate total amount based on room rate and new night count
+                nights = (new_check_out_date - booking.check_in_date).days
+                if booking.room and booking.room.room_type:
+                    booking.total_amount = booking.room.room_type.base_rate * nights
+                booking.notes = (
+                    f"{booking.notes}\n[Gia hạn] {old_check_out_date} → {new_check_out_date}"
+                    if booking.notes
+                    else f"[Gia hạn] {old_check_out_date} → {new_check_out_date}"
+                )
+                booking.save()
+        except RoomNightConflict:
+            return Response(
+                {
+                    "detail": "Không thể gia hạn vì phòng đã có booking khác trong khoảng thời gian này."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            booking.save()
 
         # Notify staff
         from .services import PushNotificationService
@@ -2436,94 +2185,55 @@ class DashboardView(APIView):
     permission_classes = [IsAuthenticated, IsStaff]
 
     def get(self, request):
-        """Get dashboard summary metrics."""
-        from datetime import date
+        """Get dashboard summary metrics (cached, see hotel_api/dashboard.py)."""
+        from hotel_api.dashboard import get_dashboard_summary
 
-        from django.db.models import Count
+        summary, cache_hit = get_dashboard_summary()
+        response = Response(summary, status=status.HTTP_200_OK)
+        response["X-Cache"] = "HIT" if cache_hit else "MISS"
+        return response
 
-        today = date.today()
 
-        # Room status summary
-        room_status = (
-            Room.objects.filter(is_active=True).values("status").annotate(count=Count("id"))
-        )
-        room_status_dict = {item["status"]: item["count"] for item in room_status}
-        total_rooms = Room.objects.filter(is_active=True).count()
+class DashboardCacheStatsView(APIView):
+    """Dashboard cache hit/miss counters."""
 
-        # Today's check-ins and check-outs
-        today_check_ins = Booking.objects.filter(
-            check_in_date=today,
-            status__in=[Booking.Status.PENDING, Booking.Status.CONFIRMED],
-        ).count()
-        today_check_outs = Booking.objects.filter(
-            check_out_date=today,
-            status=Booking.Status.CHECKED_IN,
-        ).count()
+    permission_classes = [IsAuthenticated, IsManager]
 
-        # Already checked in/out today
-        completed_check_ins = Booking.objects.filter(
-            check_in_date=today,
-            status=Booking.Status.CHECKED_IN,
-        ).count()
-        completed_check_outs = Booking.objects.filter(
-            check_out_date=today,
-            status=Booking.Status.CHECKED_OUT,
-        ).count()
+    @extend_schema(
+        summary="Dashboard cache statistics",
+        description="Hit, miss and invalidation counters of the dashboard summary cache.",
+        tags=["Dashboard"],
+    )
+    def get(self, request):
+        from hotel_api.dashboard import dashboard_cache_stats
 
-        # Booking status counts
-        pending_bookings = Booking.objects.filter(status=Booking.Status.PENDING).count()
-        confirmed_bookings = Booking.objects.filter(status=Booking.Status.CONFIRMED).count()
-        checked_in_bookings = Booking.objects.filter(status=Booking.Status.CHECKED_IN).count()
+        return Response(dashboard_cache_stats(), status=status.HTTP_200_OK)
 
-        # Calculate occupancy
-        occupied_rooms = room_status_dict.get(Room.Status.OCCUPIED, 0)
-        occupancy_rate = (occupied_rooms / total_rooms * 100) if total_rooms > 0 else 0
 
-        # Today's financial summary
-        from django.db.models import Sum
+class SlowRequestsView(APIView):
+    """Slow requests sampled by the performance middleware."""
 
-        today_income = (
-            FinancialEntry.objects.filter(
-                date=today, entry_type=FinancialEntry.EntryType.INCOME
-            ).aggregate(total=Sum("amount"))["total"]
-            or 0
-        )
-        today_expense = (
-            FinancialEntry.objects.filter(
-                date=today, entry_type=FinancialEntry.EntryType.EXPENSE
-            ).aggregate(total=Sum("amount"))["total"]
-            or 0
-        )
+    permission_classes = [IsAuthenticated, IsManager]
+
+    @extend_schema(
+        summary="Slow request samples",
+        description=(
+            "Most recent requests slower than PERFORMANCE_SLOW_REQUEST_MS in this worker, "
+            "with query count, DB and serializer time and their slowest queries."
+        ),
+        responses={200: OpenApiTypes.OBJECT},
+        tags=["Dashboard"],
+    )
+    def get(self, request):
+        from django.conf import settings
+
+        from hotel_api.performance import is_enabled, registry
 
         return Response(
             {
-                "room_status": {
-                    "total": total_rooms,
-                    "available": room_status_dict.get(Room.Status.AVAILABLE, 0),
-                    "occupied": occupied_rooms,
-                    "cleaning": room_status_dict.get(Room.Status.CLEANING, 0),
-                    "maintenance": room_status_dict.get(Room.Status.MAINTENANCE, 0),
-                    "blocked": room_status_dict.get(Room.Status.BLOCKED, 0),
-                },
-                "today": {
-                    "date": today.isoformat(),
-                    "check_ins": today_check_ins + completed_check_ins,
-                    "check_outs": today_check_outs + completed_check_outs,
-                    "pending_arrivals": today_check_ins,
-                    "pending_departures": today_check_outs,
-                    "revenue": float(today_income),
-                    "expense": float(today_expense),
-                },
-                "occupancy": {
-                    "rate": round(occupancy_rate, 1),
-                    "occupied_rooms": occupied_rooms,
-                    "total_rooms": total_rooms,
-                },
-                "bookings": {
-                    "pending": pending_bookings,
-                    "confirmed": confirmed_bookings,
-                    "checked_in": checked_in_bookings,
-                },
+                "enabled": is_enabled(),
+                "threshold_ms": getattr(settings, "PERFORMANCE_SLOW_REQUEST_MS", 500),
+                "results": registry.slow_samples(),
             },
             status=status.HTTP_200_OK,
         )
@@ -2607,9 +2317,7 @@ class FinancialCategoryViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filter queryset based on query parameters."""
-        from django.db.models import Count
-
-        queryset = super().get_queryset().annotate(entry_count=Count("entries"))
+        queryset = with_entry_count(super().get_queryset())
 
         # Filter by category type
         category_type = self.request.query_params.get("category_type")
@@ -2704,6 +2412,9 @@ class FinancialEntryViewSet(viewsets.ModelViewSet):
 
     queryset = FinancialEntry.objects.all()
     permission_classes = [IsAuthenticated, IsStaff]
+    pagination_class = KeysetPagination
+    # Cursor pages follow the list's date order rather than (created_at, id)
+    keyset_ordering = ("-date", "-id")
 
     def get_serializer_class(self):
         """Return appropriate serializer class."""
@@ -2719,37 +2430,14 @@ class FinancialEntryViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filter queryset based on query parameters."""
+        from hotel_api.exports import filter_financial_entries
+
         queryset = (
             super()
             .get_queryset()
             .select_related("category", "booking", "booking__room", "booking__guest", "created_by")
         )
-
-        # Filter by entry type
-        entry_type = self.request.query_params.get("entry_type")
-        if entry_type:
-            queryset = queryset.filter(entry_type=entry_type)
-
-        # Filter by category
-        category = self.request.query_params.get("category")
-        if category:
-            queryset = queryset.filter(category_id=category)
-
-        # Filter by date range
-        date_from = self.request.query_params.get("date_from")
-        if date_from:
-            queryset = queryset.filter(date__gte=date_from)
-
-        date_to = self.request.query_params.get("date_to")
-        if date_to:
-            queryset = queryset.filter(date__lte=date_to)
-
-        # Filter by payment method
-        payment_method = self.request.query_params.get("payment_method")
-        if payment_method:
-            queryset = queryset.filter(payment_method=payment_method)
-
-        return queryset.order_by("-date", "-created_at")
+        return filter_financial_entries(queryset, self.request.query_params)
 
     def perform_create(self, serializer):
         """Set created_by to current user."""
@@ -2988,7 +2676,11 @@ class FinancialEntryViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         summary="Export financial entries",
-        description="Export financial entries to CSV.",
+        description=(
+            "Export financial entries to CSV or Excel, streamed row by row. "
+            "With mode=async an export job is queued instead (202); poll "
+            "/export-jobs/{id}/ for the download URL."
+        ),
         parameters=[
             OpenApiParameter(
                 name="date_from",
@@ -3005,51 +2697,19 @@ class FinancialEntryViewSet(viewsets.ModelViewSet):
                 type=str,
                 description="Filter by type (income, expense)",
             ),
+            EXPORT_FORMAT_PARAMETER,
+            EXPORT_MODE_PARAMETER,
         ],
-        responses={200: OpenApiResponse(description="CSV file")},
+        responses={
+            200: OpenApiResponse(description="CSV or Excel file"),
+            202: ExportJobSerializer,
+        },
         tags=["Financial"],
     )
     @action(detail=False, methods=["get"], url_path="export")
     def export(self, request):
-        """Export financial entries to CSV."""
-        import csv
-        import io
-
-        from django.http import HttpResponse
-
-        queryset = self.get_queryset()
-
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(
-            [
-                "Ngày",
-                "Loại",
-                "Danh mục",
-                "Số tiền",
-                "Phương thức thanh toán",
-                "Mô tả",
-                "Số tham chiếu",
-                "Người tạo",
-            ]
-        )
-        for entry in queryset:
-            writer.writerow(
-                [
-                    entry.date.isoformat(),
-                    entry.entry_type,
-                    entry.category.name if entry.category else "",
-                    entry.amount,
-                    entry.payment_method,
-                    entry.description,
-                    entry.receipt_number,
-                    entry.created_by.get_full_name() if entry.created_by else "",
-                ]
-            )
-
-        response = HttpResponse(output.getvalue(), content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="financial_entries.csv"'
-        return response
+        """Export financial entries to CSV or Excel."""
+        return export_or_queue(request, "financial_entries")
 
 
 @extend_schema_view(
@@ -3115,37 +2775,36 @@ class NightAuditViewSet(viewsets.ModelViewSet):
     - POST /night-audits/{id}/recalculate/ - Recalculate statistics
     - GET /night-audits/today/ - Get or create today's audit
     - GET /night-audits/latest/ - Get the most recent audit
+    - POST /night-audits/rebuild/ - Recompute audits for a date range (manager)
     """
 
     queryset = NightAudit.objects.all()
     permission_classes = [IsAuthenticated, IsStaffOrManager]
 
+    def get_permissions(self):
+        """Rebuilding a range is manager-only."""
+        if self.action == "rebuild":
+            return [IsAuthenticated(), IsManager()]
+        return super().get_permissions()
+
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
         if self.action == "list":
             return NightAuditListSerializer
+        if self.action == "rebuild":
+            return NightAuditRebuildSerializer
         if self.action == "create":
             return NightAuditCreateSerializer
         return NightAuditSerializer
 
     def get_queryset(self):
         """Filter queryset based on query parameters."""
-        queryset = NightAudit.objects.all()
-
-        # Filter by status
-        status_filter = self.request.query_params.get("status")
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-
-        # Filter by date range
-        date_from = self.request.query_params.get("date_from")
-        date_to = self.request.query_params.get("date_to")
-        if date_from:
-            queryset = queryset.filter(audit_date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(audit_date__lte=date_to)
+        from hotel_api.exports import filter_night_audits
 
-        return queryset.order_by("-audit_date")
+        return filter_night_audits(
+            NightAudit.objects.select_related("performed_by", "closed_by"),
+            self.request.query_params,
+        )
 
     def create(self, request, *args, **kwargs):
         """Create or generate a night audit for a specific date."""
@@ -3268,16 +2927,16 @@ class NightAuditViewSet(viewsets.ModelViewSet):
         from django.utils import timezone
 
         today = date.today()
-        audit = NightAudit.objects.filter(audit_date=today).first()
-
-        if not audit:
-            # Create draft audit for today
-            audit = NightAudit.objects.create(
-                audit_date=today,
-                performed_by=request.user,
-                performed_at=timezone.now(),
-                status=NightAudit.Status.DRAFT,
-            )
+        # Statistics are only computed the first time; later GETs read the stored row
+        audit, created = NightAudit.objects.get_or_create(
+            audit_date=today,
+            defaults={
+                "performed_by": request.user,
+                "performed_at": timezone.now(),
+                "status": NightAudit.Status.DRAFT,
+            },
+        )
+        if created:
             audit.calculate_statistics()
             audit.save()
 
@@ -3305,9 +2964,44 @@ class NightAuditViewSet(viewsets.ModelViewSet):
 
         return Response(NightAuditSerializer(audit).data)
 
+    @extend_schema(
+        summary="Rebuild night audits",
+        description=(
+            "Recompute the audits of a date range (at most a year) in one pass, e.g. "
+            "after a data correction. Missing dates are created as drafts unless "
+            "create_missing is false; closed audits are skipped. Room status counts "
+            "and pending payments are a live snapshot, written to today's audit only: "
+            "past dates take rooms occupied from their bookings and keep their stored "
+            "available/cleaning/maintenance counts and pending payments (zero when "
+            "created). The response gives the counts and timings."
+        ),
+        request=NightAuditRebuildSerializer,
+        responses={200: OpenApiResponse(description="Rebuild counts and timings_ms")},
+        tags=["Night Audit"],
+    )
+    @action(detail=False, methods=["post"], url_path="rebuild")
+    def rebuild(self, request):
+        """Recompute night audits for a date range."""
+        from hotel_api.night_audit import rebuild_audits
+
+        serializer = NightAuditRebuildSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        result = rebuild_audits(
+            serializer.validated_data["start_date"],
+            serializer.validated_data["end_date"],
+            user=request.user,
+            create_missing=serializer.validated_data["create_missing"],
+        )
+        return Response(result)
+
     @extend_schema(
         summary="Export night audits",
-        description="Export night audits to CSV.",
+        description=(
+            "Export night audits to CSV or Excel, streamed row by row. "
+            "With mode=async an export job is queued instead (202); poll "
+            "/export-jobs/{id}/ for the download URL."
+        ),
         parameters=[
             OpenApiParameter(
                 name="date_from",
@@ -3319,63 +3013,19 @@ class NightAuditViewSet(viewsets.ModelViewSet):
                 type=str,
                 description="End date (YYYY-MM-DD)",
             ),
+            EXPORT_FORMAT_PARAMETER,
+            EXPORT_MODE_PARAMETER,
         ],
-        responses={200: OpenApiResponse(description="CSV file")},
+        responses={
+            200: OpenApiResponse(description="CSV or Excel file"),
+            202: ExportJobSerializer,
+        },
         tags=["Night Audit"],
-    )
-    @action(detail=False, methods=["get"], url_path="export")
-    def export(self, request):
-        """Export night audits to CSV."""
-        import csv
-        import io
-
-        from django.http import HttpResponse
-
-        queryset = self.get_queryset()
-        date_from = request.query_params.get("date_from")
-        date_to = request.query_params.get("date_to")
-        if date_from:
-            queryset = queryset.filter(audit_date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(audit_date__lte=date_to)
-
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(
-            [
-                "Ngày",
-                "Trạng thái",
-                "Tổng phòng",
-                "Phòng có khách",
-                "Tỷ lệ lấp đầy (%)",
-                "Doanh thu phòng",
-                "Doanh thu khác",
-                "Tổng doanh thu",
-                "Check-in",
-                "Check-out",
-                "Người thực hiện",
-            ]
-        )
-        for audit in queryset:
-            writer.writerow(
-                [
-                    audit.audit_date.isoformat(),
-                    audit.status,
-                    audit.total_rooms,
-                    audit.occupied_rooms,
-                    audit.occupancy_rate,
-                    audit.room_revenue,
-                    audit.other_revenue,
-                    audit.total_revenue,
-                    audit.checkins,
-                    audit.checkouts,
-                    audit.performed_by.get_full_name() if audit.performed_by else "",
-                ]
-            )
-
-        response = HttpResponse(output.getvalue(), content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="night_audits.csv"'
-        return response
+    )
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """Export night audits to CSV or Excel."""
+        return export_or_queue(request, "night_audits")
 
 
 # ============================================================
@@ -3897,18 +3547,17 @@ class ReceiptViewSet(viewsets.ViewSet):
         from django.utils import timezone
 
         from hotel_api.encryption import decrypt
+        from hotel_api.numbering import assign
 
         from .models import FolioItem
 
-        # Generate receipt number
-        date_str = timezone.now().strftime("%Y%m%d")
-        receipt_count = (
-            booking.payments.filter(
-                receipt_generated=True,
-            ).count()
-            + 1
-        )
-        receipt_number = f"INV-{booking.room.number}-{date_str}-{receipt_count:03d}"
+        # A payment receipt carries the payment's number; a booking receipt gets
+        # its own number on first issue and keeps it on every reprint
+        if payment and payment.receipt_number:
+            receipt_number = payment.receipt_number
+        else:
+            booking.refresh_from_db(fields=["receipt_number"])
+            receipt_number = booking.receipt_number or assign(booking, "receipt_number", "receipt")
 
         # Get folio items
         folio_items = []
@@ -5325,7 +4974,7 @@ class OccupancyReportView(APIView):
         tags=["Reports"],
     )
     def get(self, request):
-        from datetime import timedelta
+        from .occupancy import daily_occupancy
 
         serializer = OccupancyReportRequestSerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
@@ -5355,105 +5004,46 @@ class OccupancyReportView(APIView):
                 }
             )
 
-        # Calculate occupancy for each day in range
-        data = []
-        current_date = start_date
-
-        # Get all bookings that overlap with date range
-        bookings_query = Booking.objects.filter(
-            status__in=["confirmed", "checked_in", "checked_out"],
-            check_in_date__lte=end_date,
-            check_out_date__gt=start_date,
-        )
-        if room_type_id:
-            bookings_query = bookings_query.filter(room__room_type_id=room_type_id)
-
-        # Fetch all relevant bookings once to avoid N+1 queries
-        all_bookings = list(
-            bookings_query.values_list("check_in_date", "check_out_date", "nightly_rate")
-        )
+        series = daily_occupancy(start_date, end_date, room_type_id=room_type_id)
 
-        daily_data = {}
-        while current_date <= end_date:
-            # Count rooms occupied and revenue from in-memory list
-            occupied = 0
-            day_revenue = 0
-            for check_in, check_out, nightly_rate in all_bookings:
-                if check_in <= current_date < check_out:
-                    occupied += 1
-                    day_revenue += nightly_rate
-
-            daily_data[current_date] = {
-                "date": current_date,
-                "total_rooms": total_rooms,
-                "occupied_rooms": occupied,
-                "available_rooms": total_rooms - occupied,
-                "occupancy_rate": (
-                    round((occupied / total_rooms) * 100, 2) if total_rooms > 0 else 0
-                ),
-                "revenue": day_revenue,
-            }
-            current_date += timedelta(days=1)
+        def occupancy_rate(occupied):
+            return round((occupied / total_rooms) * 100, 2) if total_rooms > 0 else 0
 
-        # Group data if needed
+        data = []
         if group_by == "day":
-            data = list(daily_data.values())
-        elif group_by == "week":
-            from collections import defaultdict
-
-            weekly = defaultdict(lambda: {"occupied_sum": 0, "revenue_sum": 0, "days": 0})
-            for date, day_data in daily_data.items():
-                week_start = date - timedelta(days=date.weekday())
-                weekly[week_start]["occupied_sum"] += day_data["occupied_rooms"]
-                weekly[week_start]["revenue_sum"] += day_data["revenue"]
-                weekly[week_start]["days"] += 1
-
-            for week_start, week_data in sorted(weekly.items()):
-                avg_occupied = week_data["occupied_sum"] / week_data["days"]
+            for day, occupied, revenue in zip(series.dates, series.occupied, series.revenue):
                 data.append(
                     {
-                        "period": f"Week of {week_start.isoformat()}",
-                        "date": week_start,
+                        "date": day,
                         "total_rooms": total_rooms,
-                        "occupied_rooms": round(avg_occupied, 1),
-                        "available_rooms": round(total_rooms - avg_occupied, 1),
-                        "occupancy_rate": (
-                            round((avg_occupied / total_rooms) * 100, 2) if total_rooms > 0 else 0
-                        ),
-                        "revenue": week_data["revenue_sum"],
+                        "occupied_rooms": occupied,
+                        "available_rooms": total_rooms - occupied,
+                        "occupancy_rate": occupancy_rate(occupied),
+                        "revenue": revenue,
                     }
                 )
-        elif group_by == "month":
-            from collections import defaultdict
-
-            monthly = defaultdict(lambda: {"occupied_sum": 0, "revenue_sum": 0, "days": 0})
-            for date, day_data in daily_data.items():
-                month_key = date.replace(day=1)
-                monthly[month_key]["occupied_sum"] += day_data["occupied_rooms"]
-                monthly[month_key]["revenue_sum"] += day_data["revenue"]
-                monthly[month_key]["days"] += 1
-
-            for month_start, month_data in sorted(monthly.items()):
-                avg_occupied = month_data["occupied_sum"] / month_data["days"]
+        else:
+            for period_start, days, occupied_sum, revenue_sum in series.fold(group_by):
+                avg_occupied = occupied_sum / days
                 data.append(
                     {
-                        "period": month_start.strftime("%Y-%m"),
-                        "date": month_start,
+                        "period": (
+                            f"Week of {period_start.isoformat()}"
+                            if group_by == "week"
+                            else period_start.strftime("%Y-%m")
+                        ),
+                        "date": period_start,
                         "total_rooms": total_rooms,
                         "occupied_rooms": round(avg_occupied, 1),
                         "available_rooms": round(total_rooms - avg_occupied, 1),
-                        "occupancy_rate": (
-                            round((avg_occupied / total_rooms) * 100, 2) if total_rooms > 0 else 0
-                        ),
-                        "revenue": month_data["revenue_sum"],
+                        "occupancy_rate": occupancy_rate(avg_occupied),
+                        "revenue": revenue_sum,
                     }
                 )
 
         # Calculate summary
-        total_days = (end_date - start_date).days + 1
-        total_room_nights = total_rooms * total_days
-        occupied_nights = sum(d["occupied_rooms"] for d in daily_data.values())
-        total_revenue = sum(d["revenue"] for d in daily_data.values())
+        total_room_nights = total_rooms * len(series)
+        occupied_nights = series.occupied_nights
 
         summary = {
             "total_rooms": total_rooms,
@@ -5464,7 +5054,7 @@ class OccupancyReportView(APIView):
                 if total_room_nights > 0
                 else 0
             ),
-            "total_revenue": total_revenue,
+            "total_revenue": series.total_revenue,
         }
 
         return Response(
@@ -5497,10 +5087,8 @@ class RevenueReportView(APIView):
         tags=["Reports"],
     )
     def get(self, request):
-        from collections import defaultdict
-        from datetime import timedelta
-
         from django.db.models import Sum
+        from django.db.models.functions import TruncMonth, TruncWeek
 
         serializer = RevenueReportRequestSerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
@@ -5510,169 +5098,83 @@ class RevenueReportView(APIView):
         group_by = serializer.validated_data.get("group_by", "day")
         category_id = serializer.validated_data.get("category")
 
-        # Get financial entries
-        income_query = FinancialEntry.objects.filter(
-            entry_type="income",
-            date__gte=start_date,
-            date__lte=end_date,
-        )
-        expense_query = FinancialEntry.objects.filter(
-            entry_type="expense",
-            date__gte=start_date,
-            date__lte=end_date,
-        )
+        # Group in the database: one query per source table, whatever the range length
+        if group_by == "week":
+            period = TruncWeek("date")
+        elif group_by == "month":
+            period = TruncMonth("date")
+        else:
+            period = models.F("date")
 
+        # Financial entries: room revenue (linked to bookings), additional revenue
+        # (unlinked income) and expenses in one grouped query
+        entries_query = FinancialEntry.objects.filter(date__gte=start_date, date__lte=end_date)
         if category_id:
-            income_query = income_query.filter(category_id=category_id)
-            expense_query = expense_query.filter(category_id=category_id)
-
-        # Get minibar sales
-        minibar_query = MinibarSale.objects.filter(
-            date__gte=start_date,
-            date__lte=end_date,
-        )
-
-        # Build daily data
-        daily_data = {}
-        current_date = start_date
-
-        while current_date <= end_date:
-            # Room revenue (from financial entries linked to bookings)
-            day_room_revenue = (
-                income_query.filter(
-                    date=current_date,
-                    booking__isnull=False,
-                ).aggregate(
-                    total=Sum("amount")
-                )["total"]
-                or 0
-            )
-
-            # Additional revenue (income not linked to bookings)
-            day_additional = (
-                income_query.filter(
-                    date=current_date,
-                    booking__isnull=True,
-                ).aggregate(
-                    total=Sum("amount")
-                )["total"]
-                or 0
-            )
-
-            # Minibar revenue
-            day_minibar = (
-                minibar_query.filter(date=current_date).aggregate(total=Sum("total"))["total"] or 0
-            )
-
-            # Expenses
-            day_expenses = (
-                expense_query.filter(date=current_date).aggregate(total=Sum("amount"))["total"] or 0
+            entries_query = entries_query.filter(category_id=category_id)
+        entry_totals = {
+            row["period"]: row
+            for row in entries_query.annotate(period=period)
+            .values("period")
+            .annotate(
+                room_revenue=Sum("amount", filter=Q(entry_type="income", booking__isnull=False)),
+                additional_revenue=Sum(
+                    "amount", filter=Q(entry_type="income", booking__isnull=True)
+                ),
+                total_expenses=Sum("amount", filter=Q(entry_type="expense")),
             )
+            .order_by("period")
+        }
 
-            total_revenue = day_room_revenue + day_additional + day_minibar
-            net_profit = total_revenue - day_expenses
+        # Minibar sales
+        minibar_totals = dict(
+            MinibarSale.objects.filter(date__gte=start_date, date__lte=end_date)
+            .annotate(period=period)
+            .values("period")
+            .annotate(total=Sum("total"))
+            .order_by("period")
+            .values_list("period", "total")
+        )
 
-            daily_data[current_date] = {
-                "date": current_date,
-                "room_revenue": day_room_revenue,
-                "additional_revenue": day_additional,
-                "minibar_revenue": day_minibar,
+        data = []
+        summary = {
+            "room_revenue": 0,
+            "additional_revenue": 0,
+            "minibar_revenue": 0,
+            "total_revenue": 0,
+            "total_expenses": 0,
+            "net_profit": 0,
+        }
+        for period_start in self._period_starts(start_date, end_date, group_by):
+            entry_row = entry_totals.get(period_start, {})
+            room_revenue = entry_row.get("room_revenue") or 0
+            additional_revenue = entry_row.get("additional_revenue") or 0
+            total_expenses = entry_row.get("total_expenses") or 0
+            minibar_revenue = minibar_totals.get(period_start) or 0
+
+            total_revenue = room_revenue + additional_revenue + minibar_revenue
+            net_profit = total_revenue - total_expenses
+
+            row = {
+                "date": period_start,
+                "room_revenue": room_revenue,
+                "additional_revenue": additional_revenue,
+                "minibar_revenue": minibar_revenue,
                 "total_revenue": total_revenue,
-                "total_expenses": day_expenses,
+                "total_expenses": total_expenses,
                 "net_profit": net_profit,
                 "profit_margin": (
                     round((net_profit / total_revenue) * 100, 2) if total_revenue > 0 else 0
                 ),
             }
-            current_date += timedelta(days=1)
+            if group_by == "week":
+                row = {"period": f"Week of {period_start.isoformat()}", **row}
+            elif group_by == "month":
+                row = {"period": period_start.strftime("%Y-%m"), **row}
+            data.append(row)
 
-        # Group data
-        if group_by == "day":
-            data = list(daily_data.values())
-        elif group_by == "week":
-            weekly = defaultdict(
-                lambda: {
-                    "room_revenue": 0,
-                    "additional_revenue": 0,
-                    "minibar_revenue": 0,
-                    "total_expenses": 0,
-                }
-            )
-            for date, day_data in daily_data.items():
-                week_start = date - timedelta(days=date.weekday())
-                weekly[week_start]["room_revenue"] += day_data["room_revenue"]
-                weekly[week_start]["additional_revenue"] += day_data["additional_revenue"]
-                weekly[week_start]["minibar_revenue"] += day_data["minibar_revenue"]
-                weekly[week_start]["total_expenses"] += day_data["total_expenses"]
-
-            data = []
-            for week_start, week_data in sorted(weekly.items()):
-                total_rev = (
-                    week_data["room_revenue"]
-                    + week_data["additional_revenue"]
-                    + week_data["minibar_revenue"]
-                )
-                net = total_rev - week_data["total_expenses"]
-                data.append(
-                    {
-                        "period": f"Week of {week_start.isoformat()}",
-                        "date": week_start,
-                        "room_revenue": week_data["room_revenue"],
-                        "additional_revenue": week_data["additional_revenue"],
-                        "minibar_revenue": week_data["minibar_revenue"],
-                        "total_revenue": total_rev,
-                        "total_expenses": week_data["total_expenses"],
-                        "net_profit": net,
-                        "profit_margin": round((net / total_rev) * 100, 2) if total_rev > 0 else 0,
-                    }
-                )
-        elif group_by == "month":
-            monthly = defaultdict(
-                lambda: {
-                    "room_revenue": 0,
-                    "additional_revenue": 0,
-                    "minibar_revenue": 0,
-                    "total_expenses": 0,
-                }
-            )
-            for date, day_data in daily_data.items():
-                month_key = date.replace(day=1)
-                monthly[month_key]["room_revenue"] += day_data["room_revenue"]
-                monthly[month_key]["additional_revenue"] += day_data["additional_revenue"]
-                monthly[month_key]["minibar_revenue"] += day_data["minibar_revenue"]
-                monthly[month_key]["total_expenses"] += day_data["total_expenses"]
-
-            data = []
-            for month_start, month_data in sorted(monthly.items()):
-                total_rev = (
-                    month_data["room_revenue"]
-                    + month_data["additional_revenue"]
-                    + month_data["minibar_revenue"]
-                )
-                net = total_rev - month_data["total_expenses"]
-                data.append(
-                    {
-                        "period": month_start.strftime("%Y-%m"),
-                        "date": month_start,
-                        "room_revenue": month_data["room_revenue"],
-                        "additional_revenue": month_data["additional_revenue"],
-                        "minibar_revenue": month_data["minibar_revenue"],
-                        "total_revenue": total_rev,
-                        "total_expenses": month_data["total_expenses"],
-                        "net_profit": net,
-                        "profit_margin": round((net / total_rev) * 100, 2) if total_rev > 0 else 0,
-                    }
-                )
+            for key in summary:
+                summary[key] += row[key]
 
-        # Calculate summary
-        summary = {
-            "room_revenue": sum(d["room_revenue"] for d in daily_data.values()),
-            "additional_revenue": sum(d["additional_revenue"] for d in daily_data.values()),
-            "minibar_revenue": sum(d["minibar_revenue"] for d in daily_data.values()),
-            "total_revenue": sum(d["total_revenue"] for d in daily_data.values()),
-            "total_expenses": sum(d["total_expenses"] for d in daily_data.values()),
-            "net_profit": sum(d["net_profit"] for d in daily_data.values()),
-        }
         summary["profit_margin"] = (
             round((summary["net_profit"] / summary["total_revenue"]) * 100, 2)
             if summary["total_revenue"] > 0
@@ -5686,6 +5188,27 @@ class RevenueReportView(APIView):
             }
         )
 
+    @staticmethod
+    def _period_starts(start_date, end_date, group_by):
+        """Yield every day, Monday or first-of-month in the range, so empty periods show as 0."""
+        from datetime import timedelta
+
+        from dateutil.relativedelta import relativedelta
+
+        if group_by == "week":
+            current = start_date - timedelta(days=start_date.weekday())
+            step = timedelta(weeks=1)
+        elif group_by == "month":
+            current = start_date.replace(day=1)
+            step = relativedelta(months=1)
+        else:
+            current = start_date
+            step = timedelta(days=1)
+
+        while current <= end_date:
+            yield current
+            current += step
+
 
 class KPIReportView(APIView):
     """
@@ -5710,7 +5233,7 @@ class KPIReportView(APIView):
     def get(self, request):
         from datetime import timedelta
 
-        from django.db.models import Sum
+        from .stats import hotel_totals
 
         serializer = KPIReportRequestSerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
@@ -5720,63 +5243,17 @@ class KPIReportView(APIView):
         compare_previous = serializer.validated_data.get("compare_previous", True)
 
         def calculate_kpis(start, end):
-            total_days = (end - start).days + 1
-            total_rooms = Room.objects.filter(is_active=True).count()
-            total_room_nights = total_rooms * total_days
+            # Single range scan over the daily fact table
+            totals = hotel_totals(start, end)
+            total_room_nights = totals["total_rooms"]
 
             if total_room_nights == 0:
                 return None
 
-            # Get completed bookings in range
-            bookings = Booking.objects.filter(
-                status__in=["checked_out", "checked_in", "confirmed"],
-                check_in_date__lte=end,
-                check_out_date__gt=start,
-            )
-
-            # Calculate room nights sold
-            room_nights_sold = 0
-            room_revenue = 0
-            for booking in bookings:
-                # Calculate nights within the date range
-                booking_start = max(booking.check_in_date, start)
-                booking_end = min(booking.check_out_date, end + timedelta(days=1))
-                nights = (booking_end - booking_start).days
-                if nights > 0:
-                    room_nights_sold += nights
-                    room_revenue += booking.nightly_rate * nights
-
-            # Get total revenue and expenses from financial entries
-            total_revenue = (
-                FinancialEntry.objects.filter(
-                    entry_type="income",
-                    date__gte=start,
-                    date__lte=end,
-                ).aggregate(total=Sum("amount"))["total"]
-                or 0
-            )
-
-            total_expenses = (
-                FinancialEntry.objects.filter(
-                    entry_type="expense",
-                    date__gte=start,
-                    date__lte=end,
-                ).aggregate(total=Sum("amount"))["total"]
-                or 0
-            )
-
-            # Add minibar revenue
-            minibar_revenue = (
-                MinibarSale.objects.filter(
-                    date__gte=start,
-                    date__lte=end,
-                ).aggregate(
-                    total=Sum("total")
-                )["total"]
-                or 0
-            )
-
-            total_revenue += minibar_revenue
+            room_nights_sold = totals["rooms_sold"]
+            room_revenue = totals["room_revenue"]
+            total_revenue = totals["total_income"] + totals["minibar_revenue"]
+            total_expenses = totals["total_expense"]
 
             # Calculate KPIs
             occupancy_rate = (
@@ -5926,6 +5403,23 @@ class ExpenseReportView(APIView):
         )
 
 
+def _booking_nights():
+    """
+    Sum of booking nights for an aggregate, computed from the stay dates.
+
+    The database returns a duration; read whole nights with `_nights()`.
+    """
+    from django.db.models import DurationField, ExpressionWrapper, F, Sum
+
+    return Sum(
+        ExpressionWrapper(F("check_out_date") - F("check_in_date"), output_field=DurationField())
+    )
+
+
+def _nights(duration):
+    return duration.days if duration else 0
+
+
 class ChannelPerformanceView(APIView):
     """
     Channel (booking source) performance report.
@@ -5953,42 +5447,37 @@ class ChannelPerformanceView(APIView):
         start_date = serializer.validated_data["start_date"]
         end_date = serializer.validated_data["end_date"]
 
-        # Get bookings in range
-        all_bookings = Booking.objects.filter(
-            check_in_date__lte=end_date,
-            check_out_date__gt=start_date,
-        )
-
-        # Group by source
-        source_data = (
-            all_bookings.values("source")
+        # Group bookings in range by source, nights included, in one query
+        source_data = list(
+            Booking.objects.filter(
+                check_in_date__lte=end_date,
+                check_out_date__gt=start_date,
+            )
+            .values("source")
             .annotate(
                 booking_count=Count("id"),
                 total_revenue=Sum("total_amount"),
+                total_nights=_booking_nights(),
                 cancelled_count=Count("id", filter=models.Q(status="cancelled")),
             )
-            .order_by("-total_revenue")
+            .order_by("-total_revenue", "source")
         )
 
         total_revenue = sum(s["total_revenue"] or 0 for s in source_data)
+        source_labels = dict(Booking.Source.choices)
 
         data = []
         for source in source_data:
             source_code = source["source"]
-            source_display = dict(Booking.Source.choices).get(source_code, source_code)
-
-            # Calculate total nights for this source
-            source_bookings = all_bookings.filter(source=source_code)
-            total_nights = sum(b.nights for b in source_bookings)
-
             booking_count = source["booking_count"]
             cancelled_count = source["cancelled_count"]
             revenue = source["total_revenue"] or 0
+            total_nights = _nights(source["total_nights"])
 
             data.append(
                 {
                     "source": source_code,
-                    "source_display": source_display,
+                    "source_display": source_labels.get(source_code, source_code),
                     "booking_count": booking_count,
                     "total_nights": total_nights,
                     "total_revenue": revenue,
@@ -6028,7 +5517,11 @@ class GuestDemographicsView(APIView):
 
     @extend_schema(
         summary="Get guest demographics report",
-        description="Get guest statistics by nationality or other criteria.",
+        description=(
+            "Get guest statistics by nationality, booking source or room type. "
+            "Each row has a `label` plus the key of its grouping (`nationality`, "
+            "`source` or `room_type_id`)."
+        ),
         parameters=[
             OpenApiParameter("start_date", OpenApiTypes.DATE, required=True),
             OpenApiParameter("end_date", OpenApiTypes.DATE, required=True),
@@ -6040,6 +5533,9 @@ class GuestDemographicsView(APIView):
         tags=["Reports"],
     )
     def get(self, request):
+        from django.db.models import Count, Sum, Value
+        from django.db.models.functions import Coalesce, NullIf
+
         serializer = GuestDemographicsRequestSerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
 
@@ -6047,65 +5543,86 @@ class GuestDemographicsView(APIView):
         end_date = serializer.validated_data["end_date"]
         group_by = serializer.validated_data.get("group_by", "nationality")
 
-        # Get bookings in range
         bookings = Booking.objects.filter(
             status__in=["confirmed", "checked_in", "checked_out"],
             check_in_date__lte=end_date,
             check_out_date__gt=start_date,
-        ).select_related("guest", "room__room_type")
-
-        total_revenue = sum(b.total_amount for b in bookings)
-
-        if group_by == "nationality":
-            # Group by guest nationality
-            data_dict = {}
-            for booking in bookings:
-                nationality = booking.guest.nationality or "Unknown"
-                if nationality not in data_dict:
-                    data_dict[nationality] = {
-                        "guest_ids": set(),
-                        "booking_count": 0,
-                        "total_nights": 0,
-                        "total_revenue": 0,
-                    }
-                data_dict[nationality]["guest_ids"].add(booking.guest_id)
-                data_dict[nationality]["booking_count"] += 1
-                data_dict[nationality]["total_nights"] += booking.nights
-                data_dict[nationality]["total_revenue"] += booking.total_amount
-
-            data = []
-            for nationality, stats in sorted(
-                data_dict.items(), key=lambda x: -x[1]["total_revenue"]
-            ):
-                guest_count = len(stats["guest_ids"])
-                data.append(
-                    {
-                        "nationality": nationality,
-                        "guest_count": guest_count,
-                        "booking_count": stats["booking_count"],
-                        "total_nights": stats["total_nights"],
-                        "total_revenue": stats["total_revenue"],
-                        "percentage": (
-                            round((stats["total_revenue"] / total_revenue) * 100, 2)
-                            if total_revenue > 0
-                            else 0
-                        ),
-                        "average_stay": (
-                            round(stats["total_nights"] / stats["booking_count"], 2)
-                            if stats["booking_count"] > 0
-                            else 0
-                        ),
-                    }
-                )
+        )
+
+        summary = bookings.aggregate(
+            total_guests=Count("guest", distinct=True),
+            total_bookings=Count("id"),
+            total_revenue=Sum("total_amount"),
+        )
+        total_revenue = summary["total_revenue"] or 0
+
+        # group_by -> (group columns, row key of the group, label of a group row)
+        if group_by == "source":
+            source_labels = dict(Booking.Source.choices)
+            group_fields = ["source"]
+            group_key = "source"
+
+            def label(row):
+                return source_labels.get(row["source"], row["source"])
+
+        elif group_by == "room_type":
+            group_fields = ["room__room_type_id", "room__room_type__name"]
+            group_key = "room_type_id"
+
+            def label(row):
+                return row["room__room_type__name"]
+
         else:
-            # Default to nationality grouping
-            data = []
+            bookings = bookings.annotate(
+                group_nationality=Coalesce(
+                    NullIf("guest__nationality", Value("")), Value("Unknown")
+                )
+            )
+            group_fields = ["group_nationality"]
+            group_key = "nationality"
+
+            def label(row):
+                return row["group_nationality"]
+
+        groups = (
+            bookings.values(*group_fields)
+            .annotate(
+                guest_count=Count("guest", distinct=True),
+                booking_count=Count("id"),
+                total_nights=_booking_nights(),
+                group_revenue=Sum("total_amount"),
+            )
+            .order_by("-group_revenue", *group_fields)
+        )
+
+        data = []
+        for row in groups:
+            revenue = row["group_revenue"] or 0
+            total_nights = _nights(row["total_nights"])
+            data.append(
+                {
+                    group_key: row[group_fields[0]],
+                    "label": label(row),
+                    "guest_count": row["guest_count"],
+                    "booking_count": row["booking_count"],
+                    "total_nights": total_nights,
+                    "total_revenue": revenue,
+                    "percentage": (
+                        round((revenue / total_revenue) * 100, 2) if total_revenue > 0 else 0
+                    ),
+                    "average_stay": (
+                        round(total_nights / row["booking_count"], 2)
+                        if row["booking_count"] > 0
+                        else 0
+                    ),
+                }
+            )
 
         return Response(
             {
                 "summary": {
-                    "total_guests": len(set(b.guest_id for b in bookings)),
-                    "total_bookings": bookings.count(),
+                    "total_guests": summary["total_guests"],
+                    "total_bookings": summary["total_bookings"],
                     "total_revenue": total_revenue,
                 },
                 "data": data,
@@ -6141,10 +5658,10 @@ class ComparativeReportView(APIView):
     def get(self, request):
         from datetime import timedelta
 
-        from django.db.models import Sum
-
         from dateutil.relativedelta import relativedelta
 
+        from .stats import hotel_totals
+
         serializer = ComparativeReportRequestSerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
 
@@ -6165,39 +5682,20 @@ class ComparativeReportView(APIView):
             previous_end = serializer.validated_data.get("previous_end")
 
         def get_metrics(start, end):
-            total_rooms = Room.objects.filter(is_active=True).count()
-            total_days = (end - start).days + 1
-            total_room_nights = total_rooms * total_days
-
-            # Revenue
-            revenue = (
-                FinancialEntry.objects.filter(
-                    entry_type="income",
-                    date__gte=start,
-                    date__lte=end,
-                ).aggregate(total=Sum("amount"))["total"]
-                or 0
-            )
-
-            # Expenses
-            expenses = (
-                FinancialEntry.objects.filter(
-                    entry_type="expense",
-                    date__gte=start,
-                    date__lte=end,
-                ).aggregate(total=Sum("amount"))["total"]
-                or 0
-            )
-
-            # Bookings
-            bookings = Booking.objects.filter(
+            totals = hotel_totals(start, end)
+            total_room_nights = totals["total_rooms"]
+            revenue = totals["total_income"]
+            expenses = totals["total_expense"]
+            # Nights inside the period at the nightly rate, as in KPIReportView:
+            # surcharges, discounts and early/late fees are not room revenue
+            room_nights_sold = totals["rooms_sold"]
+            room_revenue = totals["room_revenue"]
+
+            booking_count = Booking.objects.filter(
                 status__in=["confirmed", "checked_in", "checked_out"],
                 check_in_date__lte=end,
                 check_out_date__gt=start,
-            )
-            booking_count = bookings.count()
-            room_nights_sold = sum(b.nights for b in bookings)
-            room_revenue = sum(b.total_amount for b in bookings)
+            ).count()
 
             # Occupancy
             occupancy = (room_nights_sold / total_room_nights) * 100 if total_room_nights > 0 else 0
@@ -6284,9 +5782,17 @@ class ExportReportView(APIView):
 
     permission_classes = [IsAuthenticated, IsOwnerOrManager]
 
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= names the file format here, not a DRF renderer; without force
+        # DRF answers 404 for format=csv/xlsx.
+        return super().perform_content_negotiation(request, force=True)
+
     @extend_schema(
         summary="Export report to file",
-        description="Export report data to Excel or CSV format.",
+        description=(
+            "Export report data to Excel or CSV format. With mode=async an export "
+            "job is queued instead (202); poll /export-jobs/{id}/ for the download URL."
+        ),
         parameters=[
             OpenApiParameter(
                 "report_type",
@@ -6297,200 +5803,134 @@ class ExportReportView(APIView):
             OpenApiParameter("start_date", OpenApiTypes.DATE, required=True),
             OpenApiParameter("end_date", OpenApiTypes.DATE, required=True),
             OpenApiParameter("format", OpenApiTypes.STR, enum=["xlsx", "csv"]),
+            EXPORT_MODE_PARAMETER,
         ],
-        responses={200: OpenApiResponse(description="File download")},
+        responses={
+            200: OpenApiResponse(description="File download"),
+            202: ExportJobSerializer,
+        },
         tags=["Reports"],
     )
     def get(self, request):
-        import csv
-        import io
-
-        from django.http import HttpResponse
+        from hotel_api.exports import REPORTS
 
         serializer = ExportReportRequestSerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
 
-        report_type = serializer.validated_data["report_type"]
-        start_date = serializer.validated_data["start_date"]
-        end_date = serializer.validated_data["end_date"]
-        export_format = serializer.validated_data.get("format", "xlsx")
-
-        # Get report data based on type
-        if report_type == "occupancy":
-            view = OccupancyReportView()
-            view.request = request
-            response_data = view.get(request).data
-            data = response_data.get("data", [])
-            headers = ["Date", "Total Rooms", "Occupied", "Available", "Occupancy %", "Revenue"]
-            rows = [
-                [
-                    d.get("date") or d.get("period"),
-                    d["total_rooms"],
-                    d["occupied_rooms"],
-                    d["available_rooms"],
-                    d["occupancy_rate"],
-                    d["revenue"],
-                ]
-                for d in data
-            ]
-        elif report_type == "revenue":
-            view = RevenueReportView()
-            view.request = request
-            response_data = view.get(request).data
-            data = response_data.get("data", [])
-            headers = [
-                "Date",
-                "Room Revenue",
-                "Additional",
-                "Minibar",
-                "Total Revenue",
-                "Expenses",
-                "Net Profit",
-                "Margin %",
-            ]
-            rows = [
-                [
-                    d.get("date") or d.get("period"),
-                    d["room_revenue"],
-                    d["additional_revenue"],
-                    d["minibar_revenue"],
-                    d["total_revenue"],
-                    d["total_expenses"],
-                    d["net_profit"],
-                    d["profit_margin"],
-                ]
-                for d in data
-            ]
-        elif report_type == "expenses":
-            view = ExpenseReportView()
-            view.request = request
-            response_data = view.get(request).data
-            data = response_data.get("data", [])
-            headers = ["Category", "Amount", "Transactions", "Percentage"]
-            rows = [
-                [
-                    d["category_name"],
-                    d["total_amount"],
-                    d["transaction_count"],
-                    d["percentage"],
-                ]
-                for d in data
-            ]
-        elif report_type == "channels":
-            view = ChannelPerformanceView()
-            view.request = request
-            response_data = view.get(request).data
-            data = response_data.get("data", [])
-            headers = [
-                "Channel",
-                "Bookings",
-                "Nights",
-                "Revenue",
-                "Avg Rate",
-                "Cancellations",
-                "Cancel %",
-                "Revenue %",
-            ]
-            rows = [
-                [
-                    d["source_display"],
-                    d["booking_count"],
-                    d["total_nights"],
-                    d["total_revenue"],
-                    d["average_rate"],
-                    d["cancellation_count"],
-                    d["cancellation_rate"],
-                    d["percentage_of_revenue"],
-                ]
-                for d in data
-            ]
-        elif report_type == "demographics":
-            view = GuestDemographicsView()
-            view.request = request
-            response_data = view.get(request).data
-            data = response_data.get("data", [])
-            headers = [
-                "Nationality",
-                "Guests",
-                "Bookings",
-                "Nights",
-                "Revenue",
-                "Percentage",
-                "Avg Stay",
-            ]
-            rows = [
-                [
-                    d["nationality"],
-                    d["guest_count"],
-                    d["booking_count"],
-                    d["total_nights"],
-                    d["total_revenue"],
-                    d["percentage"],
-                    d["average_stay"],
-                ]
-                for d in data
-            ]
-        else:
+        if serializer.validated_data["report_type"] not in REPORTS:
             return Response({"detail": "Invalid report type"}, status=400)
 
-        # Generate file
-        if export_format == "csv":
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow(headers)
-            writer.writerows(rows)
+        return export_or_queue(
+            request, "report", file_format=serializer.validated_data.get("format", "xlsx")
+        )
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="List export jobs",
+        description="Background export jobs requested by the current user.",
+        tags=["Reports"],
+    ),
+    retrieve=extend_schema(
+        summary="Get export job",
+        description="Poll an export job; download_url is set once it is done.",
+        tags=["Reports"],
+    ),
+)
+class ExportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Background export jobs (mode=async on the export endpoints)."""
+
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return ExportJob.objects.none()
+        return ExportJob.objects.filter(created_by=self.request.user)
+
+    @extend_schema(
+        summary="Download export file",
+        responses={200: OpenApiResponse(description="File download")},
+        tags=["Reports"],
+    )
+    @action(detail=True, methods=["get"], url_path="download")
+    def download(self, request, pk=None):
+        """Stream the finished export file from private export storage."""
+        import os
+
+        from django.http import FileResponse
 
-            response = HttpResponse(output.getvalue(), content_type="text/csv")
-            response["Content-Disposition"] = (
-                f'attachment; filename="{report_type}_report_{start_date}_{end_date}.csv"'
+        job = self.get_object()
+        if job.status != ExportJob.Status.DONE or not job.file:
+            return Response(
+                {"detail": "Tệp xuất chưa sẵn sàng."},
+                status=status.HTTP_409_CONFLICT,
             )
-            return response
-        else:  # xlsx
-            try:
-                import openpyxl
-                from openpyxl.utils import get_column_letter
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename=job.filename or os.path.basename(job.file.name),
+        )
+
 
-                wb = openpyxl.Workbook()
-                ws = wb.active
-                ws.title = report_type.title()
+@extend_schema_view(
+    list=extend_schema(
+        summary="List report jobs",
+        description="Background report jobs, newest first.",
+        tags=["Reports"],
+    ),
+    retrieve=extend_schema(
+        summary="Get report job",
+        description="Poll a report job; result is set once status is done.",
+        tags=["Reports"],
+    ),
+)
+class ReportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Reports computed by a Celery worker (see hotel_api/report_jobs.py).
 
-                # Headers
-                for col, header in enumerate(headers, 1):
-                    ws.cell(row=1, column=col, value=header)
+    Reports are hotel-wide, so jobs are visible to every owner/manager and an
+    identical fresh job is reused whoever submitted it.
+    """
 
-                # Data
-                for row_idx, row in enumerate(rows, 2):
-                    for col_idx, value in enumerate(row, 1):
-                        ws.cell(row=row_idx, column=col_idx, value=value)
+    queryset = ReportJob.objects.all()
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsAuthenticated, IsOwnerOrManager]
 
-                # Auto-width columns
-                for col_idx in range(1, len(headers) + 1):
-                    ws.column_dimensions[get_column_letter(col_idx)].width = 15
+    @extend_schema(
+        summary="Submit report job",
+        description=(
+            "Compute a report in the background. params are the query parameters of "
+            "the report endpoint. Returns 200 with the stored result when an "
+            "identical report finished within the freshness window, otherwise 202; "
+            "poll the job or wait for the push notification."
+        ),
+        request=ReportJobCreateSerializer,
+        responses={200: ReportJobSerializer, 202: ReportJobSerializer},
+        tags=["Reports"],
+    )
+    def create(self, request):
+        from hotel_api import report_jobs
 
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
+        serializer = ReportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-                response = HttpResponse(
-                    output.getvalue(),
-                    content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                )
-                response["Content-Disposition"] = (
-                    f'attachment; filename="{report_type}_report_{start_date}_{end_date}.xlsx"'
-                )
-                return response
-            except ImportError:
-                # Fallback to CSV if openpyxl not installed
-                output = io.StringIO()
-                writer = csv.writer(output)
-                writer.writerow(headers)
-                writer.writerows(rows)
-
-                response = HttpResponse(output.getvalue(), content_type="text/csv")
-                response["Content-Disposition"] = (
-                    f'attachment; filename="{report_type}_report_{start_date}_{end_date}.csv"'
-                )
-                return response
+        job, created = report_jobs.submit(
+            request.user,
+            serializer.validated_data["report_type"],
+            serializer.validated_data["params"],
+        )
+        response = Response(
+            ReportJobSerializer(job).data,
+            status=(
+                status.HTTP_200_OK
+                if job.status == ReportJob.Status.DONE
+                else status.HTTP_202_ACCEPTED
+            ),
+        )
+        response["X-Cache"] = "MISS" if created else "HIT"
+        return response
 
 
 # ============================================================
@@ -7707,10 +7147,13 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
 
     permission_classes = [IsAuthenticated]
     serializer_class = NotificationSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Return notifications for the authenticated user."""
-        return Notification.objects.filter(recipient=self.request.user).order_by("-created_at")
+        return Notification.objects.filter(recipient=self.request.user).order_by(
+            "-created_at", "-id"
+        )
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -7941,6 +7384,7 @@ class GuestMessageViewSet(viewsets.ReadOnlyModelViewSet):
 
     permission_classes = [IsAuthenticated]
     serializer_class = GuestMessageSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         qs = GuestMessage.objects.select_related(
@@ -8114,7 +7558,8 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = AuditLogSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrManager]
-    ordering = ["-created_at"]
+    pagination_class = KeysetPagination
+    ordering = ["-created_at", "-id"]
 
     def get_queryset(self):
         """Get queryset with optional filtering."""
@@ -8134,8 +7579,9 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
 
         queryset = queryset.order_by(*self.ordering)
 
+        # Keyset pages filter the queryset, which a slice would forbid
         limit = self.request.query_params.get("limit")
-        if limit:
+        if limit and KeysetPagination.cursor_query_param not in self.request.query_params:
             try:
                 queryset = queryset[: int(limit)]
             except (ValueError, TypeError):